@@ -0,0 +1,76 @@
+# benchmarks/bench_image_links.py
+"""图片链接重写的基准测试
+
+构造包含 N 个图片链接的合成 Markdown 和 N 张备用图片，测量
+ConversionEngine._update_markdown_image_links 的耗时。
+每张图片的平均耗时在不同规模下应保持基本不变（线性复杂度）。
+
+分两种情况：hit 为每个链接都能按页码找到同页图片；miss 为链接所在页没有备用图片，
+依次查同名、同主干名、部分匹配索引后退回第一张未使用的图片。
+
+用法: python benchmarks/bench_image_links.py [--sizes 500 1000 2000 4000 8000]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf2md.engine import ConversionEngine
+
+
+def build_document(num_images: int, lines_per_image: int = 5, miss: bool = False):
+    """生成合成文档：每页一张图片，图片之间穿插普通段落
+
+    miss 为 True 时链接指向没有备用图片的页码。
+    """
+    lines = ["# 合成文档", ""]
+    fallback_images = []
+    for i in range(num_images):
+        page = i + 1
+        lines.append(f"## 第 {page} 节")
+        for j in range(lines_per_image):
+            lines.append(f"这是第 {page} 页的第 {j + 1} 段正文，用于模拟真实文档的长度。")
+        # Marker 的图片名页码从0开始
+        link_page = page - 1 + num_images if miss else page - 1
+        lines.append(f"![](_page_{link_page}_Picture_0.jpeg)")
+        lines.append("")
+        fallback_images.append(f"page_{page:03d}_img_01_{i:08x}.png")
+    return "\n".join(lines), fallback_images
+
+
+def time_rewrite(engine: ConversionEngine, num_images: int, repeat: int, miss: bool = False) -> float:
+    markdown, fallback_images = build_document(num_images, miss=miss)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine._update_markdown_image_links(markdown, list(fallback_images), "doc")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="图片链接重写基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 4000, 8000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engine = ConversionEngine(os.getcwd(), {}, False, {})
+    for case, miss in (("hit", False), ("miss", True)):
+        print(f"\n[{case}]")
+        print(f"{'图片数':>8} {'耗时(ms)':>10} {'每张(us)':>10}")
+        per_image = []
+        for size in args.sizes:
+            elapsed = time_rewrite(engine, size, args.repeat, miss)
+            per_image.append(elapsed / size)
+            print(f"{size:>8} {elapsed * 1000:>10.2f} {elapsed / size * 1e6:>10.2f}")
+
+        growth = per_image[-1] / per_image[0]
+        print(f"最大/最小规模的单张耗时比: {growth:.2f} (线性复杂度应接近 1，平方复杂度会随规模成倍增长)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+# benchmarks/bench_image_placement.py
+"""未引用图片插入的基准测试
+
+构造 N 行的合成 Markdown（含标题、代码块和"第 N 页"提示）和若干张未被引用的图片，
+测量 ConversionEngine._handle_unused_images 的耗时。目标：5000 行、数百张图片在 1 秒以内。
+
+用法: python benchmarks/bench_image_placement.py [--lines 5000] [--images 100 300 500]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf2md.engine import ConversionEngine
+
+
+def build_document(num_lines: int, num_pages: int) -> str:
+    lines = []
+    lines_per_page = max(1, num_lines // num_pages)
+    for i in range(num_lines):
+        page = i // lines_per_page + 1
+        if i % lines_per_page == 0:
+            lines.append(f"## 第 {page} 页")
+        elif i % 97 == 0:
+            lines.append("```")
+        elif i % 13 == 0:
+            lines.append(f"参见 page {page + 1} 的图表。")
+        else:
+            lines.append(f"第 {i} 行普通正文内容。")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="未引用图片插入基准测试")
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--images", type=int, nargs="+", default=[100, 300, 500])
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    engine = ConversionEngine(os.getcwd(), {}, False, {})
+    markdown = build_document(args.lines, args.pages)
+    print(f"文档行数: {args.lines}, 页数: {args.pages}")
+    print(f"{'图片数':>8} {'耗时(ms)':>10}")
+    for count in args.images:
+        images = [f"page_{i % args.pages + 1:03d}_img_{i // args.pages + 1:02d}_{i:08x}.png" for i in range(count)]
+        start = time.perf_counter()
+        engine._handle_unused_images(markdown, images, "doc")
+        print(f"{count:>8} {(time.perf_counter() - start) * 1000:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# benchmarks/bench_suite.py
+"""可复现的基准测试套件
+
+先用 benchmarks/corpus.py 生成合成 PDF 语料（同样的 --scale / --seed 每次内容相同，生成后复用），
+再对每个文件分别测量以下用例，每个 用例 x 文件 在独立的子进程中运行，以得到各自的内存峰值：
+
+    validate   _validate_pdf（开启自动分诊，逐页统计文字层和图片）
+    extract    _extract_images_with_pymupdf（备用图片提取、去重和阅读顺序锚点）
+    links      _update_markdown_image_links（Marker 风格的 Markdown，一半图片有链接，其余按位置插入）
+    placement  _handle_unused_images（所有备用图片都未被引用，全部按真实页面位置插入）
+    engine     ConversionEngine.convert_file 完整转换（需要安装 Marker，使用 --engine 开启；模型加载不计时）
+
+报告每个用例的耗时（多次运行取最快）、页/秒、图片/秒和进程内存峰值，并与保存的基线对比，
+耗时或内存超过基线 (1 + 容差) 倍时记为退化，退出码为 1。
+
+用法:
+    python benchmarks/bench_suite.py                      # 运行并与 benchmarks/baseline.json 对比
+    python benchmarks/bench_suite.py --save-baseline      # 运行并把结果保存为新的基线
+    python benchmarks/bench_suite.py --scale 0.25 --cases extract links --kinds logos huge
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import datetime
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import CORPUS_PAGES, generate_corpus, corpus_pages
+
+CASES = ('validate', 'extract', 'links', 'placement', 'engine')
+DEFAULT_CASES = ('validate', 'extract', 'links', 'placement')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+# 对比时另加的固定余量，避免毫秒级用例和小进程上的正常波动被判为退化
+TIME_SLACK_SECONDS = 0.005
+RSS_SLACK_MB = 16
+PAGE_MARKER = "-" * 48
+
+
+def synthetic_markdown(pdf_path: str, link_every: int = 2) -> str:
+    """按 PDF 的文字层生成 Marker 风格的 Markdown
+
+    每页以 Marker 的分页标记开头，文字块作为段落；每页每 link_every 张图片中的第一张
+    写成 Marker 的图片链接 (_page_{页面ID}_Picture_{k}.jpeg)，link_every 为 0 时不写链接。
+    """
+    import fitz
+
+    parts = []
+    with fitz.open(pdf_path) as doc:
+        for page_index, page in enumerate(doc):
+            parts.append(f"{{{page_index}}}{PAGE_MARKER}\n")
+            for block in page.get_text("blocks", sort=True):
+                if block[6] == 0 and block[4].strip():
+                    parts.append(block[4].strip().replace("\n", " ") + "\n")
+            if link_every:
+                for k in range(0, len(page.get_images()), link_every):
+                    parts.append(f"![](_page_{page_index}_Picture_{k}.jpeg)\n")
+    return "\n".join(parts)
+
+
+def _new_engine(output_dir: str, config: Optional[Dict] = None, use_fallback_extraction: bool = False):
+    from pdf2md.engine import ConversionEngine
+    return ConversionEngine(output_dir, config or {}, False, {}, use_fallback_extraction)
+
+
+def _timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _fresh_dir(path: str) -> str:
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
+
+
+def run_case(case: str, pdf_path: str, pages: int, image_refs: int, repeat: int) -> Dict:
+    """在当前进程中运行一个用例，返回 {seconds, pages, images, peak_rss_mb} 或 {skipped}"""
+    from pdf2md.memory import peak_rss
+
+    work_dir = tempfile.mkdtemp(prefix="pdf2md_bench_")
+    images_dir = os.path.join(work_dir, "images")
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    try:
+        if case == 'validate':
+            engine = _new_engine(work_dir, {'auto_triage': True})
+            seconds = _timed(lambda: engine._validate_pdf(pdf_path), repeat)
+            images = image_refs
+
+        elif case == 'extract':
+            engine = _new_engine(work_dir)
+            seconds = _timed(lambda: engine._extract_images_with_pymupdf(pdf_path, _fresh_dir(images_dir)), repeat)
+            images = sum(len(occurrences) for occurrences in engine.fallback_image_occurrences.values())
+
+        elif case in ('links', 'placement'):
+            if not image_refs:
+                return {'skipped': "文档中没有图片"}
+            engine = _new_engine(work_dir)
+            image_files = engine._extract_images_with_pymupdf(pdf_path, _fresh_dir(images_dir))
+            engine.conversion_stats['total_pages'] = pages
+            if case == 'links':
+                markdown = synthetic_markdown(pdf_path)
+                seconds = _timed(lambda: engine._update_markdown_image_links(markdown, list(image_files), stem), repeat)
+            else:
+                markdown = synthetic_markdown(pdf_path, link_every=0)
+                seconds = _timed(lambda: engine._handle_unused_images(markdown, list(image_files), stem), repeat)
+            images = len(image_files)
+
+        elif case == 'engine':
+            from pdf2md.engine import MARKER_AVAILABLE, MARKER_IMPORT_ERROR
+            if not MARKER_AVAILABLE:
+                return {'skipped': f"Marker 不可用: {MARKER_IMPORT_ERROR or '未安装'}"}
+            engine = _new_engine(work_dir, {'output_format': 'markdown'}, use_fallback_extraction=True)
+            engine.load_models()
+            summaries = []
+
+            def convert():
+                summaries.append(engine.convert_file(pdf_path))
+
+            seconds = _timed(convert, repeat)
+            engine.close()
+            if not summaries[-1]['success']:
+                return {'skipped': f"转换失败: {summaries[-1]['error']}"}
+            images = summaries[-1]['images']
+
+        else:
+            raise ValueError(f"未知的用例: {case}")
+
+        peak = peak_rss()
+        return {
+            'seconds': round(seconds, 6),
+            'pages': pages,
+            'images': images,
+            'peak_rss_mb': round(peak / (1024 * 1024), 1) if peak is not None else None,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_isolated(case: str, pdf_path: str, pages: int, image_refs: int, repeat: int) -> Dict:
+    """在新的子进程中运行用例，使内存峰值只反映该用例"""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_case, (case, pdf_path, pages, image_refs, repeat))
+
+
+def prepare_corpus(corpus_dir: str, scale: float, seed: int, kinds: List[str], regenerate: bool):
+    """生成语料；目录中已有完整的同参数语料时直接复用"""
+    manifest_path = os.path.join(corpus_dir, "manifest.json")
+    expected = {'scale': scale, 'seed': seed, 'pages': corpus_pages(scale)}
+    if not regenerate and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if {key: manifest.get(key) for key in expected} == expected and all(
+                os.path.exists(item['path']) for item in manifest['files']):
+            return [item for item in manifest['files'] if item['kind'] in kinds]
+
+    print(f"正在生成合成语料到 {corpus_dir} ...")
+    files = [item._asdict() for item in generate_corpus(corpus_dir, scale, seed)]
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(expected, files=files), f, ensure_ascii=False, indent=2)
+    return [item for item in files if item['kind'] in kinds]
+
+
+def compare(results: Dict[str, Dict], baseline: Dict, tolerance: float) -> Tuple[Dict[str, str], List[str]]:
+    """与基线对比，返回 (每个用例的对比说明, 退化列表)"""
+    notes, regressions = {}, []
+    for key, result in results.items():
+        base = baseline.get('results', {}).get(key)
+        if not base or 'seconds' not in result or 'seconds' not in base:
+            continue
+        ratio = result['seconds'] / base['seconds'] if base['seconds'] > 0 else 1.0
+        note = f"{(ratio - 1) * 100:+.0f}%"
+        if result['seconds'] > base['seconds'] * (1 + tolerance) + TIME_SLACK_SECONDS:
+            regressions.append(f"{key}: 耗时 {base['seconds'] * 1000:.1f} -> {result['seconds'] * 1000:.1f} ms")
+            note += " 退化"
+        if result.get('peak_rss_mb') and base.get('peak_rss_mb'):
+            if result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance) + RSS_SLACK_MB:
+                regressions.append(f"{key}: 内存峰值 {base['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+                note += " 内存退化"
+        notes[key] = note
+    return notes, regressions
+
+
+def _rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:.1f}" if seconds > 0 and count else "-"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="pdf2md 基准测试套件")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(DEFAULT_CASES))
+    parser.add_argument("--engine", action="store_true", help="同时运行完整转换用例（需要 Marker 和模型）")
+    parser.add_argument("--kinds", nargs="+", choices=list(CORPUS_PAGES), default=list(CORPUS_PAGES))
+    parser.add_argument("--scale", type=float, default=1.0, help="语料页数缩放比例")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数，取最快一次")
+    parser.add_argument("--corpus-dir", default=None, help="语料目录，默认在系统临时目录中")
+    parser.add_argument("--regenerate", action="store_true", help="重新生成语料")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的退化比例")
+    parser.add_argument("--json", dest="json_path", default=None, help="把本次结果另存为 JSON")
+    args = parser.parse_args(argv)
+
+    cases = list(args.cases)
+    if args.engine and 'engine' not in cases:
+        cases.append('engine')
+    corpus_dir = args.corpus_dir or os.path.join(
+        tempfile.gettempdir(), "pdf2md_bench_corpus", f"scale{args.scale:g}_seed{args.seed}")
+    files = prepare_corpus(corpus_dir, args.scale, args.seed, args.kinds, args.regenerate)
+
+    results: Dict[str, Dict] = {}
+    for item in files:
+        for case in cases:
+            key = f"{case}/{item['kind']}"
+            results[key] = run_isolated(case, item['path'], item['pages'], item['image_refs'], args.repeat)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale or baseline.get('seed') != args.seed:
+            print(f"基线的语料参数 (scale={baseline.get('scale')}, seed={baseline.get('seed')}) 与本次不同，跳过对比")
+            baseline = None
+    notes, regressions = compare(results, baseline, args.tolerance) if baseline else ({}, [])
+
+    print(f"\n{'用例':<22} {'页数':>6} {'图片':>6} {'耗时(ms)':>10} {'页/秒':>10} {'图片/秒':>10} "
+          f"{'内存峰值(MB)':>12}  对比基线")
+    for key, result in results.items():
+        if 'skipped' in result:
+            print(f"{key:<22} 跳过: {result['skipped']}")
+            continue
+        seconds = result['seconds']
+        peak = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else "-"
+        print(f"{key:<22} {result['pages']:>6} {result['images']:>6} {seconds * 1000:>10.1f} "
+              f"{_rate(result['pages'], seconds):>10} {_rate(result['images'], seconds):>10} "
+              f"{peak:>12}  {notes.get(key, '')}")
+
+    report = {
+        'generated': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': f"{platform.system()} {platform.machine()} / Python {platform.python_version()}",
+        'scale': args.scale,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        if args.baseline == DEFAULT_BASELINE and baseline is None and os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            # 只运行了部分用例时保留基线中的其他结果
+            if previous.get('scale') == args.scale and previous.get('seed') == args.seed:
+                report['results'] = dict(previous.get('results', {}), **results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存到: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("\n没有可对比的基线（使用 --save-baseline 保存）")
+        return 0
+    if regressions:
+        print(f"\n发现 {len(regressions)} 项退化 (容差 {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"\n与基线相比没有超过 {args.tolerance:.0%} 的退化 (基线: {baseline.get('machine')}, {baseline.get('generated')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
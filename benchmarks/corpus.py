@@ -0,0 +1,278 @@
+# benchmarks/corpus.py
+"""基准测试用的合成 PDF 语料生成器
+
+用 PyMuPDF 按固定随机种子生成以下几类文档，同样的参数每次生成的文件内容相同
+（固定元数据与文件 ID），便于不同版本之间对比：
+
+    text_only    纯文字，每页标题 + 若干段落
+    image_heavy  图文混排，每页多张互不相同的插图
+    scanned      扫描件风格：每页一张整页灰度 JPEG，没有文字层
+    huge         页数很多的文字文档，偶尔有插图
+    logos        每页重复出现的页眉 Logo（共用同一 xref）和水印（内容相同、各自独立的图片流）
+    tables       文字 + 每页一张带表格线的表格，没有图片
+
+用法: python benchmarks/corpus.py [输出目录] [--scale 0.25] [--seed 0]
+"""
+
+import os
+import sys
+import zlib
+import random
+import struct
+import argparse
+from collections import namedtuple
+from typing import Dict, List
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    import fitz  # PyMuPDF
+
+# kind: 文档类型；pages: 页数；image_refs: 图片出现次数；unique_images: 不同图片的数量
+CorpusFile = namedtuple("CorpusFile", "kind path pages image_refs unique_images")
+
+# 各类文档在 scale=1 时的页数
+CORPUS_PAGES = {
+    'text_only': 50,
+    'image_heavy': 40,
+    'scanned': 20,
+    'huge': 2000,
+    'logos': 100,
+    'tables': 20,
+}
+IMAGES_PER_PAGE = 6
+HUGE_IMAGE_EVERY = 50
+LOGO_FIGURE_EVERY = 10
+TABLE_ROWS, TABLE_COLUMNS = 6, 4
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4, pt
+MARGIN = 56
+FIXED_METADATA = {
+    'title': 'pdf2md synthetic benchmark',
+    'author': 'pdf2md',
+    'creator': 'benchmarks/corpus.py',
+    'producer': 'PyMuPDF',
+    'creationDate': "D:20250101000000+00'00'",
+    'modDate': "D:20250101000000+00'00'",
+}
+
+_WORDS = (
+    "layout", "marker", "document", "section", "figure", "table", "result", "method", "analysis", "model",
+    "sample", "value", "image", "page", "text", "block", "reading", "order", "equation", "reference",
+    "data", "system", "process", "output", "input", "batch", "cache", "memory", "worker", "render",
+)
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _write_text_page(page, rng: random.Random, page_num: int, paragraphs: int, top: float = MARGIN) -> float:
+    """写入标题和段落，返回已用到的纵坐标"""
+    y = top + 20
+    page.insert_text((MARGIN, y), f"Section {page_num}: {_sentence(rng, 3)[:-1]}", fontsize=16)
+    y += 28
+    for _ in range(paragraphs):
+        if y > PAGE_HEIGHT - MARGIN - 60:
+            break
+        box = fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 60)
+        page.insert_textbox(box, " ".join(_sentence(rng, rng.randint(8, 14)) for _ in range(3)), fontsize=10)
+        y += 68
+    if page_num > 1:
+        page.insert_text((MARGIN, PAGE_HEIGHT - MARGIN / 2), f"See page {page_num - 1} for details.", fontsize=8)
+    return y
+
+
+def _pattern_image(rng: random.Random, width: int, height: int, cells: int = 8) -> bytes:
+    """生成由随机色块组成的 PNG（每次调用内容不同，取决于 rng 状态）"""
+    cell_w, cell_h = width // cells, height // cells
+    rows = []
+    for _ in range(cells):
+        line = b"".join(bytes((rng.randrange(256), rng.randrange(256), rng.randrange(256))) * cell_w
+                        for _ in range(cells))
+        rows.append(line * cell_h)
+    pix = fitz.Pixmap(fitz.csRGB, cell_w * cells, cell_h * cells, b"".join(rows), False)
+    return pix.tobytes("png")
+
+
+def _tag_png(png: bytes, text: str) -> bytes:
+    """在 PNG 的 IHDR 之后插入一个 tEXt 块：像素不变，但字节不同，PyMuPDF 不会把它当作同一张图片复用"""
+    data = b"Comment\x00" + text.encode("ascii")
+    chunk = struct.pack(">I", len(data)) + b"tEXt" + data + struct.pack(">I", zlib.crc32(b"tEXt" + data))
+    ihdr_end = 8 + 25  # 文件签名 + IHDR 块
+    return png[:ihdr_end] + chunk + png[ihdr_end:]
+
+
+def _scanned_image(rng: random.Random, width: int, height: int) -> bytes:
+    """生成扫描件风格的整页灰度 JPEG：白底上排列着代表文字的深色横条"""
+    paper = rng.randint(235, 250)
+    blank_row = bytes((paper,)) * width
+    line_height = max(4, height // 60)
+    margin = width // 10
+    rows = [blank_row] * margin
+    while len(rows) < height - margin - line_height:
+        row = bytearray(blank_row)
+        x = margin
+        while x < width - margin:
+            end = min(x + rng.randint(width // 40, width // 12), width - margin)
+            row[x:end] = bytes((rng.randint(20, 70),)) * (end - x)
+            x = end + width // 80
+        rows.extend([bytes(row)] * (line_height // 2))
+        rows.extend([blank_row] * (line_height - line_height // 2))
+    rows.extend([blank_row] * (height - len(rows)))
+    pix = fitz.Pixmap(fitz.csGRAY, width, height, b"".join(rows), False)
+    return pix.tobytes("jpeg", jpg_quality=75)
+
+
+def _new_document():
+    doc = fitz.open()
+    doc.set_metadata(FIXED_METADATA)
+    return doc
+
+
+def _save(doc, path: str):
+    # no_new_id: 不写入随机文件 ID，保证同样的输入生成完全相同的文件；
+    # garbage=1 只清理无用对象，不合并重复的图片流（logos 的水印需要保持各自独立）
+    doc.save(path, garbage=1, deflate=True, no_new_id=True)
+    doc.close()
+
+
+def make_text_only(path: str, pages: int, rng: random.Random) -> CorpusFile:
+    doc = _new_document()
+    for page_num in range(1, pages + 1):
+        _write_text_page(doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT), rng, page_num, paragraphs=8)
+    _save(doc, path)
+    return CorpusFile('text_only', path, pages, 0, 0)
+
+
+def make_image_heavy(path: str, pages: int, rng: random.Random) -> CorpusFile:
+    doc = _new_document()
+    columns = 2
+    cell_w = (PAGE_WIDTH - 2 * MARGIN) / columns
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = _write_text_page(page, rng, page_num, paragraphs=1)
+        cell_h = (PAGE_HEIGHT - MARGIN - y) / (IMAGES_PER_PAGE // columns)
+        for k in range(IMAGES_PER_PAGE):
+            row, col = divmod(k, columns)
+            top = y + row * cell_h
+            page.insert_text((MARGIN + col * cell_w, top + 10), f"Figure {page_num}.{k + 1}", fontsize=8)
+            rect = fitz.Rect(MARGIN + col * cell_w, top + 14, MARGIN + (col + 1) * cell_w - 8, top + cell_h - 6)
+            page.insert_image(rect, stream=_pattern_image(rng, 240, 160))
+    _save(doc, path)
+    images = pages * IMAGES_PER_PAGE
+    return CorpusFile('image_heavy', path, pages, images, images)
+
+
+def make_scanned(path: str, pages: int, rng: random.Random) -> CorpusFile:
+    doc = _new_document()
+    for _ in range(pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        # 约 100 dpi 的整页扫描
+        page.insert_image(page.rect, stream=_scanned_image(rng, 827, 1170))
+    _save(doc, path)
+    return CorpusFile('scanned', path, pages, pages, pages)
+
+
+def make_huge(path: str, pages: int, rng: random.Random) -> CorpusFile:
+    doc = _new_document()
+    images = 0
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = _write_text_page(page, rng, page_num, paragraphs=4)
+        if page_num % HUGE_IMAGE_EVERY == 0:
+            page.insert_image(fitz.Rect(MARGIN, y, MARGIN + 240, y + 160), stream=_pattern_image(rng, 240, 160))
+            images += 1
+    _save(doc, path)
+    return CorpusFile('huge', path, pages, images, images)
+
+
+def make_logos(path: str, pages: int, rng: random.Random) -> CorpusFile:
+    doc = _new_document()
+    logo = _pattern_image(random.Random(1), 120, 40, cells=4)
+    watermark = _pattern_image(random.Random(2), 200, 200, cells=2)
+    logo_xref = 0
+    figures = 0
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        # 页眉 Logo：所有页面引用同一个 xref
+        logo_xref = page.insert_image(fitz.Rect(MARGIN, 16, MARGIN + 90, 46), stream=logo, xref=logo_xref)
+        y = _write_text_page(page, rng, page_num, paragraphs=5, top=MARGIN + 8)
+        # 水印：每页单独写入一份像素相同的图片流
+        page.insert_image(fitz.Rect(PAGE_WIDTH - MARGIN - 100, PAGE_HEIGHT - MARGIN - 100,
+                                    PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN),
+                          stream=_tag_png(watermark, f"page {page_num}"), overlay=False)
+        if page_num % LOGO_FIGURE_EVERY == 0:
+            page.insert_image(fitz.Rect(MARGIN, y, MARGIN + 240, y + 160), stream=_pattern_image(rng, 240, 160))
+            figures += 1
+    _save(doc, path)
+    return CorpusFile('logos', path, pages, pages * 2 + figures, 2 + figures)
+
+
+def make_tables(path: str, pages: int, rng: random.Random) -> CorpusFile:
+    doc = _new_document()
+    cell_w = (PAGE_WIDTH - 2 * MARGIN) / TABLE_COLUMNS
+    cell_h = 18
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = _write_text_page(page, rng, page_num, paragraphs=3) + 12
+        page.insert_text((MARGIN, y), f"Table {page_num}", fontsize=9)
+        top = y + 6
+        for row in range(TABLE_ROWS):
+            for col in range(TABLE_COLUMNS):
+                text = rng.choice(_WORDS) if row == 0 else f"{rng.uniform(0, 100):.2f}"
+                page.insert_text((MARGIN + col * cell_w + 4, top + row * cell_h + 13), text, fontsize=9)
+        # 表格线
+        bottom = top + TABLE_ROWS * cell_h
+        for row in range(TABLE_ROWS + 1):
+            page.draw_line((MARGIN, top + row * cell_h), (PAGE_WIDTH - MARGIN, top + row * cell_h), width=0.5)
+        for col in range(TABLE_COLUMNS + 1):
+            page.draw_line((MARGIN + col * cell_w, top), (MARGIN + col * cell_w, bottom), width=0.5)
+    _save(doc, path)
+    return CorpusFile('tables', path, pages, 0, 0)
+
+
+GENERATORS = {
+    'text_only': make_text_only,
+    'image_heavy': make_image_heavy,
+    'scanned': make_scanned,
+    'huge': make_huge,
+    'logos': make_logos,
+    'tables': make_tables,
+}
+
+
+def corpus_pages(scale: float = 1.0) -> Dict[str, int]:
+    return {kind: max(2, int(pages * scale)) for kind, pages in CORPUS_PAGES.items()}
+
+
+def generate_corpus(out_dir: str, scale: float = 1.0, seed: int = 0, kinds=None) -> List[CorpusFile]:
+    """在 out_dir 中生成语料，返回每个文件的描述；每类文档使用独立的随机序列"""
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for kind, pages in corpus_pages(scale).items():
+        if kinds and kind not in kinds:
+            continue
+        path = os.path.join(out_dir, f"synthetic_{kind}.pdf")
+        rng = random.Random(f"{seed}:{kind}")
+        files.append(GENERATORS[kind](path, pages, rng))
+    return files
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="生成基准测试用的合成 PDF")
+    parser.add_argument("out_dir", nargs="?", default=os.path.join("examples", "test_pdfs", "synthetic"))
+    parser.add_argument("--scale", type=float, default=1.0, help="页数缩放比例")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'类型':<12} {'页数':>6} {'图片引用':>8} {'不同图片':>8} {'大小(KB)':>10}")
+    for item in generate_corpus(args.out_dir, args.scale, args.seed):
+        size = os.path.getsize(item.path) / 1024
+        print(f"{item.kind:<12} {item.pages:>6} {item.image_refs:>8} {item.unique_images:>8} {size:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
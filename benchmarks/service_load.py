@@ -0,0 +1,167 @@
+# benchmarks/service_load.py
+"""本地转换服务 (python -m pdf2md.service) 的压力测试客户端
+
+多个并发客户端反复提交 PDF（上传或提交路径），收到 503 时按 Retry-After 等待后重试，
+然后等待任务结束。统计吞吐量、端到端延迟、排队等待时间和被拒绝的次数。
+
+用法:
+    python -m pdf2md.service -j 2 --max-queue 20 &
+    python benchmarks/service_load.py [PDF ...] [--url http://127.0.0.1:8765] [--clients 8] [--requests 50] [--upload]
+
+不指定 PDF 时用 benchmarks/corpus.py 生成一组小规模的合成文档。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_corpus
+
+
+def _request(url: str, method: str = "GET", body: Optional[bytes] = None,
+             content_type: Optional[str] = None, timeout: float = 330) -> Tuple[int, Dict[str, str], Dict]:
+    headers = {"Content-Type": content_type} if content_type else {}
+    request = urllib.request.Request(url, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, dict(response.headers), json.loads(response.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read() or b"{}")
+
+
+def _seconds_between(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    if not start or not end:
+        return None
+    return (datetime.datetime.fromisoformat(end) - datetime.datetime.fromisoformat(start)).total_seconds()
+
+
+class LoadTest:
+    def __init__(self, url: str, pdfs: List[str], requests: int, upload: bool, max_priority: int):
+        self.url = url.rstrip("/")
+        self.pdfs = pdfs
+        self.upload = upload
+        self.max_priority = max_priority
+        self._remaining = requests
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.results: List[Dict] = []
+
+    def _next(self) -> bool:
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+            self._remaining -= 1
+            return True
+
+    def _submit(self, pdf: str, priority: int) -> Optional[str]:
+        """提交一个任务；队列已满时按 Retry-After 等待后重试"""
+        while True:
+            if self.upload:
+                with open(pdf, 'rb') as f:
+                    body = f.read()
+                status, headers, payload = _request(
+                    f"{self.url}/jobs?filename={quote(os.path.basename(pdf))}&priority={priority}",
+                    "POST", body, "application/pdf")
+            else:
+                status, headers, payload = _request(
+                    f"{self.url}/jobs", "POST",
+                    json.dumps({"path": os.path.abspath(pdf), "priority": priority}).encode("utf-8"),
+                    "application/json")
+            if status == 202:
+                return payload["id"]
+            if status != 503 or "Retry-After" not in headers:
+                print(f"提交失败 ({status}): {payload.get('error')}", file=sys.stderr)
+                return None
+            with self._lock:
+                self.rejected += 1
+            time.sleep(float(headers["Retry-After"]))
+
+    def _client(self, rng: random.Random):
+        while self._next():
+            pdf = rng.choice(self.pdfs)
+            start = time.perf_counter()
+            job_id = self._submit(pdf, rng.randint(0, self.max_priority))
+            if job_id is None:
+                continue
+            while True:
+                status, _, job = _request(f"{self.url}/jobs/{job_id}?wait=300")
+                if status != 200 or job["status"] not in ("queued", "running"):
+                    break
+            with self._lock:
+                self.results.append({
+                    'status': job.get('status', 'missing'),
+                    'latency': time.perf_counter() - start,
+                    'queued': _seconds_between(job.get('submitted'), job.get('started')),
+                    'convert': _seconds_between(job.get('started'), job.get('finished')),
+                })
+
+    def run(self, clients: int) -> float:
+        threads = [threading.Thread(target=self._client, args=(random.Random(k),)) for k in range(clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+
+def _percentiles(values: List[float]) -> str:
+    if not values:
+        return "-"
+    values = sorted(values)
+
+    def pick(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+    return f"p50 {pick(0.5):.2f}s  p95 {pick(0.95):.2f}s  最大 {values[-1]:.2f}s"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="本地转换服务压力测试")
+    parser.add_argument("pdfs", nargs="*", help="要提交的 PDF；不指定时生成合成文档")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--clients", type=int, default=8, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=50, help="提交的任务总数")
+    parser.add_argument("--upload", action="store_true", help="上传文件内容（默认提交本机路径）")
+    parser.add_argument("--max-priority", type=int, default=0, help="每个任务随机取 0..N 的优先级")
+    parser.add_argument("--scale", type=float, default=0.05, help="生成合成文档时的规模")
+    args = parser.parse_args(argv)
+
+    status, _, health = _request(f"{args.url.rstrip('/')}/health", timeout=5)
+    if status != 200 or health.get("status") != "ok":
+        print(f"服务不可用: {health.get('error') or health.get('status')}", file=sys.stderr)
+        return 2
+
+    pdfs = args.pdfs
+    if not pdfs:
+        corpus_dir = tempfile.mkdtemp(prefix="pdf2md_load_")
+        pdfs = [item.path for item in generate_corpus(corpus_dir, args.scale, kinds=["text_only", "image_heavy"])]
+
+    test = LoadTest(args.url, pdfs, args.requests, args.upload, args.max_priority)
+    elapsed = test.run(args.clients)
+
+    done = [r for r in test.results if r['status'] == 'done']
+    print(f"服务: {args.url}  工作进程: {health['workers']}  队列上限: {health['max_queue']}")
+    print(f"任务: {len(test.results)}  成功: {len(done)}  失败: {len(test.results) - len(done)}  "
+          f"503 拒绝: {test.rejected}")
+    print(f"总耗时: {elapsed:.2f}s  吞吐量: {len(done) / elapsed * 60:.1f} 个/分钟")
+    print(f"端到端延迟: {_percentiles([r['latency'] for r in done])}")
+    print(f"排队等待:   {_percentiles([r['queued'] for r in done if r['queued'] is not None])}")
+    print(f"转换耗时:   {_percentiles([r['convert'] for r in done if r['convert'] is not None])}")
+    return 0 if len(done) == len(test.results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
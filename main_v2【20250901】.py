@@ -2,40 +2,195 @@
 
 import sys
 import os
-import traceback
-from pathlib import Path
+import threading
 import json
-import base64
 import datetime
-import hashlib
-from typing import List, Dict, Optional, Tuple
+import html
+from typing import Dict, Optional
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QPushButton, QFileDialog, QTextEdit, QLabel, QProgressBar,
     QMessageBox, QGroupBox, QCheckBox, QLineEdit, QSpinBox,
     QTabWidget, QListWidget, QListWidgetItem, QAbstractItemView,
-    QComboBox, QSlider, QToolTip, QSplitter, QTextBrowser
+    QComboBox, QSlider, QToolTip, QSplitter, QTextBrowser, QListView
+)
+from PyQt5.QtCore import (
+    QThread, pyqtSignal, Qt, QSettings, QTimer, QMutex, QMutexLocker,
+    QAbstractListModel, QModelIndex
 )
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QSettings, QTimer, QMutex, QMutexLocker
 from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPixmap
 
-# 检查 PyMuPDF (fitz) 是否可用
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
-
-# 确保 marker-pdf[full] 已安装
-try:
-    from marker.converters.pdf import PdfConverter
-    from marker.models import create_model_dict
-    from marker.config.parser import ConfigParser
-    MARKER_AVAILABLE = True
-except ImportError as e:
-    MARKER_AVAILABLE = False
-    MARKER_IMPORT_ERROR = str(e)
+from pdf2md.batch import BatchRunner
+from pdf2md.config import DEFAULT_LLM_CONCURRENCY, LLM_CACHE_DIRNAME, build_llm_config
+from pdf2md.engine import MARKER_AVAILABLE, MARKER_IMPORT_ERROR, DEFAULT_CACHE_MAX_SIZE_MB
+from pdf2md.filelist import FileCatalog, scan_pdf_files, stat_entry
+from pdf2md.llm_check import format_probe, probe_latency, test_connection
+from pdf2md.logbuffer import LogBuffer
+from pdf2md.models import get_model_registry
+
+# 日志视图保留的最大行数，以及每次定时刷新最多显示的条数
+LOG_MAX_LINES = 5000
+LOG_FLUSH_INTERVAL_MS = 100
+LOG_FLUSH_BATCH = 500
+
+LOG_COLORS = {
+    "INFO": "#333333",    # 默认黑色
+    "SUCCESS": "#28a745", # 绿色
+    "ERROR": "#dc3545",   # 红色
+    "WARN": "#ffc107",    # 黄色
+    "DEBUG": "#6c757d",   # 灰色
+}
+
+# 日志过滤选项 -> 显示的级别（None 表示全部）
+LOG_FILTERS = {
+    "所有日志": None,
+    "仅错误": {"ERROR"},
+    "仅警告": {"WARN"},
+    "仅信息": {"INFO", "SUCCESS"},
+}
+
+
+def format_file_size(size_bytes):
+    """格式化文件大小"""
+    size_mb = size_bytes / (1024 * 1024)
+    if size_mb < 1:
+        return f"{size_bytes / 1024:.1f} KB"
+    return f"{size_mb:.1f} MB"
+
+
+# --- 文件列表模型 ---
+class PdfFileListModel(QAbstractListModel):
+    """待转换文件的列表模型
+
+    视图只为可见行调用 data()，不再为每个文件创建 QListWidgetItem；
+    文件信息在添加时 stat 一次并缓存在 FileCatalog 中，总大小为增量维护的累计值。
+    """
+
+    # 一次移除的连续区间超过该数量时直接重置模型，避免逐段通知视图
+    RESET_REMOVE_RANGES = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.catalog = FileCatalog()
+
+    @property
+    def paths(self):
+        return self.catalog.paths
+
+    @property
+    def total_size(self):
+        return self.catalog.total_size
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.catalog)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.catalog):
+            return None
+        entry = self.catalog.entry(index.row())
+        if role == Qt.DisplayRole:
+            return f"{entry.name} ({format_file_size(entry.size)})"
+        if role == Qt.ToolTipRole:
+            modified = datetime.datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M:%S') \
+                if entry.mtime else '未知'
+            return f"路径: {entry.path}\n大小: {format_file_size(entry.size)}\n修改时间: {modified}"
+        if role == Qt.ForegroundRole:
+            # 根据文件大小设置不同的颜色
+            size_mb = entry.size / (1024 * 1024)
+            if size_mb > 50:
+                return QColor("#ff6b6b")  # 大文件用红色
+            if size_mb > 10:
+                return QColor("#ffa94d")  # 中等文件用橙色
+            return None
+        if role == Qt.UserRole:
+            return entry.path  # 完整路径
+        return None
+
+    def add_entries(self, entries):
+        """追加一批文件（跳过重复项），返回实际添加的文件"""
+        fresh = self.catalog.new_entries(entries)
+        if fresh:
+            first = len(self.catalog)
+            self.beginInsertRows(QModelIndex(), first, first + len(fresh) - 1)
+            self.catalog.extend(fresh)
+            self.endInsertRows()
+        return fresh
+
+    def remove_rows(self, rows):
+        """移除指定行，返回被移除的文件"""
+        rows = sorted(set(rows))
+        if not rows:
+            return []
+        # 合并为连续区间
+        ranges = []
+        for row in rows:
+            if ranges and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+
+        if len(ranges) > self.RESET_REMOVE_RANGES:
+            self.beginResetModel()
+            removed = self.catalog.remove_rows(rows)
+            self.endResetModel()
+            return removed
+
+        removed = []
+        # 从后往前移除，前面区间的行号不受影响
+        for start, end in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), start, end)
+            removed[:0] = self.catalog.remove_rows(range(start, end + 1))
+            self.endRemoveRows()
+        return removed
+
+    def clear(self):
+        self.beginResetModel()
+        self.catalog.clear()
+        self.endResetModel()
+
+
+# --- 后台文件夹扫描线程 ---
+class FolderScanWorker(QThread):
+    batch_found = pyqtSignal(list)  # 一批 FileEntry
+    scan_finished = pyqtSignal(str, bool)  # (文件夹, 是否被取消)
+
+    def __init__(self, folder_path):
+        super().__init__()
+        self.folder_path = folder_path
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def is_stopped(self):
+        return self._stop_event.is_set()
+
+    def run(self):
+        for batch in scan_pdf_files(self.folder_path, stop_event=self._stop_event):
+            self.batch_found.emit(batch)
+        self.scan_finished.emit(self.folder_path, self._stop_event.is_set())
+
+
+# --- 后台 LLM 连接测试线程 ---
+class LlmTestWorker(QThread):
+    test_finished = pyqtSignal(dict, dict)  # (连接测试结果, 延迟探测统计)
+
+    PROBE_REQUESTS = 3
+    TIMEOUT = 30.0
+
+    def __init__(self, llm_config, service_name):
+        super().__init__()
+        self.llm_config = llm_config
+        self.service_name = service_name
+
+    def run(self):
+        result = test_connection(self.llm_config, timeout=self.TIMEOUT, service_name=self.service_name)
+        stats = {}
+        if result['ok']:
+            stats = probe_latency(self.llm_config, self.PROBE_REQUESTS, timeout=self.TIMEOUT, max_retries=0)
+        self.test_finished.emit(result, stats)
+
 
 # --- 增强的后台转换线程 ---
 class ConversionWorker(QThread):
@@ -45,621 +200,38 @@ class ConversionWorker(QThread):
     file_progress_signal = pyqtSignal(str, int, int)  # 文件进度 (文件名, 当前, 总数)
     error_signal = pyqtSignal(str, str)  # 错误信息 (文件名, 错误详情)
 
-    def __init__(self, pdf_files, output_dir, config_dict, use_llm, llm_service_config, use_fallback_extraction=False):
+    def __init__(self, pdf_files, output_dir, config_dict, use_llm, llm_service_config, use_fallback_extraction=False,
+                 resume=False, log_buffer: Optional[LogBuffer] = None):
         super().__init__()
         self.pdf_files = pdf_files
         self.output_dir = output_dir
-        self.config_dict = config_dict
-        self.use_llm = use_llm
-        self.llm_service_config = llm_service_config
-        self.use_fallback_extraction = use_fallback_extraction
-        self._is_running = True
-        self.converter = None
         self._mutex = QMutex()  # 线程安全
         self.failed_files = []  # 记录失败的文件
-        self.conversion_stats = {
-            'total_pages': 0,
-            'total_images': 0,
-            'processing_time': 0
-        }
+        # 转换流程本身在 pdf2md.batch 中实现，这里只负责转发为 Qt 信号；
+        # 日志直接写入线程安全的缓冲区，由界面定时批量显示，避免每条日志一次跨线程信号
+        self.runner = BatchRunner(
+            pdf_files, output_dir, config_dict, use_llm, llm_service_config,
+            use_fallback_extraction=use_fallback_extraction,
+            log=log_buffer.append if log_buffer is not None else self.log_signal.emit,
+            on_progress=self.progress_signal.emit,
+            on_file_started=self.file_progress_signal.emit,
+            on_file_finished=self._record_summary,
+            resume=resume
+        )
 
     def stop(self):
         with QMutexLocker(self._mutex):
-            self._is_running = False
-        if self.converter:
-            # 尝试中断转换器
-            pass
-
-    def _validate_pdf(self, pdf_path: str) -> Tuple[bool, str]:
-        """验证PDF文件的完整性和可读性"""
-        try:
-            if not os.path.exists(pdf_path):
-                return False, "文件不存在"
-            
-            if os.path.getsize(pdf_path) == 0:
-                return False, "文件大小为0"
-            
-            # 尝试打开PDF验证其有效性
-            if PYMUPDF_AVAILABLE:
-                try:
-                    doc = fitz.open(pdf_path)
-                    page_count = len(doc)
-                    doc.close()
-                    if page_count == 0:
-                        return False, "PDF没有页面"
-                except Exception as e:
-                    return False, f"PDF损坏或无法读取: {str(e)}"
-            
-            return True, "OK"
-        except Exception as e:
-            return False, f"验证失败: {str(e)}"
-
-    def _extract_images_with_pymupdf(self, pdf_path, images_dir):
-        """使用 PyMuPDF 作为备用方案提取图片（增强版）"""
-        if not PYMUPDF_AVAILABLE:
-            self.log_signal.emit("  -> PyMuPDF (fitz) 未安装，无法执行备用图片提取。")
-            return []
-        
-        try:
-            pdf_document = fitz.open(pdf_path)
-            extracted_files = []
-            total_images = 0
-            
-            for page_index in range(len(pdf_document)):
-                if not self._is_running:  # 检查是否需要停止
-                    pdf_document.close()
-                    return extracted_files
-                
-                page_document = pdf_document[page_index]
-                image_list = page_document.get_images(full=True)
-                if not image_list:
-                    continue
-                
-                for image_index, img in enumerate(image_list):
-                    total_images += 1
-                    xref = img[0]
-                    
-                    try:
-                        base_image = pdf_document.extract_image(xref)
-                        if not base_image:
-                            continue
-
-                        image_bytes = base_image["image"]
-                        image_ext = base_image["ext"]
-                        
-                        # 生成更有意义的图片名称
-                        img_hash = hashlib.md5(image_bytes).hexdigest()[:8]
-                        img_name = f"page_{page_index + 1:03d}_img_{image_index + 1:02d}_{img_hash}.{image_ext}"
-                        img_path = os.path.join(images_dir, img_name)
-                        
-                        # 避免重复保存相同的图片
-                        if not os.path.exists(img_path):
-                            with open(img_path, "wb") as img_file:
-                                img_file.write(image_bytes)
-                            extracted_files.append(img_name)
-                            
-                            # 记录图片大小信息
-                            img_size = len(image_bytes) / 1024  # KB
-                            self.log_signal.emit(f"    -> 提取图片: {img_name} ({img_size:.1f} KB)")
-                    
-                    except Exception as img_error:
-                        self.log_signal.emit(f"    -> 警告: 提取第{page_index + 1}页第{image_index + 1}张图片失败: {img_error}")
-            
-            pdf_document.close()
-            
-            self.conversion_stats['total_images'] += len(extracted_files)
-            
-            if extracted_files:
-                self.log_signal.emit(f"  -> [备用引擎] PyMuPDF 成功提取并保存了 {len(extracted_files)}/{total_images} 张图片。")
-            else:
-                self.log_signal.emit(f"  -> [备用引擎] PyMuPDF 未在该文件中找到可提取的图片。")
-            
-            return extracted_files
-
-        except Exception as e:
-            self.log_signal.emit(f"  -> [备用引擎] PyMuPDF 提取图片时发生错误: {e}")
-            return []
-
-    def _update_markdown_image_links(self, markdown_content, fallback_image_files, pdf_stem):
-        """更新Markdown中的图片链接（增强版）"""
-        import re
-        
-        if not fallback_image_files:
-            return markdown_content
-        
-        # 记录已使用的图片文件
-        used_images = set()
-        image_replacements = []
-        
-        # 查找所有的图片引用模式
-        image_pattern = r'!\[([^]]*)\]\(([^)]+)\)'
-        
-        def replace_image_link(match):
-            alt_text = match.group(1)
-            original_link = match.group(2)
-            
-            # 如果原始链接已经是相对路径或绝对路径，不修改
-            if '/' in original_link or '\\' in original_link:
-                return match.group(0)
-            
-            # 智能匹配备用图片
-            best_match = self._find_best_image_match(original_link, fallback_image_files, used_images)
-            
-            if best_match:
-                used_images.add(best_match)
-                relative_path = f"{pdf_stem}_images/{best_match}"
-                replacement = f'![{alt_text}]({relative_path})'
-                image_replacements.append((original_link, best_match))
-                return replacement
-            else:
-                return match.group(0)
-        
-        # 替换所有图片链接
-        updated_content = re.sub(image_pattern, replace_image_link, markdown_content)
-        
-        # 记录图片替换信息
-        if image_replacements:
-            self.log_signal.emit(f"  -> 已更新 {len(image_replacements)} 个图片链接")
-        
-        # 处理未使用的图片
-        unused_images = [img for img in fallback_image_files if img not in used_images]
-        if unused_images:
-            updated_content = self._handle_unused_images(updated_content, unused_images, pdf_stem)
-        
-        return updated_content
-
-    def _find_best_image_match(self, original_link: str, fallback_images: List[str], used_images: set) -> Optional[str]:
-        """智能查找最匹配的备用图片"""
-        import re
-        
-        # 提取原始链接中的页面信息
-        page_match = re.search(r'page[_\s]*(\d+)', original_link.lower())
-        if page_match:
-            target_page = int(page_match.group(1))
-            
-            # 查找对应页面的图片
-            for img in fallback_images:
-                if img not in used_images and f'page_{target_page:03d}_' in img:
-                    return img
-        
-        # 如果没有页面信息，尝试其他匹配策略
-        original_name_without_ext = os.path.splitext(original_link)[0]
-        
-        # 精确匹配
-        for img in fallback_images:
-            if img not in used_images and original_link == img:
-                return img
-        
-        # 部分匹配
-        for img in fallback_images:
-            if img not in used_images and original_name_without_ext in img:
-                return img
-        
-        # 返回第一个未使用的图片
-        for img in fallback_images:
-            if img not in used_images:
-                return img
-        
-        return None
-
-    def _handle_unused_images(self, content: str, unused_images: List[str], pdf_stem: str) -> str:
-        """处理未使用的图片"""
-        self.log_signal.emit(f"  -> 发现 {len(unused_images)} 张未在原Markdown中引用的图片")
-        
-        # 尝试智能插入
-        content = self._insert_unused_images_intelligently(content, unused_images, pdf_stem)
-        
-        # 检查是否还有剩余的未使用图片
-        remaining_unused = []
-        for img in unused_images:
-            if f"{pdf_stem}_images/{img}" not in content:
-                remaining_unused.append(img)
-        
-        # 在文档末尾添加剩余图片
-        if remaining_unused:
-            content += self._append_remaining_images(remaining_unused, pdf_stem)
-        
-        return content
-
-    def _insert_unused_images_intelligently(self, markdown_content, unused_images, pdf_stem):
-        """智能地将未使用的图片插入到Markdown内容中（增强版）"""
-        import re
-        
-        # 按页面顺序排序未使用的图片
-        unused_images.sort(key=lambda x: self._extract_page_number(x))
-        
-        lines = markdown_content.split('\n')
-        inserted_count = 0
-        
-        for img_file in unused_images[:]:  # 使用副本以便修改原列表
-            page_num = self._extract_page_number(img_file)
-            relative_path = f"{pdf_stem}_images/{img_file}"
-            
-            # 多种插入策略
-            inserted = False
-            
-            # 策略1: 寻找页面相关的标题或内容
-            patterns = [
-                rf'第\s*{page_num}\s*页',
-                rf'page\s*{page_num}\b',
-                rf'p\.\s*{page_num}\b',
-                rf'页码[:：]\s*{page_num}',
-                rf'\b{page_num}\s*页'
-            ]
-            
-            for i, line in enumerate(lines):
-                for pattern in patterns:
-                    if re.search(pattern, line, re.IGNORECASE):
-                        # 在该行后插入图片
-                        insert_pos = i + 1
-                        # 确保不在代码块中插入
-                        if not self._is_in_code_block(lines, insert_pos):
-                            lines.insert(insert_pos, f"\n![第{page_num}页图片]({relative_path})\n")
-                            inserted = True
-                            inserted_count += 1
-                            break
-                if inserted:
-                    break
-            
-            # 策略2: 基于内容结构插入
-            if not inserted:
-                insert_pos = self._find_structural_insert_position(lines, page_num)
-                if insert_pos >= 0:
-                    lines.insert(insert_pos, f"\n![第{page_num}页图片]({relative_path})\n")
-                    inserted = True
-                    inserted_count += 1
-        
-        if inserted_count > 0:
-            self.log_signal.emit(f"    -> 智能插入了 {inserted_count} 张图片")
-        
-        return '\n'.join(lines)
-
-    def _is_in_code_block(self, lines: List[str], position: int) -> bool:
-        """检查指定位置是否在代码块中"""
-        code_block_count = 0
-        for i in range(min(position, len(lines))):
-            if lines[i].strip().startswith('```'):
-                code_block_count += 1
-        return code_block_count % 2 == 1
-
-    def _find_structural_insert_position(self, lines: List[str], page_num: int) -> int:
-        """基于文档结构查找插入位置"""
-        import re
-        
-        # 查找所有标题位置
-        headers = []
-        for i, line in enumerate(lines):
-            if re.match(r'^#+\s', line):
-                headers.append((i, line.count('#')))
-        
-        if not headers:
-            return -1
-        
-        # 根据页面号估算插入位置
-        # 假设文档页面均匀分布
-        total_lines = len(lines)
-        estimated_position = int((page_num / 100.0) * total_lines)  # 假设最多100页
-        
-        # 找到最接近估算位置的标题
-        best_header_pos = -1
-        min_distance = float('inf')
-        
-        for pos, level in headers:
-            distance = abs(pos - estimated_position)
-            if distance < min_distance:
-                min_distance = distance
-                best_header_pos = pos
-        
-        # 在标题后插入
-        if best_header_pos >= 0:
-            return best_header_pos + 1
-        
-        return -1
-
-    def _append_remaining_images(self, remaining_images: List[str], pdf_stem: str) -> str:
-        """在文档末尾添加剩余图片"""
-        self.log_signal.emit(f"  -> 在文档末尾添加剩余的 {len(remaining_images)} 张图片")
-        
-        content = "\n\n---\n\n## 附加图片\n\n"
-        content += "*以下图片从PDF中提取但未在文档主体中引用：*\n\n"
-        
-        # 按页面分组
-        images_by_page = {}
-        for img in remaining_images:
-            page_num = self._extract_page_number(img)
-            if page_num not in images_by_page:
-                images_by_page[page_num] = []
-            images_by_page[page_num].append(img)
-        
-        # 按页面顺序添加
-        for page_num in sorted(images_by_page.keys()):
-            if len(images_by_page[page_num]) == 1:
-                img = images_by_page[page_num][0]
-                relative_path = f"{pdf_stem}_images/{img}"
-                content += f"![第{page_num}页图片]({relative_path})\n\n"
-            else:
-                content += f"### 第{page_num}页图片\n\n"
-                for i, img in enumerate(images_by_page[page_num], 1):
-                    relative_path = f"{pdf_stem}_images/{img}"
-                    content += f"![第{page_num}页图片{i}]({relative_path})\n\n"
-        
-        return content
-
-    def _extract_page_number(self, img_filename):
-        """从图片文件名中提取页面号（增强版）"""
-        import re
-        # 支持多种页面号格式
-        patterns = [
-            r'page_(\d+)',
-            r'_page_(\d+)_',
-            r'p(\d+)_',
-            r'第(\d+)页'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, img_filename, re.IGNORECASE)
-            if match:
-                return int(match.group(1))
-        
-        return 0
-
-    def _create_conversion_summary(self, pdf_path: str, success: bool, error_msg: str = "") -> Dict:
-        """创建转换摘要信息"""
-        return {
-            'file': os.path.basename(pdf_path),
-            'path': pdf_path,
-            'success': success,
-            'error': error_msg,
-            'timestamp': datetime.datetime.now().isoformat(),
-            'pages': self.conversion_stats.get('total_pages', 0),
-            'images': self.conversion_stats.get('total_images', 0)
-        }
+            self.runner.stop()
 
     def run(self):
-        if not MARKER_AVAILABLE:
-            self.finished_signal.emit(False, f"Marker 库未正确安装或导入: {MARKER_IMPORT_ERROR}")
-            return
-
-        if not self.pdf_files:
-            self.finished_signal.emit(False, "没有 PDF 文件需要转换。")
-            return
-
-        start_time = datetime.datetime.now()
-        conversion_summaries = []
-
-        try:
-            self.log_signal.emit(f"开始转换 {len(self.pdf_files)} 个 PDF 文件...")
-            self.log_signal.emit(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-
-            # 设置自定义模型缓存目录
-            try:
-                main_program_dir = os.getcwd()
-                custom_models_dir = os.path.join(main_program_dir, "markermodels")
-                os.makedirs(custom_models_dir, exist_ok=True)
-                os.environ['HF_HOME'] = main_program_dir
-                self.log_signal.emit(f"已设置 HF_HOME 环境变量指向: {main_program_dir}")
-                self.log_signal.emit(f"Marker 模型将从 '{custom_models_dir}' 加载/下载。")
-            except Exception as env_error:
-                self.log_signal.emit(f"警告: 设置自定义模型目录时出错: {env_error}")
-
-            # 加载 Marker 模型和配置
-            self.log_signal.emit("正在加载 Marker 模型...")
-            try:
-                artifact_dict = create_model_dict()
-            except Exception as model_load_error:
-                self.log_signal.emit(f"严重错误: 加载 Marker 模型失败: {model_load_error}")
-                self.log_signal.emit(traceback.format_exc())
-                self.finished_signal.emit(False, f"加载 Marker 模型失败: {model_load_error}")
-                return
-
-            final_config = self.config_dict.copy()
-            if self.use_llm:
-                final_config.update(self.llm_service_config)
+        result = self.runner.run()
+        self.finished_signal.emit(result['status'] == 'completed', result['message'])
 
-            config_parser = ConfigParser(final_config)
-
-            self.converter = PdfConverter(
-                artifact_dict=artifact_dict,
-                config=config_parser.generate_config_dict(),
-                processor_list=config_parser.get_processors(),
-                renderer=config_parser.get_renderer(),
-                llm_service=config_parser.get_llm_service() if self.use_llm else None
-            )
-            self.log_signal.emit("Marker 模型加载完成。")
-
-            total_files = len(self.pdf_files)
-            successful = 0
-            failed = 0
-
-            for i, pdf_path in enumerate(self.pdf_files):
-                if not self._is_running:
-                    self.log_signal.emit("转换任务被用户中止。")
-                    self.finished_signal.emit(False, "任务被中止。")
-                    return
-
-                file_start_time = datetime.datetime.now()
-                self.file_progress_signal.emit(os.path.basename(pdf_path), i + 1, total_files)
-                self.log_signal.emit(f"\n[{i+1}/{total_files}] 正在转换: {os.path.basename(pdf_path)}")
-                self.progress_signal.emit(int((i / total_files) * 100))
-
-                # 验证PDF文件
-                is_valid, validation_msg = self._validate_pdf(pdf_path)
-                if not is_valid:
-                    error_msg = f"文件验证失败: {validation_msg}"
-                    self.log_signal.emit(f"  -> 错误: {error_msg}")
-                    self.error_signal.emit(os.path.basename(pdf_path), error_msg)
-                    failed += 1
-                    self.failed_files.append(pdf_path)
-                    conversion_summaries.append(self._create_conversion_summary(pdf_path, False, error_msg))
-                    continue
-
-                try:
-                    # 重置统计信息
-                    self.conversion_stats = {
-                        'total_pages': 0,
-                        'total_images': 0,
-                        'processing_time': 0
-                    }
-
-                    # 步骤 1: 执行PDF到Markdown的转换
-                    self.log_signal.emit("  -> 正在解析PDF内容...")
-                    rendered = self.converter(pdf_path)
-
-                    # 获取页面数
-                    if hasattr(rendered, 'metadata') and hasattr(rendered.metadata, 'page_count'):
-                        self.conversion_stats['total_pages'] = rendered.metadata.page_count
-                        self.log_signal.emit(f"  -> PDF共有 {rendered.metadata.page_count} 页")
-
-                    # 步骤 2: 提取和保存图片
-                    marker_extracted_images = False
-                    pdf_stem = Path(pdf_path).stem
-                    images_dir = os.path.join(self.output_dir, f"{pdf_stem}_images")
-                    fallback_image_files = []
-                    
-                    # 策略一: 尝试使用 Marker (主引擎) 提取
-                    if hasattr(rendered, 'metadata') and hasattr(rendered.metadata, 'images') and isinstance(rendered.metadata.images, dict) and rendered.metadata.images:
-                        marker_extracted_images = True
-                        os.makedirs(images_dir, exist_ok=True)
-                        self.log_signal.emit(f"  -> [主引擎] Marker 发现 {len(rendered.metadata.images)} 张图片，正在保存...")
-
-                        saved_count = 0
-                        for img_name, img_b64_data in rendered.metadata.images.items():
-                            if not self._is_running:
-                                break
-                            
-                            img_path = os.path.join(images_dir, img_name)
-                            try:
-                                img_bytes = base64.b64decode(img_b64_data)
-                                with open(img_path, 'wb') as img_file:
-                                    img_file.write(img_bytes)
-                                saved_count += 1
-                                self.log_signal.emit(f"    -> 已保存图片: {img_name} ({len(img_bytes)/1024:.1f} KB)")
-                            except Exception as img_save_error:
-                                self.log_signal.emit(f"    -> 错误: 保存图片 '{img_name}' 失败: {img_save_error}")
-                        
-                        self.conversion_stats['total_images'] = saved_count
-                        self.log_signal.emit(f"  -> [主引擎] 成功保存 {saved_count} 张图片")
-                    
-                    # 策略二: 根据主引擎的结果，决定是否需要启动备用引擎
-                    if not marker_extracted_images:
-                        if self.use_fallback_extraction:
-                            self.log_signal.emit("  -> [主引擎] Marker 未提取到图片，启动备用引擎 PyMuPDF...")
-                            os.makedirs(images_dir, exist_ok=True)
-                            fallback_image_files = self._extract_images_with_pymupdf(pdf_path, images_dir)
-                        else:
-                            self.log_signal.emit("  -> 未在文档中检测到可提取的图片。(备用引擎未开启)")
-
-                    # 步骤 3: 处理Markdown内容并保存文件
-                    markdown_content = rendered.markdown
-                    
-                    # 如果使用了备用引擎提取图片，需要更新Markdown中的图片链接
-                    if fallback_image_files:
-                        self.log_signal.emit("  -> 正在更新Markdown中的图片链接...")
-                        markdown_content = self._update_markdown_image_links(markdown_content, fallback_image_files, pdf_stem)
-                    
-                    # 添加元数据信息到Markdown
-                    metadata_header = self._create_metadata_header(pdf_path, rendered)
-                    markdown_content = metadata_header + markdown_content
-                    
-                    # 保存Markdown文件
-                    md_filename = Path(pdf_path).stem + ".md"
-                    md_output_path = os.path.join(self.output_dir, md_filename)
-                    with open(md_output_path, 'w', encoding='utf-8') as f:
-                        f.write(markdown_content)
-
-                    # 计算处理时间
-                    file_end_time = datetime.datetime.now()
-                    processing_time = (file_end_time - file_start_time).total_seconds()
-                    self.conversion_stats['processing_time'] = processing_time
-
-                    self.log_signal.emit(f"  -> 已保存: {md_filename}")
-                    self.log_signal.emit(f"  -> 处理时间: {processing_time:.2f} 秒")
-                    successful += 1
-                    
-                    conversion_summaries.append(self._create_conversion_summary(pdf_path, True))
-
-                except Exception as e:
-                    error_msg = f"转换失败: {str(e)}"
-                    self.log_signal.emit(f"  -> 错误: {error_msg}")
-                    self.log_signal.emit(f"  -> 详细错误:\n{traceback.format_exc()}")
-                    self.error_signal.emit(os.path.basename(pdf_path), error_msg)
-                    failed += 1
-                    self.failed_files.append(pdf_path)
-                    conversion_summaries.append(self._create_conversion_summary(pdf_path, False, error_msg))
-
-            # 生成转换报告
-            end_time = datetime.datetime.now()
-            total_time = (end_time - start_time).total_seconds()
-            
-            self.progress_signal.emit(100)
-            self._generate_conversion_report(conversion_summaries, successful, failed, total_time)
-            
-            if failed > 0:
-                self.finished_signal.emit(True, f"转换完成! 成功: {successful}/{total_files}, 失败: {failed}")
-            else:
-                self.finished_signal.emit(True, f"转换完成! 成功: {successful}/{total_files}")
-
-        except Exception as e:
-            self.log_signal.emit(f"严重错误: {e}")
-            self.log_signal.emit(traceback.format_exc())
-            self.finished_signal.emit(False, f"转换因严重错误失败: {e}")
-
-    def _create_metadata_header(self, pdf_path: str, rendered) -> str:
-        """创建包含元数据的Markdown头部"""
-        header = "---\n"
-        header += f"source: {os.path.basename(pdf_path)}\n"
-        header += f"converted: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        
-        if hasattr(rendered, 'metadata'):
-            if hasattr(rendered.metadata, 'page_count'):
-                header += f"pages: {rendered.metadata.page_count}\n"
-            if hasattr(rendered.metadata, 'title') and rendered.metadata.title:
-                header += f"title: {rendered.metadata.title}\n"
-            if hasattr(rendered.metadata, 'author') and rendered.metadata.author:
-                header += f"author: {rendered.metadata.author}\n"
-        
-        header += "---\n\n"
-        return header
-
-    def _generate_conversion_report(self, summaries: List[Dict], successful: int, failed: int, total_time: float):
-        """生成详细的转换报告"""
-        report_path = os.path.join(self.output_dir, f"conversion_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-        
-        try:
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write("PDF转换报告\n")
-                f.write("=" * 60 + "\n\n")
-                f.write(f"转换时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"总耗时: {total_time:.2f} 秒\n")
-                f.write(f"文件总数: {len(summaries)}\n")
-                f.write(f"成功: {successful}\n")
-                f.write(f"失败: {failed}\n\n")
-                
-                if successful > 0:
-                    f.write("成功转换的文件:\n")
-                    f.write("-" * 40 + "\n")
-                    for summary in summaries:
-                        if summary['success']:
-                            f.write(f"  - {summary['file']}\n")
-                            if summary['pages'] > 0:
-                                f.write(f"    页数: {summary['pages']}\n")
-                            if summary['images'] > 0:
-                                f.write(f"    图片: {summary['images']}\n")
-                    f.write("\n")
-                
-                if failed > 0:
-                    f.write("失败的文件:\n")
-                    f.write("-" * 40 + "\n")
-                    for summary in summaries:
-                        if not summary['success']:
-                            f.write(f"  - {summary['file']}\n")
-                            f.write(f"    错误: {summary['error']}\n")
-                    f.write("\n")
-            
-            self.log_signal.emit(f"\n转换报告已保存到: {report_path}")
-            
-        except Exception as e:
-            self.log_signal.emit(f"保存转换报告失败: {e}")
+    def _record_summary(self, summary: Dict):
+        """记录失败文件并发出错误信号"""
+        if not summary['success']:
+            self.error_signal.emit(summary['file'], summary['error'])
+            self.failed_files.append(summary['path'])
 
 
 # --- 增强的主窗口 ---
@@ -678,13 +250,24 @@ class PDFToMdApp(QWidget):
             sys.exit(1)
 
         self.settings = QSettings("MyCompany", "PDFToMdApp")
-        self.pdf_files = []
+        self.file_model = PdfFileListModel(self)
+        self.scan_worker = None
+        self.scan_found = 0  # 当前文件夹扫描中找到的文件数
+        self.llm_test_worker = None
         self.worker_thread = None
         self.conversion_history = []  # 转换历史记录
+        self.log_buffer = LogBuffer(LOG_MAX_LINES)
+        self.log_levels = None  # 当前日志过滤显示的级别
         self.init_ui()
         self.load_settings()
         self.setup_shortcuts()
 
+        # 定时批量刷新日志
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_timer.start()
+
     def init_ui(self):
         main_layout = QVBoxLayout()
         
@@ -724,10 +307,12 @@ class PDFToMdApp(QWidget):
         file_btn_layout.addStretch()
         
         # 文件列表
-        self.list_widget = QListWidget()
+        self.list_widget = QListView()
+        self.list_widget.setModel(self.file_model)
         self.list_widget.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.list_widget.setAlternatingRowColors(True)  # 交替行颜色
-        self.list_widget.itemDoubleClicked.connect(self.preview_pdf)
+        self.list_widget.setUniformItemSizes(True)  # 行高一致，大列表滚动时无需逐行测量
+        self.list_widget.doubleClicked.connect(self.preview_pdf)
         
         # 文件统计标签
         self.file_stats_label = QLabel("未选择文件")
@@ -796,6 +381,10 @@ class PDFToMdApp(QWidget):
         """)
         self.btn_stop.clicked.connect(self.stop_conversion)
         self.btn_stop.setEnabled(False)
+
+        self.btn_release_models = QPushButton("🧹 释放模型")
+        self.btn_release_models.setToolTip("立即卸载常驻内存的 Marker 模型，下次转换时重新加载")
+        self.btn_release_models.clicked.connect(self.release_models)
         
         # 添加批处理选项
         self.batch_options_group = QGroupBox("批处理选项")
@@ -807,12 +396,21 @@ class PDFToMdApp(QWidget):
         self.create_subfolder_cb = QCheckBox("为每个PDF创建子文件夹")
         self.create_subfolder_cb.setToolTip("在输出目录中为每个PDF文件创建独立的子文件夹")
         
+        self.resume_cb = QCheckBox("断点续传（跳过上次已完成的文件）")
+        self.resume_cb.setToolTip(
+            "每个文件的转换状态记录在输出目录的任务日志中。\n"
+            "中断或崩溃后重新开始时，只转换失败或未完成的文件；\n"
+            "PDF 或输出文件有改动的会重新转换。"
+        )
+
         batch_layout.addWidget(self.auto_open_output_cb)
         batch_layout.addWidget(self.create_subfolder_cb)
+        batch_layout.addWidget(self.resume_cb)
         self.batch_options_group.setLayout(batch_layout)
         
         action_layout.addWidget(self.btn_start)
         action_layout.addWidget(self.btn_stop)
+        action_layout.addWidget(self.btn_release_models)
         action_layout.addWidget(self.batch_options_group)
         action_layout.addStretch()
         self.action_group.setLayout(action_layout)
@@ -906,8 +504,16 @@ class PDFToMdApp(QWidget):
         self.strip_existing_ocr_cb = QCheckBox("移除现有 OCR 文本")
         self.strip_existing_ocr_cb.setToolTip("在处理前移除PDF中已有的OCR文本层")
         
+        self.auto_triage_cb = QCheckBox("自动识别文档类型 (按文件选择 OCR / 跳过LLM)")
+        self.auto_triage_cb.setToolTip(
+            "转换前快速扫描每个PDF的文字层和图片：\n"
+            "扫描件自动开启 OCR，原生文本文档不做 OCR，\n"
+            "没有图片和表格的纯文字文档跳过 LLM 处理，不再需要手动套用预设。"
+        )
+
         basic_layout.addRow(self.format_lines_cb)
         basic_layout.addRow(self.force_ocr_cb)
+        basic_layout.addRow(self.auto_triage_cb)
         basic_layout.addRow(self.strip_existing_ocr_cb)
         
         # 添加语言选择
@@ -993,6 +599,28 @@ class PDFToMdApp(QWidget):
         self.max_tokens_spin.setValue(2000)
         self.max_tokens_spin.setSingleStep(100)
         llm_advanced_layout.addRow("Max Tokens:", self.max_tokens_spin)
+
+        self.llm_concurrency_spin = QSpinBox()
+        self.llm_concurrency_spin.setRange(1, 64)
+        self.llm_concurrency_spin.setValue(DEFAULT_LLM_CONCURRENCY)
+        self.llm_concurrency_spin.setToolTip("同时发往 LLM 服务的请求数；本地 Ollama/LM Studio 可按显卡能力调大")
+        llm_advanced_layout.addRow("并发请求数:", self.llm_concurrency_spin)
+
+        self.llm_rpm_spin = QSpinBox()
+        self.llm_rpm_spin.setRange(0, 100000)
+        self.llm_rpm_spin.setValue(0)
+        self.llm_rpm_spin.setSingleStep(10)
+        self.llm_rpm_spin.setSpecialValueText("不限")
+        self.llm_rpm_spin.setToolTip("每分钟最多发出的请求数，用于遵守云服务的速率限制")
+        llm_advanced_layout.addRow("每分钟请求上限:", self.llm_rpm_spin)
+
+        self.llm_cache_cb = QCheckBox("缓存 LLM 响应")
+        self.llm_cache_cb.setChecked(True)
+        self.llm_cache_cb.setToolTip(
+            "按提示词、图片内容和模型缓存 LLM 的响应（保存在程序目录的 llm_cache 中）。\n"
+            "用同样的 LLM 设置重新转换同一文档时不再调用 API。"
+        )
+        llm_advanced_layout.addRow("", self.llm_cache_cb)
         
         llm_advanced_group.setLayout(llm_advanced_layout)
         llm_layout.addRow(llm_advanced_group)
@@ -1012,6 +640,15 @@ class PDFToMdApp(QWidget):
         self.output_format_combo.setToolTip("选择输出文件的格式")
         advanced_layout.addRow("输出格式:", self.output_format_combo)
 
+        # 分块索引
+        self.chunk_index_cb = QCheckBox("生成分块索引 (.index.jsonl)")
+        self.chunk_index_cb.setToolTip(
+            "在每个 Markdown 文件旁写出检索用的分块索引：\n"
+            "每行一个分块，包含字节偏移、标题路径、页码范围和引用的图片，\n"
+            "下游可以直接按偏移截取分块，不需要重新解析 Markdown。仅用于 markdown 输出。"
+        )
+        advanced_layout.addRow(self.chunk_index_cb)
+
         # 调试模式
         self.debug_cb = QCheckBox("启用调试模式")
         self.debug_cb.setToolTip("输出详细的调试信息")
@@ -1021,9 +658,29 @@ class PDFToMdApp(QWidget):
         self.workers_spin = QSpinBox()
         self.workers_spin.setRange(1, 16)
         self.workers_spin.setValue(4)
-        self.workers_spin.setToolTip("并行处理的工作进程数")
+        self.workers_spin.setToolTip(
+            "并行处理的工作进程数。\n"
+            "大于1时每个进程独立加载一份 Marker 模型并从共享队列领取文件，\n"
+            "内存占用约为单进程的N倍，请根据内存/显存大小设置。"
+        )
         advanced_layout.addRow("工作进程数:", self.workers_spin)
 
+        # 大文件分片
+        self.shard_large_files_cb = QCheckBox("大文件自动分片并行转换")
+        self.shard_large_files_cb.setToolTip(
+            "页数超过分片页数的PDF按页码切分，由多个工作进程并行转换，\n"
+            "完成后按页码顺序合并Markdown和图片。需要工作进程数大于1，\n"
+            "且未设置页码范围、输出格式为 markdown 时生效。"
+        )
+        self.shard_pages_spin = QSpinBox()
+        self.shard_pages_spin.setRange(5, 1000)
+        self.shard_pages_spin.setValue(50)
+        self.shard_pages_spin.setSuffix(" 页/片")
+        self.shard_pages_spin.setEnabled(False)
+        self.shard_large_files_cb.toggled.connect(self.shard_pages_spin.setEnabled)
+        advanced_layout.addRow(self.shard_large_files_cb)
+        advanced_layout.addRow("分片页数:", self.shard_pages_spin)
+
         # 备用图片提取
         self.fallback_image_extraction_cb = QCheckBox("启用 PyMuPDF 作为备用图片提取引擎")
         self.fallback_image_extraction_cb.setToolTip(
@@ -1038,7 +695,7 @@ class PDFToMdApp(QWidget):
         image_layout = QFormLayout()
         
         self.compress_images_cb = QCheckBox("压缩提取的图片")
-        self.compress_images_cb.setToolTip("减小图片文件大小")
+        self.compress_images_cb.setToolTip("减小图片文件大小：按质量重新编码、限制最大尺寸、PNG 无损优化")
         
         self.image_quality_spin = QSpinBox()
         self.image_quality_spin.setRange(10, 100)
@@ -1046,9 +703,30 @@ class PDFToMdApp(QWidget):
         self.image_quality_spin.setSuffix("%")
         self.image_quality_spin.setEnabled(False)
         self.compress_images_cb.toggled.connect(self.image_quality_spin.setEnabled)
+
+        self.image_format_combo = QComboBox()
+        self.image_format_combo.addItems(["keep", "jpeg", "webp"])
+        self.image_format_combo.setToolTip(
+            "keep: 保持原格式（PNG 无损优化，JPEG 按质量重新编码）\n"
+            "jpeg / webp: 统一转换为该格式（带透明通道的图片不会转为 JPEG）"
+        )
+        self.image_format_combo.setEnabled(False)
+        self.compress_images_cb.toggled.connect(self.image_format_combo.setEnabled)
+
+        self.image_max_dimension_spin = QSpinBox()
+        self.image_max_dimension_spin.setRange(0, 10000)
+        self.image_max_dimension_spin.setValue(0)
+        self.image_max_dimension_spin.setSingleStep(256)
+        self.image_max_dimension_spin.setSuffix(" px")
+        self.image_max_dimension_spin.setSpecialValueText("不限制")
+        self.image_max_dimension_spin.setToolTip("图片长边超过该值时等比缩小")
+        self.image_max_dimension_spin.setEnabled(False)
+        self.compress_images_cb.toggled.connect(self.image_max_dimension_spin.setEnabled)
         
         image_layout.addRow(self.compress_images_cb)
         image_layout.addRow("图片质量:", self.image_quality_spin)
+        image_layout.addRow("图片格式:", self.image_format_combo)
+        image_layout.addRow("最大尺寸:", self.image_max_dimension_spin)
         
         self.extract_image_metadata_cb = QCheckBox("提取图片元数据")
         self.extract_image_metadata_cb.setToolTip("保存图片的尺寸、格式等信息")
@@ -1066,10 +744,67 @@ class PDFToMdApp(QWidget):
         self.cache_models_cb.setToolTip("首次下载后缓存模型，加快后续启动速度")
         
         self.low_memory_mode_cb = QCheckBox("低内存模式")
-        self.low_memory_mode_cb.setToolTip("适用于内存较小的系统，但可能降低处理速度")
+        self.low_memory_mode_cb.setToolTip(
+            "适用于内存较小的系统，但可能降低处理速度：\n"
+            "大文件按页码窗口逐段转换，每个文件结束后回收内存"
+        )
+
+        self.recycle_after_spin = QSpinBox()
+        self.recycle_after_spin.setRange(0, 10000)
+        self.recycle_after_spin.setValue(0)
+        self.recycle_after_spin.setSuffix(" 个文件")
+        self.recycle_after_spin.setSpecialValueText("不重启")
+        self.recycle_after_spin.setToolTip("工作进程每转换该数量的文件后重启，释放长时间运行中累积的内存")
+
+        self.max_worker_rss_spin = QSpinBox()
+        self.max_worker_rss_spin.setRange(0, 1024 * 1024)
+        self.max_worker_rss_spin.setValue(0)
+        self.max_worker_rss_spin.setSingleStep(512)
+        self.max_worker_rss_spin.setSuffix(" MB")
+        self.max_worker_rss_spin.setSpecialValueText("不限制")
+        self.max_worker_rss_spin.setToolTip("工作进程内存超过该值时，在当前文件结束后重启")
+
+        self.worker_memory_limit_spin = QSpinBox()
+        self.worker_memory_limit_spin.setRange(0, 1024 * 1024)
+        self.worker_memory_limit_spin.setValue(0)
+        self.worker_memory_limit_spin.setSingleStep(512)
+        self.worker_memory_limit_spin.setSuffix(" MB")
+        self.worker_memory_limit_spin.setSpecialValueText("不限制")
+        self.worker_memory_limit_spin.setToolTip(
+            "内存看门狗：工作进程内存超过该值时立即终止，\n"
+            "正在转换的文件由新进程重新转换一次（再次超限则记为失败）"
+        )
         
+        self.model_idle_timeout_spin = QSpinBox()
+        self.model_idle_timeout_spin.setRange(0, 1440)
+        self.model_idle_timeout_spin.setValue(10)
+        self.model_idle_timeout_spin.setSuffix(" 分钟")
+        self.model_idle_timeout_spin.setSpecialValueText("不自动释放")
+        self.model_idle_timeout_spin.setToolTip("转换结束后模型保持常驻以便下次快速启动，空闲超过该时间后自动释放内存")
+
+        self.conversion_cache_cb = QCheckBox("启用转换缓存")
+        self.conversion_cache_cb.setToolTip(
+            "按PDF内容和转换配置缓存结果。\n"
+            "文件和设置都未变化时直接恢复Markdown和图片，不再重新转换。"
+        )
+
+        self.cache_size_spin = QSpinBox()
+        self.cache_size_spin.setRange(100, 1024 * 1024)
+        self.cache_size_spin.setValue(DEFAULT_CACHE_MAX_SIZE_MB)
+        self.cache_size_spin.setSingleStep(512)
+        self.cache_size_spin.setSuffix(" MB")
+        self.cache_size_spin.setToolTip("缓存总大小上限，超出后淘汰最久未使用的结果")
+        self.cache_size_spin.setEnabled(False)
+        self.conversion_cache_cb.toggled.connect(self.cache_size_spin.setEnabled)
+
         performance_layout.addRow(self.cache_models_cb)
         performance_layout.addRow(self.low_memory_mode_cb)
+        performance_layout.addRow("进程重启间隔:", self.recycle_after_spin)
+        performance_layout.addRow("进程内存上限:", self.max_worker_rss_spin)
+        performance_layout.addRow("内存硬上限:", self.worker_memory_limit_spin)
+        performance_layout.addRow("模型空闲释放:", self.model_idle_timeout_spin)
+        performance_layout.addRow(self.conversion_cache_cb)
+        performance_layout.addRow("缓存上限:", self.cache_size_spin)
         
         performance_group.setLayout(performance_layout)
         advanced_layout.addRow(performance_group)
@@ -1154,6 +889,7 @@ class PDFToMdApp(QWidget):
         # 设置日志样式
         log_font = QFont("Consolas", 9)
         self.log_text.setFont(log_font)
+        self.log_text.document().setMaximumBlockCount(LOG_MAX_LINES)
         self.log_text.setStyleSheet("""
             QTextBrowser {
                 background-color: #f5f5f5;
@@ -1229,6 +965,9 @@ class PDFToMdApp(QWidget):
         self.btn_show_api_key.setEnabled(enabled)
         self.temperature_slider.setEnabled(enabled)
         self.max_tokens_spin.setEnabled(enabled)
+        self.llm_concurrency_spin.setEnabled(enabled)
+        self.llm_rpm_spin.setEnabled(enabled)
+        self.llm_cache_cb.setEnabled(enabled)
         
     def on_llm_service_changed(self, service):
         """LLM服务变更时更新UI"""
@@ -1273,9 +1012,32 @@ class PDFToMdApp(QWidget):
             self.btn_show_api_key.setText("👁")
 
     def test_llm_connection(self):
-        """测试LLM连接"""
-        # 这里可以实现实际的连接测试
-        QMessageBox.information(self, "测试连接", "LLM连接测试功能将在后续版本中实现。")
+        """测试LLM连接：在后台读取模型列表、发送最小请求并探测几次响应延迟"""
+        if self.llm_test_worker and self.llm_test_worker.isRunning():
+            return
+        llm_config = self.get_llm_config()
+        self.btn_test_llm.setEnabled(False)
+        self.btn_test_llm.setText("⏳ 测试中...")
+        self.log(f"正在测试 {self.llm_service_combo.currentText()} 连接...")
+        self.llm_test_worker = LlmTestWorker(llm_config, self.llm_service_combo.currentText())
+        self.llm_test_worker.test_finished.connect(self.on_llm_test_finished)
+        self.llm_test_worker.start()
+
+    def on_llm_test_finished(self, result, stats):
+        """LLM连接测试结束"""
+        self.btn_test_llm.setText("🔌 测试连接")
+        self.btn_test_llm.setEnabled(self.use_llm_cb.isChecked())
+        message = result['message']
+        if result['models']:
+            models = result['models']
+            message += "\n可用模型: " + ", ".join(models[:5]) + (" ..." if len(models) > 5 else "")
+        if stats:
+            message += "\n\n延迟探测:\n" + format_probe(stats)
+        self.log(message)
+        if result['ok']:
+            QMessageBox.information(self, "测试连接", message)
+        else:
+            QMessageBox.warning(self, "测试连接", f"连接失败:\n{message}")
 
     def select_files(self):
         """选择PDF文件"""
@@ -1292,121 +1054,89 @@ class PDFToMdApp(QWidget):
 
     def select_folder(self):
         """选择包含PDF的文件夹"""
+        if self.scan_worker and self.scan_worker.isRunning():
+            QMessageBox.information(self, "信息", "正在扫描文件夹，请稍候。")
+            return
         folder_path = QFileDialog.getExistingDirectory(
             self, "选择包含 PDF 的文件夹",
             self.settings.value("last_folder_dir", "")
         )
         if folder_path:
             self.settings.setValue("last_folder_dir", folder_path)
-            pdf_files = []
-            
-            # 递归搜索PDF文件
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if file.lower().endswith('.pdf'):
-                        pdf_files.append(os.path.join(root, file))
-            
-            if pdf_files:
-                self.add_files_to_list(pdf_files)
-                self.log(f"从文件夹 '{folder_path}' 中找到 {len(pdf_files)} 个PDF文件。")
-            else:
-                QMessageBox.information(self, "信息", "所选文件夹中未找到 PDF 文件。")
+            # 在后台线程中递归扫描，找到的文件分批加入列表
+            self.scan_found = 0
+            self.scan_worker = FolderScanWorker(folder_path)
+            self.scan_worker.batch_found.connect(self.on_scan_batch)
+            self.scan_worker.scan_finished.connect(self.on_scan_finished)
+            self.btn_select_folder.setEnabled(False)
+            self.log(f"正在扫描文件夹 '{folder_path}'...")
+            self.scan_worker.start()
+
+    def on_scan_batch(self, entries):
+        """接收后台扫描到的一批文件"""
+        if self.sender().is_stopped():
+            return  # 扫描已取消（例如列表被清空），丢弃仍在队列中的结果
+        self.scan_found += len(entries)
+        self.file_model.add_entries(entries)
+        self.update_file_stats()
+
+    def on_scan_finished(self, folder_path, cancelled):
+        """文件夹扫描结束"""
+        self.btn_select_folder.setEnabled(True)
+        self.scan_worker = None
+        if cancelled:
+            self.log(f"已取消扫描文件夹 '{folder_path}'，找到 {self.scan_found} 个PDF文件。", "WARN")
+        elif self.scan_found:
+            self.log(f"从文件夹 '{folder_path}' 中找到 {self.scan_found} 个PDF文件。")
+        else:
+            QMessageBox.information(self, "信息", "所选文件夹中未找到 PDF 文件。")
 
     def add_files_to_list(self, file_paths):
         """添加文件到列表"""
-        current_files = set(self.pdf_files)
-        new_files = []
-        
-        for fp in file_paths:
-            if fp not in current_files:
-                # 获取文件信息
-                file_info = self.get_file_info(fp)
-                
-                self.pdf_files.append(fp)
-                item = QListWidgetItem(f"{file_info['name']} ({file_info['size_str']})")
-                item.setToolTip(f"路径: {fp}\n大小: {file_info['size_str']}\n修改时间: {file_info['modified']}")
-                item.setData(Qt.UserRole, fp)  # 存储完整路径
-                
-                # 根据文件大小设置不同的图标颜色
-                if file_info['size_mb'] > 50:
-                    item.setForeground(QColor("#ff6b6b"))  # 大文件用红色
-                elif file_info['size_mb'] > 10:
-                    item.setForeground(QColor("#ffa94d"))  # 中等文件用橙色
-                
-                self.list_widget.addItem(item)
-                new_files.append(fp)
-        
+        new_files = self.file_model.add_entries(
+            stat_entry(fp) for fp in file_paths if fp not in self.file_model.catalog
+        )
         if new_files:
             self.log(f"已添加 {len(new_files)} 个新文件到列表。")
             self.update_file_stats()
 
-    def get_file_info(self, file_path):
-        """获取文件信息"""
-        try:
-            stat = os.stat(file_path)
-            size_bytes = stat.st_size
-            size_mb = size_bytes / (1024 * 1024)
-            
-            if size_mb < 1:
-                size_str = f"{size_bytes / 1024:.1f} KB"
-            else:
-                size_str = f"{size_mb:.1f} MB"
-            
-            modified_time = datetime.datetime.fromtimestamp(stat.st_mtime)
-            
-            return {
-                'name': os.path.basename(file_path),
-                'size_bytes': size_bytes,
-                'size_mb': size_mb,
-                'size_str': size_str,
-                'modified': modified_time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-        except:
-            return {
-                'name': os.path.basename(file_path),
-                'size_bytes': 0,
-                'size_mb': 0,
-                'size_str': '未知',
-                'modified': '未知'
-            }
-
     def update_file_stats(self):
         """更新文件统计信息"""
-        total_files = len(self.pdf_files)
+        total_files = self.file_model.rowCount()
         if total_files == 0:
             self.file_stats_label.setText("未选择文件")
         else:
-            total_size = sum(self.get_file_info(fp)['size_mb'] for fp in self.pdf_files)
+            total_size = self.file_model.total_size / (1024 * 1024)
             self.file_stats_label.setText(f"共 {total_files} 个文件，总大小: {total_size:.1f} MB")
 
     def remove_selected_files(self):
         """移除选中的文件"""
-        selected_items = self.list_widget.selectedItems()
-        if not selected_items:
+        selected_rows = [index.row() for index in self.list_widget.selectionModel().selectedRows()]
+        if not selected_rows:
             return
         
         # 确认删除
-        if len(selected_items) > 1:
+        if len(selected_rows) > 1:
             reply = QMessageBox.question(
                 self, '确认删除', 
-                f'确定要从列表中移除 {len(selected_items)} 个文件吗？',
+                f'确定要从列表中移除 {len(selected_rows)} 个文件吗？',
                 QMessageBox.Yes | QMessageBox.No, 
                 QMessageBox.No
             )
             if reply != QMessageBox.Yes:
                 return
         
-        for item in selected_items:
-            row = self.list_widget.row(item)
-            file_path = self.pdf_files.pop(row)
-            self.list_widget.takeItem(row)
-            self.log(f"已从列表移除: {os.path.basename(file_path)}")
+        removed = self.file_model.remove_rows(selected_rows)
+        if len(removed) == 1:
+            self.log(f"已从列表移除: {removed[0].name}")
+        else:
+            self.log(f"已从列表移除 {len(removed)} 个文件。")
         
         self.update_file_stats()
 
     def clear_file_list(self):
         """清空文件列表"""
-        if self.pdf_files:
+        if self.file_model.rowCount():
             reply = QMessageBox.question(
                 self, '确认清空', 
                 '确定要清空所有文件吗？',
@@ -1414,14 +1144,16 @@ class PDFToMdApp(QWidget):
                 QMessageBox.No
             )
             if reply == QMessageBox.Yes:
-                self.pdf_files.clear()
-                self.list_widget.clear()
+                if self.scan_worker and self.scan_worker.isRunning():
+                    self.scan_worker.stop()
+                    self.scan_worker.wait()
+                self.file_model.clear()
                 self.log("文件列表已清空。")
                 self.update_file_stats()
 
-    def preview_pdf(self, item):
+    def preview_pdf(self, index):
         """预览PDF文件（双击时）"""
-        file_path = item.data(Qt.UserRole)
+        file_path = index.data(Qt.UserRole)
         if file_path and os.path.exists(file_path):
             # 使用系统默认程序打开PDF
             import subprocess
@@ -1532,7 +1264,7 @@ class PDFToMdApp(QWidget):
 
     def quick_convert(self):
         """快速转换（使用默认设置）"""
-        if not self.pdf_files:
+        if not self.file_model.rowCount():
             QMessageBox.warning(self, "警告", "请先选择要转换的PDF文件。")
             return
         
@@ -1590,32 +1322,44 @@ class PDFToMdApp(QWidget):
         QMessageBox.information(self, "帮助", help_text)
 
     def log(self, message, level="INFO"):
-        """增强的日志记录功能，支持级别和颜色"""
-        timestamp = datetime.datetime.now().strftime('%H:%M:%S')
-        
-        color_map = {
-            "INFO": "#333333",    # 默认黑色
-            "SUCCESS": "#28a745", # 绿色
-            "ERROR": "#dc3545",   # 红色
-            "WARN": "#ffc107",    # 黄色
-            "DEBUG": "#6c757d",   # 灰色
-        }
-        
-        html_message = f'<span style="color: {color_map.get(level, "#333333")};"><b>[{timestamp} {level}]</b> {message}</span>'
-        
-        # 存储原始日志以供过滤
-        # 这里不应该使用setMetaInformation，而是直接追加日志
-        pass
+        """记录日志：写入缓冲区，由定时器批量显示（可在任意线程调用）"""
+        self.log_buffer.append(message, level)
+
+    def _format_log_html(self, records) -> str:
+        """把日志记录渲染为一段HTML，支持级别和颜色"""
+        lines = []
+        for record in records:
+            if self.log_levels is not None and record.level not in self.log_levels:
+                continue
+            color = LOG_COLORS.get(record.level, "#333333")
+            message = html.escape(record.message).replace("\n", "<br>")
+            lines.append(f'<span style="color: {color};"><b>[{record.time.strftime("%H:%M:%S")} {record.level}]</b> '
+                         f'{message}</span>')
+        return "<br>".join(lines)
+
+    def flush_log(self):
+        """把缓冲区中的新日志一次性追加到日志视图"""
+        records, dropped = self.log_buffer.drain(LOG_FLUSH_BATCH)
+        if not records and not dropped:
+            return
 
-        # 使用HTML追加到QTextBrowser
-        self.log_text.append(html_message)
-        self.log_text.moveCursor(self.log_text.textCursor().End)
-        QApplication.processEvents() # 确保UI及时更新
+        html_message = self._format_log_html(records)
+        if dropped:
+            notice = f'<span style="color: {LOG_COLORS["WARN"]};">... 日志过多，省略了 {dropped} 条 ...</span>'
+            html_message = notice + ("<br>" + html_message if html_message else "")
+        if html_message:
+            self.log_text.append(html_message)
+            self.log_text.moveCursor(self.log_text.textCursor().End)
 
     def filter_log(self, filter_text):
-        """根据选择过滤日志显示"""
-        # (此功能较为复杂，暂提供一个简单的思路实现)
-        QMessageBox.information(self, "功能说明", f"日志过滤功能 ({filter_text}) 正在开发中。")
+        """根据选择过滤日志显示：用环形缓冲中保留的记录重绘视图"""
+        self.log_levels = LOG_FILTERS.get(filter_text)
+        self.log_buffer.drain()  # 待显示的记录已包含在环形缓冲中，随重绘一起显示
+        self.log_text.clear()
+        html_message = self._format_log_html(self.log_buffer.snapshot())
+        if html_message:
+            self.log_text.append(html_message)
+            self.log_text.moveCursor(self.log_text.textCursor().End)
 
     def copy_log(self):
         """复制日志到剪贴板"""
@@ -1627,8 +1371,11 @@ class PDFToMdApp(QWidget):
         self.log("日志内容已复制到剪贴板。", "INFO")
         
     def save_log(self):
-        """保存日志文件"""
-        log_content = self.log_text.toPlainText()
+        """保存日志文件（保存缓冲区中的全部日志，不受过滤影响）"""
+        log_content = "\n".join(
+            f"[{record.time.strftime('%H:%M:%S')} {record.level}] {record.message}"
+            for record in self.log_buffer.snapshot()
+        )
         if not log_content:
             QMessageBox.information(self, "信息", "日志为空。")
             return
@@ -1647,6 +1394,7 @@ class PDFToMdApp(QWidget):
 
     def clear_log(self):
         """清空日志显示"""
+        self.log_buffer.clear()
         self.log_text.clear()
 
     def get_config_dict(self):
@@ -1660,62 +1408,57 @@ class PDFToMdApp(QWidget):
             config["format_lines"] = True
         if self.force_ocr_cb.isChecked():
             config["force_ocr"] = True
+        if self.auto_triage_cb.isChecked():
+            config["auto_triage"] = True
+        if self.chunk_index_cb.isChecked():
+            config["chunk_index"] = True
         if self.strip_existing_ocr_cb.isChecked():
             config["strip_existing_ocr"] = True
         if self.debug_cb.isChecked():
             config["debug"] = True
-        # worker进程数现在是Marker内部处理，UI的设置可以作为参考或传递
+        # 工作进程数由多进程调度器使用，不会传递给 Marker
         config["workers"] = self.workers_spin.value()
+        if self.shard_large_files_cb.isChecked():
+            config["shard_pages"] = self.shard_pages_spin.value()
+        if self.compress_images_cb.isChecked():
+            config["compress_images"] = True
+            config["image_format"] = self.image_format_combo.currentText()
+            config["image_quality"] = self.image_quality_spin.value()
+            config["image_max_dimension"] = self.image_max_dimension_spin.value()
+        if self.low_memory_mode_cb.isChecked():
+            config["low_memory"] = True
+        if self.recycle_after_spin.value():
+            config["recycle_after_files"] = self.recycle_after_spin.value()
+        if self.max_worker_rss_spin.value():
+            config["max_worker_rss_mb"] = self.max_worker_rss_spin.value()
+        if self.worker_memory_limit_spin.value():
+            config["worker_memory_limit_mb"] = self.worker_memory_limit_spin.value()
+        if self.conversion_cache_cb.isChecked():
+            config["cache_dir"] = os.path.join(os.getcwd(), "conversion_cache")
+            config["cache_max_size_mb"] = self.cache_size_spin.value()
         
         return config
 
     def get_llm_config(self):
         """获取LLM配置字典"""
-        service_map = {
-            "OpenAI": "marker.services.openai.OpenAIService",
-            "Ollama": "marker.services.ollama.OllamaService",
-            "Gemini": "marker.services.gemini.GoogleGeminiService",
-            "Claude": "marker.services.claude.ClaudeService",
-            "Azure OpenAI": "marker.services.azure_openai.AzureOpenAIService",
-            "LM Studio": "marker.services.openai.OpenAIService", # LM Studio 使用 OpenAI 兼容接口
-        }
-        service_name = self.llm_service_combo.currentText()
-        service_class = service_map.get(service_name, "")
-
-        llm_config = {"llm_service": service_class}
-
-        api_key = self.api_key_edit.text().strip()
-        base_url = self.base_url_edit.text().strip()
-        model_name = self.model_name_edit.text().strip()
-        
-        if service_name in ["OpenAI", "LM Studio"]:
-            if api_key: llm_config["openai_api_key"] = api_key
-            if base_url: llm_config["openai_base_url"] = base_url
-            if model_name: llm_config["model"] = model_name
-        elif service_name == "Ollama":
-            if base_url: llm_config["ollama_base_url"] = base_url
-            if model_name: llm_config["ollama_model"] = model_name
-        elif service_name == "Gemini":
-            if api_key: llm_config["gemini_api_key"] = api_key
-            if model_name: llm_config["gemini_model"] = model_name 
-        elif service_name == "Claude":
-            if api_key: llm_config["claude_api_key"] = api_key
-            if model_name: llm_config["claude_model_name"] = model_name
-        elif service_name == "Azure OpenAI":
-            if api_key: llm_config["azure_api_key"] = api_key
-            if base_url: llm_config["azure_endpoint"] = base_url
-            if model_name: llm_config["deployment_name"] = model_name
-        
-        # LLM 高级选项
-        llm_config["temperature"] = self.temperature_slider.value() / 100.0
-        llm_config["top_p"] = 1.0 # Marker config parser expects this
-        llm_config["max_tokens"] = self.max_tokens_spin.value()
-            
-        return llm_config
+        return build_llm_config(
+            self.llm_service_combo.currentText(),
+            api_key=self.api_key_edit.text().strip(),
+            base_url=self.base_url_edit.text().strip(),
+            model_name=self.model_name_edit.text().strip(),
+            temperature=self.temperature_slider.value() / 100.0,
+            max_tokens=self.max_tokens_spin.value(),
+            max_concurrency=self.llm_concurrency_spin.value(),
+            requests_per_minute=self.llm_rpm_spin.value(),
+            cache_dir=os.path.join(os.getcwd(), LLM_CACHE_DIRNAME) if self.llm_cache_cb.isChecked() else ""
+        )
 
     def start_conversion(self):
         """开始转换流程"""
-        if not self.pdf_files:
+        if self.scan_worker and self.scan_worker.isRunning():
+            QMessageBox.warning(self, "警告", "正在扫描文件夹，请等待扫描完成。")
+            return
+        if not self.file_model.rowCount():
             QMessageBox.warning(self, "警告", "请先选择要转换的 PDF 文件。")
             return
 
@@ -1740,7 +1483,7 @@ class PDFToMdApp(QWidget):
 
         self.log("="*60, "INFO")
         self.log("开始新的转换任务...", "INFO")
-        self.log(f"文件总数: {len(self.pdf_files)}", "INFO")
+        self.log(f"文件总数: {self.file_model.rowCount()}", "INFO")
         self.log(f"输出目录: {output_dir}", "INFO")
         self.log(f"基础配置: {config_dict}", "DEBUG")
         if use_llm:
@@ -1755,13 +1498,16 @@ class PDFToMdApp(QWidget):
 
         self.set_ui_state_for_conversion(True)
 
+        get_model_registry().idle_timeout = self.model_idle_timeout_spin.value() * 60
+
         self.worker_thread = ConversionWorker(
-            self.pdf_files, output_dir, config_dict, use_llm, llm_service_config,
-            use_fallback_extraction=use_fallback
+            list(self.file_model.paths), output_dir, config_dict, use_llm, llm_service_config,
+            use_fallback_extraction=use_fallback,
+            resume=self.resume_cb.isChecked(),
+            log_buffer=self.log_buffer
         )
 
         # 连接所有信号
-        self.worker_thread.log_signal.connect(lambda msg: self.log(msg, "INFO"))
         self.worker_thread.error_signal.connect(self.on_conversion_error)
         self.worker_thread.progress_signal.connect(self.progress_bar.setValue)
         self.worker_thread.file_progress_signal.connect(self.update_file_progress)
@@ -1778,10 +1524,21 @@ class PDFToMdApp(QWidget):
                 self.btn_stop.setEnabled(False)
                 self.worker_thread.stop()
 
+    def release_models(self):
+        """手动释放常驻的 Marker 模型"""
+        registry = get_model_registry()
+        if not registry.is_loaded:
+            self.log("当前没有已加载的模型。", "INFO")
+        elif registry.unload():
+            self.log("已释放常驻的 Marker 模型。", "SUCCESS")
+        else:
+            self.log("模型正在被转换任务使用，无法释放。", "WARN")
+
     def set_ui_state_for_conversion(self, is_running):
         """设置UI在转换开始和结束时的状态"""
         self.btn_start.setEnabled(not is_running)
         self.btn_stop.setEnabled(is_running)
+        self.btn_release_models.setEnabled(not is_running)
         self.list_widget.setEnabled(not is_running)
         self.tabs.setEnabled(not is_running)
         self.action_group.setEnabled(not is_running)
@@ -1848,6 +1605,7 @@ class PDFToMdApp(QWidget):
         self.settings.setValue("page_range", self.page_range_edit.text())
         self.settings.setValue("format_lines", self.format_lines_cb.isChecked())
         self.settings.setValue("force_ocr", self.force_ocr_cb.isChecked())
+        self.settings.setValue("auto_triage", self.auto_triage_cb.isChecked())
         self.settings.setValue("strip_existing_ocr", self.strip_existing_ocr_cb.isChecked())
         self.settings.setValue("language", self.language_combo.currentText())
         self.settings.setValue("use_llm", self.use_llm_cb.isChecked())
@@ -1857,12 +1615,30 @@ class PDFToMdApp(QWidget):
         self.settings.setValue("model_name", self.model_name_edit.text())
         self.settings.setValue("temperature", self.temperature_slider.value())
         self.settings.setValue("max_tokens", self.max_tokens_spin.value())
+        self.settings.setValue("llm_max_concurrency", self.llm_concurrency_spin.value())
+        self.settings.setValue("llm_requests_per_minute", self.llm_rpm_spin.value())
+        self.settings.setValue("llm_cache", self.llm_cache_cb.isChecked())
         self.settings.setValue("output_format", self.output_format_combo.currentText())
+        self.settings.setValue("chunk_index", self.chunk_index_cb.isChecked())
         self.settings.setValue("debug", self.debug_cb.isChecked())
         self.settings.setValue("workers", self.workers_spin.value())
+        self.settings.setValue("shard_large_files", self.shard_large_files_cb.isChecked())
+        self.settings.setValue("shard_pages", self.shard_pages_spin.value())
+        self.settings.setValue("model_idle_timeout", self.model_idle_timeout_spin.value())
+        self.settings.setValue("low_memory", self.low_memory_mode_cb.isChecked())
+        self.settings.setValue("recycle_after_files", self.recycle_after_spin.value())
+        self.settings.setValue("max_worker_rss_mb", self.max_worker_rss_spin.value())
+        self.settings.setValue("worker_memory_limit_mb", self.worker_memory_limit_spin.value())
+        self.settings.setValue("conversion_cache", self.conversion_cache_cb.isChecked())
+        self.settings.setValue("cache_max_size_mb", self.cache_size_spin.value())
         self.settings.setValue("fallback_extraction", self.fallback_image_extraction_cb.isChecked())
+        self.settings.setValue("compress_images", self.compress_images_cb.isChecked())
+        self.settings.setValue("image_quality", self.image_quality_spin.value())
+        self.settings.setValue("image_format", self.image_format_combo.currentText())
+        self.settings.setValue("image_max_dimension", self.image_max_dimension_spin.value())
         self.settings.setValue("auto_open_output", self.auto_open_output_cb.isChecked())
         self.settings.setValue("create_subfolder", self.create_subfolder_cb.isChecked())
+        self.settings.setValue("resume", self.resume_cb.isChecked())
         self.log("设置已保存。", "DEBUG")
 
     def load_settings(self):
@@ -1871,6 +1647,7 @@ class PDFToMdApp(QWidget):
         self.page_range_edit.setText(self.settings.value("page_range", ""))
         self.format_lines_cb.setChecked(self.settings.value("format_lines", True, type=bool))
         self.force_ocr_cb.setChecked(self.settings.value("force_ocr", False, type=bool))
+        self.auto_triage_cb.setChecked(self.settings.value("auto_triage", False, type=bool))
         self.strip_existing_ocr_cb.setChecked(self.settings.value("strip_existing_ocr", False, type=bool))
         
         lang = self.settings.value("language", "自动检测")
@@ -1887,22 +1664,46 @@ class PDFToMdApp(QWidget):
         self.model_name_edit.setText(self.settings.value("model_name", ""))
         self.temperature_slider.setValue(self.settings.value("temperature", 30, type=int))
         self.max_tokens_spin.setValue(self.settings.value("max_tokens", 2000, type=int))
+        self.llm_concurrency_spin.setValue(
+            self.settings.value("llm_max_concurrency", DEFAULT_LLM_CONCURRENCY, type=int))
+        self.llm_rpm_spin.setValue(self.settings.value("llm_requests_per_minute", 0, type=int))
+        self.llm_cache_cb.setChecked(self.settings.value("llm_cache", True, type=bool))
         
         output_format = self.settings.value("output_format", "markdown")
         index = self.output_format_combo.findText(output_format)
         if index >= 0: self.output_format_combo.setCurrentIndex(index)
+        self.chunk_index_cb.setChecked(self.settings.value("chunk_index", False, type=bool))
             
         self.debug_cb.setChecked(self.settings.value("debug", False, type=bool))
         self.workers_spin.setValue(self.settings.value("workers", 4, type=int))
+        self.shard_large_files_cb.setChecked(self.settings.value("shard_large_files", False, type=bool))
+        self.shard_pages_spin.setValue(self.settings.value("shard_pages", 50, type=int))
+        self.model_idle_timeout_spin.setValue(self.settings.value("model_idle_timeout", 10, type=int))
+        self.low_memory_mode_cb.setChecked(self.settings.value("low_memory", False, type=bool))
+        self.recycle_after_spin.setValue(self.settings.value("recycle_after_files", 0, type=int))
+        self.max_worker_rss_spin.setValue(self.settings.value("max_worker_rss_mb", 0, type=int))
+        self.worker_memory_limit_spin.setValue(self.settings.value("worker_memory_limit_mb", 0, type=int))
+        self.conversion_cache_cb.setChecked(self.settings.value("conversion_cache", False, type=bool))
+        self.cache_size_spin.setValue(self.settings.value("cache_max_size_mb", DEFAULT_CACHE_MAX_SIZE_MB, type=int))
         self.fallback_image_extraction_cb.setChecked(self.settings.value("fallback_extraction", True, type=bool))
+        self.compress_images_cb.setChecked(self.settings.value("compress_images", False, type=bool))
+        self.image_quality_spin.setValue(self.settings.value("image_quality", 85, type=int))
+        self.image_format_combo.setCurrentText(self.settings.value("image_format", "keep"))
+        self.image_max_dimension_spin.setValue(self.settings.value("image_max_dimension", 0, type=int))
         self.auto_open_output_cb.setChecked(self.settings.value("auto_open_output", True, type=bool))
         self.create_subfolder_cb.setChecked(self.settings.value("create_subfolder", False, type=bool))
+        self.resume_cb.setChecked(self.settings.value("resume", False, type=bool))
 
         self.toggle_llm_options(Qt.Checked if self.use_llm_cb.isChecked() else Qt.Unchecked)
         self.log("设置已加载。", "DEBUG")
 
     def closeEvent(self, event):
         """处理窗口关闭事件"""
+        if self.scan_worker and self.scan_worker.isRunning():
+            self.scan_worker.stop()
+            self.scan_worker.wait()
+        if self.llm_test_worker and self.llm_test_worker.isRunning():
+            self.llm_test_worker.wait(2000)
         if self.worker_thread and self.worker_thread.isRunning():
             reply = QMessageBox.question(self, '确认退出', '转换正在进行中，确定要退出吗？',
                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
@@ -0,0 +1 @@
+"""PDF to Markdown 转换核心（不依赖 PyQt5，可在工作进程和命令行中使用）"""
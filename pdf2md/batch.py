@@ -0,0 +1,306 @@
+# pdf2md/batch.py
+
+import os
+import datetime
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from .journal import JobJournal
+from .engine import ConversionEngine, ModelLoadError, MARKER_AVAILABLE, MARKER_IMPORT_ERROR
+from .memory import recycle_options
+from .scheduler import ProcessPoolScheduler
+
+
+def _noop(*args):
+    pass
+
+
+class BatchRunner:
+    """批量转换流程：在当前线程或多进程中转换全部文件并生成报告
+
+    与界面无关，进度通过回调通知：
+        log(message)
+        on_progress(percent)
+        on_file_started(filename, current, total)
+        on_file_finished(summary)
+    run() 返回结果字典，status 为 completed / aborted / failed。
+    每个文件的状态记录在输出目录的任务日志中；resume=True 时跳过上次已完成的文件。
+    """
+
+    def __init__(self, pdf_files: List[str], output_dir, config_dict, use_llm, llm_service_config,
+                 use_fallback_extraction=False,
+                 log: Optional[Callable[[str], None]] = None,
+                 on_progress: Optional[Callable[[int], None]] = None,
+                 on_file_started: Optional[Callable[[str, int, int], None]] = None,
+                 on_file_finished: Optional[Callable[[Dict], None]] = None,
+                 resume: bool = False):
+        self.pdf_files = list(pdf_files)
+        self.output_dir = output_dir
+        self.config_dict = config_dict
+        self.use_llm = use_llm
+        self.llm_service_config = llm_service_config
+        self.use_fallback_extraction = use_fallback_extraction
+        self.log = log or _noop
+        self.on_progress = on_progress or _noop
+        self.on_file_started = on_file_started or _noop
+        self.on_file_finished = on_file_finished or _noop
+        self.resume = resume
+        self.recycle = recycle_options(config_dict)
+        self.journal: Optional[JobJournal] = None
+        self._stop_event = threading.Event()
+        self.scheduler = None
+        self.engine = ConversionEngine(
+            output_dir, config_dict, use_llm, llm_service_config,
+            use_fallback_extraction=use_fallback_extraction,
+            log=self.log,
+            should_continue=lambda: not self._stop_event.is_set()
+        )
+
+    @property
+    def is_running(self) -> bool:
+        return not self._stop_event.is_set()
+
+    def stop(self):
+        """请求停止：当前文件结束后不再开始新的文件"""
+        self._stop_event.set()
+        if self.scheduler:
+            self.scheduler.stop()
+
+    def run(self) -> Dict:
+        if not MARKER_AVAILABLE:
+            return self._result('failed', f"Marker 库未正确安装或导入: {MARKER_IMPORT_ERROR}")
+
+        if not self.pdf_files:
+            return self._result('failed', "没有 PDF 文件需要转换。")
+
+        start_time = datetime.datetime.now()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        try:
+            self.log(f"开始转换 {len(self.pdf_files)} 个 PDF 文件...")
+            self.log(f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+            resumed_summaries, pdf_files = self._open_journal()
+
+            workers = max(1, int(self.config_dict.get("workers", 1)))
+            if not self.config_dict.get("shard_pages"):
+                # 不分片时工作进程数不超过文件数；分片后单个大文件也能用满所有进程
+                workers = min(workers, len(pdf_files))
+            if not pdf_files:
+                conversion_summaries = []
+            elif workers > 1 or any(self.recycle.values()):
+                # 需要回收工作进程时，即使只有一个进程也在子进程中转换
+                conversion_summaries = self._run_with_process_pool(pdf_files, workers)
+            else:
+                conversion_summaries = self._run_in_thread(pdf_files)
+            conversion_summaries = resumed_summaries + conversion_summaries
+
+            if not self.is_running:
+                self.log("转换任务被用户中止。")
+                return self._result('aborted', "任务被中止。", conversion_summaries)
+
+            total_files = len(self.pdf_files)
+            successful = sum(1 for summary in conversion_summaries if summary['success'])
+            failed = len(conversion_summaries) - successful
+
+            # 生成转换报告
+            end_time = datetime.datetime.now()
+            total_time = (end_time - start_time).total_seconds()
+
+            self.on_progress(100)
+            self.engine._generate_conversion_report(conversion_summaries, successful, failed, total_time)
+
+            if failed > 0:
+                message = f"转换完成! 成功: {successful}/{total_files}, 失败: {failed}"
+            else:
+                message = f"转换完成! 成功: {successful}/{total_files}"
+            return self._result('completed', message, conversion_summaries, total_time)
+
+        except ModelLoadError as model_load_error:
+            self.log(f"严重错误: {model_load_error}")
+            self.log(traceback.format_exc())
+            return self._result('failed', str(model_load_error))
+        except Exception as e:
+            self.log(f"严重错误: {e}")
+            self.log(traceback.format_exc())
+            return self._result('failed', f"转换因严重错误失败: {e}")
+        finally:
+            # 归还模型引用，模型保持常驻以便下一批次复用
+            self.engine.close()
+
+    def _open_journal(self):
+        """打开任务日志；续传模式下返回 (已完成文件的摘要, 仍需转换的文件)"""
+        try:
+            self.journal = JobJournal(self.output_dir)
+            self.journal.compact()
+        except Exception as journal_error:
+            self.log(f"警告: 无法打开任务日志，本次不记录进度: {journal_error}")
+            self.journal = None
+            return [], list(self.pdf_files)
+
+        resumed_summaries, pdf_files = [], []
+        for pdf_path in self.pdf_files:
+            summary = self.journal.completed_summary(pdf_path) if self.resume else None
+            if summary is not None:
+                resumed_summaries.append(summary)
+            else:
+                pdf_files.append(pdf_path)
+
+        if self.resume:
+            self.log(f"断点续传: 跳过 {len(resumed_summaries)} 个已完成的文件，待转换 {len(pdf_files)} 个")
+        self._write_journal(self.journal.mark_pending, pdf_files)
+        return resumed_summaries, pdf_files
+
+    def _write_journal(self, method, *args):
+        """写入任务日志；失败只记录警告，不影响转换"""
+        if self.journal is None:
+            return
+        try:
+            method(*args)
+        except Exception as journal_error:
+            self.log(f"警告: 写入任务日志失败: {journal_error}")
+
+    def _file_started(self, pdf_path: str, current: int, total: int):
+        if self.journal is not None:
+            self._write_journal(self.journal.mark_running, pdf_path)
+        self.on_file_started(os.path.basename(pdf_path), current, total)
+
+    def _file_finished(self, summary: Dict):
+        if self.journal is not None:
+            output_path = os.path.join(self.output_dir,
+                                       self.engine.writer.output_name(os.path.splitext(summary['file'])[0]))
+            self._write_journal(self.journal.mark_finished, summary, output_path)
+        self.on_file_finished(summary)
+
+    def _result(self, status: str, message: str, summaries: Optional[List[Dict]] = None,
+                total_time: float = 0.0) -> Dict:
+        summaries = summaries or []
+        successful = sum(1 for summary in summaries if summary['success'])
+        return {
+            'status': status,
+            'message': message,
+            'summaries': summaries,
+            'successful': successful,
+            'failed': len(summaries) - successful,
+            'total_time': total_time,
+        }
+
+    def _run_in_thread(self, pdf_files: List[str]) -> List[Dict]:
+        """在当前线程中逐个转换；模型加载失败时抛出 ModelLoadError"""
+        total_files = len(pdf_files)
+        conversion_summaries = []
+
+        for i, pdf_path in enumerate(pdf_files):
+            if not self.is_running:
+                break
+
+            self._file_started(pdf_path, i + 1, total_files)
+            self.log(f"\n[{i+1}/{total_files}] 正在转换: {os.path.basename(pdf_path)}")
+            self.on_progress(int((i / total_files) * 100))
+
+            # 模型在第一个未命中缓存的文件处才加载
+            summary = self.engine.convert_file(pdf_path)
+            self._file_finished(summary)
+            conversion_summaries.append(summary)
+
+        return conversion_summaries
+
+    def _run_with_process_pool(self, pdf_files: List[str], workers: int) -> List[Dict]:
+        """使用多进程调度器并行转换，返回按输入顺序排列的转换摘要"""
+        total_files = len(pdf_files)
+        self.log(f"启用多进程转换: {workers} 个工作进程 (每个进程独立加载一次模型)")
+        if self.recycle['recycle_after_files']:
+            self.log(f"工作进程每完成 {self.recycle['recycle_after_files']} 个任务后重启")
+        if self.recycle['max_worker_rss_mb']:
+            self.log(f"工作进程内存超过 {self.recycle['max_worker_rss_mb']} MB 时在文件之间重启")
+        if self.recycle['worker_memory_limit_mb']:
+            self.log(f"内存看门狗: 工作进程内存超过 {self.recycle['worker_memory_limit_mb']} MB 时立即终止并重新排队当前文件")
+
+        self.scheduler = ProcessPoolScheduler(
+            workers, self.output_dir, self.config_dict, self.use_llm, self.llm_service_config,
+            use_fallback_extraction=self.use_fallback_extraction, recycle=self.recycle
+        )
+        if not self.is_running:
+            self.scheduler = None
+            return []
+
+        results: Dict[int, Dict] = {}
+        fatal_errors = []
+        shard_plan, shard_cache_keys, shard_stages = self._plan_shards(pdf_files, results)
+        shard_start_times = {}
+
+        try:
+            self.scheduler.start(pdf_files, shard_plan, skip=results.keys())
+            if not self.is_running:
+                self.scheduler.stop()
+            for kind, worker_id, payload in self.scheduler.events():
+                if kind == "log":
+                    self.log(f"[进程{worker_id}] {payload}")
+                elif kind == "fatal":
+                    fatal_errors.append(payload)
+                    self.log(f"[进程{worker_id}] 严重错误: {payload}")
+                elif kind == "started":
+                    index, pdf_path = payload
+                    shard_start_times[index] = datetime.datetime.now()
+                    self._file_started(pdf_path, len(results) + 1, total_files)
+                    self.log(f"\n[进程{worker_id}] [{index + 1}/{total_files}] 正在转换: {os.path.basename(pdf_path)}")
+                elif kind == "result":
+                    index, summary = payload
+                    results[index] = summary
+                    self._file_finished(summary)
+                    self.on_progress(int((len(results) / total_files) * 100))
+                elif kind == "shards_done":
+                    index, shard_results = payload
+                    pdf_path = pdf_files[index]
+                    self.log(f"\n[{index + 1}/{total_files}] 正在合并分片: {os.path.basename(pdf_path)}")
+                    summary = self.engine.merge_shards(
+                        pdf_path, shard_results, shard_cache_keys.get(index),
+                        shard_start_times.get(index, datetime.datetime.now()), shard_stages.get(index)
+                    )
+                    results[index] = summary
+                    self._file_finished(summary)
+                    self.on_progress(int((len(results) / total_files) * 100))
+        finally:
+            process_count = self.scheduler.process_count
+            self.scheduler.close()
+            self.scheduler = None
+
+        if fatal_errors and len(fatal_errors) >= process_count and not any(s['success'] for s in results.values()):
+            raise ModelLoadError(fatal_errors[0].splitlines()[0])
+
+        return [results[index] for index in sorted(results)]
+
+    def _plan_shards(self, pdf_files: List[str], results: Dict[int, Dict]):
+        """为超过分片页数的大文件规划页码分片
+
+        分片前先查缓存，命中的文件直接写入 results，不再入队。
+        返回 (分片计划, 各分片文件的缓存键, 各分片文件在主进程中已记录的阶段耗时)。
+        """
+        shard_pages = int(self.config_dict.get("shard_pages") or 0)
+        if shard_pages <= 0 or not self.engine.writer.markdown_pipeline:
+            return {}, {}, {}
+
+        shard_plan, cache_keys, stages = {}, {}, {}
+        for index, pdf_path in enumerate(pdf_files):
+            if not self.is_running:
+                break
+            shards = self.engine.plan_shards(pdf_path, shard_pages)
+            if len(shards) < 2:
+                continue
+
+            timer = self.engine.timer
+            timer.reset()
+            with timer.stage('cache'):
+                cache_key, cached_summary = self.engine.lookup_cache(pdf_path)
+            if cached_summary is not None:
+                cached_summary['stages'] = timer.snapshot()
+                results[index] = cached_summary
+                self._file_finished(cached_summary)
+                continue
+
+            self.log(f"大文件分片: {os.path.basename(pdf_path)} 切分为 {len(shards)} 个分片 (每片最多 {shard_pages} 页)")
+            shard_plan[index] = shards
+            cache_keys[index] = cache_key
+            stages[index] = dict(timer.times)
+        return shard_plan, cache_keys, stages
@@ -0,0 +1,195 @@
+# pdf2md/cache.py
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+from contextlib import closing
+from typing import Dict, Optional
+
+from .chunk_index import CHUNK_INDEX_SUFFIX, rebase_chunk_index
+
+# 缓存格式或转换逻辑发生不兼容变化时递增，使旧缓存全部失效
+CACHE_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+
+# 这些输出文件以 "<PDF名>_images/" 引用图片，恢复到不同文件名时需要改写引用
+TEXT_LINKED_SUFFIXES = (".md", ".html")
+
+
+def file_digest(path: str) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_digest(config: Dict) -> str:
+    """计算配置字典的规范化哈希（键排序，与插入顺序无关）"""
+    canonical = json.dumps(config, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ConversionCache:
+    """按内容寻址的转换结果缓存
+
+    键为 PDF 内容哈希与有效配置哈希的组合，值为生成的输出文件（Markdown/JSON/HTML/分块）、
+    图片文件夹和转换元数据。索引保存在 SQLite 中（多进程可同时读写），
+    总大小超过 max_bytes 时按最近最少使用的顺序淘汰。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(cache_dir, "entries")
+        self.index_path = os.path.join(cache_dir, "index.sqlite3")
+        os.makedirs(self.entries_dir, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.entries_dir, key[:2], key)
+
+    @staticmethod
+    def make_key(pdf_digest: str, cfg_digest: str) -> str:
+        """组合PDF哈希与配置哈希得到缓存键"""
+        return hashlib.sha256(f"v{CACHE_VERSION}:{pdf_digest}:{cfg_digest}".encode('ascii')).hexdigest()
+
+    def restore(self, key: str, output_dir: str, pdf_stem: str) -> Optional[Dict]:
+        """命中时把缓存的输出文件和图片恢复到输出目录，返回元数据；未命中返回 None"""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT key FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            # 旧版本的条目只有 output.md
+            outputs = meta.get('outputs') or [".md"]
+            contents = {}
+            for suffix in outputs:
+                path = os.path.join(entry_dir, "output" + suffix)
+                if suffix.endswith(TEXT_LINKED_SUFFIXES) or suffix == CHUNK_INDEX_SUFFIX:
+                    # newline='': 保持原有换行符，分块索引中的字节偏移才能对上
+                    with open(path, 'r', encoding='utf-8', newline='') as f:
+                        contents[suffix] = f.read()
+                elif not os.path.isfile(path):
+                    raise OSError(f"缺少缓存文件 output{suffix}")
+        except (OSError, ValueError):
+            # 缓存文件被外部删除或损坏，移除索引
+            self._remove(key)
+            return None
+
+        os.makedirs(output_dir, exist_ok=True)
+        cached_stem = meta.get('pdf_stem', pdf_stem)
+        for suffix in outputs:
+            target = os.path.join(output_dir, pdf_stem + suffix)
+            if suffix not in contents:
+                shutil.copyfile(os.path.join(entry_dir, "output" + suffix), target)
+                continue
+            content = contents[suffix]
+            # 同一份PDF换了文件名时，修正图片文件夹的引用（分块索引随之修正字节偏移）
+            if cached_stem != pdf_stem:
+                old, new = f"{cached_stem}_images/", f"{pdf_stem}_images/"
+                if suffix == CHUNK_INDEX_SUFFIX:
+                    content = rebase_chunk_index(content, contents.get(".md", "").encode('utf-8'), old, new)
+                else:
+                    content = content.replace(old, new)
+            with open(target, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+
+        cached_images = os.path.join(entry_dir, "images")
+        if os.path.isdir(cached_images):
+            shutil.copytree(cached_images, os.path.join(output_dir, f"{pdf_stem}_images"), dirs_exist_ok=True)
+
+        return meta
+
+    def put(self, key: str, outputs: Dict[str, str], images_dir: Optional[str], meta: Dict):
+        """把一次成功转换的结果写入缓存，并按LRU淘汰超出容量的条目
+
+        outputs: 文件名后缀 -> 输出文件路径，例如 {".md": "out/doc.md"}；
+        后缀记录在元数据中，恢复时拼接到新的 PDF 文件名之后。
+        """
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+
+        tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            for suffix, path in outputs.items():
+                shutil.copyfile(path, os.path.join(tmp_dir, "output" + suffix))
+            meta = dict(meta, outputs=list(outputs))
+            if images_dir and os.path.isdir(images_dir):
+                shutil.copytree(images_dir, os.path.join(tmp_dir, "images"))
+            with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # 其他进程已写入同一条目，或磁盘写入失败，放弃本次缓存
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, _dir_size(entry_dir), now, now)
+            )
+        self._evict()
+
+    def _evict(self):
+        """总大小超过上限时淘汰最久未使用的条目"""
+        with closing(self._connect()) as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC").fetchall()
+
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+    def _remove(self, key: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def clear(self):
+        """清空全部缓存"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries")
+        shutil.rmtree(self.entries_dir, ignore_errors=True)
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    def total_size(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
@@ -0,0 +1,148 @@
+# pdf2md/chunk_index.py
+
+import json
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Sequence, Tuple
+
+from .image_links import IMAGE_LINK_PATTERN, link_page
+from .image_placement import HEADER_PATTERN, PAGE_MARKER_PATTERN
+
+# 写在 Markdown 旁边的分块索引: <PDF名>.index.jsonl
+CHUNK_INDEX_SUFFIX = ".index.jsonl"
+
+# 单个分块的字节数上限：没有标题的长章节在段落边界处继续切分
+CHUNK_MAX_BYTES = 8192
+
+
+class _Chunk:
+    __slots__ = ('heading', 'byte_start', 'byte_end', 'pages', 'images', 'has_text')
+
+    def __init__(self, heading: List[str], byte_start: int):
+        self.heading = heading
+        self.byte_start = byte_start
+        self.byte_end = byte_start
+        self.pages: List[int] = []
+        self.images: List[str] = []
+        self.has_text = False
+
+    def entry(self, chunk_id: int) -> Dict:
+        return {
+            'id': chunk_id,
+            'heading': self.heading,
+            'byte_start': self.byte_start,
+            'byte_end': self.byte_end,
+            'page_start': min(self.pages) if self.pages else None,
+            'page_end': max(self.pages) if self.pages else None,
+            'images': self.images,
+        }
+
+
+def build_chunk_index(markdown_content: str, body_start: int = 0,
+                      page_offsets: Sequence[Tuple[int, int]] = (),
+                      max_bytes: int = CHUNK_MAX_BYTES) -> List[Dict]:
+    """对最终写出的 Markdown 做一次正向扫描，按标题（及段落边界）切分为检索用的分块
+
+    每个分块记录在 UTF-8 文件中的字节区间 [byte_start, byte_end)、标题路径、页码范围和引用的图片。
+    body_start: 正文开始的字符位置，之前的元数据头不计入分块。
+    page_offsets: [(字符位置, 页码)]，移除分页标记时记录的每页起点；
+                  Markdown 中保留的分页标记在扫描时直接识别。
+    没有分页信息时，页码取自图片文件名中的页码。
+    """
+    page_positions = [offset for offset, _ in page_offsets]
+    page_numbers = [page for _, page in page_offsets]
+
+    chunks: List[_Chunk] = []
+    heading_path: List[Tuple[int, str]] = []
+    in_code_block = False
+    marker_page = None
+    char_pos = body_start
+    byte_pos = len(markdown_content[:body_start].encode('utf-8'))
+    current = _Chunk([], byte_pos)
+
+    for line in markdown_content[body_start:].splitlines(keepends=True):
+        line_bytes = len(line.encode('utf-8'))
+        stripped = line.strip()
+        is_fence = stripped.startswith('```')
+        is_header = not in_code_block and not is_fence and bool(HEADER_PATTERN.match(line))
+        at_break = not in_code_block and not stripped
+
+        if is_header:
+            level = len(line) - len(line.lstrip('#'))
+            while heading_path and heading_path[-1][0] >= level:
+                heading_path.pop()
+            heading_path.append((level, line.strip('#').strip()))
+
+        # 标题开始新的分块；超长的分块在空行（代码块之外）处切开
+        if (is_header and current.has_text) or (
+                at_break and current.byte_end - current.byte_start >= max_bytes):
+            chunks.append(current)
+            current = _Chunk([text for _, text in heading_path], byte_pos)
+        elif is_header:
+            current.heading = [text for _, text in heading_path]
+
+        if is_fence:
+            in_code_block = not in_code_block
+
+        marker = None if in_code_block else PAGE_MARKER_PATTERN.match(stripped)
+        if marker:
+            marker_page = int(marker.group(1)) + 1
+        elif stripped:
+            k = bisect_right(page_positions, char_pos)
+            page = page_numbers[k - 1] if k else marker_page
+            if page is not None:
+                current.pages.append(page)
+            current.has_text = True
+            if not in_code_block:
+                for match in IMAGE_LINK_PATTERN.finditer(line):
+                    target = match.group(2)
+                    current.images.append(target)
+                    if page is None and not page_positions and marker_page is None:
+                        target_page = link_page(target)
+                        if target_page is not None:
+                            current.pages.append(target_page)
+
+        char_pos += len(line)
+        byte_pos += line_bytes
+        if not current.has_text:
+            # 分块从第一行有内容的行开始（跳过空行和分页标记）
+            current.byte_start = current.byte_end = byte_pos
+        elif stripped and not marker:
+            current.byte_end = byte_pos
+
+    if current.has_text:
+        chunks.append(current)
+    return [chunk.entry(k) for k, chunk in enumerate(chunks)]
+
+
+def write_chunk_index(path: str, entries: List[Dict]) -> int:
+    """写出 JSON Lines 格式的分块索引，返回写出的字节数"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+            f.write('\n')
+        return f.tell()
+
+
+def rebase_chunk_index(index_text: str, markdown_bytes: bytes, old: str, new: str) -> str:
+    """Markdown 中的 old 全部替换为 new 之后，修正索引中的字节偏移和图片引用
+
+    用于缓存恢复到另一个文件名时（"旧名_images/" -> "新名_images/"）；markdown_bytes 是替换前的内容。
+    """
+    old_bytes = old.encode('utf-8')
+    delta = len(new.encode('utf-8')) - len(old_bytes)
+    positions = []
+    start = markdown_bytes.find(old_bytes)
+    while start >= 0:
+        positions.append(start)
+        start = markdown_bytes.find(old_bytes, start + len(old_bytes))
+
+    lines = []
+    for line in index_text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        entry['byte_start'] += delta * bisect_left(positions, entry['byte_start'])
+        entry['byte_end'] += delta * bisect_left(positions, entry['byte_end'])
+        entry['images'] = [image.replace(old, new) for image in entry['images']]
+        lines.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+    return "".join(lines)
@@ -0,0 +1,228 @@
+# pdf2md/cli.py
+
+import os
+import sys
+import glob
+import signal
+import argparse
+import datetime
+from typing import List
+
+from .config import load_config_file, parse_config
+
+# 退出码
+EXIT_OK = 0
+EXIT_FILES_FAILED = 1
+EXIT_ERROR = 2
+EXIT_INTERRUPTED = 130
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """展开输入：支持文件、目录（递归查找PDF）和通配符（支持 **）"""
+    pdf_files = []
+    seen = set()
+
+    def add(path):
+        path = os.path.abspath(path)
+        if path not in seen and path.lower().endswith('.pdf') and os.path.isfile(path):
+            seen.add(path)
+            pdf_files.append(path)
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in sorted(files):
+                    add(os.path.join(root, name))
+        elif glob.has_magic(pattern):
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                add(path)
+        else:
+            add(pattern)
+
+    return pdf_files
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m pdf2md",
+        description="PDF to Markdown 批量转换（命令行/无界面模式，不依赖 PyQt5）"
+    )
+    parser.add_argument("inputs", nargs="+", help="PDF文件、目录或通配符，例如 'docs/**/*.pdf'（--watch 时为要监视的目录）")
+    parser.add_argument("-o", "--output-dir", help="输出目录（默认使用配置文件中的 output_directory）")
+    parser.add_argument("-c", "--config", help="JSON 配置文件，可直接使用 examples/sample_configs/*.json")
+    parser.add_argument("-j", "--workers", type=int, help="并行工作进程数（覆盖配置文件中的 workers）")
+    parser.add_argument("--shard-pages", type=int,
+                        help="大文件按页分片并行转换，每片的页数（0 表示不分片，需要 -j 大于 1）")
+    parser.add_argument("--page-range", help="页码范围，例如 1-5,8")
+    parser.add_argument("--output-format", choices=["markdown", "json", "html", "chunks"], help="输出格式")
+    parser.add_argument("--chunk-index", action="store_true",
+                        help="在每个 Markdown 旁写出检索用的分块索引 (<文件名>.index.jsonl)")
+    parser.add_argument("--force-ocr", action="store_true", default=None, help="强制 OCR")
+    parser.add_argument("--auto-triage", action="store_true", help="按文件自动选择路径：扫描件开启 OCR，纯文字文档跳过 LLM")
+    parser.add_argument("--no-llm", action="store_true", help="忽略配置文件中的 LLM 设置")
+    parser.add_argument("--llm-concurrency", type=int, help="每个进程同时发往 LLM 服务的请求数（默认 4）")
+    parser.add_argument("--llm-rpm", type=float, help="每分钟最多发出的 LLM 请求数（0 表示不限）")
+    parser.add_argument("--llm-cache-dir", help="LLM 响应缓存目录（默认 ./llm_cache）")
+    parser.add_argument("--no-llm-cache", action="store_true", help="关闭 LLM 响应缓存")
+    parser.add_argument("--no-fallback", action="store_true", help="关闭 PyMuPDF 备用图片提取")
+    parser.add_argument("--compress-images", action="store_true", help="压缩提取的图片")
+    parser.add_argument("--image-format", choices=["keep", "jpeg", "webp"], help="图片压缩的目标格式（默认 keep）")
+    parser.add_argument("--image-quality", type=int, help="JPEG/WebP 质量 10-100（默认 85）")
+    parser.add_argument("--max-image-size", type=int, help="图片长边的最大像素数，超出时等比缩小")
+    parser.add_argument("--cache-dir", help="启用转换缓存并指定缓存目录")
+    parser.add_argument("--cache-size", type=int, help="转换缓存上限 (MB)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="低内存模式：大文件按页码窗口逐段转换，每个文件后回收内存")
+    parser.add_argument("--window-pages", type=int, help="低内存模式下每个页码窗口的页数（默认 20）")
+    parser.add_argument("--recycle-after", type=int, help="工作进程每转换 N 个文件后重启以释放内存")
+    parser.add_argument("--max-worker-rss", type=int, help="工作进程内存超过该值 (MB) 时在文件之间重启")
+    parser.add_argument("--worker-memory-limit", type=int,
+                        help="内存硬上限 (MB)：工作进程超过时立即终止，当前文件由新进程重新转换")
+    parser.add_argument("--resume", action="store_true", help="断点续传：跳过输出目录任务日志中已完成的文件")
+    parser.add_argument("--watch", action="store_true",
+                        help="监视模式：持续扫描输入目录，自动转换新增或修改过的PDF（Ctrl+C 停止）")
+    parser.add_argument("--poll-interval", type=float, help="监视模式的扫描间隔（秒，默认 5）")
+    parser.add_argument("--settle", type=float, help="监视模式下文件多少秒内没有变化才转换（默认 10）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只输出最终结果")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    try:
+        options = load_config_file(args.config) if args.config else parse_config({})
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取配置文件 '{args.config}': {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    config_dict = options['config_dict']
+    if args.workers is not None:
+        config_dict["workers"] = max(1, args.workers)
+    if args.shard_pages is not None:
+        config_dict["shard_pages"] = max(0, args.shard_pages)
+    if args.page_range:
+        config_dict["page_range"] = args.page_range
+    if args.output_format:
+        config_dict["output_format"] = args.output_format
+    if args.chunk_index:
+        config_dict["chunk_index"] = True
+    if args.force_ocr:
+        config_dict["force_ocr"] = True
+    if args.auto_triage:
+        config_dict["auto_triage"] = True
+    if args.compress_images:
+        config_dict["compress_images"] = True
+    if args.image_format:
+        config_dict["image_format"] = args.image_format
+    if args.image_quality:
+        config_dict["image_quality"] = args.image_quality
+    if args.max_image_size:
+        config_dict["image_max_dimension"] = args.max_image_size
+    if args.cache_dir:
+        config_dict["cache_dir"] = os.path.abspath(args.cache_dir)
+    if args.cache_size:
+        config_dict["cache_max_size_mb"] = args.cache_size
+    if args.low_memory:
+        config_dict["low_memory"] = True
+    if args.window_pages:
+        config_dict["low_memory_window_pages"] = max(1, args.window_pages)
+    if args.recycle_after is not None:
+        config_dict["recycle_after_files"] = max(0, args.recycle_after)
+    if args.max_worker_rss is not None:
+        config_dict["max_worker_rss_mb"] = max(0, args.max_worker_rss)
+    if args.worker_memory_limit is not None:
+        config_dict["worker_memory_limit_mb"] = max(0, args.worker_memory_limit)
+    use_llm = options['use_llm'] and not args.no_llm
+    llm_service_config = options['llm_service_config']
+    if args.llm_concurrency is not None:
+        llm_service_config["llm_max_concurrency"] = max(1, args.llm_concurrency)
+    if args.llm_rpm is not None:
+        llm_service_config["llm_requests_per_minute"] = max(0.0, args.llm_rpm)
+    if args.llm_cache_dir:
+        llm_service_config["llm_cache_dir"] = args.llm_cache_dir
+    if args.no_llm_cache:
+        llm_service_config["llm_cache_dir"] = ""
+    use_fallback = options['use_fallback_extraction'] and not args.no_fallback
+
+    output_dir = args.output_dir or options['output_dir']
+    if not output_dir:
+        print("错误: 请通过 -o/--output-dir 指定输出目录。", file=sys.stderr)
+        return EXIT_ERROR
+
+    def log(message):
+        if not args.quiet:
+            print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def on_file_finished(summary):
+        if not summary['success']:
+            print(f"失败: {summary['file']}: {summary['error']}", file=sys.stderr, flush=True)
+
+    if args.watch:
+        return _watch(args, options, config_dict, use_llm, use_fallback, output_dir, log, on_file_finished)
+
+    pdf_files = expand_inputs(args.inputs)
+    if not pdf_files:
+        print("错误: 没有找到匹配的 PDF 文件。", file=sys.stderr)
+        return EXIT_ERROR
+
+    # 延迟导入：参数错误或 --help 时不需要加载 Marker
+    from .batch import BatchRunner
+
+    runner = BatchRunner(
+        pdf_files, os.path.abspath(output_dir), config_dict, use_llm,
+        options['llm_service_config'] if use_llm else {},
+        use_fallback_extraction=use_fallback,
+        log=log,
+        on_file_finished=on_file_finished,
+        resume=args.resume
+    )
+
+    try:
+        result = runner.run()
+    except KeyboardInterrupt:
+        runner.stop()
+        print("已中断。", file=sys.stderr)
+        return EXIT_INTERRUPTED
+
+    print(result['message'], flush=True)
+    if result['status'] == 'aborted':
+        return EXIT_INTERRUPTED
+    if result['status'] != 'completed':
+        return EXIT_ERROR
+    return EXIT_FILES_FAILED if result['failed'] else EXIT_OK
+
+
+def _watch(args, options, config_dict, use_llm, use_fallback, output_dir, log, on_file_finished) -> int:
+    """监视模式：Ctrl+C / SIGTERM 时在当前文件结束后停止，并写出本次会话的转换报告"""
+    folders = [folder for folder in args.inputs if os.path.isdir(folder)]
+    if len(folders) != len(args.inputs):
+        not_dirs = [path for path in args.inputs if not os.path.isdir(path)]
+        print(f"错误: 监视模式的输入必须是目录: {', '.join(not_dirs)}", file=sys.stderr)
+        return EXIT_ERROR
+
+    from .watch import FolderWatcher, DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_SECONDS
+
+    watcher = FolderWatcher(
+        folders, os.path.abspath(output_dir), config_dict, use_llm,
+        options['llm_service_config'] if use_llm else {},
+        use_fallback_extraction=use_fallback,
+        poll_interval=args.poll_interval if args.poll_interval is not None else DEFAULT_POLL_INTERVAL,
+        settle_seconds=args.settle if args.settle is not None else DEFAULT_SETTLE_SECONDS,
+        log=log,
+        on_file_finished=on_file_finished
+    )
+
+    def request_stop(signum, frame):
+        log("收到停止信号，当前文件结束后退出...")
+        watcher.stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, request_stop)
+
+    result = watcher.run()
+    print(result['message'], flush=True)
+    if result['status'] != 'completed':
+        return EXIT_ERROR
+    return EXIT_FILES_FAILED if result['failed'] else EXIT_OK
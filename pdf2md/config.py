@@ -0,0 +1,146 @@
+# pdf2md/config.py
+
+import os
+import json
+from typing import Dict, Optional
+
+# LLM 服务显示名称 -> Marker 服务类
+LLM_SERVICE_CLASSES = {
+    "OpenAI": "marker.services.openai.OpenAIService",
+    "Ollama": "marker.services.ollama.OllamaService",
+    "Gemini": "marker.services.gemini.GoogleGeminiService",
+    "Claude": "marker.services.claude.ClaudeService",
+    "Azure OpenAI": "marker.services.azure_openai.AzureOpenAIService",
+    "LM Studio": "marker.services.openai.OpenAIService",  # LM Studio 使用 OpenAI 兼容接口
+}
+
+# 配置文件未提供 API 密钥时读取的环境变量
+LLM_API_KEY_ENV = {
+    "OpenAI": ("OPENAI_API_KEY",),
+    "Gemini": ("GEMINI_API_KEY", "GOOGLE_API_KEY"),
+    "Claude": ("ANTHROPIC_API_KEY", "CLAUDE_API_KEY"),
+    "Azure OpenAI": ("AZURE_OPENAI_API_KEY",),
+}
+
+# LLM 网关（pdf2md.llm_gateway）的默认设置：每个服务同时进行的请求数、失败后的重试次数
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_LLM_MAX_RETRIES = 3
+# 未指定目录时 LLM 响应缓存保存在程序目录下；设为空字符串则关闭缓存
+LLM_CACHE_DIRNAME = "llm_cache"
+
+# 直接传递给 Marker 的基础配置项
+MARKER_CONFIG_KEYS = (
+    "output_format", "page_range", "format_lines", "force_ocr", "strip_existing_ocr", "debug",
+)
+
+# 只被本程序使用的配置项（调度、缓存等），不会传递给 Marker
+ENGINE_CONFIG_KEYS = (
+    "workers", "shard_pages", "auto_triage", "cache_dir", "cache_max_size_mb",
+    "compress_images", "image_format", "image_quality", "image_max_dimension",
+    "low_memory", "low_memory_window_pages", "recycle_after_files", "max_worker_rss_mb",
+    "worker_memory_limit_mb", "chunk_index",
+)
+
+
+def build_llm_config(service_name: str, api_key: str = "", base_url: str = "", model_name: str = "",
+                     temperature: float = 0.3, max_tokens: int = 2000,
+                     max_concurrency: int = DEFAULT_LLM_CONCURRENCY, requests_per_minute: float = 0,
+                     max_retries: int = DEFAULT_LLM_MAX_RETRIES, cache_dir: Optional[str] = None) -> Dict:
+    """根据界面/配置文件中的LLM选项构造 Marker 的LLM配置字典"""
+    llm_config = {"llm_service": LLM_SERVICE_CLASSES.get(service_name, service_name)}
+
+    if service_name in ["OpenAI", "LM Studio"]:
+        if api_key: llm_config["openai_api_key"] = api_key
+        if base_url: llm_config["openai_base_url"] = base_url
+        if model_name: llm_config["model"] = model_name
+    elif service_name == "Ollama":
+        if base_url: llm_config["ollama_base_url"] = base_url
+        if model_name: llm_config["ollama_model"] = model_name
+    elif service_name == "Gemini":
+        if api_key: llm_config["gemini_api_key"] = api_key
+        if model_name: llm_config["gemini_model"] = model_name
+    elif service_name == "Claude":
+        if api_key: llm_config["claude_api_key"] = api_key
+        if model_name: llm_config["claude_model_name"] = model_name
+    elif service_name == "Azure OpenAI":
+        if api_key: llm_config["azure_api_key"] = api_key
+        if base_url: llm_config["azure_endpoint"] = base_url
+        if model_name: llm_config["deployment_name"] = model_name
+
+    # LLM 高级选项
+    llm_config["temperature"] = temperature
+    llm_config["top_p"] = 1.0  # Marker config parser expects this
+    llm_config["max_tokens"] = max_tokens
+
+    # LLM 网关：并发、限流、重试与响应缓存
+    llm_config["llm_max_concurrency"] = max(1, int(max_concurrency))
+    llm_config["llm_requests_per_minute"] = max(0.0, float(requests_per_minute))
+    llm_config["llm_max_retries"] = max(0, int(max_retries))
+    if cache_dir is None:
+        cache_dir = os.path.join(os.getcwd(), LLM_CACHE_DIRNAME)
+    llm_config["llm_cache_dir"] = cache_dir
+
+    return llm_config
+
+
+def load_config_file(path: str) -> Dict:
+    """读取 JSON 配置文件，返回批量转换所需的全部参数
+
+    既支持 examples/sample_configs/*.json 的格式（配置位于 "config"，
+    推荐设置位于 "recommended_settings"），也支持直接写在顶层的扁平配置。
+    返回的字典包含 config_dict / use_llm / llm_service_config / llm_service_name /
+    use_fallback_extraction / output_dir。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return parse_config(data)
+
+
+def parse_config(data: Dict) -> Dict:
+    """把配置文件内容转换为批量转换参数"""
+    raw = dict(data.get("config", data))
+    recommended = data.get("recommended_settings", {}) if "config" in data else {}
+
+    config_dict = {k: raw[k] for k in MARKER_CONFIG_KEYS if raw.get(k) not in (None, "")}
+    if "page_range" not in config_dict and recommended.get("page_range"):
+        config_dict["page_range"] = recommended["page_range"]
+    for key in ENGINE_CONFIG_KEYS:
+        if raw.get(key) not in (None, ""):
+            config_dict[key] = raw[key]
+    config_dict.setdefault("output_format", "markdown")
+
+    use_llm = bool(raw.get("use_llm", False))
+    llm_service_config = {}
+    service_name = ""
+    if use_llm:
+        service_name = raw.get("llm_service", "OpenAI")
+        api_key = raw.get("api_key") or _api_key_from_env(service_name) or ""
+        llm_service_config = build_llm_config(
+            service_name,
+            api_key=api_key,
+            base_url=raw.get("base_url", ""),
+            model_name=raw.get("model", ""),
+            temperature=float(raw.get("temperature", 0.3)),
+            max_tokens=int(raw.get("max_tokens", 2000)),
+            max_concurrency=int(raw.get("llm_max_concurrency", DEFAULT_LLM_CONCURRENCY)),
+            requests_per_minute=float(raw.get("llm_requests_per_minute", 0)),
+            max_retries=int(raw.get("llm_max_retries", DEFAULT_LLM_MAX_RETRIES)),
+            cache_dir=raw.get("llm_cache_dir"),
+        )
+
+    return {
+        'config_dict': config_dict,
+        'use_llm': use_llm,
+        'llm_service_config': llm_service_config,
+        'llm_service_name': service_name,
+        'use_fallback_extraction': bool(raw.get("fallback_extraction", True)),
+        'output_dir': recommended.get("output_directory") or raw.get("output_dir"),
+    }
+
+
+def _api_key_from_env(service_name: str) -> Optional[str]:
+    for env_name in LLM_API_KEY_ENV.get(service_name, ()):
+        value = os.environ.get(env_name)
+        if value:
+            return value
+    return None
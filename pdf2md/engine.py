@@ -0,0 +1,1167 @@
+# pdf2md/engine.py
+
+import os
+import re
+import shutil
+import traceback
+from pathlib import Path
+import datetime
+import hashlib
+from collections import Counter
+from typing import Callable, List, Dict, Optional, Tuple
+
+from .cache import ConversionCache, config_digest, file_digest
+from .chunk_index import CHUNK_INDEX_SUFFIX, build_chunk_index, write_chunk_index
+from .config import ENGINE_CONFIG_KEYS
+from .image_links import IMAGE_LINK_PATTERN, ImageLinkIndex, link_page, offset_link_page
+from .image_placement import (
+    offset_page_markers, page_marker_ids, place_images, strip_page_markers, strip_page_markers_with_offsets
+)
+from .images import PIL_AVAILABLE, ImageCompressor, ImageWriter, compression_options, rename_image_links
+from .llm_gateway import GATEWAY_TUNING_KEYS, STATS as LLM_STATS, format_stats, gateway_config, stats_delta
+from .memory import DEFAULT_LOW_MEMORY_WINDOW_PAGES
+from .models import get_model_registry, release_torch_memory
+from .profiling import STAGE_LABELS, MARKER_SUBSTAGES, StageTimer, instrument_converter, stage_totals, write_profile
+from .writers import MarkdownWriter, get_writer, rendered_images
+from .triage import (
+    ROUTE_LABELS, ROUTE_OCR, ROUTE_PLAIN, ROUTE_TEXT, describe as describe_triage, triage_document, triage_pdf
+)
+
+# 检查 PyMuPDF (fitz) 是否可用
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# 确保 marker-pdf[full] 已安装
+MARKER_IMPORT_ERROR = ""
+try:
+    from marker.converters.pdf import PdfConverter
+    from marker.config.parser import ConfigParser
+    MARKER_AVAILABLE = True
+except ImportError as e:
+    MARKER_AVAILABLE = False
+    MARKER_IMPORT_ERROR = str(e)
+
+# 不影响转换结果、计算缓存键时忽略的 Marker 配置项
+CACHE_IGNORED_KEYS = ("disable_multiprocessing",) + GATEWAY_TUNING_KEYS
+
+DEFAULT_CACHE_MAX_SIZE_MB = 2048
+
+# 低内存模式下图片写盘线程池最多积压的图片数
+LOW_MEMORY_IMAGE_PENDING = 4
+
+
+class ModelLoadError(RuntimeError):
+    """Marker 模型加载失败，整个批次无法继续"""
+
+
+def setup_model_cache_dir(log: Callable[[str], None]):
+    """将 HF_HOME 指向程序目录，使 Marker 模型从 markermodels 加载/下载"""
+    try:
+        main_program_dir = os.getcwd()
+        custom_models_dir = os.path.join(main_program_dir, "markermodels")
+        os.makedirs(custom_models_dir, exist_ok=True)
+        os.environ['HF_HOME'] = main_program_dir
+        log(f"已设置 HF_HOME 环境变量指向: {main_program_dir}")
+        log(f"Marker 模型将从 '{custom_models_dir}' 加载/下载。")
+    except Exception as env_error:
+        log(f"警告: 设置自定义模型目录时出错: {env_error}")
+
+
+def create_conversion_summary(pdf_path: str, success: bool, error_msg: str = "", stats: Optional[Dict] = None) -> Dict:
+    """创建转换摘要信息"""
+    stats = stats or {}
+    return {
+        'file': os.path.basename(pdf_path),
+        'path': pdf_path,
+        'success': success,
+        'error': error_msg,
+        'timestamp': datetime.datetime.now().isoformat(),
+        'pages': stats.get('total_pages', 0),
+        'images': stats.get('total_images', 0),
+        'processing_time': stats.get('processing_time', 0),
+        'route': stats.get('route'),
+        'image_bytes_saved': stats.get('image_bytes_saved', 0),
+        'input_bytes': stats.get('input_bytes', 0),
+        'output_bytes': stats.get('output_bytes', 0),
+        'image_bytes': stats.get('image_bytes', 0),
+        'stages': stats.get('stages') or {}
+    }
+
+
+class ConversionEngine:
+    """与界面无关的转换核心：负责单个PDF的转换、图片提取和Markdown生成
+
+    日志通过 log 回调输出，是否继续运行通过 should_continue 回调查询，
+    因此既可以被 QThread 包装，也可以在独立的工作进程中运行。
+    """
+
+    def __init__(self, output_dir, config_dict, use_llm, llm_service_config, use_fallback_extraction=False,
+                 log: Optional[Callable[[str], None]] = None,
+                 should_continue: Optional[Callable[[], bool]] = None):
+        self.output_dir = output_dir
+        self.config_dict = config_dict
+        self.use_llm = use_llm
+        self.llm_service_config = llm_service_config
+        self.use_fallback_extraction = use_fallback_extraction
+        self.log = log or (lambda message: None)
+        self._should_continue = should_continue or (lambda: True)
+        self.converter = None
+        self._holds_models = False
+        self._artifact_dict = None
+        self._config_digest = None
+        # 各处理阶段的耗时，随转换摘要写入运行剖析文件
+        self.timer = StageTimer()
+        self._reset_stats()
+
+        # 转换前分诊：按文档内容自动选择 文本 / OCR / 跳过LLM 路径
+        self.auto_triage = bool(config_dict.get("auto_triage"))
+        self._triage: Optional[Dict] = None
+        # 验证 PDF 时读到的页数，Marker 的渲染结果中没有页数时使用
+        self._validated_pages = 0
+        self._shard_routes: Dict[str, str] = {}
+        self._route_converters: Dict[str, object] = {}
+        # 备用图片文件名 -> [(页码, 上方最近的文字块, 图片顶部坐标), ...]
+        self.fallback_image_occurrences: Dict[str, List[Tuple[int, Optional[str], float]]] = {}
+        self.image_compression = compression_options(config_dict)
+
+        # 输出写出器：决定读取渲染结果的哪个属性、写成什么扩展名
+        try:
+            self.writer = get_writer(config_dict.get("output_format"))
+        except ValueError as format_error:
+            self.log(f"警告: {format_error}，改为输出 Markdown。")
+            self.writer = MarkdownWriter()
+        # 检索用的分块索引：在每个 Markdown 旁写出 <PDF名>.index.jsonl（只用于 Markdown 输出）
+        self.chunk_index = bool(config_dict.get("chunk_index")) and self.writer.markdown_pipeline
+
+        # 低内存模式：大文件按页码窗口逐段转换，每个文件结束后回收内存
+        self.low_memory = bool(config_dict.get("low_memory"))
+        self.low_memory_window_pages = int(
+            config_dict.get("low_memory_window_pages") or DEFAULT_LOW_MEMORY_WINDOW_PAGES)
+
+        self.cache = None
+        cache_dir = config_dict.get("cache_dir")
+        if cache_dir:
+            try:
+                max_size_mb = int(config_dict.get("cache_max_size_mb", DEFAULT_CACHE_MAX_SIZE_MB))
+                self.cache = ConversionCache(cache_dir, max_size_mb * 1024 * 1024)
+            except Exception as cache_error:
+                self.log(f"警告: 无法打开转换缓存 '{cache_dir}': {cache_error}")
+
+    @property
+    def _is_running(self) -> bool:
+        return self._should_continue()
+
+    def get_final_config(self) -> Dict:
+        """合并基础配置与LLM配置，得到实际传给 Marker 的配置"""
+        final_config = {k: v for k, v in self.config_dict.items() if k not in ENGINE_CONFIG_KEYS}
+        if self._adds_page_markers:
+            final_config["paginate_output"] = True
+        if self.use_llm:
+            final_config.update(gateway_config(self.llm_service_config))
+        return final_config
+
+    @property
+    def _adds_page_markers(self) -> bool:
+        """备用图片定位或分块索引需要真实分页时，让 Marker 输出分页标记，写出前再移除"""
+        return ((self.use_fallback_extraction or self.chunk_index)
+                and self.writer.markdown_pipeline
+                and not self.config_dict.get("paginate_output"))
+
+    def load_models(self):
+        """从进程级注册表获取 Marker 模型并创建转换器（失败时抛出异常）"""
+        setup_model_cache_dir(self.log)
+
+        registry = get_model_registry()
+        self._artifact_dict = registry.acquire(self.log)
+        self._holds_models = True
+
+        self.converter = self._build_converter(self.get_final_config())
+        self.log("Marker 模型加载完成。")
+
+    def _build_converter(self, final_config: Dict, use_llm: Optional[bool] = None):
+        """用已加载的模型和给定配置创建 PdfConverter"""
+        if use_llm is None:
+            use_llm = self.use_llm
+        config_parser = ConfigParser(final_config)
+
+        converter = PdfConverter(
+            artifact_dict=self._artifact_dict,
+            config=config_parser.generate_config_dict(),
+            processor_list=config_parser.get_processors(),
+            renderer=config_parser.get_renderer(),
+            llm_service=config_parser.get_llm_service() if use_llm else None
+        )
+        return instrument_converter(converter, self.timer)
+
+    def _route_config(self, route: Optional[str]) -> Tuple[Dict, bool]:
+        """返回分诊路径对应的 (Marker 配置, 是否使用LLM)"""
+        if route == ROUTE_OCR:
+            final_config = self.get_final_config()
+            final_config["force_ocr"] = True
+            return final_config, self.use_llm
+        if route == ROUTE_PLAIN and self.use_llm:
+            final_config = self.get_final_config()
+            for key in gateway_config(self.llm_service_config):
+                final_config.pop(key, None)
+            return final_config, False
+        return self.get_final_config(), self.use_llm
+
+    def _is_default_route(self, route: Optional[str]) -> bool:
+        """该路径是否与当前配置等价（可直接使用默认转换器）"""
+        if route == ROUTE_OCR:
+            return bool(self.config_dict.get("force_ocr"))
+        if route == ROUTE_PLAIN:
+            return not self.use_llm
+        return True
+
+    def _converter_for_route(self, route: Optional[str]):
+        """取得分诊路径对应的转换器，非默认路径的转换器按需创建并复用"""
+        if self._is_default_route(route):
+            return self.converter
+        if route not in self._route_converters:
+            final_config, use_llm = self._route_config(route)
+            self._route_converters[route] = self._build_converter(final_config, use_llm)
+        return self._route_converters[route]
+
+    def _ensure_models(self):
+        """第一次真正需要转换时才加载模型"""
+        if self.converter is None:
+            try:
+                self.load_models()
+            except Exception as model_load_error:
+                raise ModelLoadError(f"加载 Marker 模型失败: {model_load_error}") from model_load_error
+
+    def _cache_key(self, pdf_path: str) -> str:
+        """缓存键 = PDF内容哈希 + 有效配置哈希"""
+        if self._config_digest is None:
+            effective_config = {k: v for k, v in self.get_final_config().items() if k not in CACHE_IGNORED_KEYS}
+            effective_config['fallback_extraction'] = self.use_fallback_extraction
+            if self.auto_triage:
+                effective_config['auto_triage'] = True
+            if self.image_compression:
+                effective_config['image_compression'] = self.image_compression
+            if self.chunk_index:
+                effective_config['chunk_index'] = True
+            self._config_digest = config_digest(effective_config)
+        return ConversionCache.make_key(file_digest(pdf_path), self._config_digest)
+
+    def lookup_cache(self, pdf_path: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """计算缓存键并尝试恢复结果，返回 (缓存键, 命中时的转换摘要)"""
+        if self.cache is None:
+            return None, None
+        try:
+            cache_key = self._cache_key(pdf_path)
+        except Exception as cache_error:
+            self.log(f"  -> 警告: 计算缓存键失败: {cache_error}")
+            return None, None
+        return cache_key, self._restore_from_cache(cache_key, pdf_path)
+
+    def _restore_from_cache(self, cache_key: str, pdf_path: str) -> Optional[Dict]:
+        """尝试从缓存恢复转换结果，命中时返回转换摘要"""
+        pdf_stem = Path(pdf_path).stem
+        try:
+            meta = self.cache.restore(cache_key, self.output_dir, pdf_stem)
+        except Exception as cache_error:
+            self.log(f"  -> 警告: 读取转换缓存失败: {cache_error}")
+            return None
+        if meta is None:
+            return None
+
+        self.conversion_stats['total_pages'] = meta.get('pages', 0)
+        self.conversion_stats['total_images'] = meta.get('images', 0)
+        restored = ", ".join(pdf_stem + suffix for suffix in meta.get('outputs') or [".md"])
+        self.log(f"  -> 命中转换缓存，已恢复 {restored} 及图片 (跳过转换)")
+        summary = self._create_conversion_summary(pdf_path, True)
+        summary['cached'] = True
+        return summary
+
+    def _store_in_cache(self, cache_key: str, pdf_path: str, output_path: str, images_dir: str):
+        """把成功的转换结果写入缓存"""
+        meta = {
+            'pdf_stem': Path(pdf_path).stem,
+            'pages': self.conversion_stats['total_pages'],
+            'images': self.conversion_stats['total_images'],
+        }
+        outputs = self.writer.output_files(output_path)
+        if self.chunk_index:
+            outputs[CHUNK_INDEX_SUFFIX] = self._chunk_index_path(pdf_path)
+        try:
+            self.cache.put(cache_key, outputs, images_dir if os.path.isdir(images_dir) else None, meta)
+        except Exception as cache_error:
+            self.log(f"  -> 警告: 写入转换缓存失败: {cache_error}")
+
+    def close(self):
+        """释放转换器，并把模型归还给注册表（模型本身保持常驻）"""
+        self.converter = None
+        self._route_converters = {}
+        self._artifact_dict = None
+        if self._holds_models:
+            self._holds_models = False
+            get_model_registry().release()
+
+    def _reset_stats(self):
+        self.conversion_stats = {
+            'total_pages': 0,
+            'total_images': 0,
+            'processing_time': 0,
+            'route': None,
+            'image_bytes_saved': 0,
+            'input_bytes': 0,
+            'output_bytes': 0,
+            'image_bytes': 0
+        }
+        self.timer.reset()
+        self._llm_stats = LLM_STATS.snapshot()
+
+    def _log_llm_stats(self):
+        """本文件经由 LLM 网关的请求数与缓存命中数（分片在其他进程中转换时不计入）"""
+        if not self.use_llm:
+            return
+        delta = stats_delta(self._llm_stats, LLM_STATS.snapshot())
+        if any(delta.values()):
+            self.log(f"  -> LLM: {format_stats(delta)}")
+
+    def _validate_pdf(self, pdf_path: str) -> Tuple[bool, str]:
+        """验证PDF文件的完整性和可读性
+
+        开启自动分诊时复用同一次打开，逐页统计文字层与图片，结果保存在 self._triage。
+        """
+        self._triage = None
+        self._validated_pages = 0
+        try:
+            if not os.path.exists(pdf_path):
+                return False, "文件不存在"
+
+            if os.path.getsize(pdf_path) == 0:
+                return False, "文件大小为0"
+
+            # 尝试打开PDF验证其有效性
+            if PYMUPDF_AVAILABLE:
+                try:
+                    doc = fitz.open(pdf_path)
+                    try:
+                        page_count = len(doc)
+                        self._validated_pages = page_count
+                        if page_count > 0 and self.auto_triage:
+                            self._triage = triage_document(doc)
+                    finally:
+                        doc.close()
+                    if page_count == 0:
+                        return False, "PDF没有页面"
+                except Exception as e:
+                    return False, f"PDF损坏或无法读取: {str(e)}"
+
+            return True, "OK"
+        except Exception as e:
+            return False, f"验证失败: {str(e)}"
+
+    def convert_file(self, pdf_path: str) -> Dict:
+        """转换单个PDF文件，返回转换摘要
+
+        单个文件的错误记录在摘要中；只有模型加载失败时抛出 ModelLoadError。
+        模型在第一次缓存未命中时才加载，全部命中的批次不需要加载模型。
+        低内存模式下，文件结束后回收 Python 垃圾并清空 torch 缓存。
+        """
+        try:
+            return self._convert_file(pdf_path)
+        finally:
+            if self.low_memory:
+                release_torch_memory()
+
+    def _convert_file(self, pdf_path: str) -> Dict:
+        file_start_time = datetime.datetime.now()
+        self._reset_stats()
+
+        # 验证PDF文件
+        with self.timer.stage('validate'):
+            is_valid, validation_msg = self._validate_pdf(pdf_path)
+        if not is_valid:
+            error_msg = f"文件验证失败: {validation_msg}"
+            self.log(f"  -> 错误: {error_msg}")
+            return self._create_conversion_summary(pdf_path, False, error_msg)
+        self.conversion_stats['input_bytes'] = os.path.getsize(pdf_path)
+
+        with self.timer.stage('cache'):
+            cache_key, cached_summary = self.lookup_cache(pdf_path)
+        if cached_summary is not None:
+            cached_summary['stages'] = self.timer.snapshot()
+            return cached_summary
+
+        with self.timer.stage('load_models'):
+            self._ensure_models()
+
+        route = None
+        if self._triage is not None:
+            route = self._triage['route']
+            self.conversion_stats['route'] = route
+            self.log(f"  -> 预检: {describe_triage(self._triage)}")
+
+        # 页码窗口按 Markdown 文本合并，其他输出格式整份转换
+        if self.low_memory and self.writer.markdown_pipeline:
+            windows = self.plan_shards(pdf_path, self.low_memory_window_pages)
+            if len(windows) > 1:
+                return self._convert_in_windows(pdf_path, windows, route, cache_key, file_start_time)
+
+        try:
+            # 步骤 1: 执行PDF到Markdown的转换
+            self.log("  -> 正在解析PDF内容...")
+            converter = self._converter_for_route(route)
+            with self.timer.stage('marker'):
+                rendered = converter(pdf_path)
+            metadata = self._rendered_metadata(rendered)
+
+            # 获取页面数
+            if metadata['page_count']:
+                self.conversion_stats['total_pages'] = metadata['page_count']
+                self.log(f"  -> PDF共有 {metadata['page_count']} 页")
+
+            if not self.writer.markdown_pipeline:
+                return self._write_structured_output(pdf_path, rendered, cache_key, file_start_time)
+
+            # 步骤 2: 使用 Marker (主引擎) 提取和保存图片
+            images_dir = os.path.join(self.output_dir, f"{Path(pdf_path).stem}_images")
+            with self.timer.stage('save_images'):
+                marker_images = self._save_marker_images(rendered_images(rendered), images_dir)
+            self.conversion_stats['total_images'] = len(marker_images)
+
+            # 步骤 3: 处理Markdown内容并保存文件（先释放渲染结果，只保留 Markdown 文本）
+            markdown_content = rendered.markdown
+            rendered = None
+            return self._finish_conversion(pdf_path, markdown_content, metadata, marker_images,
+                                           cache_key, file_start_time)
+
+        except Exception as e:
+            error_msg = f"转换失败: {str(e)}"
+            self.log(f"  -> 错误: {error_msg}")
+            self.log(f"  -> 详细错误:\n{traceback.format_exc()}")
+            return self._create_conversion_summary(pdf_path, False, error_msg)
+
+    def _convert_in_windows(self, pdf_path: str, windows: List[Tuple[int, int]], route: Optional[str],
+                            cache_key: Optional[str], file_start_time) -> Dict:
+        """低内存模式：在当前进程中按页码窗口依次转换，再按分片流程合并
+
+        每个窗口的渲染结果写出后立即释放，峰值内存只与窗口页数有关，与文档总页数无关。
+        """
+        self.log(f"  -> 低内存模式: 按 {len(windows)} 个页码窗口转换 (每个窗口最多 {self.low_memory_window_pages} 页)")
+        if route is not None:
+            self._shard_routes[pdf_path] = route
+        file_stages = dict(self.timer.times)
+        results = []
+        try:
+            for k, (start, end) in enumerate(windows):
+                if not self._is_running:
+                    shutil.rmtree(self._shard_dir(pdf_path), ignore_errors=True)
+                    return self._create_conversion_summary(pdf_path, False, "转换被中止")
+                result = self.convert_shard(pdf_path, k, start, end)
+                results.append(result)
+                release_torch_memory()
+                if not result['success']:
+                    break
+        finally:
+            self._shard_routes.pop(pdf_path, None)
+        return self.merge_shards(pdf_path, results, cache_key, file_start_time, file_stages)
+
+    def _rendered_metadata(self, rendered) -> Dict:
+        """从 Marker 的渲染结果中取出页数、标题和作者
+
+        Marker 的 metadata 是字典，页数取 page_stats 的长度；没有时使用验证 PDF 时读到的页数。
+        """
+        metadata = getattr(rendered, 'metadata', None)
+        if isinstance(metadata, dict):
+            get = metadata.get
+        else:
+            def get(key, default=None):
+                return getattr(metadata, key, default)
+        page_count = get('page_count') or len(get('page_stats') or ()) or self._validated_pages
+        return {
+            'page_count': page_count or 0,
+            'title': get('title'),
+            'author': get('author'),
+        }
+
+    def _save_marker_images(self, images: Optional[Dict[str, str]], images_dir: str) -> List[str]:
+        """保存 Marker 提取的 base64 图片，返回成功保存的图片文件名
+
+        images 是 rendered_images() 取得的 图片名 -> base64 字典。解码和写盘在 ImageWriter 的线程池中进行；
+        提交时把图片从字典中取出，写完即释放，不再让整个 base64 字典一直留在内存中。
+        """
+        if not isinstance(images, dict) or not images:
+            return []
+
+        os.makedirs(images_dir, exist_ok=True)
+        self.log(f"  -> [主引擎] Marker 发现 {len(images)} 张图片，正在保存...")
+
+        writer_options = {'max_pending': LOW_MEMORY_IMAGE_PENDING} if self.low_memory else {}
+        with ImageWriter(images_dir, **writer_options) as writer:
+            while images:
+                if not self._is_running:
+                    break
+                img_name = next(iter(images))
+                writer.submit(img_name, images.pop(img_name))
+
+        if self.config_dict.get("debug"):
+            for img_name, size in writer.saved:
+                self.log(f"    -> 已保存图片: {img_name} ({size/1024:.1f} KB)")
+        for img_name, error in writer.errors:
+            self.log(f"    -> 错误: 保存图片 '{img_name}' 失败: {error}")
+
+        stats = writer.stats()
+        self.log(f"  -> [主引擎] 成功保存 {stats['saved']} 张图片 ({stats['bytes']/1024:.1f} KB)")
+        return [img_name for img_name, _ in writer.saved]
+
+    def _finish_conversion(self, pdf_path: str, markdown_content: str, metadata: Dict, marker_images: List[str],
+                           cache_key: Optional[str], file_start_time) -> Dict:
+        """备用图片提取、链接更新、写出Markdown并写入缓存，返回成功摘要"""
+        pdf_stem = Path(pdf_path).stem
+        images_dir = os.path.join(self.output_dir, f"{pdf_stem}_images")
+        fallback_image_files = []
+
+        # 根据主引擎的结果，决定是否需要启动备用引擎
+        if not marker_images:
+            if self.use_fallback_extraction:
+                self.log("  -> [主引擎] Marker 未提取到图片，启动备用引擎 PyMuPDF...")
+                os.makedirs(images_dir, exist_ok=True)
+                with self.timer.stage('fallback_extraction'):
+                    fallback_image_files = self._extract_images_with_pymupdf(pdf_path, images_dir)
+            else:
+                self.log("  -> 未在文档中检测到可提取的图片。(备用引擎未开启)")
+
+        # Marker 的图片链接只有文件名，图片保存在 <PDF名>_images 文件夹中
+        if marker_images:
+            markdown_content = rename_image_links(
+                markdown_content, {name: f"{pdf_stem}_images/{name}" for name in marker_images})
+
+        # 如果使用了备用引擎提取图片，需要更新Markdown中的图片链接
+        if fallback_image_files:
+            self.log("  -> 正在更新Markdown中的图片链接...")
+            with self.timer.stage('link_rewrite'):
+                markdown_content = self._update_markdown_image_links(markdown_content, fallback_image_files, pdf_stem)
+
+        # 图片压缩：只处理本次转换写出的图片，避免重复压缩已有文件
+        if self.image_compression:
+            with self.timer.stage('compress_images'):
+                markdown_content = self._compress_images(images_dir, marker_images + fallback_image_files,
+                                                         markdown_content)
+
+        page_offsets = []
+        if self._adds_page_markers:
+            if self.chunk_index:
+                markdown_content, page_offsets = strip_page_markers_with_offsets(markdown_content)
+            else:
+                markdown_content = strip_page_markers(markdown_content)
+
+        # 添加元数据信息到Markdown
+        header = self._format_metadata_header(pdf_path, metadata)
+        markdown_content = header + markdown_content
+        page_offsets = [(offset + len(header), page) for offset, page in page_offsets]
+
+        # 保存Markdown文件
+        md_filename = pdf_stem + ".md"
+        md_output_path = os.path.join(self.output_dir, md_filename)
+        with self.timer.stage('write_markdown'):
+            self.conversion_stats['output_bytes'] = self.writer.write_text(markdown_content, md_output_path)
+        if self.chunk_index:
+            with self.timer.stage('chunk_index'):
+                self.conversion_stats['output_bytes'] += self._write_chunk_index(
+                    pdf_path, markdown_content, len(header), page_offsets)
+        self.conversion_stats['image_bytes'] = self._directory_size(images_dir)
+
+        # 计算处理时间
+        file_end_time = datetime.datetime.now()
+        processing_time = (file_end_time - file_start_time).total_seconds()
+        self.conversion_stats['processing_time'] = processing_time
+
+        self.log(f"  -> 已保存: {md_filename}")
+        self.log(f"  -> 处理时间: {processing_time:.2f} 秒")
+        self._log_llm_stats()
+
+        # 被中止的转换结果可能不完整，不写入缓存
+        if cache_key and self._is_running:
+            with self.timer.stage('cache_store'):
+                self._store_in_cache(cache_key, pdf_path, md_output_path, images_dir)
+
+        return self._create_conversion_summary(pdf_path, True)
+
+    def _write_structured_output(self, pdf_path: str, rendered, cache_key: Optional[str], file_start_time) -> Dict:
+        """JSON / HTML / 分块输出：由写出器把渲染结果逐块写入对应扩展名的文件
+
+        只有 HTML 的图片另存到 _images 文件夹（并压缩）；JSON 和分块输出的图片以 base64 内嵌在块中。
+        备用图片提取、分页标记和元数据头只适用于 Markdown，这里不做。
+        """
+        pdf_stem = Path(pdf_path).stem
+        images_dir = os.path.join(self.output_dir, f"{pdf_stem}_images")
+
+        if not self.conversion_stats['total_pages']:
+            self.conversion_stats['total_pages'] = self.writer.page_count(rendered)
+
+        renames = {}
+        if self.writer.saves_images:
+            with self.timer.stage('save_images'):
+                marker_images = self._save_marker_images(rendered_images(rendered), images_dir)
+            self.conversion_stats['total_images'] = len(marker_images)
+            if self.image_compression and marker_images:
+                with self.timer.stage('compress_images'):
+                    renames = self._compress_image_files(images_dir, marker_images)
+
+        output_filename = self.writer.output_name(pdf_stem)
+        output_path = os.path.join(self.output_dir, output_filename)
+        images_prefix = f"{pdf_stem}_images/" if self.conversion_stats['total_images'] else ""
+        with self.timer.stage('write_markdown'):
+            self.conversion_stats['output_bytes'] = self.writer.write(rendered, output_path, images_prefix, renames)
+        self.conversion_stats['image_bytes'] = self._directory_size(images_dir)
+
+        processing_time = (datetime.datetime.now() - file_start_time).total_seconds()
+        self.conversion_stats['processing_time'] = processing_time
+        self.log(f"  -> 已保存: {output_filename}")
+        self.log(f"  -> 处理时间: {processing_time:.2f} 秒")
+        self._log_llm_stats()
+
+        if cache_key and self._is_running:
+            with self.timer.stage('cache_store'):
+                self._store_in_cache(cache_key, pdf_path, output_path, images_dir)
+
+        return self._create_conversion_summary(pdf_path, True)
+
+    def _chunk_index_path(self, pdf_path: str) -> str:
+        return os.path.join(self.output_dir, Path(pdf_path).stem + CHUNK_INDEX_SUFFIX)
+
+    def _write_chunk_index(self, pdf_path: str, markdown_content: str, body_start: int,
+                           page_offsets: List[Tuple[int, int]]) -> int:
+        """按标题切分最终的 Markdown，写出分块索引，返回写出的字节数"""
+        entries = build_chunk_index(markdown_content, body_start, page_offsets)
+        index_path = self._chunk_index_path(pdf_path)
+        written = write_chunk_index(index_path, entries)
+        self.log(f"  -> 已写出分块索引: {os.path.basename(index_path)} ({len(entries)} 个分块)")
+        return written
+
+    @staticmethod
+    def _directory_size(path: str) -> int:
+        """目录中文件的总字节数（不递归），目录不存在时为 0"""
+        try:
+            with os.scandir(path) as it:
+                return sum(entry.stat().st_size for entry in it if entry.is_file())
+        except OSError:
+            return 0
+
+    def _compress_images(self, images_dir: str, image_names: List[str], markdown_content: str) -> str:
+        """压缩图片并更新 Markdown 中改了扩展名的图片链接"""
+        if not image_names:
+            return markdown_content
+        return rename_image_links(markdown_content, self._compress_image_files(images_dir, image_names))
+
+    def _compress_image_files(self, images_dir: str, image_names: List[str]) -> Dict[str, str]:
+        """在线程池中压缩图片并记录节省的空间，返回 原文件名 -> 新文件名"""
+        if not PIL_AVAILABLE:
+            self.log("  -> 警告: Pillow 未安装，跳过图片压缩。")
+            return {}
+
+        renames, results = ImageCompressor(self.image_compression).compress(images_dir, image_names)
+
+        before = after = 0
+        for result in results:
+            if 'error' in result:
+                self.log(f"    -> 警告: 压缩图片 '{result['image']}' 失败: {result['error']}")
+                continue
+            before += result['before']
+            after += result['after']
+            if self.config_dict.get("debug"):
+                self.log(f"    -> 压缩图片: {result['output']} "
+                         f"({result['before']/1024:.1f} KB -> {result['after']/1024:.1f} KB)")
+
+        saved = before - after
+        self.conversion_stats['image_bytes_saved'] = saved
+        if before:
+            self.log(f"  -> 图片压缩: {len(results)} 张, {before/1024:.1f} KB -> {after/1024:.1f} KB "
+                     f"(节省 {saved / before:.0%})")
+
+        if renames:
+            self.fallback_image_occurrences = {
+                renames.get(name, name): occurrences for name, occurrences in self.fallback_image_occurrences.items()
+            }
+        return renames
+
+    def plan_shards(self, pdf_path: str, shard_pages: int) -> List[Tuple[int, int]]:
+        """把大文件按页切分为 [起始页, 结束页) 的分片；不需要分片时返回空列表"""
+        if shard_pages <= 0 or not PYMUPDF_AVAILABLE or self.config_dict.get("page_range"):
+            return []
+        try:
+            doc = fitz.open(pdf_path)
+            page_count = len(doc)
+            doc.close()
+        except Exception:
+            return []
+        if page_count <= shard_pages:
+            return []
+        return [(start, min(start + shard_pages, page_count)) for start in range(0, page_count, shard_pages)]
+
+    def _shard_dir(self, pdf_path: str) -> str:
+        return os.path.join(self.output_dir, f".{Path(pdf_path).stem}_shards")
+
+    def convert_shard(self, pdf_path: str, shard_index: int, start: int, end: int) -> Dict:
+        """转换大文件的一个页码分片
+
+        分页标记和图片名统一为原文档中的页码（见 _to_document_pages），各分片保存的图片名互不冲突，
+        直接写入最终的 _images 文件夹；分片的 Markdown 写入临时文件，等待合并。
+        模型加载失败时抛出 ModelLoadError，其他错误记录在返回结果中。
+        """
+        result = {'path': pdf_path, 'shard': shard_index, 'start': start, 'end': end,
+                  'success': False, 'error': '', 'pages': 0, 'images': 0, 'image_names': [], 'metadata': {},
+                  'markdown_path': '', 'stages': {}}
+
+        # 分片的阶段耗时单独记录在结果中，合并时再累加到整个文件
+        outer_times, self.timer.times = self.timer.times, {}
+        try:
+            with self.timer.stage('load_models'):
+                self._ensure_models()
+            self._convert_shard(pdf_path, shard_index, start, end, result)
+        finally:
+            result['stages'] = self.timer.snapshot()
+            self.timer.times = outer_times
+        return result
+
+    def _convert_shard(self, pdf_path: str, shard_index: int, start: int, end: int, result: Dict):
+        try:
+            self.log(f"  -> 正在解析分片 {shard_index + 1} (第 {start + 1}-{end} 页)...")
+            result['route'] = self._shard_route(pdf_path)
+            shard_config, use_llm = self._route_config(result['route'])
+            shard_config["page_range"] = f"{start}-{end - 1}"
+            converter = self._build_converter(shard_config, use_llm)
+            with self.timer.stage('marker'):
+                rendered = converter(pdf_path)
+
+            markdown_content, images = self._to_document_pages(
+                rendered.markdown, rendered_images(rendered) or {}, shard_index, start)
+            images_dir = os.path.join(self.output_dir, f"{Path(pdf_path).stem}_images")
+            with self.timer.stage('save_images'):
+                result['image_names'] = self._save_marker_images(images, images_dir)
+            result['images'] = len(result['image_names'])
+            result['metadata'] = self._rendered_metadata(rendered)
+            result['pages'] = end - start
+
+            shard_dir = self._shard_dir(pdf_path)
+            os.makedirs(shard_dir, exist_ok=True)
+            result['markdown_path'] = os.path.join(shard_dir, f"part{shard_index:04d}.md")
+            with open(result['markdown_path'], 'w', encoding='utf-8') as f:
+                f.write(markdown_content)
+            result['success'] = True
+        except Exception as e:
+            result['error'] = f"分片 {shard_index + 1} 转换失败: {str(e)}"
+            self.log(f"  -> 错误: {result['error']}")
+            self.log(f"  -> 详细错误:\n{traceback.format_exc()}")
+
+    @staticmethod
+    def _to_document_pages(markdown_content: str, images: Dict[str, str], shard_index: int,
+                           start: int) -> Tuple[str, Dict[str, str]]:
+        """把分片的分页标记 {N} 和图片名中的页码统一为原文档中的页码，合并结果与整份转换一致
+
+        Marker 通常已按原文档页码编号；分片内出现小于 start 的页码时，说明是从0开始的分片内编号，整体加上 start。
+        不含页码的图片名在后续分片中加上分片前缀，避免与其他分片的同名图片互相覆盖。
+        """
+        if start == 0:
+            return markdown_content, images
+        pages = page_marker_ids(markdown_content)
+        pages += [page - 1 for page in map(link_page, images) if page is not None]
+        offset = start if pages and min(pages) < start else 0
+
+        renames = {}
+        for name in images:
+            new_name = offset_link_page(name, offset) if link_page(name) is not None else f"shard{shard_index + 1}_{name}"
+            if new_name != name:
+                renames[name] = new_name
+        markdown_content = offset_page_markers(markdown_content, offset)
+        if renames:
+            markdown_content = rename_image_links(markdown_content, renames)
+            images = {renames.get(name, name): data for name, data in images.items()}
+        return markdown_content, images
+
+    def _shard_route(self, pdf_path: str) -> Optional[str]:
+        """分片使用整个文档的分诊结果，每个进程对同一文档只分诊一次"""
+        if not self.auto_triage:
+            return None
+        if pdf_path not in self._shard_routes:
+            stats = triage_pdf(pdf_path)
+            self._shard_routes[pdf_path] = stats['route'] if stats else ROUTE_TEXT
+            if stats:
+                self.log(f"  -> 预检: {describe_triage(stats)}")
+        return self._shard_routes[pdf_path]
+
+    def merge_shards(self, pdf_path: str, shard_results: List[Dict], cache_key: Optional[str], file_start_time,
+                     stages: Optional[Dict[str, float]] = None) -> Dict:
+        """按页码顺序拼接分片的 Markdown，并完成备用图片提取、写出和缓存
+
+        stages: 合并前已经记录的阶段耗时（例如低内存模式下整个文件的验证和缓存查询）。
+        """
+        self._reset_stats()
+        self.timer.merge(stages or {})
+        for result in shard_results:
+            self.timer.merge(result.get('stages') or {})
+        try:
+            self.conversion_stats['input_bytes'] = os.path.getsize(pdf_path)
+        except OSError:
+            pass
+        shard_results = sorted(shard_results, key=lambda r: r['start'])
+        shard_dir = self._shard_dir(pdf_path)
+
+        try:
+            failed = [r for r in shard_results if not r['success']]
+            if failed:
+                error_msg = failed[0]['error'] or "分片转换失败"
+                return self._create_conversion_summary(pdf_path, False, error_msg)
+
+            parts = []
+            for result in shard_results:
+                with open(result['markdown_path'], 'r', encoding='utf-8') as f:
+                    parts.append(f.read().strip('\n'))
+            markdown_content = "\n\n".join(parts) + "\n"
+
+            metadata = dict(shard_results[0]['metadata'])
+            metadata['page_count'] = sum(r['pages'] for r in shard_results)
+            marker_images = [name for r in shard_results for name in r['image_names']]
+            self.conversion_stats['total_pages'] = metadata['page_count']
+            self.conversion_stats['total_images'] = len(marker_images)
+            self.conversion_stats['route'] = shard_results[0].get('route')
+            self.log(f"  -> 已按页码顺序合并 {len(shard_results)} 个分片 (共 {metadata['page_count']} 页)")
+
+            return self._finish_conversion(pdf_path, markdown_content, metadata, marker_images,
+                                           cache_key, file_start_time)
+        except Exception as e:
+            error_msg = f"合并分片失败: {str(e)}"
+            self.log(f"  -> 错误: {error_msg}")
+            return self._create_conversion_summary(pdf_path, False, error_msg)
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+
+    def _extract_images_with_pymupdf(self, pdf_path, images_dir):
+        """使用 PyMuPDF 作为备用方案提取图片（增强版）
+
+        按文档建立 xref 和内容摘要索引：每个不同的图片流只解码、写盘一次，
+        文件以首次出现的页码命名；之后在其他页面的出现只记录为对同一文件的引用。
+        每次出现的页码、页面上方最近的文字块（阅读顺序）和坐标保存在
+        self.fallback_image_occurrences 中，用于把图片放回原来的位置。
+        """
+        self.fallback_image_occurrences = {}
+        if not PYMUPDF_AVAILABLE:
+            self.log("  -> PyMuPDF (fitz) 未安装，无法执行备用图片提取。")
+            return []
+
+        try:
+            pdf_document = fitz.open(pdf_path)
+            extracted_files = []
+            total_images = 0
+            xref_index: Dict[int, Optional[str]] = {}  # xref -> 图片文件名（无法提取时为 None）
+            digest_index: Dict[str, str] = {}  # 内容摘要 -> 图片文件名（不同 xref 的相同图片）
+
+            for page_index in range(len(pdf_document)):
+                if not self._is_running:  # 检查是否需要停止
+                    pdf_document.close()
+                    return extracted_files
+
+                page_document = pdf_document[page_index]
+                image_list = page_document.get_images(full=True)
+                if not image_list:
+                    continue
+                anchors = self._page_image_anchors(page_document)
+
+                for image_index, img in enumerate(image_list):
+                    total_images += 1
+                    xref = img[0]
+
+                    if xref not in xref_index:
+                        xref_index[xref] = self._extract_unique_image(
+                            pdf_document, xref, page_index, image_index, images_dir, digest_index, extracted_files
+                        )
+
+                    img_name = xref_index[xref]
+                    if img_name:
+                        occurrences = self.fallback_image_occurrences.setdefault(img_name, [])
+                        if not any(occurrence[0] == page_index + 1 for occurrence in occurrences):
+                            anchor, top = anchors.get(xref, (None, 0.0))
+                            occurrences.append((page_index + 1, anchor, top))
+
+            pdf_document.close()
+
+            self.conversion_stats['total_images'] += len(extracted_files)
+
+            if extracted_files:
+                self.log(f"  -> [备用引擎] PyMuPDF 成功提取并保存了 {len(extracted_files)} 张图片 "
+                         f"(共 {total_images} 处引用，重复图片只保存一次)。")
+            else:
+                self.log("  -> [备用引擎] PyMuPDF 未在该文件中找到可提取的图片。")
+
+            return extracted_files
+
+        except Exception as e:
+            self.log(f"  -> [备用引擎] PyMuPDF 提取图片时发生错误: {e}")
+            return []
+
+    def _page_image_anchors(self, page) -> Dict[int, Tuple[Optional[str], float]]:
+        """xref -> (阅读顺序上位于图片上方的最后一个文字块的首行, 图片顶部坐标)
+
+        图片位于页面所有文字之上时锚点为 None。
+        """
+        try:
+            blocks = [block for block in page.get_text("blocks", sort=True) if block[6] == 0 and block[4].strip()]
+            image_infos = page.get_image_info(xrefs=True)
+        except Exception:
+            return {}
+
+        anchors = {}
+        for info in image_infos:
+            xref = info.get("xref")
+            if not xref or xref in anchors:
+                continue
+            top = info["bbox"][1]
+            anchor = None
+            for block in blocks:
+                if block[1] < top:
+                    anchor = block[4].strip().split('\n', 1)[0]
+            anchors[xref] = (anchor, top)
+        return anchors
+
+    def _extract_unique_image(self, pdf_document, xref, page_index, image_index, images_dir,
+                              digest_index: Dict[str, str], extracted_files: List[str]) -> Optional[str]:
+        """提取一个尚未处理过的 xref；内容与已保存图片相同时直接返回已有文件名"""
+        try:
+            base_image = pdf_document.extract_image(xref)
+            if not base_image:
+                return None
+
+            image_bytes = base_image["image"]
+            image_ext = base_image["ext"]
+
+            digest = hashlib.md5(image_bytes).hexdigest()
+            if digest in digest_index:
+                return digest_index[digest]
+
+            # 生成更有意义的图片名称
+            img_name = f"page_{page_index + 1:03d}_img_{image_index + 1:02d}_{digest[:8]}.{image_ext}"
+            img_path = os.path.join(images_dir, img_name)
+
+            if not os.path.exists(img_path):
+                with open(img_path, "wb") as img_file:
+                    img_file.write(image_bytes)
+
+                # 记录图片大小信息
+                img_size = len(image_bytes) / 1024  # KB
+                self.log(f"    -> 提取图片: {img_name} ({img_size:.1f} KB)")
+
+            digest_index[digest] = img_name
+            extracted_files.append(img_name)
+            return img_name
+
+        except Exception as img_error:
+            self.log(f"    -> 警告: 提取第{page_index + 1}页第{image_index + 1}张图片失败: {img_error}")
+            return None
+
+    def _update_markdown_image_links(self, markdown_content, fallback_image_files, pdf_stem):
+        """更新Markdown中的图片链接（增强版）
+
+        匹配基于预先建立的索引（见 ImageLinkIndex），耗时与图片数和文档长度成线性关系。
+        """
+        if not fallback_image_files:
+            return markdown_content
+
+        index = ImageLinkIndex(fallback_image_files, self.fallback_image_occurrences)
+        replaced_count = 0
+
+        def replace_image_link(match):
+            nonlocal replaced_count
+            alt_text = match.group(1)
+            original_link = match.group(2)
+
+            # 如果原始链接已经是相对路径或绝对路径，不修改
+            if '/' in original_link or '\\' in original_link:
+                return match.group(0)
+
+            # 智能匹配备用图片
+            best_match = index.match(original_link)
+            if best_match:
+                replaced_count += 1
+                return f'![{alt_text}]({pdf_stem}_images/{best_match})'
+            return match.group(0)
+
+        # 替换所有图片链接
+        updated_content = IMAGE_LINK_PATTERN.sub(replace_image_link, markdown_content)
+
+        # 记录图片替换信息
+        if replaced_count:
+            self.log(f"  -> 已更新 {replaced_count} 个图片链接")
+
+        # 处理未使用的图片
+        unused_images = index.unused()
+        if unused_images:
+            updated_content = self._handle_unused_images(updated_content, unused_images, pdf_stem)
+
+        return updated_content
+
+    def _handle_unused_images(self, content: str, unused_images: List[str], pdf_stem: str) -> str:
+        """处理未使用的图片"""
+        self.log(f"  -> 发现 {len(unused_images)} 张未在原Markdown中引用的图片")
+
+        # 按图片在PDF中的真实位置插入（一次扫描文档，一次性拼接输出）
+        placements = []
+        for img in unused_images:
+            occurrences = self.fallback_image_occurrences.get(img) or [(self._extract_page_number(img), None, 0.0)]
+            placements.extend((page_num, top, img, anchor) for page_num, anchor, top in occurrences)
+        placements.sort(key=lambda item: (item[0], item[1]))
+
+        content, placed = place_images(
+            content, [(img, page_num, anchor) for page_num, _, img, anchor in placements], pdf_stem,
+            page_count=self.conversion_stats['total_pages']
+        )
+        if placed:
+            self.log(f"    -> 智能插入了 {len(placed)} 张图片")
+
+        # 在文档末尾添加剩余图片
+        remaining_unused = [img for img in unused_images if img not in placed]
+        if remaining_unused:
+            content += self._append_remaining_images(remaining_unused, pdf_stem)
+
+        return content
+
+    def _append_remaining_images(self, remaining_images: List[str], pdf_stem: str) -> str:
+        """在文档末尾添加剩余图片"""
+        self.log(f"  -> 在文档末尾添加剩余的 {len(remaining_images)} 张图片")
+
+        content = "\n\n---\n\n## 附加图片\n\n"
+        content += "*以下图片从PDF中提取但未在文档主体中引用：*\n\n"
+
+        # 按页面分组
+        images_by_page = {}
+        for img in remaining_images:
+            page_num = self._extract_page_number(img)
+            if page_num not in images_by_page:
+                images_by_page[page_num] = []
+            images_by_page[page_num].append(img)
+
+        # 按页面顺序添加
+        for page_num in sorted(images_by_page.keys()):
+            if len(images_by_page[page_num]) == 1:
+                img = images_by_page[page_num][0]
+                relative_path = f"{pdf_stem}_images/{img}"
+                content += f"![第{page_num}页图片]({relative_path})\n\n"
+            else:
+                content += f"### 第{page_num}页图片\n\n"
+                for i, img in enumerate(images_by_page[page_num], 1):
+                    relative_path = f"{pdf_stem}_images/{img}"
+                    content += f"![第{page_num}页图片{i}]({relative_path})\n\n"
+
+        return content
+
+    def _extract_page_number(self, img_filename):
+        """从图片文件名中提取页面号（增强版）"""
+        # 支持多种页面号格式
+        patterns = [
+            r'page_(\d+)',
+            r'_page_(\d+)_',
+            r'p(\d+)_',
+            r'第(\d+)页'
+        ]
+
+        for pattern in patterns:
+            match = re.search(pattern, img_filename, re.IGNORECASE)
+            if match:
+                return int(match.group(1))
+
+        return 0
+
+    def _create_conversion_summary(self, pdf_path: str, success: bool, error_msg: str = "") -> Dict:
+        """创建转换摘要信息"""
+        return create_conversion_summary(pdf_path, success, error_msg,
+                                         dict(self.conversion_stats, stages=self.timer.snapshot()))
+
+    def _create_metadata_header(self, pdf_path: str, rendered) -> str:
+        """创建包含元数据的Markdown头部"""
+        return self._format_metadata_header(pdf_path, self._rendered_metadata(rendered))
+
+    def _format_metadata_header(self, pdf_path: str, metadata: Dict) -> str:
+        """根据页数、标题、作者生成 Markdown 头部"""
+        header = "---\n"
+        header += f"source: {os.path.basename(pdf_path)}\n"
+        header += f"converted: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+
+        if metadata.get('page_count'):
+            header += f"pages: {metadata['page_count']}\n"
+        if metadata.get('title'):
+            header += f"title: {metadata['title']}\n"
+        if metadata.get('author'):
+            header += f"author: {metadata['author']}\n"
+
+        header += "---\n\n"
+        return header
+
+    def _generate_conversion_report(self, summaries: List[Dict], successful: int, failed: int, total_time: float):
+        """生成详细的转换报告，并把各阶段耗时写入 conversion_profile_*.json / .csv"""
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        report_path = os.path.join(self.output_dir, f"conversion_report_{timestamp}.txt")
+        totals = stage_totals(summaries)
+
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write("PDF转换报告\n")
+                f.write("=" * 60 + "\n\n")
+                f.write(f"转换时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                f.write(f"总耗时: {total_time:.2f} 秒\n")
+                f.write(f"文件总数: {len(summaries)}\n")
+                f.write(f"成功: {successful}\n")
+                cached = sum(1 for summary in summaries if summary.get('cached'))
+                if cached > 0:
+                    f.write(f"缓存命中: {cached}\n")
+                image_bytes_saved = sum(summary.get('image_bytes_saved', 0) for summary in summaries)
+                if image_bytes_saved > 0:
+                    f.write(f"图片压缩节省: {image_bytes_saved / 1024 / 1024:.2f} MB\n")
+                resumed = sum(1 for summary in summaries if summary.get('resumed'))
+                if resumed > 0:
+                    f.write(f"断点续传跳过: {resumed}\n")
+                routes = Counter(summary['route'] for summary in summaries if summary.get('route'))
+                if routes:
+                    f.write("自动分诊: " + ", ".join(f"{ROUTE_LABELS[route]} {count}"
+                                                 for route, count in routes.items()) + "\n")
+                f.write(f"失败: {failed}\n\n")
+
+                if totals:
+                    # Marker 的细分阶段包含在 Marker 转换之内，不计入合计
+                    measured = sum(seconds for stage, seconds in totals.items() if stage not in MARKER_SUBSTAGES)
+                    f.write("耗时分布:\n")
+                    f.write("-" * 40 + "\n")
+                    for stage, label in STAGE_LABELS.items():
+                        if stage in totals:
+                            share = totals[stage] / measured * 100 if measured > 0 else 0
+                            f.write(f"  {label}: {totals[stage]:.2f} 秒 ({share:.1f}%)\n")
+                    f.write("\n")
+
+                if successful > 0:
+                    f.write("成功转换的文件:\n")
+                    f.write("-" * 40 + "\n")
+                    for summary in summaries:
+                        if summary['success']:
+                            f.write(f"  - {summary['file']}\n")
+                            if summary['pages'] > 0:
+                                f.write(f"    页数: {summary['pages']}\n")
+                            if summary['images'] > 0:
+                                f.write(f"    图片: {summary['images']}\n")
+                    f.write("\n")
+
+                if failed > 0:
+                    f.write("失败的文件:\n")
+                    f.write("-" * 40 + "\n")
+                    for summary in summaries:
+                        if not summary['success']:
+                            f.write(f"  - {summary['file']}\n")
+                            f.write(f"    错误: {summary['error']}\n")
+                    f.write("\n")
+
+            self.log(f"\n转换报告已保存到: {report_path}")
+
+        except Exception as e:
+            self.log(f"保存转换报告失败: {e}")
+
+        try:
+            profile_paths = write_profile(os.path.join(self.output_dir, f"conversion_profile_{timestamp}"),
+                                          summaries, total_time)
+            self.log(f"耗时剖析已保存到: {', '.join(profile_paths)}")
+        except Exception as e:
+            self.log(f"保存耗时剖析失败: {e}")
@@ -0,0 +1,112 @@
+# pdf2md/filelist.py
+
+import os
+import threading
+from collections import namedtuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+# 列表中每个文件的缓存信息（添加时 stat 一次，之后不再访问磁盘）
+FileEntry = namedtuple("FileEntry", "path name size mtime")
+
+DEFAULT_SCAN_BATCH = 500
+
+
+def stat_entry(path: str) -> FileEntry:
+    """读取单个文件的信息；文件不可访问时大小和修改时间记为 0"""
+    try:
+        st = os.stat(path)
+        return FileEntry(path, os.path.basename(path), st.st_size, st.st_mtime)
+    except OSError:
+        return FileEntry(path, os.path.basename(path), 0, 0.0)
+
+
+def scan_pdf_files(folder: str, batch_size: int = DEFAULT_SCAN_BATCH,
+                   stop_event: Optional[threading.Event] = None) -> Iterator[List[FileEntry]]:
+    """用 os.scandir 递归扫描文件夹中的 PDF，每找到 batch_size 个文件产出一批
+
+    目录项自带的 stat 信息（Windows 上无需额外系统调用）直接写入 FileEntry；
+    无法访问的子目录会被跳过。stop_event 被设置后扫描尽快结束。
+    """
+    batch: List[FileEntry] = []
+    pending = [folder]
+    while pending:
+        if stop_event is not None and stop_event.is_set():
+            return
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith('.pdf') and entry.is_file():
+                    st = entry.stat()
+                    batch.append(FileEntry(entry.path, entry.name, st.st_size, st.st_mtime))
+            except OSError:
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        # 逆序入栈，保证子目录按名称顺序（深度优先）扫描
+        pending.extend(reversed(subdirs))
+
+    if batch:
+        yield batch
+
+
+class FileCatalog:
+    """待转换文件列表
+
+    按添加顺序保存路径，另有 路径 -> FileEntry 的字典用于去重和查询缓存信息，
+    总大小随增删维护，查询为 O(1)。
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.entries: Dict[str, FileEntry] = {}
+        self.total_size = 0
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.entries
+
+    def entry(self, row: int) -> FileEntry:
+        return self.entries[self.paths[row]]
+
+    def new_entries(self, entries: Iterable[FileEntry]) -> List[FileEntry]:
+        """过滤掉已在列表中（或在本批中重复）的文件"""
+        seen: Set[str] = set()
+        fresh = []
+        for entry in entries:
+            if entry.path in self.entries or entry.path in seen:
+                continue
+            seen.add(entry.path)
+            fresh.append(entry)
+        return fresh
+
+    def extend(self, entries: Iterable[FileEntry]):
+        """追加文件；调用方应先用 new_entries() 去重"""
+        for entry in entries:
+            self.paths.append(entry.path)
+            self.entries[entry.path] = entry
+            self.total_size += entry.size
+
+    def remove_rows(self, rows: Iterable[int]) -> List[FileEntry]:
+        """移除指定行，返回被移除的文件"""
+        rows = set(rows)
+        removed = [self.entries.pop(self.paths[row]) for row in sorted(rows)]
+        self.paths = [path for row, path in enumerate(self.paths) if row not in rows]
+        self.total_size -= sum(entry.size for entry in removed)
+        return removed
+
+    def clear(self):
+        self.paths.clear()
+        self.entries.clear()
+        self.total_size = 0
@@ -0,0 +1,139 @@
+# pdf2md/image_links.py
+
+import os
+import re
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Markdown 图片引用: ![alt](link)
+IMAGE_LINK_PATTERN = re.compile(r'!\[([^]]*)\]\(([^)]+)\)')
+# 原始链接中的页码信息，例如 _page_12_Picture_0.jpeg（Marker 的页码从0开始）
+LINK_PAGE_PATTERN = re.compile(r'page[_\s]*(\d+)')
+_LINK_PAGE_NUMBER = re.compile(r'(page[_\s]*)(\d+)', re.IGNORECASE)
+# 备用引擎生成的文件名中的页码: page_012_img_01_xxxx.png（从1开始）
+IMAGE_PAGE_PATTERN = re.compile(r'page_(\d+)_')
+_FALLBACK_NAME_PATTERN = re.compile(r'^page_(\d+)_img_')
+# 部分匹配时文件名按下划线、连字符、空白等分隔符切分为词
+_NAME_SEPARATOR = re.compile(r'[\W_]+')
+
+
+def _name_tokens(stem: str) -> List[str]:
+    return [token for token in _NAME_SEPARATOR.split(stem) if token]
+
+
+def link_page(link: str) -> Optional[int]:
+    """图片链接所在的页码（从1开始）：备用引擎的文件名从1开始，Marker 的图片名从0开始"""
+    name = link.replace('\\', '/').rsplit('/', 1)[-1]
+    match = _FALLBACK_NAME_PATTERN.match(name)
+    if match:
+        return int(match.group(1))
+    match = LINK_PAGE_PATTERN.search(name.lower())
+    if match:
+        return int(match.group(1)) + 1
+    return None
+
+
+def offset_link_page(name: str, offset: int) -> str:
+    """Marker 图片名中的页码加上 offset；没有页码时原样返回"""
+    if not offset:
+        return name
+    return _LINK_PAGE_NUMBER.sub(lambda match: f"{match.group(1)}{int(match.group(2)) + offset}", name, count=1)
+
+
+class ImageLinkIndex:
+    """备用图片的匹配索引
+
+    预先建立 页码 -> 图片、文件名 -> 图片、主干名 -> 图片、词序列 -> 图片 四个索引，每次匹配都是常数时间（均摊），
+    整个链接重写对图片数和文档长度是线性的。
+    匹配优先级：同页图片 > 同名图片 > 同主干名（不同扩展名）图片 > 文件名包含链接主干名（按完整的词）的图片
+    > 第一张未使用的图片。
+
+    occurrences: 图片文件名 -> [(页码, ...), ...]，即去重后同一图片在文档中出现的每一页。
+    重复出现的图片（例如每页的标志）在它出现的每一页都可以被链接一次；没有记录时按文件名中的页码。
+    同一页的图片按页内从上到下的顺序匹配。
+    """
+
+    def __init__(self, image_names: Iterable[str], occurrences: Optional[Dict[str, Sequence[Tuple]]] = None):
+        self.order: List[str] = list(image_names)
+        self.used: Set[str] = set()
+        self._by_page: Dict[int, Deque[str]] = {}
+        # 已链接的 (页码, 图片)；_first_page 为图片第一次出现的页码
+        self._page_links: Set[Tuple[int, str]] = set()
+        self._first_page: Dict[str, int] = {}
+        self._names: Set[str] = set(self.order)
+        self._by_stem: Dict[str, Deque[str]] = {}
+        # 主干名中每一段连续的词（以 "_" 连接）-> 图片，用于部分匹配
+        self._by_tokens: Dict[str, Deque[str]] = {}
+        self._unused: Deque[str] = deque(self.order)
+
+        placements = []
+        for k, name in enumerate(self.order):
+            pages = [(occurrence[0], occurrence[2] if len(occurrence) > 2 else 0.0)
+                     for occurrence in (occurrences or {}).get(name, ())]
+            if not pages:
+                match = IMAGE_PAGE_PATTERN.search(name)
+                pages = [(int(match.group(1)), 0.0)] if match else []
+            if pages:
+                self._first_page[name] = min(page for page, _ in pages)
+            placements.extend((page, top, k, name) for page, top in pages)
+            stem = os.path.splitext(name)[0]
+            self._by_stem.setdefault(stem, deque()).append(name)
+            tokens = _name_tokens(stem)
+            keys = {"_".join(tokens[i:j]) for i in range(len(tokens)) for j in range(i + 1, len(tokens) + 1)}
+            for key in keys:
+                self._by_tokens.setdefault(key, deque()).append(name)
+        for page, _, _, name in sorted(placements):
+            self._by_page.setdefault(page, deque()).append(name)
+
+    def _first_unused(self, candidates: Optional[Deque[str]]) -> Optional[str]:
+        # 已使用的图片从队首弹出，每张图片最多被弹出一次
+        while candidates:
+            if candidates[0] not in self.used:
+                return candidates[0]
+            candidates.popleft()
+        return None
+
+    def _first_unlinked_on_page(self, page: int) -> Optional[str]:
+        # 每个 (页码, 图片) 最多被弹出一次
+        candidates = self._by_page.get(page)
+        while candidates:
+            if (page, candidates[0]) not in self._page_links:
+                return candidates[0]
+            candidates.popleft()
+        return None
+
+    def match(self, original_link: str) -> Optional[str]:
+        """为 Marker 的原始链接找到最合适的图片，并标记为已使用
+
+        按页码匹配时，重复出现的图片在它出现的每一页都可以匹配；其他方式只匹配尚未使用的图片。
+        """
+        best = None
+        page = link_page(original_link)
+        if page is not None:
+            best = self._first_unlinked_on_page(page)
+        if best is None:
+            page = None
+            if original_link in self._names and original_link not in self.used:
+                best = original_link
+
+        stem = os.path.splitext(original_link)[0]
+        if best is None:
+            best = self._first_unused(self._by_stem.get(stem))
+
+        if best is None:
+            tokens = _name_tokens(stem)
+            if tokens:
+                best = self._first_unused(self._by_tokens.get("_".join(tokens)))
+
+        if best is None:
+            best = self._first_unused(self._unused)
+
+        if best is not None:
+            self.used.add(best)
+            if page is None:
+                page = self._first_page.get(best)
+            self._page_links.add((page, best))
+        return best
+
+    def unused(self) -> List[str]:
+        return [name for name in self.order if name not in self.used]
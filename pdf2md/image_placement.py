@@ -0,0 +1,202 @@
+# pdf2md/image_placement.py
+
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Marker 开启 paginate_output 后在每页开头输出的分页标记: {页面ID}------...（页面ID从0开始）
+PAGE_MARKER_PATTERN = re.compile(r'^\{(\d+)\}-{48}$')
+_PAGE_MARKER_BLOCK = re.compile(r'\n*^\{\d+\}-{48}$\n*', re.MULTILINE)
+_PAGE_MARKER_LINE = re.compile(r'^\{(\d+)\}(-{48})$', re.MULTILINE)
+
+# 文本中提到页码的写法: 第5页 / page 5 / p. 5 / 页码：5 / 5页
+PAGE_HINT_PATTERN = re.compile(
+    r'第\s*(\d+)\s*页|page\s*(\d+)\b|p\.\s*(\d+)\b|页码[:：]\s*(\d+)|\b(\d+)\s*页',
+    re.IGNORECASE
+)
+HEADER_PATTERN = re.compile(r'^#+\s')
+
+# 锚点文字与 Markdown 行按去除标点、空白后的前若干个字符匹配
+ANCHOR_KEY_LENGTH = 16
+ANCHOR_KEY_MIN_LENGTH = 6
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def anchor_key(text: Optional[str]) -> Optional[str]:
+    """把锚点文字或 Markdown 行归一化为匹配键；太短（不可靠）时返回 None"""
+    if not text:
+        return None
+    key = _NON_WORD.sub('', text).lower()[:ANCHOR_KEY_LENGTH]
+    return key if len(key) >= ANCHOR_KEY_MIN_LENGTH else None
+
+
+def strip_page_markers(markdown_content: str) -> str:
+    """移除 Marker 的分页标记"""
+    return _PAGE_MARKER_BLOCK.sub('\n\n', markdown_content).lstrip('\n')
+
+
+def page_marker_ids(markdown_content: str) -> List[int]:
+    """按出现顺序返回分页标记中的页面ID（从0开始）"""
+    return [int(match.group(1)) for match in _PAGE_MARKER_LINE.finditer(markdown_content)]
+
+
+def offset_page_markers(markdown_content: str, offset: int) -> str:
+    """分页标记的页面ID整体加上 offset"""
+    if not offset:
+        return markdown_content
+    return _PAGE_MARKER_LINE.sub(lambda match: f"{{{int(match.group(1)) + offset}}}{match.group(2)}", markdown_content)
+
+
+def strip_page_markers_with_offsets(markdown_content: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """与 strip_page_markers 结果相同，同时返回每页在结果中的起点 [(字符位置, 页码(从1开始))]"""
+    pieces, pages = [], []
+    last = 0
+    for match in _PAGE_MARKER_BLOCK.finditer(markdown_content):
+        pieces.append(markdown_content[last:match.start()])
+        pages.append(int(PAGE_MARKER_PATTERN.match(match.group().strip('\n')).group(1)) + 1)
+        last = match.end()
+    pieces.append(markdown_content[last:])
+
+    text = '\n\n'.join(pieces)
+    stripped = text.lstrip('\n')
+    lead = len(text) - len(stripped)
+    offsets = []
+    position = len(pieces[0])
+    for page, piece in zip(pages, pieces[1:]):
+        position += 2
+        offsets.append((max(position - lead, 0), page))
+        position += len(piece)
+    return stripped, offsets
+
+
+class DocumentOutline:
+    """对 Markdown 做一次正向扫描，记录文档结构
+
+    page_starts: 页码(从1开始) -> 分页标记所在行
+    page_keys:   页码 -> {行的匹配键: 行号}，用于按锚点文字定位
+    breaks:      代码块外的空行和代码块起始行（段落边界）
+    headers:     标题所在的行号
+    page_hits:   页码 -> 第一次提到该页码、且其后不在代码块内的行号
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.page_starts: Dict[int, int] = {}
+        self.page_keys: Dict[int, Dict[str, int]] = {}
+        self.breaks: List[int] = []
+        self.headers: List[int] = []
+        self.page_hits: Dict[int, int] = {}
+
+        in_code_block = False
+        current_page = None
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped.startswith('```'):
+                if not in_code_block:
+                    self.breaks.append(i)
+                in_code_block = not in_code_block
+                continue
+            if in_code_block:
+                continue
+            if HEADER_PATTERN.match(line):
+                self.headers.append(i)
+            if not stripped:
+                self.breaks.append(i)
+                continue
+
+            marker = PAGE_MARKER_PATTERN.match(stripped)
+            if marker:
+                current_page = int(marker.group(1)) + 1
+                self.page_starts.setdefault(current_page, i)
+                continue
+            if current_page is not None:
+                key = anchor_key(stripped)
+                if key:
+                    self.page_keys.setdefault(current_page, {}).setdefault(key, i)
+
+            for match in PAGE_HINT_PATTERN.finditer(line):
+                page = int(next(group for group in match.groups() if group))
+                self.page_hits.setdefault(page, i)
+
+        # 每页的结束位置 = 下一个分页标记所在行
+        ordered = sorted(self.page_starts.items(), key=lambda item: item[1])
+        self._page_ends = {
+            page: ordered[k + 1][1] if k + 1 < len(ordered) else len(lines)
+            for k, (page, _) in enumerate(ordered)
+        }
+
+    @property
+    def has_page_markers(self) -> bool:
+        return bool(self.page_starts)
+
+    def anchored_point(self, page_num: int, anchor: Optional[str]) -> Optional[int]:
+        """按真实分页定位：插在锚点文字所在段落之后；没有锚点（图片在页首）时插在该页开头"""
+        start = self.page_starts.get(page_num)
+        if start is None:
+            return None
+        end = self._page_ends[page_num]
+        if anchor is None:
+            return start + 1
+
+        line = self.page_keys.get(page_num, {}).get(anchor_key(anchor))
+        if line is None:
+            # 找不到锚点文字时放在该页末尾
+            return end
+        k = bisect_left(self.breaks, line)
+        paragraph_end = self.breaks[k] if k < len(self.breaks) else len(self.lines)
+        return min(paragraph_end, end)
+
+    def estimated_point(self, page_num: int, page_count: int) -> Optional[int]:
+        """没有分页标记时的估算位置"""
+        # 策略1: 在提到该页码的行之后插入
+        if page_num in self.page_hits:
+            return self.page_hits[page_num] + 1
+
+        # 策略2: 按页码在全文中的比例估算位置，插在最近的标题之后
+        if not self.headers or page_count <= 0:
+            return None
+        estimated_position = int((min(page_num, page_count) / page_count) * len(self.lines))
+        k = bisect_left(self.headers, estimated_position)
+        candidates = self.headers[max(0, k - 1):k + 1]
+        best_header = min(candidates, key=lambda pos: abs(pos - estimated_position))
+        return best_header + 1
+
+
+def place_images(markdown_content: str, images: Iterable[Tuple[str, int, Optional[str]]], pdf_stem: str,
+                 page_count: int = 0) -> Tuple[str, Set[str]]:
+    """把 (图片文件名, 页码, 锚点文字) 插入到文档中，返回 (新文档, 已插入的图片)
+
+    文档带有 Marker 分页标记时，图片放在对应页面中、阅读顺序上紧邻其上方文字块的段落之后；
+    否则退回按页码提示和页数比例估算。先一次扫描得到文档结构，
+    再计算所有插入位置，最后一次性拼接输出。images 应按页码和页内阅读顺序排列。
+    同一图片出现在多页时（例如每页页眉中的标志），每一处都插入对同一文件的引用。
+    """
+    images = sorted(images, key=lambda item: item[1])
+    lines = markdown_content.split('\n')
+    outline = DocumentOutline(lines)
+    if page_count <= 0:
+        page_count = max((page_num for _, page_num, _ in images), default=0)
+
+    insertions: Dict[int, List[str]] = {}
+    placed: Set[str] = set()
+    for img_file, page_num, anchor in images:
+        position = None
+        if outline.has_page_markers:
+            position = outline.anchored_point(page_num, anchor)
+        if position is None:
+            position = outline.estimated_point(page_num, page_count)
+        if position is None:
+            continue
+        relative_path = f"{pdf_stem}_images/{img_file}"
+        insertions.setdefault(position, []).append(f"\n![第{page_num}页图片]({relative_path})\n")
+        placed.add(img_file)
+
+    if not insertions:
+        return markdown_content, placed
+
+    output = []
+    for i, line in enumerate(lines):
+        output.extend(insertions.get(i, ()))
+        output.append(line)
+    output.extend(insertions.get(len(lines), ()))
+    return '\n'.join(output), placed
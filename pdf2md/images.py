@@ -0,0 +1,207 @@
+# pdf2md/images.py
+
+import os
+import re
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# 检查 Pillow 是否可用（图片压缩需要）
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# 同时在内存中等待解码/写盘的图片数上限
+DEFAULT_MAX_PENDING = 32
+
+# 图片压缩的目标格式：keep 保持原格式（PNG 无损优化、JPEG/WebP 按质量重新编码）
+IMAGE_FORMATS = ("keep", "jpeg", "webp")
+DEFAULT_IMAGE_QUALITY = 85
+
+_FORMAT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+
+def default_image_workers() -> int:
+    return max(2, min(8, os.cpu_count() or 1))
+
+
+class ImageWriter:
+    """异步图片写入器
+
+    在线程池中完成 base64 解码和写盘，不阻塞转换线程。
+    待处理的图片数量有上限（submit 在达到上限时阻塞），每张图片写完后立即释放其数据，
+    因此峰值内存只与上限有关，而与文档中的图片总数无关。
+
+    用法:
+        with ImageWriter(images_dir) as writer:
+            writer.submit(name, b64_data)
+        writer.saved / writer.errors
+    """
+
+    def __init__(self, images_dir: str, max_workers: int = 0, max_pending: int = DEFAULT_MAX_PENDING):
+        self.images_dir = images_dir
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or default_image_workers(),
+                                            thread_name_prefix="pdf2md-images")
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self.saved: List[Tuple[str, int]] = []  # (图片文件名, 字节数)
+        self.errors: List[Tuple[str, str]] = []  # (图片文件名, 错误信息)
+
+    def submit(self, img_name: str, img_b64_data: str):
+        """提交一张 base64 图片；待处理的图片已达上限时等待"""
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._write, img_name, img_b64_data)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _write(self, img_name: str, img_b64_data: str):
+        try:
+            img_bytes = base64.b64decode(img_b64_data)
+            with open(os.path.join(self.images_dir, img_name), 'wb') as img_file:
+                img_file.write(img_bytes)
+            with self._lock:
+                self.saved.append((img_name, len(img_bytes)))
+        except Exception as img_save_error:
+            with self._lock:
+                self.errors.append((img_name, str(img_save_error)))
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """等待所有已提交的图片写完"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            'saved': len(self.saved),
+            'bytes': sum(size for _, size in self.saved),
+            'errors': len(self.errors),
+        }
+
+
+def compression_options(config_dict: Dict) -> Optional[Dict]:
+    """从配置中读取图片压缩选项；未开启压缩时返回 None"""
+    if not config_dict.get("compress_images"):
+        return None
+    image_format = str(config_dict.get("image_format") or "keep").lower()
+    return {
+        'format': image_format if image_format in IMAGE_FORMATS else "keep",
+        'quality': max(10, min(100, int(config_dict.get("image_quality") or DEFAULT_IMAGE_QUALITY))),
+        'max_dimension': max(0, int(config_dict.get("image_max_dimension") or 0)),
+    }
+
+
+def compress_image_file(path: str, options: Dict) -> Tuple[str, int, int]:
+    """按选项重新编码/缩小一张图片，返回 (新路径, 原大小, 新大小)
+
+    结果不比原图小时保留原文件。格式改变时原文件被替换为新扩展名的文件。
+    """
+    before = os.path.getsize(path)
+    with Image.open(path) as image:
+        image.load()
+        source_format = image.format or ""
+
+        resized = False
+        max_dimension = options['max_dimension']
+        if max_dimension and max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+            resized = True
+
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        target_format = {"jpeg": "JPEG", "webp": "WEBP"}.get(options['format'], source_format)
+        if target_format == "JPEG" and has_alpha:
+            # JPEG 不支持透明通道，带透明的图片只做无损优化
+            target_format = "PNG"
+        if target_format not in _FORMAT_EXTENSIONS:
+            if not resized:
+                return path, before, before
+            target_format = "PNG"
+
+        base, ext = os.path.splitext(path)
+        if _FORMAT_EXTENSIONS[target_format] == ext.lower() or (target_format == "JPEG" and ext.lower() == ".jpeg"):
+            new_path = path
+        else:
+            new_path = base + _FORMAT_EXTENSIONS[target_format]
+            if os.path.exists(new_path):
+                # 同名的其他图片已占用目标文件名，保持原格式
+                target_format = source_format if source_format in _FORMAT_EXTENSIONS else "PNG"
+                new_path = path
+
+        if target_format == "JPEG":
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            save_options = {'quality': options['quality'], 'optimize': True, 'progressive': True}
+        elif target_format == "WEBP":
+            save_options = {'quality': options['quality'], 'method': 4}
+        else:
+            save_options = {'optimize': True}
+
+        tmp_path = new_path + ".tmp"
+        image.save(tmp_path, format=target_format, **save_options)
+
+    after = os.path.getsize(tmp_path)
+    if after >= before and not resized and new_path == path:
+        os.remove(tmp_path)
+        return path, before, before
+
+    os.replace(tmp_path, new_path)
+    if new_path != path:
+        os.remove(path)
+    return new_path, before, after
+
+
+class ImageCompressor:
+    """在线程池中压缩一批图片，记录每张图片节省的空间和文件名变化"""
+
+    def __init__(self, options: Dict, max_workers: int = 0):
+        self.options = options
+        self.max_workers = max_workers or default_image_workers()
+
+    def compress(self, images_dir: str, image_names: List[str]) -> Tuple[Dict[str, str], List[Dict]]:
+        """压缩 images_dir 中的指定图片，返回 (旧文件名 -> 新文件名, 每张图片的结果)"""
+        if not PIL_AVAILABLE or not image_names:
+            return {}, []
+
+        def process(img_name):
+            try:
+                new_path, before, after = compress_image_file(os.path.join(images_dir, img_name), self.options)
+                return {'image': img_name, 'output': os.path.basename(new_path), 'before': before, 'after': after}
+            except Exception as compress_error:
+                return {'image': img_name, 'output': img_name, 'before': 0, 'after': 0, 'error': str(compress_error)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pdf2md-compress") as executor:
+            results = list(executor.map(process, image_names))
+
+        renames = {r['image']: r['output'] for r in results if r['output'] != r['image']}
+        return renames, results
+
+
+_IMAGE_LINK_PATTERN = re.compile(r'(!\[[^\]]*\]\()([^)\s]+)(\))')
+
+
+def rename_image_links(markdown_content: str, renames: Dict[str, str]) -> str:
+    """把 Markdown 图片链接中的旧文件名替换为压缩后的新文件名"""
+    if not renames:
+        return markdown_content
+
+    def replace(match):
+        link = match.group(2)
+        directory, _, name = link.rpartition('/')
+        if name not in renames:
+            return match.group(0)
+        new_link = f"{directory}/{renames[name]}" if directory else renames[name]
+        return match.group(1) + new_link + match.group(3)
+
+    return _IMAGE_LINK_PATTERN.sub(replace, markdown_content)
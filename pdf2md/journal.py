@@ -0,0 +1,127 @@
+# pdf2md/journal.py
+
+import os
+import json
+import datetime
+from typing import Dict, Iterable, Optional
+
+from .cache import file_digest
+
+# 文件状态
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+JOURNAL_FILENAME = ".pdf2md_journal.jsonl"
+
+
+class JobJournal:
+    """输出目录中的任务日志（只追加的 JSONL）
+
+    每次状态变化追加一行 {path, state, time, size, mtime, ...}，同一文件以最后一行为准。
+    程序崩溃或被中止后，续传模式据此跳过已完成且输出未被改动的文件，
+    只重新转换失败或中断（pending / running）的文件。
+    """
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, JOURNAL_FILENAME)
+        self._entries: Dict[str, Dict] = {}
+        self._lines = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if data and not data.endswith(b"\n"):
+            # 崩溃时可能留下写了一半的最后一行：截掉它，之后追加的记录才会从新的一行开始
+            data = data[:data.rfind(b"\n") + 1]
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(data))
+                os.fsync(f.fileno())
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            try:
+                record = json.loads(line)
+                self._entries[record['path']] = record
+            except (ValueError, KeyError, TypeError):
+                continue
+            self._lines += 1
+
+    def state(self, pdf_path: str) -> Optional[str]:
+        record = self._entries.get(os.path.abspath(pdf_path))
+        return record['state'] if record else None
+
+    def completed_summary(self, pdf_path: str) -> Optional[Dict]:
+        """文件已完成、输入未变化且输出文件未被改动时，返回上次的转换摘要"""
+        record = self._entries.get(os.path.abspath(pdf_path))
+        if not record or record['state'] != STATE_DONE:
+            return None
+        try:
+            stat = os.stat(pdf_path)
+            if stat.st_size != record.get('size') or stat.st_mtime != record.get('mtime'):
+                return None
+            output_path = record.get('output')
+            if not output_path or file_digest(output_path) != record.get('output_sha256'):
+                return None
+        except OSError:
+            return None
+
+        summary = dict(record.get('summary') or {})
+        summary['resumed'] = True
+        return summary
+
+    def mark_pending(self, pdf_paths: Iterable[str]):
+        self._append([self._record(path, STATE_PENDING) for path in pdf_paths])
+
+    def mark_running(self, pdf_path: str):
+        self._append([self._record(pdf_path, STATE_RUNNING)])
+
+    def mark_finished(self, summary: Dict, output_path: Optional[str] = None):
+        """记录转换结果；成功时同时记录输出文件的哈希"""
+        if summary['success']:
+            record = self._record(summary['path'], STATE_DONE, summary=summary)
+            if output_path and os.path.exists(output_path):
+                record['output'] = os.path.abspath(output_path)
+                record['output_sha256'] = file_digest(output_path)
+        else:
+            record = self._record(summary['path'], STATE_FAILED, error=summary['error'])
+        self._append([record])
+
+    def compact(self):
+        """日志行数远多于文件数时，只保留每个文件的最后状态"""
+        if self._lines <= 2 * len(self._entries) + 100:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self._entries.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._lines = len(self._entries)
+
+    def _record(self, pdf_path: str, state: str, **extra) -> Dict:
+        pdf_path = os.path.abspath(pdf_path)
+        record = {'path': pdf_path, 'state': state, 'time': datetime.datetime.now().isoformat()}
+        try:
+            stat = os.stat(pdf_path)
+            record['size'] = stat.st_size
+            record['mtime'] = stat.st_mtime
+        except OSError:
+            pass
+        record.update(extra)
+        return record
+
+    def _append(self, records):
+        if not records:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for record in records:
+            self._entries[record['path']] = record
+        self._lines += len(records)
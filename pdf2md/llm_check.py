@@ -0,0 +1,344 @@
+# pdf2md/llm_check.py
+"""LLM 服务的连接测试与延迟探测
+
+直接用标准库按各服务的 HTTP 接口发送最小请求（与 Marker 使用的服务相同），不依赖各家的 SDK。
+输入是 build_llm_config() 生成的 Marker LLM 配置，界面和命令行共用。
+
+用法: python -m pdf2md.llm_check --service "LM Studio" --base-url http://localhost:1234/v1 --requests 20 -j 4
+"""
+
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .config import LLM_SERVICE_CLASSES, build_llm_config, load_config_file
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRY_WAIT = 1.0
+# 这些状态码与超时一样按 Marker 的做法重试，其他错误直接失败
+RETRY_STATUS = (429, 500, 502, 503, 504)
+PROBE_PROMPT = "Reply with the single word OK."
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+OLLAMA_BASE_URL = "http://localhost:11434"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+CLAUDE_BASE_URL = "https://api.anthropic.com/v1"
+AZURE_API_VERSION = "2024-10-21"
+
+# Marker 服务类 -> 界面中的服务名称
+_SERVICE_NAMES = {}
+for _name, _cls in LLM_SERVICE_CLASSES.items():
+    _SERVICE_NAMES.setdefault(_cls, _name)
+
+
+class LLMRequestError(Exception):
+    """LLM 请求失败；status 为 HTTP 状态码（网络错误和超时为 None）"""
+
+    def __init__(self, message: str, status: Optional[int] = None, timeout: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.timeout = timeout
+
+    @property
+    def retryable(self) -> bool:
+        return self.timeout or self.status in RETRY_STATUS
+
+
+class Endpoint:
+    """按服务类型组装模型列表和最小补全请求
+
+    service_name 为界面/配置文件中选择的服务名称；LM Studio 与 OpenAI 共用同一个服务类，
+    不指定时只能按服务类推断。
+    """
+
+    def __init__(self, llm_config: Dict, service_name: Optional[str] = None):
+        self.service = llm_config.get("llm_service", "")
+        self.name = service_name or _SERVICE_NAMES.get(self.service, self.service.rsplit(".", 1)[-1])
+        self.missing: Optional[str] = None  # 缺少的必填项说明
+        cfg = llm_config
+
+        if self.service.endswith("openai.OpenAIService"):
+            base = (cfg.get("openai_base_url") or OPENAI_BASE_URL).rstrip("/")
+            self.model = cfg.get("openai_model") or cfg.get("model") or ""
+            headers = {"Authorization": f"Bearer {cfg['openai_api_key']}"} if cfg.get("openai_api_key") else {}
+            self.models_request = (f"{base}/models", None, headers)
+            self.chat_request = (f"{base}/chat/completions", {
+                "model": self.model or "default",
+                "messages": [{"role": "user", "content": PROBE_PROMPT}],
+                "max_tokens": 1,
+            }, headers)
+
+        elif self.service.endswith("ollama.OllamaService"):
+            base = (cfg.get("ollama_base_url") or OLLAMA_BASE_URL).rstrip("/")
+            self.model = cfg.get("ollama_model") or ""
+            self.models_request = (f"{base}/api/tags", None, {})
+            self.chat_request = (f"{base}/api/generate", {
+                "model": self.model or "llama3", "prompt": PROBE_PROMPT, "stream": False,
+                "options": {"num_predict": 1},
+            }, {})
+
+        elif self.service.endswith("gemini.GoogleGeminiService"):
+            key = urllib.parse.quote(cfg.get("gemini_api_key") or "")
+            if not key:
+                self.missing = "Gemini 需要填写 API 密钥"
+            self.model = cfg.get("gemini_model") or "gemini-2.0-flash"
+            self.models_request = (f"{GEMINI_BASE_URL}/models?key={key}", None, {})
+            self.chat_request = (f"{GEMINI_BASE_URL}/models/{self.model}:generateContent?key={key}", {
+                "contents": [{"parts": [{"text": PROBE_PROMPT}]}],
+                "generationConfig": {"maxOutputTokens": 1},
+            }, {})
+
+        elif self.service.endswith("claude.ClaudeService"):
+            headers = {"x-api-key": cfg.get("claude_api_key") or "", "anthropic-version": "2023-06-01"}
+            if not headers["x-api-key"]:
+                self.missing = "Claude 需要填写 API 密钥"
+            self.model = cfg.get("claude_model_name") or "claude-3-5-haiku-latest"
+            self.models_request = (f"{CLAUDE_BASE_URL}/models", None, headers)
+            self.chat_request = (f"{CLAUDE_BASE_URL}/messages", {
+                "model": self.model, "max_tokens": 1,
+                "messages": [{"role": "user", "content": PROBE_PROMPT}],
+            }, headers)
+
+        elif self.service.endswith("azure_openai.AzureOpenAIService"):
+            base = (cfg.get("azure_endpoint") or "").rstrip("/")
+            version = cfg.get("azure_api_version") or AZURE_API_VERSION
+            self.model = cfg.get("deployment_name") or ""
+            headers = {"api-key": cfg.get("azure_api_key") or ""}
+            if not base or not self.model:
+                self.missing = "Azure OpenAI 需要填写 Endpoint (Base URL) 和部署名称"
+            self.models_request = None  # Azure 按部署调用，没有通用的模型列表
+            self.chat_request = (f"{base}/openai/deployments/{self.model}/chat/completions?api-version={version}", {
+                "messages": [{"role": "user", "content": PROBE_PROMPT}], "max_tokens": 1,
+            }, headers)
+
+        else:
+            raise ValueError(f"不支持的 LLM 服务: {self.service or '(未设置)'}")
+
+
+def _request(url: str, payload: Optional[Dict], headers: Dict, timeout: float) -> Dict:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET")
+    request.add_header("Accept", "application/json")
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    for name, value in headers.items():
+        request.add_header(name, value)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode("utf-8", "replace")[:300]
+        raise LLMRequestError(f"HTTP {e.code}: {_error_message(detail) or e.reason}", status=e.code)
+    except (socket.timeout, TimeoutError):
+        raise LLMRequestError(f"请求超时 ({timeout:g} 秒)", timeout=True)
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, (socket.timeout, TimeoutError)):
+            raise LLMRequestError(f"请求超时 ({timeout:g} 秒)", timeout=True)
+        raise LLMRequestError(f"无法连接: {e.reason}")
+    except (ConnectionError, OSError) as e:
+        raise LLMRequestError(f"连接中断: {e}")
+    try:
+        return json.loads(body or b"{}")
+    except ValueError:
+        raise LLMRequestError("服务返回的不是 JSON")
+
+
+def _error_message(detail: str) -> str:
+    try:
+        error = json.loads(detail).get("error")
+    except (ValueError, AttributeError):
+        return detail.strip()
+    if isinstance(error, dict):
+        return error.get("message") or json.dumps(error, ensure_ascii=False)
+    return str(error or "")
+
+
+def _model_ids(payload: Dict) -> List[str]:
+    """从各服务的模型列表响应中取出模型名称"""
+    items = payload.get("data") or payload.get("models") or []
+    names = []
+    for item in items:
+        if isinstance(item, dict):
+            name = item.get("id") or item.get("name") or item.get("model")
+            if name:
+                names.append(name.rsplit("/", 1)[-1] if name.startswith("models/") else name)
+    return names
+
+
+def call_with_retries(endpoint: Endpoint, timeout: float = DEFAULT_TIMEOUT, max_retries: int = 2,
+                      retry_wait: float = DEFAULT_RETRY_WAIT) -> Tuple[float, int]:
+    """发送一次最小补全请求，可重试的错误（超时、429、5xx）按 第 n 次 x retry_wait 秒退避后重试
+
+    返回 (成功那次请求的耗时, 重试次数)；最终失败时抛出 LLMRequestError（附带 retries 属性）。
+    """
+    url, payload, headers = endpoint.chat_request
+    retries = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            _request(url, payload, headers, timeout)
+            return time.perf_counter() - start, retries
+        except LLMRequestError as e:
+            if not e.retryable or retries >= max_retries:
+                e.retries = retries
+                raise
+            retries += 1
+            time.sleep(retries * retry_wait)
+
+
+def test_connection(llm_config: Dict, timeout: float = DEFAULT_TIMEOUT, service_name: Optional[str] = None) -> Dict:
+    """测试 LLM 服务：读取模型列表，再发送一次最小补全请求
+
+    返回 {'ok', 'message', 'latency', 'models'}；latency 为补全请求的耗时（秒）。
+    """
+    result = {'ok': False, 'message': "", 'latency': None, 'models': []}
+    try:
+        endpoint = Endpoint(llm_config, service_name)
+    except ValueError as e:
+        result['message'] = str(e)
+        return result
+    if endpoint.missing:
+        result['message'] = endpoint.missing
+        return result
+
+    if endpoint.models_request is not None:
+        url, _, headers = endpoint.models_request
+        try:
+            result['models'] = _model_ids(_request(url, None, headers, timeout))
+        except LLMRequestError as e:
+            result['message'] = f"无法获取模型列表: {e}"
+            return result
+
+    try:
+        result['latency'], _ = call_with_retries(endpoint, timeout, max_retries=0)
+    except LLMRequestError as e:
+        result['message'] = f"补全请求失败: {e}"
+        if endpoint.model and result['models'] and endpoint.model not in result['models']:
+            result['message'] += f"\n模型 '{endpoint.model}' 不在服务的模型列表中"
+        return result
+
+    result['ok'] = True
+    model = endpoint.model or (result['models'][0] if result['models'] else "默认模型")
+    result['message'] = f"{endpoint.name} 连接正常，模型 {model}，响应耗时 {result['latency'] * 1000:.0f} ms"
+    return result
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def probe_latency(llm_config: Dict, requests: int = 10, concurrency: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                  max_retries: int = 2, retry_wait: float = DEFAULT_RETRY_WAIT) -> Dict:
+    """以给定并发发送 requests 个最小补全请求，统计延迟分布、重试和失败
+
+    返回 {'requests', 'ok', 'failed', 'retries', 'timeouts', 'errors', 'wall_seconds', 'throughput',
+          'mean', 'p50', 'p95', 'max'}，耗时单位为秒（没有成功请求时延迟统计为 None）。
+    """
+    endpoint = Endpoint(llm_config)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    counters = {'retries': 0, 'timeouts': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def one(_):
+        try:
+            latency, retries = call_with_retries(endpoint, timeout, max_retries, retry_wait)
+            with lock:
+                latencies.append(latency)
+                counters['retries'] += retries
+        except LLMRequestError as e:
+            with lock:
+                counters['failed'] += 1
+                counters['retries'] += getattr(e, 'retries', 0)
+                counters['timeouts'] += 1 if e.timeout else 0
+                key = f"HTTP {e.status}" if e.status else ("超时" if e.timeout else "网络错误")
+                errors[key] = errors.get(key, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    stats = {
+        'requests': requests,
+        'ok': len(latencies),
+        'failed': counters['failed'],
+        'retries': counters['retries'],
+        'timeouts': counters['timeouts'],
+        'errors': errors,
+        'wall_seconds': round(wall, 4),
+        'throughput': round(len(latencies) / wall, 3) if wall > 0 else 0.0,
+        'mean': None, 'p50': None, 'p95': None, 'max': None,
+    }
+    if latencies:
+        stats.update(mean=round(sum(latencies) / len(latencies), 4), p50=round(_percentile(latencies, 0.5), 4),
+                     p95=round(_percentile(latencies, 0.95), 4), max=round(max(latencies), 4))
+    return stats
+
+
+def format_probe(stats: Dict) -> str:
+    lines = [f"请求 {stats['requests']}，成功 {stats['ok']}，失败 {stats['failed']}，重试 {stats['retries']}，"
+             f"耗时 {stats['wall_seconds']:.2f} 秒 ({stats['throughput']:.2f} 请求/秒)"]
+    if stats['p50'] is not None:
+        lines.append(f"延迟: 平均 {stats['mean'] * 1000:.0f} ms，P50 {stats['p50'] * 1000:.0f} ms，"
+                     f"P95 {stats['p95'] * 1000:.0f} ms，最大 {stats['max'] * 1000:.0f} ms")
+    if stats['errors']:
+        lines.append("错误: " + "，".join(f"{kind} x{count}" for kind, count in stats['errors'].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pdf2md.llm_check", description="LLM 服务连接测试与延迟探测")
+    parser.add_argument("-c", "--config", help="JSON 配置文件（读取其中的 LLM 设置）")
+    parser.add_argument("--service", choices=list(LLM_SERVICE_CLASSES), default="LM Studio")
+    parser.add_argument("--base-url", default="")
+    parser.add_argument("--model", default="")
+    parser.add_argument("--api-key", default="")
+    parser.add_argument("--requests", type=int, default=10, help="延迟探测的请求数，0 为只测试连接")
+    parser.add_argument("-j", "--concurrency", type=int, default=1, help="并发请求数")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单个请求的超时（秒）")
+    parser.add_argument("--retries", type=int, default=2, help="超时、429 和 5xx 时的最大重试次数")
+    parser.add_argument("--retry-wait", type=float, default=DEFAULT_RETRY_WAIT, help="重试的退避基数（秒）")
+    args = parser.parse_args(argv)
+
+    if args.config:
+        try:
+            options = load_config_file(args.config)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取配置文件 '{args.config}': {e}", file=sys.stderr)
+            return 2
+        llm_config = options['llm_service_config']
+        service_name = options['llm_service_name']
+        if not llm_config:
+            print("错误: 配置文件没有启用 LLM (use_llm)。", file=sys.stderr)
+            return 2
+    else:
+        base_url = args.base_url or ("http://localhost:1234/v1" if args.service == "LM Studio" else "")
+        llm_config = build_llm_config(args.service, args.api_key, base_url, args.model)
+        service_name = args.service
+
+    result = test_connection(llm_config, args.timeout, service_name)
+    print(result['message'])
+    if result['models']:
+        print("可用模型: " + ", ".join(result['models'][:10]) + (" ..." if len(result['models']) > 10 else ""))
+    if not result['ok']:
+        return 1
+    if args.requests > 0:
+        stats = probe_latency(llm_config, args.requests, args.concurrency, args.timeout, args.retries,
+                              args.retry_wait)
+        print(format_probe(stats))
+        return 0 if stats['ok'] else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+# pdf2md/llm_gateway.py
+"""LLM 请求网关
+
+Marker 的 LLM 处理器以 max_concurrency 个线程并发调用 llm_service。网关作为 llm_service 包在
+实际的服务类（OpenAIService、OllamaService ……）外面，对每个请求依次：
+
+    1. 按 (服务, 端点, 模型, 提示词, 响应 schema, 图片内容哈希) 查磁盘缓存，命中时不发请求；
+    2. 占用该服务的并发名额（同一进程内同一服务共享），再从令牌桶取令牌（每分钟请求数上限）；
+    3. 调用实际服务；失败（Marker 的服务出错时返回空结果）时按指数退避加随机抖动重试；
+    4. 成功的响应写入缓存。
+
+同样的 LLM 设置重新转换同一份文档时，全部请求都从缓存返回。
+并发名额和令牌桶在每个进程内独立计算，多进程转换时总并发约为 进程数 x llm_max_concurrency。
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from .config import DEFAULT_LLM_CONCURRENCY, DEFAULT_LLM_MAX_RETRIES, LLM_SERVICE_CLASSES
+
+try:
+    from marker.services import BaseService
+    from marker.util import strings_to_classes
+except ImportError:
+    # 未安装 Marker 时限流器和缓存仍可单独使用
+    BaseService = object
+    strings_to_classes = None
+
+GATEWAY_SERVICE = "pdf2md.llm_gateway.LLMGatewayService"
+
+# 只影响请求调度、不影响转换结果的配置项
+GATEWAY_TUNING_KEYS = ("llm_max_concurrency", "llm_requests_per_minute", "llm_max_retries", "llm_cache_dir",
+                       "max_concurrency")
+
+# 重试等待：第 n 次重试等待 RETRY_BASE_DELAY * 2^(n-1) 秒（不超过 MAX_RETRY_DELAY），再乘以 0.5~1 的随机系数
+RETRY_BASE_DELAY = 2.0
+MAX_RETRY_DELAY = 60.0
+
+# 各服务类中保存端点和模型名的属性
+_ENDPOINT_ATTRS = ("openai_base_url", "ollama_base_url", "azure_endpoint")
+_MODEL_ATTRS = ("openai_model", "ollama_model", "gemini_model_name", "claude_model_name", "deployment_name")
+
+
+def gateway_config(llm_config: Dict) -> Dict:
+    """把 build_llm_config() 生成的配置改为经由网关调用：原服务类保存在 llm_gateway_service 中
+
+    Marker 的 LLM 处理器按 max_concurrency 并发提交请求，与网关的并发名额保持一致。
+    """
+    config = dict(llm_config)
+    service = config.get("llm_service") or LLM_SERVICE_CLASSES["OpenAI"]
+    if service != GATEWAY_SERVICE:
+        config["llm_gateway_service"] = service
+        config["llm_service"] = GATEWAY_SERVICE
+    config["use_llm"] = True
+    config["max_concurrency"] = max(1, int(config.get("llm_max_concurrency") or DEFAULT_LLM_CONCURRENCY))
+    return config
+
+
+def retry_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY) -> float:
+    """第 attempt 次重试（从1开始）前的等待秒数"""
+    return min(MAX_RETRY_DELAY, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """令牌桶：每分钟补充 requests_per_minute 个令牌，最多积攒 capacity 个；速率为 0 时不限速"""
+
+    def __init__(self, requests_per_minute: float, capacity: float = 1):
+        self.rate = max(0.0, requests_per_minute) / 60.0
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取一个令牌，没有时等待；返回等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class ServiceLimiter:
+    """一个 LLM 服务的并发名额 + 令牌桶"""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float = 0):
+        self.settings = (max_concurrency, requests_per_minute)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.bucket = TokenBucket(requests_per_minute, capacity=max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __enter__(self):
+        self._slots.acquire()
+        try:
+            self.bucket.acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+_limiters: Dict[Tuple, ServiceLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(service_key: Tuple, max_concurrency: int, requests_per_minute: float = 0) -> ServiceLimiter:
+    """同一进程内同一服务（服务类、端点、模型）共享一个限流器；设置变化时换用新的限流器"""
+    with _limiters_lock:
+        limiter = _limiters.get(service_key)
+        if limiter is None or limiter.settings != (max_concurrency, requests_per_minute):
+            limiter = ServiceLimiter(max_concurrency, requests_per_minute)
+            _limiters[service_key] = limiter
+        return limiter
+
+
+class GatewayStats:
+    """进程内所有网关的累计计数：requests 实际发出的请求，cache_hits 缓存命中，
+    retries 重试，failures 重试用尽后仍失败的请求"""
+
+    FIELDS = ('requests', 'cache_hits', 'retries', 'failures')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def count(self, field: str):
+        with self._lock:
+            self._counts[field] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+STATS = GatewayStats()
+
+
+def stats_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {field: after[field] - before[field] for field in GatewayStats.FIELDS}
+
+
+def format_stats(delta: Dict[str, int]) -> str:
+    text = f"{delta['requests']} 次请求，{delta['cache_hits']} 次缓存命中"
+    if delta['retries']:
+        text += f"，{delta['retries']} 次重试"
+    if delta['failures']:
+        text += f"，{delta['failures']} 次失败"
+    return text
+
+
+def _image_digest(image) -> str:
+    """图片内容哈希：PIL 图片按模式、尺寸和像素数据计算，与编码方式无关"""
+    digest = hashlib.sha256()
+    if isinstance(image, (bytes, bytearray)):
+        digest.update(image)
+    else:
+        digest.update(f"{image.mode}:{image.size}".encode("utf-8"))
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _schema_text(response_schema) -> str:
+    if hasattr(response_schema, 'model_json_schema'):
+        return json.dumps(response_schema.model_json_schema(), sort_keys=True, ensure_ascii=False)
+    return repr(response_schema)
+
+
+def request_key(service_key: Tuple, prompt: str, image, response_schema) -> str:
+    """缓存键 = (服务, 端点, 模型) + 提示词 + 响应 schema + 各图片的内容哈希"""
+    if image is None:
+        images = []
+    elif isinstance(image, (list, tuple)):
+        images = list(image)
+    else:
+        images = [image]
+    payload = {
+        'service': list(service_key),
+        'prompt': prompt,
+        'schema': _schema_text(response_schema),
+        'images': [_image_digest(item) for item in images],
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """LLM 响应的磁盘缓存：每个响应一个 JSON 文件 <目录>/<键前2位>/<键>.json
+
+    写入时先写临时文件再原子替换，多个进程可以共用同一个缓存目录。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.abspath(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, response: Dict):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(response, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except OSError:
+            # 缓存写入失败不影响转换
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class LLMGatewayService(BaseService):
+    """Marker 的 llm_service：在 llm_gateway_service 指定的服务外加上缓存、并发限制、限流和重试"""
+
+    llm_gateway_service: str = LLM_SERVICE_CLASSES["OpenAI"]
+    llm_max_concurrency: int = DEFAULT_LLM_CONCURRENCY
+    llm_requests_per_minute: float = 0
+    llm_max_retries: int = DEFAULT_LLM_MAX_RETRIES
+    llm_cache_dir: Optional[str] = None
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        service_cls = strings_to_classes([self.llm_gateway_service])[0]
+        self.service = service_cls(config)
+        # 重试统一由网关按指数退避处理
+        self.service.max_retries = 0
+
+        endpoint = next((getattr(self.service, attr) for attr in _ENDPOINT_ATTRS
+                         if getattr(self.service, attr, None)), "")
+        model = next((getattr(self.service, attr) for attr in _MODEL_ATTRS
+                      if getattr(self.service, attr, None)), "")
+        self.service_key = (self.llm_gateway_service, str(endpoint), str(model))
+        self.limiter = get_limiter(self.service_key, max(1, int(self.llm_max_concurrency)),
+                                   float(self.llm_requests_per_minute or 0))
+        self.cache = LLMResponseCache(self.llm_cache_dir) if self.llm_cache_dir else None
+
+    def __call__(self, prompt, image, block, response_schema, max_retries=None, timeout=None):
+        key = None
+        if self.cache is not None:
+            key = request_key(self.service_key, prompt, image, response_schema)
+            cached = self.cache.get(key)
+            if cached:
+                STATS.count('cache_hits')
+                return cached
+
+        retries = self.llm_max_retries if max_retries is None else max_retries
+        for attempt in range(retries + 1):
+            if attempt:
+                STATS.count('retries')
+                time.sleep(retry_delay(attempt))
+            with self.limiter:
+                STATS.count('requests')
+                response = self.service(prompt, image, block, response_schema, max_retries=0, timeout=timeout)
+            if response:
+                if key is not None:
+                    self.cache.put(key, response)
+                return response
+
+        STATS.count('failures')
+        return {}
@@ -0,0 +1,420 @@
+# pdf2md/llm_stub.py
+"""本地离线的 OpenAI 兼容 LLM 模拟服务
+
+用于在没有真实 LLM 端点时测试和测量开启 LLM 的转换流程。界面中选择 "LM Studio"，
+Base URL 填 http://localhost:1234/v1 即可指向本服务（默认端口与 LM Studio 相同）。
+
+支持的接口：
+    GET  /v1/models             模型列表
+    POST /v1/chat/completions   对话补全，支持 stream=true（SSE）
+    GET  /stats                 请求统计（请求数、错误数、并发峰值、平均耗时）
+
+请求带有 response_format (json_schema) 时，按 schema 生成一个字段齐全的"空"结果
+（字符串为空、数组为空、数字为 0……），Marker 的 LLM 处理器据此保留原有的非 LLM 输出，
+因此可以放心地用真实文档测试整个流程。
+
+响应耗时 = latency + 0~jitter 的随机值 + completion_tokens / tokens_per_sec。
+error_rate 的请求返回错误（429 附带 Retry-After），timeout_rate 的请求挂起 hang_seconds 后才返回，
+超过 max_concurrency 的并发请求直接返回 429，用于测试并发、重试和超时。
+
+用法: python -m pdf2md.llm_stub [--port 1234] [--latency 0.5] [--tokens-per-sec 50] [--error-rate 0.1]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+DEFAULT_PORT = 1234
+DEFAULT_MODEL = "pdf2md-stub"
+# 估算 token 数：约 4 个字符一个 token，每张图片按 85 个 token 计
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 85
+STREAM_CHUNKS = 8
+
+
+def schema_instance(schema: Dict, defs: Optional[Dict] = None):
+    """按 JSON Schema 生成一个满足结构要求的最小实例"""
+    defs = defs if defs is not None else schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return schema_instance(defs.get(schema["$ref"].rsplit("/", 1)[-1], {}), defs)
+    if "const" in schema:
+        return schema["const"]
+    if "default" in schema:
+        return schema["default"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if schema.get(key):
+            options = [option for option in schema[key] if option.get("type") != "null"] or schema[key]
+            return schema_instance(options[0], defs)
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: schema_instance(prop, defs) for name, prop in properties.items()}
+    return {"array": [], "string": "", "integer": 0, "number": 0, "boolean": False}.get(kind)
+
+
+def _prompt_tokens(messages) -> int:
+    tokens = 0
+    for message in messages or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += len(content) // CHARS_PER_TOKEN
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                tokens += len(part.get("text", "")) // CHARS_PER_TOKEN
+            else:
+                tokens += IMAGE_TOKENS
+    return max(1, tokens)
+
+
+class StubStats:
+    """线程安全的请求统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.peak_concurrency = 0
+        self.total_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def enter(self, limit: int) -> bool:
+        """登记一个进行中的请求；超过并发上限时返回 False"""
+        with self._lock:
+            self.requests += 1
+            if limit and self.in_flight >= limit:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+            return True
+
+    def leave(self, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_seconds += seconds
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            served = self.requests - self.rejected
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+                'in_flight': self.in_flight,
+                'peak_concurrency': self.peak_concurrency,
+                'mean_seconds': round(self.total_seconds / served, 4) if served else 0.0,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+            }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server_version = "pdf2md-llm-stub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.stub.verbose:
+            sys.stderr.write("[llm-stub] " + (format % args) + "\n")
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict] = None):
+        kind = {401: "authentication_error", 429: "rate_limit_error"}.get(status, "server_error")
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": status}}, headers)
+
+    def _authorized(self) -> bool:
+        api_key = self.server.stub.api_key
+        if not api_key:
+            return True
+        return self.headers.get("Authorization", "") == f"Bearer {api_key}"
+
+    def do_GET(self):
+        stub = self.server.stub
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/stats":
+            self._send_json(200, stub.stats.snapshot())
+        elif path in ("/v1/models", "/models"):
+            if not self._authorized():
+                self._send_error(401, "无效的 API 密钥")
+                return
+            self._send_json(200, {"object": "list", "data": [
+                {"id": stub.model, "object": "model", "created": 0, "owned_by": "pdf2md"}]})
+        else:
+            self._send_error(404, f"未知的接口: {self.path}")
+
+    def do_POST(self):
+        stub = self.server.stub
+        path = self.path.split("?", 1)[0].rstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if path not in ("/v1/chat/completions", "/chat/completions"):
+            self._send_error(404, f"未知的接口: {self.path}")
+            return
+        if not self._authorized():
+            self._send_error(401, "无效的 API 密钥")
+            return
+        try:
+            request = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_error(400, "请求体不是有效的 JSON")
+            return
+
+        if not stub.stats.enter(stub.max_concurrency):
+            self._send_error(429, "并发请求过多", {"Retry-After": "1"})
+            return
+        start = time.perf_counter()
+        prompt_tokens = completion_tokens = 0
+        try:
+            fault = stub.draw_fault()
+            if fault == "timeout":
+                stub.stats.count("timeouts")
+                time.sleep(stub.hang_seconds)
+                self._send_error(504, "模拟的超时")
+                return
+            if fault == "error":
+                stub.stats.count("errors")
+                time.sleep(stub.latency)
+                status = stub.error_status
+                self._send_error(status, "模拟的服务错误", {"Retry-After": "1"} if status == 429 else None)
+                return
+
+            content = self._response_content(request)
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False)
+            prompt_tokens = _prompt_tokens(request.get("messages"))
+            completion_tokens = min(int(request.get("max_tokens") or stub.completion_tokens), stub.completion_tokens)
+            generation = stub.generation_seconds(completion_tokens)
+            if request.get("stream"):
+                time.sleep(stub.first_token_delay())
+                self._stream(request, content, generation)
+            else:
+                time.sleep(stub.first_token_delay() + generation)
+                self._send_json(200, self._completion(request, content, prompt_tokens, completion_tokens))
+        finally:
+            stub.stats.leave(time.perf_counter() - start, prompt_tokens, completion_tokens)
+
+    def _response_content(self, request: Dict):
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            return schema_instance(response_format.get("json_schema", {}).get("schema", {}))
+        if response_format.get("type") == "json_object":
+            return {}
+        return "OK"
+
+    def _completion(self, request: Dict, content: str, prompt_tokens: int, completion_tokens: int) -> Dict:
+        return {
+            "id": f"chatcmpl-stub-{self.server.stub.next_id()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or self.server.stub.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _stream(self, request: Dict, content: str, generation_seconds: float):
+        """以 SSE 分块返回；生成耗时平均分摊到各个分块之间"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-stub-{self.server.stub.next_id()}"
+        model = request.get("model") or self.server.stub.model
+        size = max(1, -(-len(content) // STREAM_CHUNKS))
+        pieces = [content[i:i + size] for i in range(0, len(content), size)] or [""]
+        for k, piece in enumerate(pieces + [None]):
+            delta = {"content": piece} if piece is not None else {}
+            if k == 0:
+                delta["role"] = "assistant"
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None if piece is not None else "stop"}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if piece is not None:
+                time.sleep(generation_seconds / len(pieces))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端超时后断开连接是正常情况（尤其是模拟超时的请求），不输出异常堆栈
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubLLMServer:
+    """OpenAI 兼容的模拟服务，在后台线程中运行
+
+    with StubLLMServer(latency=0.2) as server:
+        base_url = server.base_url   # 例如 http://127.0.0.1:1234/v1
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, latency: float = 0.0, jitter: float = 0.0,
+                 tokens_per_sec: float = 0.0, completion_tokens: int = 64, error_rate: float = 0.0,
+                 error_status: int = 500, timeout_rate: float = 0.0, hang_seconds: float = 120.0,
+                 max_concurrency: int = 0, api_key: str = "", model: str = DEFAULT_MODEL,
+                 seed: Optional[int] = None, verbose: bool = False):
+        self.host = host
+        self.port = port
+        self.latency = max(0.0, latency)
+        self.jitter = max(0.0, jitter)
+        self.tokens_per_sec = max(0.0, tokens_per_sec)
+        self.completion_tokens = max(1, completion_tokens)
+        self.error_rate = min(1.0, max(0.0, error_rate))
+        self.error_status = error_status
+        self.timeout_rate = min(1.0, max(0.0, timeout_rate))
+        self.hang_seconds = max(0.0, hang_seconds)
+        self.max_concurrency = max(0, max_concurrency)
+        self.api_key = api_key
+        self.model = model
+        self.verbose = verbose
+        self.stats = StubStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._httpd: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def draw_fault(self) -> Optional[str]:
+        """按设定的概率决定本次请求是否出错或挂起"""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.timeout_rate:
+            return "timeout"
+        if roll < self.timeout_rate + self.error_rate:
+            return "error"
+        return None
+
+    def generation_seconds(self, completion_tokens: int) -> float:
+        return completion_tokens / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    def first_token_delay(self) -> float:
+        """生成开始前的等待时间：固定延迟 + 随机抖动"""
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + jitter
+
+    def start(self) -> "StubLLMServer":
+        self._httpd = _StubHTTPServer((self.host, self.port), _StubHandler)
+        self._httpd.stub = self
+        # 端口为 0 时由系统分配
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pdf2md.llm_stub", description="本地 OpenAI 兼容 LLM 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外的随机延迟上限（秒）")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="模拟的生成速度，0 为不限制")
+    parser.add_argument("--completion-tokens", type=int, default=64, help="每个回复计为多少个生成 token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回错误的请求比例 0-1")
+    parser.add_argument("--error-status", type=int, default=500, help="错误请求的 HTTP 状态码，例如 429/500/503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="挂起（模拟超时）的请求比例 0-1")
+    parser.add_argument("--hang-seconds", type=float, default=120.0, help="挂起请求的等待时间（秒）")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="并发上限，超出时返回 429，0 为不限制")
+    parser.add_argument("--api-key", default="", help="要求请求携带该 API 密钥")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，使错误和抖动可复现")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出每个请求")
+    args = parser.parse_args(argv)
+
+    server = StubLLMServer(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, tokens_per_sec=args.tokens_per_sec,
+        completion_tokens=args.completion_tokens, error_rate=args.error_rate, error_status=args.error_status,
+        timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds, max_concurrency=args.max_concurrency,
+        api_key=args.api_key, model=args.model, seed=args.seed, verbose=args.verbose,
+    )
+    try:
+        server.start()
+    except OSError as e:
+        print(f"错误: 无法监听 {args.host}:{args.port}: {e}", file=sys.stderr)
+        return 2
+    print(f"LLM 模拟服务已启动: {server.base_url} (模型 {server.model})，按 Ctrl+C 停止", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats.snapshot(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
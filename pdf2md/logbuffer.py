@@ -0,0 +1,61 @@
+# pdf2md/logbuffer.py
+
+import datetime
+import threading
+from collections import deque, namedtuple
+from typing import List, Optional, Tuple
+
+LogRecord = namedtuple("LogRecord", "time level message")
+
+DEFAULT_MAX_RECORDS = 5000
+
+
+def infer_level(message: str) -> str:
+    """根据转换引擎日志的内容推断级别（引擎的日志回调只传递文本）"""
+    if "错误" in message:
+        return "ERROR"
+    if "警告" in message:
+        return "WARN"
+    return "INFO"
+
+
+class LogBuffer:
+    """线程安全的日志缓冲区
+
+    任意线程调用 append() 写入结构化记录；界面线程定时调用 drain() 批量取出新记录显示。
+    records 是保留最近 max_records 条的环形缓冲，用于按级别过滤重绘和保存日志。
+    界面来不及取走时，最早的未显示记录会被丢弃并计数。
+    """
+
+    def __init__(self, max_records: int = DEFAULT_MAX_RECORDS):
+        self._lock = threading.Lock()
+        self.records = deque(maxlen=max_records)
+        self._pending = deque(maxlen=max_records)
+        self._dropped = 0
+
+    def append(self, message, level: Optional[str] = None):
+        message = str(message)
+        record = LogRecord(datetime.datetime.now(), level or infer_level(message), message)
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(record)
+            self.records.append(record)
+
+    def drain(self, limit: int = 0) -> Tuple[List[LogRecord], int]:
+        """取出尚未显示的记录（最多 limit 条，0 为全部），同时返回被丢弃的记录数"""
+        with self._lock:
+            count = len(self._pending) if limit <= 0 else min(limit, len(self._pending))
+            records = [self._pending.popleft() for _ in range(count)]
+            dropped, self._dropped = self._dropped, 0
+        return records, dropped
+
+    def snapshot(self) -> List[LogRecord]:
+        with self._lock:
+            return list(self.records)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self._pending.clear()
+            self._dropped = 0
@@ -0,0 +1,116 @@
+# pdf2md/memory.py
+
+import os
+import sys
+from typing import Dict, Optional
+
+# psutil 不是必需依赖：没有安装时 Linux 读取 /proc，Windows 调用 psapi
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# 低内存模式下每个页码窗口的默认页数
+DEFAULT_LOW_MEMORY_WINDOW_PAGES = 20
+
+
+def _rss_from_proc(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _psapi_counters(pid: int):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if not kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _rss_from_psapi(pid: int) -> Optional[int]:
+    counters = _psapi_counters(pid)
+    return None if counters is None else counters.WorkingSetSize
+
+
+def process_rss(pid: Optional[int] = None) -> Optional[int]:
+    """返回进程当前的常驻内存（字节）；无法获取时返回 None"""
+    pid = pid or os.getpid()
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except Exception:
+            return None
+    if sys.platform.startswith("linux"):
+        return _rss_from_proc(pid)
+    if sys.platform == "win32":
+        try:
+            return _rss_from_psapi(pid)
+        except Exception:
+            return None
+    return None
+
+
+def process_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    rss = process_rss(pid)
+    return None if rss is None else rss / (1024 * 1024)
+
+
+def peak_rss() -> Optional[int]:
+    """返回当前进程启动以来的常驻内存峰值（字节）；无法获取时返回 None"""
+    if sys.platform == "win32":
+        try:
+            counters = _psapi_counters(os.getpid())
+        except Exception:
+            return None
+        return None if counters is None else counters.PeakWorkingSetSize
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def recycle_options(config_dict: Dict) -> Dict:
+    """从配置中读取工作进程回收选项
+
+    recycle_after_files: 工作进程每转换 N 个文件（或分片）后退出并由新进程接替，0 为不限制
+    max_worker_rss_mb:   工作进程在两个文件之间检查自身内存，超过该值时同样回收，0 为不限制
+    worker_memory_limit_mb: 主进程采样的内存硬上限，超过时在转换中途终止进程并重新排队其任务，0 为不限制
+    """
+    return {
+        'recycle_after_files': max(0, int(config_dict.get("recycle_after_files") or 0)),
+        'max_worker_rss_mb': max(0, int(config_dict.get("max_worker_rss_mb") or 0)),
+        'worker_memory_limit_mb': max(0, int(config_dict.get("worker_memory_limit_mb") or 0)),
+    }
@@ -0,0 +1,134 @@
+# pdf2md/models.py
+
+import gc
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# 默认空闲 10 分钟后自动释放模型
+DEFAULT_IDLE_TIMEOUT = 600
+
+
+def release_torch_memory():
+    """回收 Python 垃圾并清空 torch 的显存缓存"""
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        if hasattr(torch, "mps") and torch.backends.mps.is_available():
+            torch.mps.empty_cache()
+    except Exception:
+        pass
+
+
+def _create_marker_models() -> Dict:
+    from marker.models import create_model_dict
+    return create_model_dict()
+
+
+class ModelRegistry:
+    """进程级 Marker 模型注册表
+
+    第一次 acquire 时加载 artifact dict，之后的批次直接复用同一份模型。
+    没有使用者时开始计时，超过 idle_timeout 秒自动释放；
+    也可以通过 unload() 手动释放（例如界面上的“释放模型”按钮）。
+    每次取消或重新开始计时都会更换计时编号，已经开始执行的旧计时回调据此放弃释放。
+    """
+
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 loader: Callable[[], Dict] = _create_marker_models):
+        self.idle_timeout = idle_timeout
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._artifact_dict: Optional[Dict] = None
+        self._users = 0
+        self._idle_timer: Optional[threading.Timer] = None
+        self._idle_generation = 0
+        self.loaded_at: Optional[float] = None
+        self.last_used: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._artifact_dict is not None
+
+    @property
+    def users(self) -> int:
+        return self._users
+
+    def acquire(self, log: Optional[Callable[[str], None]] = None) -> Dict:
+        """获取模型（必要时加载），调用方用完后必须调用 release()"""
+        log = log or (lambda message: None)
+        with self._lock:
+            self._cancel_idle_timer()
+            if self._artifact_dict is None:
+                log("正在加载 Marker 模型...")
+                start = time.perf_counter()
+                self._artifact_dict = self._loader()
+                self.loaded_at = time.time()
+                log(f"Marker 模型加载耗时 {time.perf_counter() - start:.1f} 秒")
+            else:
+                log("复用已加载的 Marker 模型，跳过加载。")
+            self._users += 1
+            self.last_used = time.time()
+            return self._artifact_dict
+
+    def release(self):
+        """归还模型引用；没有使用者时启动空闲释放计时"""
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            self.last_used = time.time()
+            if self._users == 0 and self.idle_timeout and self.idle_timeout > 0:
+                self._cancel_idle_timer()
+                self._idle_timer = threading.Timer(self.idle_timeout, self._on_idle_timeout,
+                                                   args=(self._idle_generation,))
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def unload(self) -> bool:
+        """立即释放模型；仍有使用者时不释放并返回 False"""
+        with self._lock:
+            if self._users > 0:
+                return False
+            released = self._drop_models()
+        if released:
+            release_torch_memory()
+        return True
+
+    def _on_idle_timeout(self, generation: int):
+        # 检查和释放在同一次加锁中完成，期间 acquire() 无法拿到即将被释放的模型；
+        # Timer.cancel() 挡不住已经开始执行的回调，计时编号不一致说明计时已被取消或重新开始
+        with self._lock:
+            if generation != self._idle_generation or self._users > 0:
+                return
+            released = self._drop_models()
+        if released:
+            release_torch_memory()
+
+    def _drop_models(self) -> bool:
+        """丢弃模型引用（调用方持有锁），返回之前是否已加载"""
+        self._cancel_idle_timer()
+        if self._artifact_dict is None:
+            return False
+        self._artifact_dict = None
+        self.loaded_at = None
+        return True
+
+    def _cancel_idle_timer(self):
+        self._idle_generation += 1
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """返回当前进程共享的模型注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
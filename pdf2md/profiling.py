@@ -0,0 +1,160 @@
+# pdf2md/profiling.py
+
+import csv
+import json
+import time
+import datetime
+from contextlib import contextmanager
+from typing import Dict, List
+
+# 各阶段的键与报告中的名称，按处理顺序排列
+STAGE_LABELS = {
+    'validate': "验证/分诊",
+    'cache': "缓存查询",
+    'load_models': "加载模型",
+    'marker': "Marker 转换",
+    'marker_layout_ocr': "  版面分析/OCR",
+    'marker_processors': "  后处理",
+    'marker_llm': "  LLM",
+    'marker_render': "  渲染输出",
+    'save_images': "保存图片",
+    'fallback_extraction': "备用图片提取",
+    'link_rewrite': "图片链接更新",
+    'compress_images': "图片压缩",
+    'write_markdown': "写出结果文件",
+    'chunk_index': "分块索引",
+    'cache_store': "写入缓存",
+}
+STAGES = tuple(STAGE_LABELS)
+
+# Marker 转换的细分阶段（包含在 marker 之内，统计总耗时时不重复计算）
+MARKER_SUBSTAGES = ('marker_layout_ocr', 'marker_processors', 'marker_llm', 'marker_render')
+
+PROFILE_FIELDS = (
+    'file', 'success', 'cached', 'route', 'pages', 'images',
+    'input_bytes', 'output_bytes', 'image_bytes', 'processing_time',
+)
+
+
+class StageTimer:
+    """按阶段累计耗时（秒），同一阶段多次进入时累加"""
+
+    def __init__(self):
+        self.times: Dict[str, float] = {}
+
+    def reset(self):
+        self.times = {}
+
+    def add(self, stage: str, seconds: float):
+        self.times[stage] = self.times.get(stage, 0.0) + seconds
+
+    def merge(self, times: Dict[str, float]):
+        for stage, seconds in times.items():
+            self.add(stage, seconds)
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, float]:
+        """返回各阶段耗时；Marker 有细分数据时，渲染耗时 = 总耗时 - 其他细分阶段"""
+        times = dict(self.times)
+        if 'marker' in times and 'marker_layout_ocr' in times:
+            measured = sum(times.get(stage, 0.0) for stage in MARKER_SUBSTAGES if stage != 'marker_render')
+            times['marker_render'] = max(0.0, times['marker'] - measured)
+        return {stage: round(seconds, 4) for stage, seconds in times.items()}
+
+
+class _TimedProcessor:
+    """包装 Marker 的处理器，按类名把耗时记为 LLM 或普通后处理"""
+
+    def __init__(self, processor, timer: StageTimer):
+        self._processor = processor
+        self._timer = timer
+        self._stage = 'marker_llm' if type(processor).__name__.lower().startswith('llm') else 'marker_processors'
+
+    def __call__(self, document):
+        with self._timer.stage(self._stage):
+            return self._processor(document)
+
+    def __getattr__(self, name):
+        return getattr(self._processor, name)
+
+
+def instrument_converter(converter, timer: StageTimer):
+    """在 Marker 转换器上挂接计时
+
+    PdfConverter 在 build_document 中依次完成版面分析、文字行/OCR 和全部处理器，
+    之后渲染输出；这里包装处理器列表和 build_document 得到细分耗时。
+    Marker 的内部结构不同（没有这些属性）时保持原样，只统计整体耗时。
+    """
+    processors = getattr(converter, 'processor_list', None)
+    build_document = getattr(converter, 'build_document', None)
+    if not isinstance(processors, list) or not callable(build_document):
+        return converter
+
+    converter.processor_list = [_TimedProcessor(processor, timer) for processor in processors]
+
+    def timed_build_document(*args, **kwargs):
+        before = timer.times.get('marker_processors', 0.0) + timer.times.get('marker_llm', 0.0)
+        start = time.perf_counter()
+        try:
+            return build_document(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            after = timer.times.get('marker_processors', 0.0) + timer.times.get('marker_llm', 0.0)
+            timer.add('marker_layout_ocr', max(0.0, elapsed - (after - before)))
+
+    converter.build_document = timed_build_document
+    return converter
+
+
+def stage_totals(summaries: List[Dict]) -> Dict[str, float]:
+    """汇总所有文件的各阶段耗时"""
+    totals: Dict[str, float] = {}
+    for summary in summaries:
+        for stage, seconds in (summary.get('stages') or {}).items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+    return {stage: round(seconds, 4) for stage, seconds in totals.items()}
+
+
+def write_profile(base_path: str, summaries: List[Dict], total_time: float) -> List[str]:
+    """把每个文件的阶段耗时和数据量写入 base_path + .json / .csv，返回写出的文件"""
+    stages = [stage for stage in STAGES if any(stage in (s.get('stages') or {}) for s in summaries)]
+    stages += sorted({stage for s in summaries for stage in (s.get('stages') or {})} - set(stages))
+
+    files = []
+    for summary in summaries:
+        row = {field: summary.get(field) for field in PROFILE_FIELDS}
+        row['cached'] = bool(summary.get('cached'))
+        row['error'] = summary.get('error', '')
+        row['stages'] = summary.get('stages') or {}
+        files.append(row)
+
+    profile = {
+        'generated': datetime.datetime.now().isoformat(),
+        'total_time': round(total_time, 4),
+        'file_count': len(summaries),
+        'pages': sum(s.get('pages', 0) for s in summaries),
+        'input_bytes': sum(s.get('input_bytes', 0) for s in summaries),
+        'output_bytes': sum(s.get('output_bytes', 0) for s in summaries),
+        'image_bytes': sum(s.get('image_bytes', 0) for s in summaries),
+        'stage_totals': stage_totals(summaries),
+        'files': files,
+    }
+
+    json_path, csv_path = base_path + ".json", base_path + ".csv"
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+
+    # utf-8-sig 便于 Excel 直接打开中文文件名
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(PROFILE_FIELDS) + stages)
+        for row in files:
+            writer.writerow([row[field] for field in PROFILE_FIELDS] + [row['stages'].get(stage, 0) for stage in stages])
+    return [json_path, csv_path]
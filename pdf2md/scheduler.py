@@ -0,0 +1,463 @@
+# pdf2md/scheduler.py
+
+import os
+import time
+import queue
+import threading
+import traceback
+import multiprocessing
+import multiprocessing.connection
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from .engine import ConversionEngine, ModelLoadError, create_conversion_summary
+from .memory import process_rss_mb
+
+# 任务队列结束标记（全部任务完成后由 close() 发给仍在运行的进程）
+_STOP = None
+# 工作进程任务槽的特殊值：空闲（或非分片任务）/ 进程仍在启动
+_NO_TASK = -1
+_STARTING = -2
+
+# 主进程采样工作进程内存的间隔（秒）
+WATCHDOG_INTERVAL = 2.0
+# 工作进程异常退出或被看门狗终止时，其正在处理的任务最多重新排队的次数
+MAX_TASK_RETRIES = 1
+# 连续多少次轮询所有进程都空闲、却仍有文件没有结果时，判定这些任务的结果已丢失
+IDLE_POLLS_BEFORE_RECOVERY = 2
+
+
+def _limit_torch_threads(num_threads: int):
+    """限制工作进程内 torch 的线程数，避免多个进程争抢 CPU"""
+    try:
+        import torch
+        torch.set_num_threads(max(1, num_threads))
+    except Exception:
+        pass
+
+
+def _recycle_reason(tasks_done: int, recycle: Dict) -> Optional[str]:
+    """两个任务之间检查是否需要回收当前工作进程，返回原因；不需要时返回 None"""
+    if recycle.get('recycle_after_files') and tasks_done >= recycle['recycle_after_files']:
+        return f"已完成 {tasks_done} 个任务"
+    if recycle.get('max_worker_rss_mb'):
+        rss_mb = process_rss_mb()
+        if rss_mb is not None and rss_mb > recycle['max_worker_rss_mb']:
+            return f"内存占用 {rss_mb:.0f} MB 超过上限 {recycle['max_worker_rss_mb']} MB"
+    return None
+
+
+class _EventPipe:
+    """工作进程一侧的事件发送端
+
+    每个工作进程独占一条管道：进程在发送途中被强制终止时，只会损坏它自己的管道，
+    不会像共享队列那样留下被占用的锁，使其他进程的事件再也发不出去。
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def put(self, event):
+        with self._lock:
+            try:
+                self._conn.send(event)
+            except OSError:
+                # 主进程已关闭接收端（调度已结束）
+                pass
+
+
+def _worker_main(worker_id: int, engine_kwargs: Dict, task_queue, event_conn, stop_event, torch_threads: int,
+                 recycle: Optional[Dict] = None, slot=None, engine_class=None):
+    """工作进程入口：第一次需要时加载模型，然后循环领取PDF直到收到结束标记
+
+    设置了回收条件时，进程在两个任务之间发出 recycle 事件后退出，由主进程启动新进程接替，
+    长时间运行中累积的内存随进程一起归还给系统。
+    slot 是与主进程共享的 [文件序号, 分片序号]，领取任务后同步写入、等待下一个任务前清空：
+    进程被强制终止时管道中尚未发出的事件会丢失，主进程据此找回正在处理的任务。
+    engine_class 默认为 ConversionEngine。
+    """
+    event_queue = _EventPipe(event_conn)
+
+    def log(message):
+        event_queue.put(("log", worker_id, message))
+
+    _limit_torch_threads(torch_threads)
+    engine_class = engine_class or ConversionEngine
+    engine = engine_class(log=log, should_continue=lambda: not stop_event.is_set(), **engine_kwargs)
+    recycle = recycle or {}
+    tasks_done = 0
+
+    try:
+        while not stop_event.is_set():
+            if slot is not None:
+                slot[0], slot[1] = _NO_TASK, _NO_TASK
+            task = task_queue.get()
+            if task is _STOP:
+                break
+            index, pdf_path, shard = task
+            if slot is not None:
+                slot[0], slot[1] = index, shard[0] if shard is not None else _NO_TASK
+            event_queue.put(("started", worker_id, (index, pdf_path, shard)))
+
+            if shard is not None:
+                # 大文件的一个页码分片，结果由主进程按页码顺序合并
+                shard_index, start, end = shard
+                try:
+                    result = engine.convert_shard(pdf_path, shard_index, start, end)
+                except ModelLoadError as e:
+                    event_queue.put(("fatal", worker_id, f"{e}\n{traceback.format_exc()}"))
+                    event_queue.put(("shard_result", worker_id, (index, {
+                        'path': pdf_path, 'shard': shard_index, 'start': start, 'end': end,
+                        'success': False, 'error': str(e)})))
+                    break
+                event_queue.put(("shard_result", worker_id, (index, result)))
+            else:
+                try:
+                    summary = engine.convert_file(pdf_path)
+                except ModelLoadError as e:
+                    event_queue.put(("fatal", worker_id, f"{e}\n{traceback.format_exc()}"))
+                    event_queue.put(("result", worker_id, (index, create_conversion_summary(pdf_path, False, str(e)))))
+                    break
+                event_queue.put(("result", worker_id, (index, summary)))
+
+            tasks_done += 1
+            reason = _recycle_reason(tasks_done, recycle)
+            if reason:
+                event_queue.put(("recycle", worker_id, reason))
+                break
+    finally:
+        engine.close()
+
+
+class ProcessPoolScheduler:
+    """多进程批量调度器
+
+    启动固定数量的工作进程，每个进程只加载一次 Marker 模型，
+    然后从共享任务队列中领取PDF；日志和结果通过每个进程各自的管道发回主进程。
+    大文件可以按页码切分为多个分片任务，由不同的工作进程并行转换。
+    recycle 指定回收条件（见 memory.recycle_options），被回收的进程由新进程接替。
+    设置 worker_memory_limit_mb 时，主进程定期采样各工作进程的内存，超过上限的进程
+    在转换中途被终止；异常退出的进程正在处理的任务会重新排队，由新进程重新转换。
+    """
+
+    # 工作进程中使用的引擎类；以 spawn 方式启动，必须能在子进程中按模块路径导入
+    engine_class = ConversionEngine
+
+    def __init__(self, num_workers: int, output_dir, config_dict, use_llm, llm_service_config,
+                 use_fallback_extraction=False, recycle: Optional[Dict] = None):
+        self.num_workers = max(1, num_workers)
+        self.recycle = dict(recycle or {})
+        # 文件级已经并行，关闭 pdftext 的内部多进程，避免进程过度嵌套
+        worker_config = dict(config_dict)
+        worker_config["disable_multiprocessing"] = True
+        self.engine_kwargs = {
+            'output_dir': output_dir,
+            'config_dict': worker_config,
+            'use_llm': use_llm,
+            'llm_service_config': llm_service_config,
+            'use_fallback_extraction': use_fallback_extraction,
+        }
+        self._ctx = multiprocessing.get_context("spawn")
+        self._task_queue = None
+        self._event_readers: List = []
+        self._inbox: Deque[Tuple[str, int, object]] = deque()
+        self._stop_event = None
+        self._processes: List = []
+        self._slots: List = []
+        self.process_count = 0
+        self._torch_threads = 1
+        self._reaped = set()
+        self._killed: Dict[int, float] = {}
+        self._retries: Dict[Tuple, int] = {}
+        self._last_watchdog = 0.0
+        self._fatal = False
+        self._respawns = 0
+        self._finished = set()
+        self._received_shards = set()
+        self._pdf_files: List[str] = []
+        self._pending: List[int] = []
+        self._shard_plan: Dict[int, List[Tuple[int, int]]] = {}
+
+    def start(self, pdf_files: List[str], shard_plan: Optional[Dict[int, List[Tuple[int, int]]]] = None,
+              skip=()):
+        """启动工作进程并把PDF放入任务队列
+
+        shard_plan: 文件序号 -> [(起始页, 结束页), ...]，这些文件按分片入队；
+        skip: 已经有结果（例如命中缓存）而不需要转换的文件序号。
+        """
+        self._task_queue = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+        self._pdf_files = list(pdf_files)
+        self._shard_plan = dict(shard_plan or {})
+        self._pending = [index for index in range(len(pdf_files)) if index not in set(skip)]
+
+        task_count = 0
+        for index in self._pending:
+            pdf_path = pdf_files[index]
+            shards = self._shard_plan.get(index)
+            if shards:
+                for shard_index, (start, end) in enumerate(shards):
+                    self._task_queue.put((index, pdf_path, (shard_index, start, end)))
+                task_count += len(shards)
+            else:
+                self._task_queue.put((index, pdf_path, None))
+                task_count += 1
+
+        # 任务比进程少时不启动多余的进程（每个进程都要加载一份模型）；
+        # 结束标记在 close() 中才发送，重新排队的任务不会排在结束标记之后
+        num_processes = min(self.num_workers, task_count)
+        self.process_count = num_processes
+
+        self._torch_threads = max(1, (os.cpu_count() or 1) // max(1, num_processes))
+        for _ in range(num_processes):
+            self._spawn_worker()
+
+    def _spawn_worker(self) -> int:
+        """启动一个工作进程，返回其编号（编号从1开始，不重复使用）"""
+        worker_id = len(self._processes) + 1
+        slot = self._ctx.Array('i', [_STARTING, _STARTING], lock=False)
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.engine_kwargs, self._task_queue, writer,
+                  self._stop_event, self._torch_threads, self.recycle, slot, self.engine_class),
+            name=f"pdf2md-worker-{worker_id}",
+        )
+        process.start()
+        # 主进程不保留发送端，进程退出后接收端才能读到 EOF
+        writer.close()
+        self._processes.append(process)
+        self._slots.append(slot)
+        self._event_readers.append(reader)
+        return worker_id
+
+    def _receive(self, timeout: float) -> Tuple[str, int, object]:
+        """取出下一个工作进程事件，timeout 秒内没有事件时抛出 queue.Empty
+
+        每次从所有可读的管道各读一个事件，避免某个进程的大量日志挤占其他进程的结果。
+        """
+        if not self._inbox:
+            readers = [reader for reader in self._event_readers if reader is not None]
+            if not readers:
+                time.sleep(timeout)
+                raise queue.Empty
+            for reader in multiprocessing.connection.wait(readers, timeout):
+                try:
+                    self._inbox.append(reader.recv())
+                except (EOFError, OSError):
+                    # 进程已退出；被强制终止时管道中可能只有半条事件
+                    self._event_readers[self._event_readers.index(reader)] = None
+                    reader.close()
+        if not self._inbox:
+            raise queue.Empty
+        return self._inbox.popleft()
+
+    def events(self, poll_interval: float = 0.5) -> Iterator[Tuple[str, int, object]]:
+        """依次产出工作进程的事件，直到所有待转换文件都有结果
+
+        事件类型: log / fatal / started / result / shards_done。
+        工作进程被回收时启动新进程接替，并以 log 事件通知。
+        分片文件的各分片结果会先被收集，全部到齐后产出一次
+        ("shards_done", 0, (序号, [分片结果...]))，由调用方合并。
+        工作进程异常退出时，其正在处理的任务重新排队一次；仍然失败或已没有可用进程时生成失败结果。
+        """
+        pending = set(self._pending)
+        started = set()
+        shard_results: Dict[int, List[Dict]] = {}
+        finished = self._finished = set()
+        received_shards = self._received_shards = set()
+        idle_polls = 0
+
+        while not pending <= finished:
+            for event in self._watchdog():
+                yield event
+            try:
+                kind, worker_id, payload = self._receive(poll_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                events = self._collect_crashed()
+                idle_polls = idle_polls + 1 if self._all_idle() else 0
+                if idle_polls >= IDLE_POLLS_BEFORE_RECOVERY:
+                    idle_polls = 0
+                    events += self._recover_lost(pending)
+                for event in events:
+                    yield event
+                continue
+            idle_polls = 0
+
+            if kind == "started":
+                index, _, shard = payload
+                if shard is not None and index in started:
+                    # 同一文件的后续分片不再重复通知
+                    continue
+                started.add(index)
+                yield kind, worker_id, payload[:2]
+                continue
+            if kind == "shard_result":
+                index, result = payload
+                if index in finished or (index, result['shard']) in received_shards:
+                    continue
+                received_shards.add((index, result['shard']))
+                shard_results.setdefault(index, []).append(result)
+                if len(shard_results[index]) == len(self._shard_plan[index]):
+                    finished.add(index)
+                    yield "shards_done", 0, (index, shard_results.pop(index))
+                continue
+            if kind == "recycle":
+                if self._stop_event.is_set():
+                    yield "log", worker_id, f"工作进程退出以释放内存 ({payload})"
+                    continue
+                new_worker_id = self._spawn_worker()
+                yield "log", worker_id, f"工作进程退出以释放内存 ({payload})，由进程{new_worker_id}接替"
+                continue
+            if kind == "fatal":
+                self._fatal = True
+            if kind == "result":
+                if payload[0] in finished:
+                    continue
+                finished.add(payload[0])
+            yield kind, worker_id, payload
+
+    def _watchdog(self) -> List[Tuple[str, int, object]]:
+        """定期采样工作进程的内存，终止超过硬上限的进程（由 _collect_crashed 重新排队）
+
+        只终止正在转换的进程：空闲进程可能正阻塞在任务队列的读取中，此时终止会一直占住队列的读锁。
+        """
+        limit_mb = self.recycle.get('worker_memory_limit_mb')
+        now = time.monotonic()
+        if not limit_mb or now - self._last_watchdog < WATCHDOG_INTERVAL:
+            return []
+        self._last_watchdog = now
+
+        events = []
+        for worker_id, process in enumerate(self._processes, 1):
+            if worker_id in self._killed or not process.is_alive() or self._slot_task(worker_id) is None:
+                continue
+            rss_mb = process_rss_mb(process.pid)
+            if rss_mb is not None and rss_mb > limit_mb:
+                self._killed[worker_id] = rss_mb
+                process.kill()
+                events.append(("log", worker_id, f"工作进程内存 {rss_mb:.0f} MB 超过上限 {limit_mb} MB，已终止"))
+        return events
+
+    def _requeue(self, task, spawn: bool = True) -> bool:
+        """把任务重新排队（必要时启动新进程接替）；超过重试次数时返回 False"""
+        index, _, shard = task
+        key = (index, shard[0] if shard is not None else None)
+        if self._stop_event.is_set() or self._retries.get(key, 0) >= MAX_TASK_RETRIES:
+            return False
+        self._retries[key] = self._retries.get(key, 0) + 1
+        self._task_queue.put(task)
+        if spawn:
+            self._spawn_worker()
+        return True
+
+    def _slot_task(self, worker_id: int):
+        """从任务槽中读出工作进程正在处理的任务，空闲时返回 None"""
+        index, shard_index = self._slots[worker_id - 1][:]
+        if index < 0:
+            return None
+        shard = None
+        if shard_index != _NO_TASK:
+            start, end = self._shard_plan[index][shard_index]
+            shard = (shard_index, start, end)
+        return index, self._pdf_files[index], shard
+
+    def _task_done(self, task) -> bool:
+        index, _, shard = task
+        if index in self._finished:
+            return True
+        return shard is not None and (index, shard[0]) in self._received_shards
+
+    def _all_idle(self) -> bool:
+        """运行中的进程是否都在等待新任务（没有运行中的进程时也为真）"""
+        return all(self._slots[worker_id - 1][0] == _NO_TASK
+                   for worker_id, process in enumerate(self._processes, 1) if process.is_alive())
+
+    def _collect_crashed(self) -> List[Tuple[str, int, object]]:
+        """检查异常退出的工作进程，重新排队或为受影响的文件生成失败结果
+
+        正在处理的任务（文件或分片）先重新排队，由新进程重新转换；
+        同一任务再次导致进程退出时判定为失败，分片文件只要有一个分片失败，整个文件即失败。
+        """
+        events = []
+        for worker_id, process in enumerate(self._processes, 1):
+            if process.is_alive() or process.exitcode in (0, None) or worker_id in self._reaped:
+                continue
+            self._reaped.add(worker_id)
+            task = self._slot_task(worker_id)
+            if task is None or self._task_done(task):
+                continue
+            if worker_id in self._killed:
+                error_msg = f"工作进程内存 {self._killed[worker_id]:.0f} MB 超过上限 {self.recycle['worker_memory_limit_mb']} MB"
+            else:
+                error_msg = f"工作进程异常退出 (exitcode={process.exitcode})"
+            if self._requeue(task):
+                events.append(("log", worker_id, f"{error_msg}，{os.path.basename(task[1])} 已重新排队"))
+                continue
+            self._finished.add(task[0])
+            events.append(("result", worker_id, (task[0], create_conversion_summary(task[1], False, error_msg))))
+        return events
+
+    def _recover_lost(self, pending) -> List[Tuple[str, int, object]]:
+        """所有运行中的进程都已空闲，仍没有结果的任务随异常退出的进程丢失了结果
+
+        还有进程在运行时把这些任务重新排队；没有进程时先启动新进程处理队列中剩余的任务，
+        模型加载失败或启动新进程的次数用完后，为剩余文件生成失败结果。
+        """
+        if self._stop_event.is_set():
+            return []
+        alive = any(process.is_alive() for process in self._processes)
+        if not alive and not self._fatal and self._respawns < self.num_workers:
+            self._respawns += 1
+            worker_id = self._spawn_worker()
+            return [("log", worker_id, "没有运行中的工作进程，已启动新进程处理剩余任务")]
+
+        events = []
+        for index in sorted(pending - self._finished):
+            pdf_path = self._pdf_files[index]
+            shards = self._shard_plan.get(index)
+            if shards:
+                tasks = [(index, pdf_path, (k, start, end)) for k, (start, end) in enumerate(shards)
+                         if (index, k) not in self._received_shards]
+            else:
+                tasks = [(index, pdf_path, None)]
+            if alive and all(self._requeue(task, spawn=False) for task in tasks):
+                events.append(("log", 0, f"{os.path.basename(pdf_path)} 的转换结果丢失，已重新排队"))
+                continue
+            self._finished.add(index)
+            error_msg = "转换结果丢失" if alive else "没有可用的工作进程"
+            events.append(("result", 0, (index, create_conversion_summary(pdf_path, False, error_msg))))
+        return events
+
+    def stop(self):
+        """请求所有工作进程在当前文件结束后退出"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def close(self, timeout: float = 5.0):
+        """通知工作进程退出并等待，超时仍未退出的进程将被强制终止
+
+        先关闭事件管道：之后工作进程发出的事件直接丢弃，不会因管道写满而无法退出。
+        """
+        for reader in self._event_readers:
+            if reader is not None:
+                reader.close()
+        self._event_readers = []
+        self._inbox.clear()
+        if self._task_queue is not None:
+            for process in self._processes:
+                if process.is_alive():
+                    self._task_queue.put(_STOP)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._processes = []
+        self._slots = []
+        if self._task_queue is not None:
+            self._task_queue.cancel_join_thread()
+            self._task_queue.close()
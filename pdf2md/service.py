@@ -0,0 +1,801 @@
+# pdf2md/service.py
+"""本地 HTTP/JSON 转换服务
+
+固定数量的工作进程各自加载一次 Marker 模型并常驻，任务按优先级排队分配给空闲的进程；
+排队的任务数达到 max_queue 时拒绝新任务（503 + Retry-After），由调用方稍后重试。
+默认只监听 127.0.0.1，全部在本机离线运行。
+
+接口：
+    POST   /jobs                    提交任务，返回 202 {"id": ..., "status": "queued", ...}
+                                    - JSON: {"path": "D:/docs/a.pdf", "priority": 0}
+                                    - 直接上传: Content-Type: application/pdf，查询参数 ?filename=a.pdf&priority=0
+    GET    /jobs                    任务列表（?status=queued|running|done|failed|cancelled）
+    GET    /jobs/<id>               任务状态和转换摘要；?wait=30 时最多等待 30 秒直到任务结束
+    GET    /jobs/<id>/result        转换结果（Markdown/JSON/HTML/JSONL）；?file=相对路径 读取图片等其他输出文件
+    GET    /jobs/<id>/files         输出文件列表
+    DELETE /jobs/<id>               取消排队中的任务，或删除已结束任务的文件
+    GET    /health                  服务状态：工作进程、排队/运行/完成的任务数
+
+优先级数值越大越先处理，相同优先级按提交顺序。
+
+用法: python -m pdf2md.service [-c 配置文件.json] [-j 2] [--port 8765] [--max-queue 100] [--data-dir service_data]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import heapq
+import queue
+import shutil
+import argparse
+import datetime
+import threading
+import traceback
+import mimetypes
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .config import load_config_file, parse_config
+from .engine import ConversionEngine, MARKER_AVAILABLE, MARKER_IMPORT_ERROR, create_conversion_summary
+from .scheduler import _limit_torch_threads
+from .writers import MarkdownWriter, get_writer
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_MAX_UPLOAD_MB = 512
+# 内存中保留的已结束任务数，超出时忘记最早结束的任务（输出文件保留在磁盘上）
+MAX_FINISHED_JOBS = 10000
+# 每个任务保留的日志行数
+JOB_LOG_LINES = 200
+# GET /jobs/<id>?wait= 的最长等待时间（秒）
+MAX_WAIT_SECONDS = 300
+_UPLOAD_CHUNK = 1024 * 1024
+
+# 任务状态
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+# 工作进程任务队列的结束标记
+_STOP = None
+
+
+class QueueFullError(RuntimeError):
+    """排队的任务数已达上限"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ServiceUnavailableError(RuntimeError):
+    """没有可用的工作进程（例如模型加载失败）"""
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+def _parse_priority(value) -> int:
+    """请求中的优先级：整数或整数字符串；其他值（如 "high"、null）引发 ValueError"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"priority 应为整数: {value!r}")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"priority 应为整数: {value!r}") from None
+
+
+def _service_worker_main(worker_id: int, engine_kwargs: Dict, task_queue, event_queue, torch_threads: int):
+    """工作进程入口：启动时加载模型，然后依次处理分配给本进程的任务直到收到结束标记
+
+    每个任务指定自己的输出目录，同一个引擎（和已加载的模型）在任务之间复用。
+    """
+    def log(message):
+        event_queue.put(("log", worker_id, message))
+
+    _limit_torch_threads(torch_threads)
+    engine = ConversionEngine(log=log, **engine_kwargs)
+    try:
+        try:
+            engine.load_models()
+        except Exception as e:
+            event_queue.put(("fatal", worker_id, f"加载 Marker 模型失败: {e}\n{traceback.format_exc()}"))
+            return
+        event_queue.put(("ready", worker_id, None))
+
+        while True:
+            task = task_queue.get()
+            if task is _STOP:
+                break
+            job_id, pdf_path, output_dir = task
+            os.makedirs(output_dir, exist_ok=True)
+            engine.output_dir = output_dir
+            try:
+                summary = engine.convert_file(pdf_path)
+            except Exception as e:
+                summary = create_conversion_summary(pdf_path, False, f"转换失败: {e}")
+            event_queue.put(("result", worker_id, (job_id, summary)))
+    finally:
+        engine.close()
+
+
+class Job:
+    """一个转换任务；状态只在 ConversionService 的锁内修改"""
+
+    __slots__ = ('id', 'pdf_path', 'output_dir', 'output_name', 'priority', 'seq', 'status', 'uploaded',
+                 'submitted', 'started', 'finished', 'worker', 'summary', 'error', 'log')
+
+    def __init__(self, job_id: str, pdf_path: str, output_dir: str, output_name: str, priority: int, seq: int,
+                 uploaded: bool):
+        self.id = job_id
+        self.pdf_path = pdf_path
+        self.output_dir = output_dir
+        self.output_name = output_name
+        self.priority = priority
+        self.seq = seq
+        self.uploaded = uploaded
+        self.status = STATUS_QUEUED
+        self.submitted = _now()
+        self.started: Optional[str] = None
+        self.finished: Optional[str] = None
+        self.worker: Optional[int] = None
+        self.summary: Optional[Dict] = None
+        self.error = ""
+        self.log: List[str] = []
+
+    @property
+    def output_path(self) -> str:
+        return os.path.join(self.output_dir, self.output_name)
+
+    def to_dict(self, include_log: bool = False) -> Dict:
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'file': os.path.basename(self.pdf_path),
+            'path': self.pdf_path,
+            'priority': self.priority,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'worker': self.worker,
+            'error': self.error,
+            'output': self.output_path if self.status == STATUS_DONE else None,
+            'summary': self.summary,
+        }
+        if include_log:
+            data['log'] = list(self.log)
+        return data
+
+
+class ConversionService:
+    """优先级队列 + 常驻模型的工作进程池 + HTTP 接口
+
+    with ConversionService("service_data", config_dict, False, {}, workers=2) as service:
+        print(service.url)     # 例如 http://127.0.0.1:8765
+    """
+
+    def __init__(self, data_dir: str, config_dict: Dict, use_llm: bool, llm_service_config: Dict,
+                 use_fallback_extraction: bool = False, workers: int = 1, max_queue: int = DEFAULT_MAX_QUEUE,
+                 host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_upload_mb: int = DEFAULT_MAX_UPLOAD_MB,
+                 log: Optional[Callable[[str], None]] = None, verbose: bool = False):
+        self.data_dir = os.path.abspath(data_dir)
+        self.num_workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.host = host
+        self.port = port
+        self.max_upload_bytes = max(1, max_upload_mb) * 1024 * 1024
+        self.log = log or (lambda message: None)
+        self.verbose = verbose
+        try:
+            self.writer = get_writer(config_dict.get("output_format"))
+        except ValueError:
+            self.writer = MarkdownWriter()
+
+        # 任务级已经并行，关闭 pdftext 的内部多进程
+        worker_config = dict(config_dict)
+        worker_config["disable_multiprocessing"] = True
+        self.engine_kwargs = {
+            'output_dir': self.data_dir,
+            'config_dict': worker_config,
+            'use_llm': use_llm,
+            'llm_service_config': llm_service_config,
+            'use_fallback_extraction': use_fallback_extraction,
+        }
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._jobs: Dict[str, Job] = {}
+        self._finished_order: List[str] = []
+        self._heap: List[Tuple[int, int, str]] = []
+        self._queued = 0
+        self._seq = 0
+        self._event_queue = None
+        # 工作进程编号 -> (进程, 任务队列)；空闲进程编号；进程编号 -> 正在处理的任务
+        self._workers: Dict[int, Tuple] = {}
+        self._idle: List[int] = []
+        self._busy: Dict[int, str] = {}
+        self._ready_ids = set()
+        self._next_worker_id = 1
+        self._fatal_error = ""
+        self._durations: List[float] = []
+        self._started_at = 0.0
+        self._stopping = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._httpd: Optional["_ServiceHTTPServer"] = None
+        self._http_thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ---- 生命周期 ----
+
+    def start(self) -> "ConversionService":
+        os.makedirs(os.path.join(self.data_dir, "jobs"), exist_ok=True)
+        self._started_at = time.monotonic()
+        self._event_queue = self._ctx.Queue()
+        if MARKER_AVAILABLE:
+            self._torch_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            for _ in range(self.num_workers):
+                self._spawn_worker()
+        else:
+            self._fatal_error = f"Marker 库未正确安装或导入: {MARKER_IMPORT_ERROR}"
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="pdf2md-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+        self._httpd = _ServiceHTTPServer((self.host, self.port), _ServiceHandler)
+        self._httpd.service = self
+        self.port = self._httpd.server_address[1]
+        self._http_thread = threading.Thread(target=self._httpd.serve_forever, name="pdf2md-service", daemon=True)
+        self._http_thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        """停止接收请求，通知工作进程在当前任务结束后退出；排队中的任务记为取消"""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        self._stopping.set()
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == STATUS_QUEUED:
+                    self._finish(job, STATUS_CANCELLED, "服务已停止")
+            workers = list(self._workers.values())
+        for process, task_queue in workers:
+            if process.is_alive():
+                task_queue.put(_STOP)
+        for process, task_queue in workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            task_queue.cancel_join_thread()
+            task_queue.close()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=5)
+        if self._event_queue is not None:
+            self._event_queue.cancel_join_thread()
+            self._event_queue.close()
+        if self._http_thread is not None:
+            self._http_thread.join(timeout=5)
+
+    def __enter__(self) -> "ConversionService":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _spawn_worker(self) -> int:
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_service_worker_main,
+            args=(worker_id, self.engine_kwargs, task_queue, self._event_queue, self._torch_threads),
+            name=f"pdf2md-service-worker-{worker_id}",
+        )
+        process.start()
+        self._workers[worker_id] = (process, task_queue)
+        return worker_id
+
+    # ---- 任务 ----
+
+    def submit(self, pdf_path: str, priority: int = 0, job_id: Optional[str] = None, uploaded: bool = False) -> Job:
+        """把 PDF 加入队列；队列已满时抛出 QueueFullError，没有可用进程时抛出 ServiceUnavailableError"""
+        job_id = job_id or self.new_job_id()
+        output_dir = os.path.join(self.data_dir, "jobs", job_id, "output")
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        with self._lock:
+            self._check_capacity()
+            self._seq += 1
+            job = Job(job_id, os.path.abspath(pdf_path), output_dir, self.writer.output_name(stem),
+                      int(priority), self._seq, uploaded)
+            self._jobs[job_id] = job
+            heapq.heappush(self._heap, (-job.priority, job.seq, job_id))
+            self._queued += 1
+            self._dispatch()
+        return job
+
+    def check_capacity(self):
+        with self._lock:
+            self._check_capacity()
+
+    def _check_capacity(self):
+        if self._fatal_error:
+            raise ServiceUnavailableError(self._fatal_error)
+        if self._stopping.is_set():
+            raise ServiceUnavailableError("服务正在停止")
+        if self._queued >= self.max_queue:
+            raise QueueFullError(f"排队的任务已达上限 ({self.max_queue})，请稍后重试", self._retry_after())
+
+    def _retry_after(self) -> int:
+        """按最近任务的平均耗时估计队列空出位置所需的秒数"""
+        recent = self._durations[-50:]
+        average = sum(recent) / len(recent) if recent else 5.0
+        return max(1, int(average / self.num_workers + 0.5))
+
+    @staticmethod
+    def new_job_id() -> str:
+        return uuid.uuid4().hex[:16]
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.data_dir, "jobs", job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """等待任务结束（或超时），返回任务"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job.status in FINISHED_STATUSES or remaining <= 0:
+                    return job
+                self._changed.wait(remaining)
+
+    def job_info(self, job_id: str, include_log: bool = False) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            info = job.to_dict(include_log)
+            if job.status == STATUS_QUEUED:
+                info['position'] = sum(1 for _, _, other_id in self._heap
+                                       if self._jobs.get(other_id) is not None
+                                       and self._jobs[other_id].status == STATUS_QUEUED
+                                       and (-self._jobs[other_id].priority, self._jobs[other_id].seq)
+                                       < (-job.priority, job.seq)) + 1
+            return info
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values() if status is None or job.status == status]
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """取消排队中的任务，或删除已结束任务的文件；返回操作后的状态，任务不存在时返回 None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status == STATUS_RUNNING:
+                return STATUS_RUNNING
+            if job.status == STATUS_QUEUED:
+                self._finish(job, STATUS_CANCELLED, "已取消")
+                return STATUS_CANCELLED
+            del self._jobs[job_id]
+            if job_id in self._finished_order:
+                self._finished_order.remove(job_id)
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return "deleted"
+
+    def health(self) -> Dict:
+        with self._lock:
+            counts = {status: 0 for status in (STATUS_QUEUED, STATUS_RUNNING) + FINISHED_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            alive = sum(1 for process, _ in self._workers.values() if process.is_alive())
+            if self._fatal_error:
+                status = "error"
+            elif self._idle or self._busy:
+                status = "ok"
+            else:
+                status = "starting"
+            return {
+                'status': status,
+                'error': self._fatal_error,
+                'workers': self.num_workers,
+                'workers_alive': alive,
+                'workers_ready': len(self._idle) + len(self._busy),
+                'workers_busy': len(self._busy),
+                'max_queue': self.max_queue,
+                'jobs': counts,
+                'average_seconds': round(sum(self._durations[-50:]) / len(self._durations[-50:]), 3)
+                if self._durations else None,
+                'uptime_seconds': round(time.monotonic() - self._started_at, 1),
+            }
+
+    # ---- 调度（调用方持有锁） ----
+
+    def _dispatch(self):
+        """把优先级最高的排队任务分配给空闲的工作进程"""
+        while self._idle and self._heap:
+            _, _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.get(job_id)
+            if job is None or job.status != STATUS_QUEUED:
+                continue
+            worker_id = self._idle.pop(0)
+            self._queued -= 1
+            job.status = STATUS_RUNNING
+            job.started = _now()
+            job.worker = worker_id
+            self._busy[worker_id] = job_id
+            self._workers[worker_id][1].put((job_id, job.pdf_path, job.output_dir))
+            self._changed.notify_all()
+
+    def _finish(self, job: Job, status: str, error: str = "", summary: Optional[Dict] = None):
+        if job.status == STATUS_QUEUED:
+            self._queued -= 1
+        job.status = status
+        job.error = error
+        job.summary = summary
+        job.finished = _now()
+        if job.started:
+            started = datetime.datetime.fromisoformat(job.started)
+            self._durations.append((datetime.datetime.now() - started).total_seconds())
+            del self._durations[:-200]
+        self._finished_order.append(job.id)
+        while len(self._finished_order) > MAX_FINISHED_JOBS:
+            self._jobs.pop(self._finished_order.pop(0), None)
+        self._changed.notify_all()
+
+    def _dispatch_loop(self):
+        """处理工作进程的事件，检查异常退出的进程"""
+        while not self._stopping.is_set():
+            try:
+                kind, worker_id, payload = self._event_queue.get(timeout=0.5)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                self._handle_event(kind, worker_id, payload)
+                self._dispatch()
+
+    def _handle_event(self, kind: str, worker_id: int, payload):
+        if kind == "log":
+            job_id = self._busy.get(worker_id)
+            if job_id in self._jobs:
+                job_log = self._jobs[job_id].log
+                job_log.append(payload)
+                del job_log[:-JOB_LOG_LINES]
+            if self.verbose:
+                self.log(f"[进程{worker_id}] {payload}")
+        elif kind == "ready":
+            self._ready_ids.add(worker_id)
+            self._idle.append(worker_id)
+            self.log(f"工作进程{worker_id} 已加载模型")
+        elif kind == "fatal":
+            self.log(f"[进程{worker_id}] 严重错误: {payload}")
+            self._workers.pop(worker_id, None)
+            self._check_alive(payload.splitlines()[0])
+        elif kind == "result":
+            job_id, summary = payload
+            self._busy.pop(worker_id, None)
+            self._idle.append(worker_id)
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._finish(job, STATUS_DONE if summary['success'] else STATUS_FAILED, summary['error'], summary)
+                self.log(f"任务 {job_id} ({os.path.basename(job.pdf_path)}) {job.status}")
+
+    def _check_workers(self):
+        """异常退出的工作进程：正在处理的任务记为失败，并启动新进程接替"""
+        with self._lock:
+            for worker_id, (process, task_queue) in list(self._workers.items()):
+                if process.is_alive() or self._stopping.is_set():
+                    continue
+                del self._workers[worker_id]
+                if worker_id in self._idle:
+                    self._idle.remove(worker_id)
+                job_id = self._busy.pop(worker_id, None)
+                error_msg = f"工作进程异常退出 (exitcode={process.exitcode})"
+                if job_id in self._jobs:
+                    self._finish(self._jobs[job_id], STATUS_FAILED, error_msg)
+                if worker_id not in self._ready_ids:
+                    # 还没加载完模型就退出，重启也会同样失败
+                    self.log(f"工作进程{worker_id}启动失败 (exitcode={process.exitcode})")
+                    self._check_alive(f"工作进程启动失败 (exitcode={process.exitcode})")
+                    continue
+                new_worker_id = self._spawn_worker()
+                self.log(f"{error_msg}，由进程{new_worker_id}接替")
+            self._dispatch()
+
+    def _check_alive(self, error_msg: str):
+        """所有进程都无法加载模型时：拒绝新任务，排队的任务全部失败"""
+        if self._workers:
+            return
+        self._fatal_error = error_msg
+        for job in self._jobs.values():
+            if job.status == STATUS_QUEUED:
+                self._finish(job, STATUS_FAILED, error_msg)
+
+    # ---- 上传 ----
+
+    def save_upload(self, job_id: str, filename: str, stream, length: int) -> str:
+        """把上传的 PDF 写入任务目录，返回文件路径"""
+        name = os.path.basename(filename.replace("\\", "/")) or "upload.pdf"
+        if not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        input_dir = os.path.join(self.job_dir(job_id), "input")
+        os.makedirs(input_dir, exist_ok=True)
+        path = os.path.join(input_dir, name)
+        remaining = length
+        with open(path, 'wb') as f:
+            while remaining > 0:
+                chunk = stream.read(min(_UPLOAD_CHUNK, remaining))
+                if not chunk:
+                    raise ValueError("上传的内容不完整")
+                f.write(chunk)
+                remaining -= len(chunk)
+        return path
+
+    def output_file(self, job: Job, relative: Optional[str]) -> Optional[str]:
+        """任务输出目录中的文件路径；relative 为空时返回主输出文件，越出输出目录时返回 None"""
+        if not relative:
+            return job.output_path
+        path = os.path.normpath(os.path.join(job.output_dir, relative))
+        if os.path.commonpath([path, job.output_dir]) != job.output_dir:
+            return None
+        return path
+
+
+class _ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "pdf2md-service/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.service.verbose:
+            self.server.service.log("[http] " + (format % args))
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict] = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _route(self) -> Tuple[List[str], Dict[str, str]]:
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        return [part for part in parts.path.split("/") if part], query
+
+    def _discard_body(self):
+        """拒绝请求时不读取请求体，直接关闭连接"""
+        self.close_connection = True
+
+    def do_GET(self):
+        service = self.server.service
+        route, query = self._route()
+        if route == ["health"]:
+            self._send_json(200, service.health())
+        elif route == ["jobs"]:
+            self._send_json(200, {"jobs": service.list_jobs(query.get("status"))})
+        elif len(route) == 2 and route[0] == "jobs":
+            if "wait" in query:
+                try:
+                    timeout = min(MAX_WAIT_SECONDS, max(0.0, float(query["wait"])))
+                except ValueError:
+                    self._send_error(400, "wait 必须是秒数")
+                    return
+                service.wait(route[1], timeout)
+            info = service.job_info(route[1], include_log=query.get("log") == "1")
+            if info is None:
+                self._send_error(404, f"任务不存在: {route[1]}")
+            else:
+                self._send_json(200, info)
+        elif len(route) == 3 and route[0] == "jobs" and route[2] in ("result", "files"):
+            job = service.get(route[1])
+            if job is None:
+                self._send_error(404, f"任务不存在: {route[1]}")
+            elif job.status != STATUS_DONE:
+                self._send_error(409, f"任务尚未完成 (状态: {job.status})")
+            elif route[2] == "files":
+                files = []
+                for root, _, names in os.walk(job.output_dir):
+                    for name in sorted(names):
+                        path = os.path.join(root, name)
+                        files.append({'file': os.path.relpath(path, job.output_dir).replace(os.sep, "/"),
+                                      'size': os.path.getsize(path)})
+                self._send_json(200, {"files": files})
+            else:
+                self._send_file(service.output_file(job, query.get("file")))
+        else:
+            self._send_error(404, f"未知的接口: {self.path}")
+
+    def _send_file(self, path: Optional[str]):
+        if not path or not os.path.isfile(path):
+            self._send_error(404, "输出文件不存在")
+            return
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if path.endswith((".md", ".jsonl")):
+            content_type = "text/markdown" if path.endswith(".md") else "application/x-ndjson"
+        if content_type.startswith("text/") or content_type.endswith(("json", "ndjson")):
+            content_type += "; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, _UPLOAD_CHUNK)
+
+    def do_POST(self):
+        service = self.server.service
+        route, query = self._route()
+        if route != ["jobs"]:
+            self._discard_body()
+            self._send_error(404, f"未知的接口: {self.path}")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        content_type = self.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+
+        # 先检查队列，已满时不接收上传内容
+        try:
+            service.check_capacity()
+        except QueueFullError as e:
+            self._discard_body()
+            self._send_error(503, str(e), {"Retry-After": str(e.retry_after)})
+            return
+        except ServiceUnavailableError as e:
+            self._discard_body()
+            self._send_error(503, str(e))
+            return
+
+        job_id = service.new_job_id()
+        try:
+            if content_type == "application/json":
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("请求体应为 JSON 对象")
+                pdf_path = request.get("path") or ""
+                priority = _parse_priority(request.get("priority", 0))
+                if not isinstance(pdf_path, str) or not os.path.isfile(pdf_path):
+                    self._send_error(400, f"文件不存在: {pdf_path}")
+                    return
+                job = service.submit(pdf_path, priority, job_id)
+            elif content_type in ("application/pdf", "application/octet-stream"):
+                if length <= 0:
+                    self._send_error(411, "上传 PDF 需要 Content-Length")
+                    return
+                if length > service.max_upload_bytes:
+                    self._discard_body()
+                    self._send_error(413, f"文件超过上传上限 ({service.max_upload_bytes // (1024 * 1024)} MB)")
+                    return
+                try:
+                    priority = _parse_priority(query.get("priority", 0))
+                except ValueError:
+                    self._discard_body()
+                    raise
+                pdf_path = service.save_upload(job_id, query.get("filename", "upload.pdf"), self.rfile, length)
+                job = service.submit(pdf_path, priority, job_id, uploaded=True)
+            else:
+                self._discard_body()
+                self._send_error(415, "请求体应为 application/json（提交路径）或 application/pdf（上传文件）")
+                return
+        except QueueFullError as e:
+            shutil.rmtree(service.job_dir(job_id), ignore_errors=True)
+            self._send_error(503, str(e), {"Retry-After": str(e.retry_after)})
+            return
+        except ServiceUnavailableError as e:
+            shutil.rmtree(service.job_dir(job_id), ignore_errors=True)
+            self._send_error(503, str(e))
+            return
+        except ValueError as e:
+            shutil.rmtree(service.job_dir(job_id), ignore_errors=True)
+            self._send_error(400, f"无效的请求: {e}")
+            return
+        except ConnectionError:
+            # 客户端在上传中途断开：删除已写入的部分，不再回复
+            shutil.rmtree(service.job_dir(job_id), ignore_errors=True)
+            self.close_connection = True
+            return
+        except OSError as e:
+            shutil.rmtree(service.job_dir(job_id), ignore_errors=True)
+            self._discard_body()
+            self._send_error(500, f"保存上传文件失败: {e}")
+            return
+
+        self._send_json(202, service.job_info(job.id), {"Location": f"/jobs/{job.id}"})
+
+    def do_DELETE(self):
+        service = self.server.service
+        route, _ = self._route()
+        if len(route) != 2 or route[0] != "jobs":
+            self._send_error(404, f"未知的接口: {self.path}")
+            return
+        result = service.cancel(route[1])
+        if result is None:
+            self._send_error(404, f"任务不存在: {route[1]}")
+        elif result == STATUS_RUNNING:
+            self._send_error(409, "任务正在转换，无法取消")
+        else:
+            self._send_json(200, {"id": route[1], "status": result})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pdf2md.service", description="本地 HTTP/JSON PDF 转换服务")
+    parser.add_argument("-c", "--config", help="JSON 配置文件，可直接使用 examples/sample_configs/*.json")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="工作进程数（每个进程加载一份模型）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="最多排队的任务数，超出时返回 503")
+    parser.add_argument("--max-upload", type=int, default=DEFAULT_MAX_UPLOAD_MB, help="上传文件的大小上限 (MB)")
+    parser.add_argument("--data-dir", default="service_data", help="上传文件和转换结果的保存目录")
+    parser.add_argument("--no-llm", action="store_true", help="忽略配置文件中的 LLM 设置")
+    parser.add_argument("--no-fallback", action="store_true", help="关闭 PyMuPDF 备用图片提取")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出转换日志和每个 HTTP 请求")
+    args = parser.parse_args(argv)
+
+    try:
+        options = load_config_file(args.config) if args.config else parse_config({})
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取配置文件 '{args.config}': {e}", file=sys.stderr)
+        return 2
+    use_llm = options['use_llm'] and not args.no_llm
+
+    def log(message):
+        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    service = ConversionService(
+        args.data_dir, options['config_dict'], use_llm, options['llm_service_config'] if use_llm else {},
+        use_fallback_extraction=options['use_fallback_extraction'] and not args.no_fallback,
+        workers=args.workers, max_queue=args.max_queue, host=args.host, port=args.port,
+        max_upload_mb=args.max_upload, log=log, verbose=args.verbose,
+    )
+    try:
+        service.start()
+    except OSError as e:
+        print(f"错误: 无法监听 {args.host}:{args.port}: {e}", file=sys.stderr)
+        service.stop()
+        return 2
+    log(f"转换服务已启动: {service.url} ({service.num_workers} 个工作进程，最多排队 {service.max_queue} 个任务)，按 Ctrl+C 停止")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log("正在停止服务...")
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# pdf2md/triage.py
+
+"""转换前的快速分诊
+
+逐页统计文字层覆盖率、图片面积占比，并识别只有扫描图像的页面，
+据此为每个文档选择代价最低的转换路径：
+    text  - 常规文本路径（按当前配置转换）
+    ocr   - 扫描件，开启 force_ocr
+    plain - 只有文字、没有图片和表格的原生文档，跳过 LLM 处理器
+
+表格靠页面上的横竖线（表格线）识别：有表格的文档即使没有图片也保留 LLM，
+由 LLM 处理器修正表格结构。
+"""
+
+from typing import Dict, Optional
+
+ROUTE_TEXT = "text"
+ROUTE_OCR = "ocr"
+ROUTE_PLAIN = "plain"
+
+ROUTE_LABELS = {
+    ROUTE_TEXT: "文本路径",
+    ROUTE_OCR: "OCR路径",
+    ROUTE_PLAIN: "纯文本路径(跳过LLM)",
+}
+
+# 文字少于该字符数、且图片覆盖超过该比例的页面视为扫描页
+SCANNED_PAGE_MAX_CHARS = 50
+SCANNED_PAGE_MIN_IMAGE_RATIO = 0.6
+# 扫描页占比达到该比例的文档走 OCR 路径
+OCR_MIN_SCANNED_RATIO = 0.5
+# 平均图片面积占比低于该值、且没有扫描页和表格页的文档视为纯文本
+PLAIN_MAX_IMAGE_RATIO = 0.02
+# 长度不小于 RULING_MIN_LENGTH (pt) 的水平/竖直线段视为表格线；
+# 表格线不少于 TABLE_MIN_RULINGS 条的页面视为表格页（三线表也算）
+RULING_MIN_LENGTH = 20.0
+TABLE_MIN_RULINGS = 3
+# 覆盖超过该比例页面的矩形视为页面边框或背景，不计入表格线
+RULING_MAX_BOX_RATIO = 0.5
+
+
+def _clipped_area(rect, page_rect) -> float:
+    x0, y0 = max(rect[0], page_rect.x0), max(rect[1], page_rect.y0)
+    x1, y1 = min(rect[2], page_rect.x1), min(rect[3], page_rect.y1)
+    return max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+
+def count_rulings(page) -> int:
+    """统计页面上的表格线：水平/竖直的线段，以及细长矩形（常用来画线）和单元格边框"""
+    page_area = page.rect.width * page.rect.height or 1.0
+    rulings = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "l":
+                dx, dy = abs(item[2].x - item[1].x), abs(item[2].y - item[1].y)
+                if min(dx, dy) < 1 and max(dx, dy) >= RULING_MIN_LENGTH:
+                    rulings += 1
+            elif item[0] == "re":
+                rect = item[1]
+                width, height = abs(rect.width), abs(rect.height)
+                if max(width, height) < RULING_MIN_LENGTH or width * height > RULING_MAX_BOX_RATIO * page_area:
+                    continue
+                # 细长矩形是一条线，否则是单元格的四条边
+                rulings += 1 if min(width, height) <= 2 else 4
+    return rulings
+
+
+def analyze_page(page) -> Dict:
+    """统计单页的文字字符数、文字覆盖率、图片面积占比，以及是否为扫描页、表格页"""
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height or 1.0
+
+    chars = 0
+    text_area = 0.0
+    # 文字块: (x0, y0, x1, y1, text, block_no, block_type)，block_type 0 为文字
+    for block in page.get_text("blocks"):
+        if block[6] == 0:
+            chars += len(block[4].strip())
+            text_area += _clipped_area(block[:4], page_rect)
+
+    image_area = 0.0
+    for info in page.get_image_info():
+        image_area += _clipped_area(info["bbox"], page_rect)
+
+    text_ratio = min(1.0, text_area / page_area)
+    image_ratio = min(1.0, image_area / page_area)
+    return {
+        'chars': chars,
+        'text_ratio': text_ratio,
+        'image_ratio': image_ratio,
+        'scanned': chars < SCANNED_PAGE_MAX_CHARS and image_ratio >= SCANNED_PAGE_MIN_IMAGE_RATIO,
+        'table': count_rulings(page) >= TABLE_MIN_RULINGS,
+    }
+
+
+def triage_document(doc) -> Dict:
+    """分析已打开的 fitz 文档，返回统计结果和推荐的转换路径"""
+    page_count = len(doc)
+    text_ratio_sum = 0.0
+    image_ratio_sum = 0.0
+    scanned_pages = 0
+    table_pages = 0
+
+    for page in doc:
+        stats = analyze_page(page)
+        text_ratio_sum += stats['text_ratio']
+        image_ratio_sum += stats['image_ratio']
+        scanned_pages += stats['scanned']
+        table_pages += stats['table']
+
+    pages = max(1, page_count)
+    result = {
+        'page_count': page_count,
+        'text_coverage': text_ratio_sum / pages,
+        'image_ratio': image_ratio_sum / pages,
+        'scanned_pages': scanned_pages,
+        'table_pages': table_pages,
+    }
+    result['route'] = choose_route(result)
+    return result
+
+
+def choose_route(stats: Dict) -> str:
+    """根据文档统计选择转换路径"""
+    pages = max(1, stats['page_count'])
+    if stats['scanned_pages'] / pages >= OCR_MIN_SCANNED_RATIO:
+        return ROUTE_OCR
+    if (stats['scanned_pages'] == 0 and stats.get('table_pages', 0) == 0
+            and stats['image_ratio'] < PLAIN_MAX_IMAGE_RATIO):
+        return ROUTE_PLAIN
+    return ROUTE_TEXT
+
+
+def triage_pdf(pdf_path: str) -> Optional[Dict]:
+    """打开PDF并分诊；PyMuPDF 不可用或文件无法打开时返回 None"""
+    try:
+        import fitz
+    except ImportError:
+        return None
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception:
+        return None
+    try:
+        return triage_document(doc)
+    finally:
+        doc.close()
+
+
+def describe(stats: Dict) -> str:
+    """生成一行便于阅读的分诊结果"""
+    return (f"文字覆盖率 {stats['text_coverage']:.0%}, 图片占比 {stats['image_ratio']:.0%}, "
+            f"扫描页 {stats['scanned_pages']}/{stats['page_count']}, 表格页 {stats.get('table_pages', 0)} "
+            f"-> {ROUTE_LABELS[stats['route']]}")
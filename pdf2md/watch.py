@@ -0,0 +1,313 @@
+# pdf2md/watch.py
+
+import os
+import json
+import time
+import datetime
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache import file_digest
+from .engine import ConversionEngine, ModelLoadError, MARKER_AVAILABLE, MARKER_IMPORT_ERROR
+from .filelist import FileEntry, scan_pdf_files
+from .journal import JobJournal
+
+WATCH_INDEX_FILENAME = ".pdf2md_watch_index.jsonl"
+
+# 两次扫描的间隔（秒）
+DEFAULT_POLL_INTERVAL = 5.0
+# 文件的大小和修改时间保持不变多久（秒）之后才认为已经写完
+DEFAULT_SETTLE_SECONDS = 10.0
+# 文件末尾还没有 %%EOF 时最多多等几倍的稳定时间，之后交给转换时的验证处理
+INCOMPLETE_WAIT_FACTOR = 6
+_EOF_TAIL_BYTES = 1024
+
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+
+def _noop(*args):
+    pass
+
+
+def looks_complete(path: str) -> bool:
+    """文件能以只读方式打开，并且末尾 1KB 内有 %%EOF（PDF 写完的标志）"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - _EOF_TAIL_BYTES))
+            return b'%%EOF' in f.read()
+    except OSError:
+        return False
+
+
+class WatchIndex:
+    """监视模式的文件索引（只追加的 JSONL，与任务日志相同的格式约定）
+
+    每个文件记录 {path, size, mtime, sha256, state, time}，同一文件以最后一行为准。
+    大小和修改时间都没变的文件直接跳过；变了时再比较内容哈希，
+    内容相同（例如被重新复制了一遍）只更新记录，不重新转换。
+    """
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, WATCH_INDEX_FILENAME)
+        self._entries: Dict[str, Dict] = {}
+        self._lines = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._entries[record['path']] = record
+                except (ValueError, KeyError, TypeError):
+                    continue
+                self._lines += 1
+
+    def unchanged(self, entry: FileEntry) -> bool:
+        """大小和修改时间与记录一致（不读取文件内容）"""
+        record = self._entries.get(entry.path)
+        return record is not None and record.get('size') == entry.size and record.get('mtime') == entry.mtime
+
+    def same_content(self, entry: FileEntry, digest: str) -> bool:
+        record = self._entries.get(entry.path)
+        return record is not None and record.get('sha256') == digest
+
+    def record(self, entry: FileEntry, digest: str, state: Optional[str] = None):
+        """记录文件的当前状态；state 为 None 时沿用上次的转换状态（内容没变，只是大小或修改时间变了）"""
+        if state is None:
+            state = self._entries.get(entry.path, {}).get('state')
+        record = {'path': entry.path, 'size': entry.size, 'mtime': entry.mtime, 'sha256': digest,
+                  'state': state, 'time': datetime.datetime.now().isoformat()}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._entries[entry.path] = record
+        self._lines += 1
+
+    def compact(self):
+        """日志行数远多于文件数时，只保留每个文件的最后状态"""
+        if self._lines <= 2 * len(self._entries) + 100:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in self._entries.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._lines = len(self._entries)
+
+
+class FolderWatcher:
+    """监视一个或多个文件夹，自动转换新增或修改过的 PDF
+
+    定期用 scan_pdf_files 扫描（不依赖 inotify 等平台接口），新文件或变化的文件
+    需要连续 settle_seconds 秒大小和修改时间不变、能够打开且末尾有 %%EOF 才会入队，
+    避免转换扫描仪或复制程序还没写完的文件。
+    转换在当前进程中由同一个 ConversionEngine 依次完成，模型在启动时加载一次并一直常驻。
+    转换结果记录在输出目录的监视索引中，重新启动后不再处理没有变化的文件；
+    任务日志中已完成且输入未变的文件（例如之前用批量模式转换过的）也直接记入索引。
+
+    回调与 BatchRunner 相同：log(message)、on_file_started(filename, current, total)、on_file_finished(summary)。
+    """
+
+    def __init__(self, folders: List[str], output_dir, config_dict, use_llm, llm_service_config,
+                 use_fallback_extraction=False,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                 log: Optional[Callable[[str], None]] = None,
+                 on_file_started: Optional[Callable[[str, int, int], None]] = None,
+                 on_file_finished: Optional[Callable[[Dict], None]] = None):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.output_dir = output_dir
+        self.poll_interval = max(0.1, poll_interval)
+        self.settle_seconds = max(0.0, settle_seconds)
+        self.log = log or _noop
+        self.on_file_started = on_file_started or _noop
+        self.on_file_finished = on_file_finished or _noop
+        self._stop_event = threading.Event()
+        # 路径 -> (大小, 修改时间, 第一次看到这个状态的时间)
+        self._candidates: Dict[str, Tuple[int, float, float]] = {}
+        self.index: Optional[WatchIndex] = None
+        self.journal: Optional[JobJournal] = None
+
+        # 监视模式始终在当前进程中转换：工作进程和进程回收设置会让模型在每一批文件时重新加载
+        watch_config = {k: v for k, v in config_dict.items()
+                        if k not in ("workers", "shard_pages", "recycle_after_files", "max_worker_rss_mb",
+                                     "worker_memory_limit_mb")}
+        self.engine = ConversionEngine(
+            output_dir, watch_config, use_llm, llm_service_config,
+            use_fallback_extraction=use_fallback_extraction,
+            log=self.log,
+            should_continue=lambda: not self._stop_event.is_set()
+        )
+
+    @property
+    def is_running(self) -> bool:
+        return not self._stop_event.is_set()
+
+    def stop(self):
+        """请求停止：当前文件结束后退出监视循环"""
+        self._stop_event.set()
+
+    def run(self) -> Dict:
+        """加载模型并开始监视，直到 stop() 被调用；返回与 BatchRunner.run() 相同格式的结果"""
+        if not MARKER_AVAILABLE:
+            return self._result('failed', f"Marker 库未正确安装或导入: {MARKER_IMPORT_ERROR}")
+        missing = [folder for folder in self.folders if not os.path.isdir(folder)]
+        if missing:
+            return self._result('failed', f"监视的文件夹不存在: {', '.join(missing)}")
+
+        start_time = datetime.datetime.now()
+        os.makedirs(self.output_dir, exist_ok=True)
+        summaries: List[Dict] = []
+        try:
+            self.index = WatchIndex(self.output_dir)
+            self.index.compact()
+            self._open_journal()
+
+            self.log("正在加载 Marker 模型...")
+            try:
+                self.engine.load_models()
+            except Exception as model_load_error:
+                raise ModelLoadError(f"加载 Marker 模型失败: {model_load_error}") from model_load_error
+
+            self.log(f"开始监视: {', '.join(self.folders)} (每 {self.poll_interval:g} 秒扫描一次，"
+                     f"文件 {self.settle_seconds:g} 秒内无变化后转换；索引中已有 {len(self.index)} 个文件)")
+            while self.is_running:
+                ready = self.poll()
+                for i, entry in enumerate(ready):
+                    if not self.is_running:
+                        break
+                    summary = self._convert(entry, i + 1, len(ready))
+                    if summary is not None:
+                        summaries.append(summary)
+                self._stop_event.wait(self.poll_interval)
+
+            self.log("监视已停止。")
+            successful = sum(1 for summary in summaries if summary['success'])
+            failed = len(summaries) - successful
+            total_time = (datetime.datetime.now() - start_time).total_seconds()
+            if summaries:
+                self.engine._generate_conversion_report(summaries, successful, failed, total_time)
+            message = f"监视结束，共转换 {len(summaries)} 个文件，成功: {successful}"
+            if failed:
+                message += f", 失败: {failed}"
+            return self._result('completed', message, summaries, total_time)
+
+        except ModelLoadError as model_load_error:
+            self.log(f"严重错误: {model_load_error}")
+            self.log(traceback.format_exc())
+            return self._result('failed', str(model_load_error), summaries)
+        except Exception as e:
+            self.log(f"严重错误: {e}")
+            self.log(traceback.format_exc())
+            return self._result('failed', f"监视因严重错误停止: {e}", summaries)
+        finally:
+            self.engine.close()
+
+    def poll(self) -> List[FileEntry]:
+        """扫描一次所有文件夹，返回已经写完、需要转换的新文件或变化的文件"""
+        now = time.monotonic()
+        seen = set()
+        ready = []
+        for folder in self.folders:
+            for batch in scan_pdf_files(folder, stop_event=self._stop_event):
+                for entry in batch:
+                    seen.add(entry.path)
+                    if self.index.unchanged(entry):
+                        self._candidates.pop(entry.path, None)
+                        continue
+                    if self._settled(entry, now):
+                        ready.append(entry)
+
+        # 扫描期间被删除或移走的文件不再等待
+        for path in [path for path in self._candidates if path not in seen]:
+            del self._candidates[path]
+        return ready
+
+    def _settled(self, entry: FileEntry, now: float) -> bool:
+        """文件的大小和修改时间已经保持不变足够长的时间，并且看起来已经写完"""
+        candidate = self._candidates.get(entry.path)
+        if candidate is None or candidate[:2] != (entry.size, entry.mtime):
+            self._candidates[entry.path] = (entry.size, entry.mtime, now)
+            return self.settle_seconds == 0 and looks_complete(entry.path)
+        waited = now - candidate[2]
+        if waited < self.settle_seconds:
+            return False
+        return looks_complete(entry.path) or waited >= self.settle_seconds * INCOMPLETE_WAIT_FACTOR
+
+    def _convert(self, entry: FileEntry, current: int, total: int) -> Optional[Dict]:
+        """转换一个文件并记入索引；内容与上次相同（或任务日志中已完成）时只更新索引，返回 None"""
+        self._candidates.pop(entry.path, None)
+        try:
+            digest = file_digest(entry.path)
+        except OSError as read_error:
+            self.log(f"警告: 无法读取 {entry.name}，稍后重试: {read_error}")
+            return None
+
+        if self.index.same_content(entry, digest):
+            self.index.record(entry, digest)
+            return None
+        if self.journal is not None and self.journal.completed_summary(entry.path) is not None:
+            self.log(f"已跳过 {entry.name} (任务日志中已完成，输出未改动)")
+            self.index.record(entry, digest, STATE_DONE)
+            return None
+
+        self._write_journal('mark_running', entry.path)
+        self.on_file_started(entry.name, current, total)
+        change = "修改" if entry.path in self.index else "新增"
+        self.log(f"\n[{current}/{total}] 检测到{change}的文件，正在转换: {entry.name}")
+        summary = self.engine.convert_file(entry.path)
+        if not self.is_running and not summary['success']:
+            # 被中止的转换不记入索引，下次启动时重新转换
+            return summary
+
+        output_path = os.path.join(self.output_dir, self.engine.writer.output_name(os.path.splitext(entry.name)[0]))
+        self._write_journal('mark_finished', summary, output_path)
+        self.index.record(entry, digest, STATE_DONE if summary['success'] else STATE_FAILED)
+        if not summary['success']:
+            self.log(f"  -> 转换失败，文件再次变化后会重新转换: {summary['error']}")
+        self.on_file_finished(summary)
+        return summary
+
+    def _open_journal(self):
+        try:
+            self.journal = JobJournal(self.output_dir)
+            self.journal.compact()
+        except Exception as journal_error:
+            self.log(f"警告: 无法打开任务日志，本次不记录进度: {journal_error}")
+            self.journal = None
+
+    def _write_journal(self, method: str, *args):
+        if self.journal is None:
+            return
+        try:
+            getattr(self.journal, method)(*args)
+        except Exception as journal_error:
+            self.log(f"警告: 写入任务日志失败: {journal_error}")
+
+    def _result(self, status: str, message: str, summaries: Optional[List[Dict]] = None,
+                total_time: float = 0.0) -> Dict:
+        summaries = summaries or []
+        successful = sum(1 for summary in summaries if summary['success'])
+        return {
+            'status': status,
+            'message': message,
+            'summaries': summaries,
+            'successful': successful,
+            'failed': len(summaries) - successful,
+            'total_time': total_time,
+        }
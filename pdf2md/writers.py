@@ -0,0 +1,192 @@
+# pdf2md/writers.py
+
+import re
+import abc
+import json
+from typing import Dict, Optional
+
+# Marker 的输出格式 -> 写出器；每种格式对应渲染结果中的不同属性和不同的文件扩展名
+DEFAULT_OUTPUT_FORMAT = "markdown"
+
+_HTML_IMAGE_SRC = re.compile(r'''(<img\b[^>]*?\bsrc=)(["'])([^"']+)\2''', re.IGNORECASE)
+
+
+def _json_default(obj):
+    """json.dumps 无法直接处理的对象：pydantic 模型、带 __dict__ 的对象、集合等"""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump(mode='json')
+    if hasattr(obj, '__dict__'):
+        return vars(obj)
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def to_json(obj) -> str:
+    """把一个块（pydantic 模型或普通对象）序列化为单行 JSON"""
+    if hasattr(obj, 'model_dump_json'):
+        return obj.model_dump_json()
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+def rendered_images(rendered) -> Optional[Dict[str, str]]:
+    """渲染结果中的 图片名 -> base64 字典（HTML/Markdown 输出在顶层，兼容放在 metadata 中的情况）"""
+    images = getattr(rendered, 'images', None)
+    if isinstance(images, dict):
+        return images
+    images = getattr(getattr(rendered, 'metadata', None), 'images', None)
+    return images if isinstance(images, dict) else None
+
+
+def rendered_metadata_dict(rendered) -> Dict:
+    metadata = getattr(rendered, 'metadata', None)
+    if isinstance(metadata, dict):
+        return metadata
+    if metadata is None:
+        return {}
+    return {key: value for key, value in vars(metadata).items() if key != 'images'}
+
+
+class OutputWriter(abc.ABC):
+    """一种输出格式的写出器（抽象基类，子类实现 write）
+
+    attribute: 渲染结果中保存正文的属性；extension: 输出文件的扩展名。
+    write() 把渲染结果写入 path，返回写出的字节数。
+    """
+
+    format = DEFAULT_OUTPUT_FORMAT
+    attribute = "markdown"
+    extension = ".md"
+    # 是否执行 Markdown 专用的后处理（备用图片、链接重写、分页标记、元数据头、分片合并）
+    markdown_pipeline = False
+    # 图片是否另存到 _images 文件夹（JSON 和分块输出中的图片以 base64 内嵌在块里）
+    saves_images = False
+
+    def output_name(self, pdf_stem: str) -> str:
+        return pdf_stem + self.extension
+
+    def output_files(self, path: str) -> Dict[str, str]:
+        """本次写出的全部文件：文件名后缀（文件名去掉 PDF 名之后的部分） -> 路径"""
+        return {self.extension: path}
+
+    def page_count(self, rendered) -> int:
+        """Marker 的 metadata 中没有页数时，从渲染结果本身推断"""
+        return 0
+
+    @abc.abstractmethod
+    def write(self, rendered, path: str, images_prefix: str = "", renames: Optional[Dict[str, str]] = None) -> int:
+        """写出渲染结果；images_prefix 为图片文件夹前缀，renames 为压缩后改名的图片"""
+
+
+class MarkdownWriter(OutputWriter):
+    markdown_pipeline = True
+    saves_images = True
+
+    def write_text(self, markdown_content: str, path: str) -> int:
+        data = markdown_content.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+    def write(self, rendered, path, images_prefix="", renames=None):
+        return self.write_text(getattr(rendered, self.attribute), path)
+
+
+class HtmlWriter(OutputWriter):
+    format = "html"
+    attribute = "html"
+    extension = ".html"
+    saves_images = True
+
+    def write(self, rendered, path, images_prefix="", renames=None):
+        """写出 HTML，把 <img src="图片名"> 指向图片文件夹（压缩后改名的图片使用新文件名）"""
+        renames = renames or {}
+
+        def replace(match):
+            src = match.group(3)
+            if '/' in src or '\\' in src or src.startswith('data:'):
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{images_prefix}{renames.get(src, src)}{match.group(2)}"
+
+        html = getattr(rendered, self.attribute)
+        if images_prefix or renames:
+            html = _HTML_IMAGE_SRC.sub(replace, html)
+        data = html.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+
+class JsonWriter(OutputWriter):
+    """Marker 的 JSON 块树：逐个顶层块（页面）序列化并写盘
+
+    不生成整个文档的 JSON 字符串；每写完一页就释放渲染结果中对应的块，
+    内存峰值只与单页的大小有关。
+    """
+
+    format = "json"
+    attribute = "children"
+    extension = ".json"
+
+    def page_count(self, rendered):
+        return len(getattr(rendered, self.attribute, None) or [])
+
+    def write(self, rendered, path, images_prefix="", renames=None):
+        children = getattr(rendered, self.attribute)
+        block_type = getattr(rendered, 'block_type', 'Document')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"block_type": ' + json.dumps(block_type) + ', "children": [')
+            for k in range(len(children)):
+                f.write(',\n' if k else '\n')
+                f.write(to_json(children[k]))
+                children[k] = None
+            f.write('\n], "metadata": ')
+            json.dump(rendered_metadata_dict(rendered), f, ensure_ascii=False, default=_json_default)
+            f.write('}\n')
+            return f.tell()
+
+
+class ChunksWriter(OutputWriter):
+    """Marker 的扁平块列表，按 JSON Lines 逐块写出（每行一个块，便于直接送入向量化流程）
+
+    页面信息和文档元数据写入同名的 _meta.json。
+    """
+
+    format = "chunks"
+    attribute = "blocks"
+    extension = ".jsonl"
+    meta_suffix = "_meta.json"
+
+    def output_files(self, path):
+        return {self.extension: path, self.meta_suffix: path[:-len(self.extension)] + self.meta_suffix}
+
+    def page_count(self, rendered):
+        return len(getattr(rendered, 'page_info', None) or {})
+
+    def write(self, rendered, path, images_prefix="", renames=None):
+        blocks = getattr(rendered, self.attribute)
+        written = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for k in range(len(blocks)):
+                f.write(to_json(blocks[k]))
+                f.write('\n')
+                blocks[k] = None
+            written = f.tell()
+
+        with open(self.output_files(path)[self.meta_suffix], 'w', encoding='utf-8') as f:
+            json.dump({'page_info': getattr(rendered, 'page_info', None) or {},
+                       'metadata': rendered_metadata_dict(rendered)},
+                      f, ensure_ascii=False, indent=2, default=_json_default)
+            written += f.tell()
+        return written
+
+
+OUTPUT_WRITERS = {writer.format: writer for writer in (MarkdownWriter, JsonWriter, HtmlWriter, ChunksWriter)}
+
+
+def get_writer(output_format: Optional[str]) -> OutputWriter:
+    """返回输出格式对应的写出器；未知格式抛出 ValueError"""
+    output_format = output_format or DEFAULT_OUTPUT_FORMAT
+    if output_format not in OUTPUT_WRITERS:
+        raise ValueError(f"不支持的输出格式: {output_format} (可选: {', '.join(OUTPUT_WRITERS)})")
+    return OUTPUT_WRITERS[output_format]()
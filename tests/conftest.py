@@ -0,0 +1,77 @@
+# tests/conftest.py
+
+import os
+import base64
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    import fitz  # PyMuPDF
+
+from pdf2md import engine as engine_module
+
+
+def make_pdf(path: str, pages: int = 1, text: str = "测试文档") -> str:
+    """生成一个每页一行文字的小 PDF"""
+    doc = fitz.open()
+    for k in range(pages):
+        doc.new_page().insert_text((72, 72), f"{text} {k + 1}")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def png_base64(color=(255, 0, 0), size=(8, 8)) -> str:
+    """生成一张纯色 PNG 的 base64（不依赖 Pillow）"""
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, *size), False)
+    pixmap.set_rect(pixmap.irect, color)
+    return base64.b64encode(pixmap.tobytes("png")).decode("ascii")
+
+
+class FakeConverter:
+    """代替 Marker 的 PdfConverter：按 Marker 的 MarkdownOutput 结构返回渲染结果
+
+    images 放在顶层 rendered.images，metadata 是包含 page_stats 的字典；设置 html 时模拟 HTMLOutput。
+    """
+
+    def __init__(self, markdown: str = "# 标题\n\n正文\n", images=None, pages: int = 1):
+        self.markdown = markdown
+        self.images = images or {}
+        self.pages = pages
+        self.html = None
+        self.calls = []
+
+    def __call__(self, pdf_path):
+        self.calls.append(pdf_path)
+        rendered = SimpleNamespace(
+            markdown=self.markdown,
+            images=dict(self.images),
+            metadata={'page_stats': [{'page_id': k} for k in range(self.pages)], 'table_of_contents': []},
+        )
+        if self.html is not None:
+            del rendered.markdown
+            rendered.html = self.html
+        return rendered
+
+
+@pytest.fixture
+def fake_marker(monkeypatch):
+    """让 ConversionEngine 使用 FakeConverter，不加载 Marker 模型"""
+    converter = FakeConverter()
+
+    def load_models(self):
+        self.converter = converter
+
+    monkeypatch.setattr(engine_module.ConversionEngine, "load_models", load_models)
+    monkeypatch.setattr(engine_module.ConversionEngine, "_build_converter",
+                        lambda self, final_config, use_llm=None: converter)
+    monkeypatch.setattr(engine_module, "MARKER_AVAILABLE", True)
+    return converter
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    return make_pdf(os.path.join(str(tmp_path), "doc.pdf"), pages=2)
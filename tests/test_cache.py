@@ -0,0 +1,67 @@
+# tests/test_cache.py
+
+import os
+import time
+
+from pdf2md.cache import ConversionCache, config_digest
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    return path
+
+
+def _put(cache, tmp_path, key, stem="doc", size=0):
+    out_dir = tmp_path / f"out_{key}"
+    out_dir.mkdir()
+    md = _write(str(out_dir / f"{stem}.md"), f"![]({stem}_images/a.png)\n" + "x" * size)
+    images_dir = out_dir / f"{stem}_images"
+    images_dir.mkdir()
+    (images_dir / "a.png").write_bytes(b"png")
+    cache.put(key, {".md": md}, str(images_dir), {'pdf_stem': stem, 'pages': 3})
+
+
+def test_config_digest_ignores_key_order():
+    assert config_digest({'a': 1, 'b': [1, 2]}) == config_digest({'b': [1, 2], 'a': 1})
+    assert config_digest({'a': 1}) != config_digest({'a': 2})
+
+
+def test_restore_round_trip_and_rename(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), 10 * 1024 * 1024)
+    _put(cache, tmp_path, "k1", stem="doc")
+
+    target = tmp_path / "restored"
+    meta = cache.restore("k1", str(target), "renamed")
+    assert meta['pages'] == 3
+    # 换了文件名后图片文件夹的引用随之改写
+    assert (target / "renamed.md").read_text(encoding='utf-8').startswith("![](renamed_images/a.png)")
+    assert (target / "renamed_images" / "a.png").read_bytes() == b"png"
+
+
+def test_restore_miss_and_corrupt_entry(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), 10 * 1024 * 1024)
+    assert cache.restore("missing", str(tmp_path / "out"), "doc") is None
+
+    _put(cache, tmp_path, "k1")
+    os.remove(os.path.join(cache._entry_dir("k1"), "output.md"))
+    assert cache.restore("k1", str(tmp_path / "out"), "doc") is None
+    # 损坏的条目从索引中移除
+    assert cache.total_size() == 0
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), 5000)
+    _put(cache, tmp_path, "old", size=2000)
+    time.sleep(0.05)
+    _put(cache, tmp_path, "used", size=2000)
+    time.sleep(0.05)
+    # 访问 old，使 used 成为最久未使用的条目
+    assert cache.restore("old", str(tmp_path / "r1"), "doc") is not None
+    time.sleep(0.05)
+    _put(cache, tmp_path, "new", size=2000)
+
+    assert cache.restore("used", str(tmp_path / "r2"), "doc") is None
+    assert cache.restore("old", str(tmp_path / "r3"), "doc") is not None
+    assert cache.restore("new", str(tmp_path / "r4"), "doc") is not None
+    assert cache.total_size() <= 5000
@@ -0,0 +1,89 @@
+# tests/test_chunk_index.py
+
+import os
+import json
+
+from pdf2md.chunk_index import CHUNK_INDEX_SUFFIX, build_chunk_index, rebase_chunk_index, write_chunk_index
+from pdf2md.engine import ConversionEngine
+from pdf2md.image_placement import strip_page_markers_with_offsets
+
+PAGE_BREAK = "-" * 48
+HEADER = "---\nsource: doc.pdf\n---\n\n"
+MARKDOWN = HEADER + (
+    f"{{0}}{PAGE_BREAK}\n\n"
+    "# 第一章 概述\n\n中文正文，每个字三个字节。\n\n"
+    "## 1.1 背景\n\n背景段落 ![](doc_images/_page_0_Picture_0.png)\n\n"
+    f"{{1}}{PAGE_BREAK}\n\n"
+    "背景的第二页\n\n"
+    "```\n# 代码块中的注释不是标题\n```\n\n"
+    "# 第二章 方法\n\n方法正文 🙂\n"
+)
+
+
+def _slices(markdown, entries):
+    data = markdown.encode('utf-8')
+    return [data[entry['byte_start']:entry['byte_end']].decode('utf-8') for entry in entries]
+
+
+def test_byte_offsets_headings_and_pages():
+    entries = build_chunk_index(MARKDOWN, body_start=len(HEADER))
+    assert [entry['heading'] for entry in entries] == [["第一章 概述"], ["第一章 概述", "1.1 背景"], ["第二章 方法"]]
+    texts = _slices(MARKDOWN, entries)
+    assert texts[0] == "# 第一章 概述\n\n中文正文，每个字三个字节。\n"
+    assert texts[1].startswith("## 1.1 背景\n") and texts[1].endswith("```\n")
+    assert "# 代码块中的注释不是标题" in texts[1]
+    assert texts[2] == "# 第二章 方法\n\n方法正文 🙂\n"
+    assert [(entry['page_start'], entry['page_end']) for entry in entries] == [(1, 1), (1, 2), (2, 2)]
+    assert entries[1]['images'] == ["doc_images/_page_0_Picture_0.png"]
+
+
+def test_offsets_after_stripping_page_markers():
+    body, page_offsets = strip_page_markers_with_offsets(MARKDOWN[len(HEADER):])
+    markdown = HEADER + body
+    entries = build_chunk_index(markdown, len(HEADER), [(offset + len(HEADER), page) for offset, page in page_offsets])
+    assert _slices(markdown, entries)[2] == "# 第二章 方法\n\n方法正文 🙂\n"
+    assert [(entry['page_start'], entry['page_end']) for entry in entries] == [(1, 1), (1, 2), (2, 2)]
+
+
+def test_long_section_splits_at_paragraphs():
+    markdown = "# 长章节\n\n" + "\n\n".join("段落" * 40 for _ in range(10)) + "\n"
+    entries = build_chunk_index(markdown, max_bytes=500)
+    assert len(entries) > 1
+    assert all(entry['heading'] == ["长章节"] for entry in entries)
+    assert "".join(_slices(markdown, entries)).replace("\n", "") == markdown.replace("\n", "")
+
+
+def test_rebase_after_rename(tmp_path):
+    entries = build_chunk_index(MARKDOWN, body_start=len(HEADER))
+    path = str(tmp_path / "doc.index.jsonl")
+    write_chunk_index(path, entries)
+    with open(path, encoding='utf-8') as f:
+        index_text = f.read()
+
+    renamed = MARKDOWN.replace("doc_images/", "新名字_images/")
+    rebased = [json.loads(line) for line in
+               rebase_chunk_index(index_text, MARKDOWN.encode('utf-8'), "doc_images/", "新名字_images/").splitlines()]
+    assert _slices(renamed, rebased) == [text.replace("doc_images/", "新名字_images/")
+                                         for text in _slices(MARKDOWN, entries)]
+    assert rebased[1]['images'] == ["新名字_images/_page_0_Picture_0.png"]
+
+
+def test_engine_writes_index_matching_the_markdown(tmp_path, fake_marker, pdf_file):
+    fake_marker.markdown = MARKDOWN[len(HEADER):]
+    engine = ConversionEngine(str(tmp_path), {"chunk_index": True}, False, {})
+    assert engine.convert_file(pdf_file)['success']
+
+    with open(os.path.join(str(tmp_path), "doc.md"), encoding='utf-8') as f:
+        markdown = f.read()
+    with open(os.path.join(str(tmp_path), "doc" + CHUNK_INDEX_SUFFIX), encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    texts = _slices(markdown, entries)
+    assert [text.split("\n", 1)[0] for text in texts] == ["# 第一章 概述", "## 1.1 背景", "# 第二章 方法"]
+
+
+def test_pages_from_image_names_without_page_markers():
+    """没有分页信息时按图片名取页码：Marker 的图片名从0开始，备用引擎的文件名从1开始"""
+    markdown = ("# 甲\n\n![](doc_images/_page_0_Picture_0.png)\n\n"
+                "# 乙\n\n![](doc_images/page_004_img_01_abcd1234.png)\n")
+    entries = build_chunk_index(markdown)
+    assert [(entry['page_start'], entry['page_end']) for entry in entries] == [(1, 1), (4, 4)]
@@ -0,0 +1,89 @@
+# tests/test_engine_images.py
+
+import os
+import re
+
+from pdf2md.engine import ConversionEngine
+from pdf2md.images import PIL_AVAILABLE
+
+from .conftest import fitz, png_base64
+
+IMAGE_NAMES = [f"_page_{k}_Picture_0.png" for k in range(3)]
+MARKDOWN = "# 标题\n\n" + "\n\n".join(f"第{k + 1}页\n\n![]({name})" for k, name in enumerate(IMAGE_NAMES)) + "\n"
+
+
+def _linked_files(markdown):
+    return re.findall(r'!\[[^\]]*\]\(([^)]+)\)', markdown)
+
+
+def test_markdown_saves_top_level_images(tmp_path, fake_marker, pdf_file):
+    """Marker 的 MarkdownOutput 把图片放在顶层 rendered.images"""
+    fake_marker.markdown = MARKDOWN
+    fake_marker.images = {name: png_base64() for name in IMAGE_NAMES}
+    out_dir = str(tmp_path / "out")
+    engine = ConversionEngine(out_dir, {}, False, {})
+
+    summary = engine.convert_file(pdf_file)
+    assert summary['success'], summary['error']
+    assert summary['images'] == 3
+
+    images_dir = os.path.join(out_dir, "doc_images")
+    assert sorted(os.listdir(images_dir)) == sorted(IMAGE_NAMES)
+    with open(os.path.join(out_dir, "doc.md"), encoding='utf-8') as f:
+        links = _linked_files(f.read())
+    assert links and all(os.path.isfile(os.path.join(out_dir, link)) for link in links)
+
+
+def test_markdown_images_are_compressed(tmp_path, fake_marker, pdf_file):
+    if not PIL_AVAILABLE:
+        return
+    fake_marker.markdown = MARKDOWN
+    fake_marker.images = {name: png_base64() for name in IMAGE_NAMES}
+    out_dir = str(tmp_path / "out")
+    engine = ConversionEngine(out_dir, {"compress_images": True, "image_format": "jpeg"}, False, {})
+
+    assert engine.convert_file(pdf_file)['success']
+    saved = os.listdir(os.path.join(out_dir, "doc_images"))
+    assert saved and all(name.endswith(".jpg") or name.endswith(".jpeg") for name in saved)
+    with open(os.path.join(out_dir, "doc.md"), encoding='utf-8') as f:
+        links = _linked_files(f.read())
+    assert links and all(os.path.isfile(os.path.join(out_dir, link)) for link in links)
+
+
+def test_html_images_point_into_images_folder(tmp_path, fake_marker, pdf_file):
+    fake_marker.html = "".join(f'<p><img src="{name}"/></p>' for name in IMAGE_NAMES)
+    fake_marker.images = {name: png_base64() for name in IMAGE_NAMES}
+    out_dir = str(tmp_path / "out")
+    engine = ConversionEngine(out_dir, {"output_format": "html"}, False, {})
+
+    assert engine.convert_file(pdf_file)['success']
+    with open(os.path.join(out_dir, "doc.html"), encoding='utf-8') as f:
+        sources = re.findall(r'src="([^"]+)"', f.read())
+    assert sources == [f"doc_images/{name}" for name in IMAGE_NAMES]
+    assert all(os.path.isfile(os.path.join(out_dir, src)) for src in sources)
+
+
+def test_fallback_logo_repeated_on_every_page_is_one_file(tmp_path, fake_marker):
+    """备用引擎只保存一次重复的标志，每一页的链接都指向同一个文件"""
+    pdf_path = str(tmp_path / "report.pdf")
+    doc = fitz.open()
+    logo = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 16, 16), False)
+    logo.set_rect(logo.irect, (0, 0, 255))
+    logo_bytes = logo.tobytes("png")
+    for k in range(3):
+        page = doc.new_page()
+        page.insert_image(fitz.Rect(20, 20, 60, 60), stream=logo_bytes)
+        page.insert_text((72, 120), f"第{k + 1}页正文")
+    doc.save(pdf_path)
+    doc.close()
+
+    fake_marker.markdown = "\n\n".join(f"![](_page_{k}_Picture_0.jpeg)\n\n第{k + 1}页正文" for k in range(3)) + "\n"
+    out_dir = str(tmp_path / "out")
+    os.makedirs(out_dir)
+    engine = ConversionEngine(out_dir, {}, False, {}, use_fallback_extraction=True)
+    assert engine.convert_file(pdf_path)['success']
+
+    saved = os.listdir(os.path.join(out_dir, "report_images"))
+    assert len(saved) == 1
+    with open(os.path.join(out_dir, "report.md"), encoding='utf-8') as f:
+        assert _linked_files(f.read()) == [f"report_images/{saved[0]}"] * 3
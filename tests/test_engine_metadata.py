@@ -0,0 +1,35 @@
+# tests/test_engine_metadata.py
+
+import os
+from types import SimpleNamespace
+
+from pdf2md.engine import ConversionEngine
+
+
+def test_page_count_from_marker_page_stats(tmp_path, fake_marker, pdf_file):
+    """Marker 的 metadata 是字典，页数来自 page_stats"""
+    fake_marker.pages = 2
+    engine = ConversionEngine(str(tmp_path), {}, False, {})
+
+    summary = engine.convert_file(pdf_file)
+    assert summary['success'], summary['error']
+    assert summary['pages'] == 2
+    with open(os.path.join(str(tmp_path), "doc.md"), encoding='utf-8') as f:
+        assert "pages: 2\n" in f.read()
+
+
+def test_page_count_falls_back_to_validated_pdf(tmp_path, fake_marker, pdf_file):
+    fake_marker.pages = 0
+    engine = ConversionEngine(str(tmp_path), {}, False, {})
+
+    summary = engine.convert_file(pdf_file)
+    assert summary['success'], summary['error']
+    assert summary['pages'] == 2
+
+
+def test_rendered_metadata_reads_dict_and_object(tmp_path):
+    engine = ConversionEngine(str(tmp_path), {}, False, {})
+    rendered = SimpleNamespace(metadata={'page_stats': [{}, {}, {}], 'title': "标题"})
+    assert engine._rendered_metadata(rendered) == {'page_count': 3, 'title': "标题", 'author': None}
+    rendered = SimpleNamespace(metadata=SimpleNamespace(page_count=5, author="作者"))
+    assert engine._rendered_metadata(rendered) == {'page_count': 5, 'title': None, 'author': "作者"}
@@ -0,0 +1,50 @@
+# tests/test_image_links.py
+
+from pdf2md.image_links import ImageLinkIndex
+
+
+def test_same_page_image_is_preferred():
+    index = ImageLinkIndex(["page_001_img_01_aa.png", "page_002_img_01_bb.png", "page_002_img_02_cc.png"])
+    # Marker 的图片名页码从0开始：_page_1_ 是第2页
+    assert index.match("_page_1_Picture_0.jpeg") == "page_002_img_01_bb.png"
+    assert index.match("_page_1_Picture_1.jpeg") == "page_002_img_02_cc.png"
+    # 第2页的图片已用完，退回第一张未使用的图片
+    assert index.match("_page_1_Picture_2.jpeg") == "page_001_img_01_aa.png"
+    assert index.match("_page_1_Picture_3.jpeg") is None
+
+
+def test_exact_name_then_stem():
+    index = ImageLinkIndex(["figure.png", "chart.jpg", "other.png"])
+    assert index.match("chart.jpg") == "chart.jpg"
+    assert index.match("figure.jpeg") == "figure.png"
+    assert index.unused() == ["other.png"]
+
+
+def test_partial_name_match():
+    """链接的主干名只是文件名的一部分时，仍按部分匹配找到对应图片"""
+    index = ImageLinkIndex(["intro.png", "scan_logo_01.png", "scan_chart_02.png"])
+    assert index.match("chart.png") == "scan_chart_02.png"
+    assert index.match("logo.jpeg") == "scan_logo_01.png"
+    assert index.match("logo.jpeg") == "intro.png"
+    assert index.unused() == []
+
+
+def test_repeated_image_is_linked_on_every_page_it_appears():
+    """去重后的标志在每一页都链接到同一个文件，不会占用其他页的图片"""
+    logo = "page_001_img_01_logo.png"
+    chart = "page_003_img_02_chart.png"
+    occurrences = {logo: [(1, None, 10.0), (2, None, 10.0), (3, None, 10.0)], chart: [(3, "图表上方的文字", 300.0)]}
+    index = ImageLinkIndex([logo, chart], occurrences)
+
+    assert [index.match(f"_page_{page}_Picture_0.jpeg") for page in range(3)] == [logo, logo, logo]
+    # 第3页的第二张图片按页内顺序匹配到图表
+    assert index.match("_page_2_Picture_1.jpeg") == chart
+    assert index.match("_page_1_Picture_1.jpeg") is None
+    assert index.unused() == []
+
+
+def test_image_matched_by_name_is_not_reused_by_page():
+    index = ImageLinkIndex(["page_002_img_01_aa.png", "page_002_img_02_bb.png"])
+    assert index.match("bb.png") == "page_002_img_02_bb.png"
+    assert index.match("_page_1_Picture_0.jpeg") == "page_002_img_01_aa.png"
+    assert index.match("_page_1_Picture_1.jpeg") is None
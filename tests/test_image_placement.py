@@ -0,0 +1,100 @@
+# tests/test_image_placement.py
+
+from pdf2md.image_placement import DocumentOutline, anchor_key, place_images, strip_page_markers
+
+PAGE_BREAK = "-" * 48
+
+
+def _paginated(*pages):
+    return "\n\n".join(f"{{{k}}}{PAGE_BREAK}\n\n{text}" for k, text in enumerate(pages))
+
+
+def test_image_repeated_on_every_page_is_referenced_on_each_page():
+    content = _paginated("第一页正文内容", "第二页正文内容", "第三页正文内容")
+    images = [("logo.png", page, None) for page in (1, 2, 3)] + [("chart.png", 2, "第二页正文内容")]
+
+    result, placed = place_images(content, images, "doc")
+    assert placed == {"logo.png", "chart.png"}
+    assert result.count("doc_images/logo.png") == 3
+    assert result.count("doc_images/chart.png") == 1
+    # 每一页开头都引用同一个文件
+    positions = [result.index(text) for text in ("第一页正文内容", "第二页正文内容", "第三页正文内容")]
+    logos = [k for k in range(len(result)) if result.startswith("doc_images/logo.png", k)]
+    assert logos[0] < positions[0] < logos[1] < positions[1] < logos[2] < positions[2]
+
+
+def test_outline_records_pages_headers_and_hints():
+    lines = [
+        f"{{0}}{PAGE_BREAK}", "", "# 标题", "见第3页的图表说明", "",
+        "```", "# 不是标题 第9页", "", "```",
+        f"{{1}}{PAGE_BREAK}", "第二页的第一段文字",
+    ]
+    outline = DocumentOutline(lines)
+    assert outline.has_page_markers
+    assert outline.page_starts == {1: 0, 2: 9}
+    assert outline.headers == [2]
+    assert outline.page_hits == {3: 3}
+    assert outline.breaks == [1, 4, 5]
+    assert outline.page_keys[2] == {anchor_key("第二页的第一段文字"): 10}
+
+
+def test_anchored_point():
+    lines = [
+        f"{{0}}{PAGE_BREAK}", "", "第一段第一行文字", "第一段第二行", "", "第二段的文字内容",
+        f"{{1}}{PAGE_BREAK}", "", "下一页的正文内容",
+    ]
+    outline = DocumentOutline(lines)
+    # 图片在页首：插在分页标记之后
+    assert outline.anchored_point(1, None) == 1
+    # 插在锚点文字所在段落之后
+    assert outline.anchored_point(1, "第一段第一行文字") == 4
+    # 找不到锚点：放在该页末尾；不存在的页：无法定位
+    assert outline.anchored_point(1, "不存在的锚点文字") == 6
+    assert outline.anchored_point(5, None) is None
+
+
+def test_images_follow_anchor_paragraph_in_reading_order():
+    content = _paginated("第一页开头段落\n\n第一页中间段落\n\n第一页结尾段落", "第二页正文内容")
+    images = [("a.png", 1, "第一页中间段落"), ("b.png", 1, "第一页中间段落"), ("c.png", 2, None)]
+
+    result, placed = place_images(content, images, "doc")
+    assert placed == {"a.png", "b.png", "c.png"}
+    positions = [result.index(text) for text in
+                 ("第一页中间段落", "doc_images/a.png", "doc_images/b.png", "第一页结尾段落",
+                  "doc_images/c.png", "第二页正文内容")]
+    assert positions == sorted(positions)
+    assert "![第2页图片](doc_images/c.png)" in result
+
+
+def test_estimated_placement_without_page_markers():
+    content = "# 第一节\n\n内容\n\n参见第2页\n\n# 第二节\n\n更多内容\n\n# 第三节\n\n结尾"
+    images = [("hint.png", 2, None), ("ratio.png", 3, None)]
+
+    result, placed = place_images(content, images, "doc", page_count=3)
+    assert placed == {"hint.png", "ratio.png"}
+    lines = result.split("\n")
+    assert lines[lines.index("参见第2页") + 2] == "![第2页图片](doc_images/hint.png)"
+    assert lines[lines.index("# 第三节") + 2] == "![第3页图片](doc_images/ratio.png)"
+
+
+def test_unplaceable_images_are_reported():
+    content = "没有标题也没有页码的正文"
+    result, placed = place_images(content, [("a.png", 4, None)], "doc")
+    assert result == content and placed == set()
+
+
+def test_strip_page_markers():
+    content = _paginated("第一页", "第二页")
+    assert strip_page_markers(content) == "第一页\n\n第二页"
+
+
+def test_estimated_placement_skips_comments_in_code_blocks():
+    """代码块中以 # 开头的注释不是标题，图片不会插入代码块中间"""
+    # 第1页（共2页）的估算位置正好落在代码块中的注释行
+    content = "# 开头\n\n正文\n\n```\n# 代码注释\n```\n\n正文\n\n# 结尾"
+    result, placed = place_images(content, [("a.png", 1, None)], "doc", page_count=2)
+    assert placed == {"a.png"}
+    lines = result.split("\n")
+    fences = [k for k, line in enumerate(lines) if line == "```"]
+    image_line = lines.index("![第1页图片](doc_images/a.png)")
+    assert not fences[0] < image_line < fences[1]
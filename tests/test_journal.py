@@ -0,0 +1,107 @@
+# tests/test_journal.py
+
+import os
+import json
+
+from pdf2md.journal import JOURNAL_FILENAME, STATE_FAILED, STATE_PENDING, STATE_RUNNING, JobJournal
+
+
+def _files(tmp_path, name):
+    pdf_path = tmp_path / f"{name}.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 " + name.encode())
+    output_path = tmp_path / "out" / f"{name}.md"
+    output_path.parent.mkdir(exist_ok=True)
+    output_path.write_text(f"# {name}\n", encoding="utf-8")
+    return str(pdf_path), str(output_path)
+
+
+def _finish(journal, pdf_path, output_path, success=True):
+    summary = {'path': pdf_path, 'success': success, 'error': "" if success else "转换失败", 'pages': 3}
+    journal.mark_finished(summary, output_path)
+
+
+def test_resume_skips_only_unchanged_completed_files(tmp_path):
+    out_dir = str(tmp_path / "out")
+    done, done_md = _files(tmp_path, "done")
+    failed, failed_md = _files(tmp_path, "failed")
+    crashed, _ = _files(tmp_path, "crashed")
+
+    journal = JobJournal(out_dir)
+    journal.mark_pending([done, failed, crashed])
+    for path in (done, failed, crashed):
+        journal.mark_running(path)
+    _finish(journal, done, done_md)
+    _finish(journal, failed, failed_md, success=False)
+
+    # 重新打开（模拟崩溃后续传）
+    journal = JobJournal(out_dir)
+    summary = journal.completed_summary(done)
+    assert summary['resumed'] and summary['pages'] == 3
+    assert journal.state(failed) == STATE_FAILED and journal.completed_summary(failed) is None
+    assert journal.state(crashed) == STATE_RUNNING and journal.completed_summary(crashed) is None
+
+
+def test_changed_input_or_output_is_converted_again(tmp_path):
+    out_dir = str(tmp_path / "out")
+    first, first_md = _files(tmp_path, "first")
+    second, second_md = _files(tmp_path, "second")
+    journal = JobJournal(out_dir)
+    _finish(journal, first, first_md)
+    _finish(journal, second, second_md)
+
+    with open(first_md, 'a', encoding='utf-8') as f:
+        f.write("手动修改\n")
+    with open(second, 'ab') as f:
+        f.write(b" updated")
+
+    journal = JobJournal(out_dir)
+    assert journal.completed_summary(first) is None
+    assert journal.completed_summary(second) is None
+
+
+def test_partial_last_line_is_ignored(tmp_path):
+    out_dir = str(tmp_path / "out")
+    pdf_path, output_path = _files(tmp_path, "doc")
+    journal = JobJournal(out_dir)
+    _finish(journal, pdf_path, output_path)
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"path": "' + pdf_path.replace("\\", "\\\\") + '", "state": "runn')
+
+    assert JobJournal(out_dir).completed_summary(pdf_path) is not None
+
+
+def test_append_after_partial_last_line(tmp_path):
+    out_dir = str(tmp_path / "out")
+    first, first_md = _files(tmp_path, "first")
+    second, second_md = _files(tmp_path, "second")
+    journal = JobJournal(out_dir)
+    _finish(journal, first, first_md)
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"path": "' + first.replace("\\", "\\\\") + '", "state": "runn')
+
+    # 崩溃后续传：新记录不能接在写了一半的行后面
+    journal = JobJournal(out_dir)
+    _finish(journal, second, second_md)
+    with open(journal.path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['path'] for record in records] == [os.path.abspath(first), os.path.abspath(second)]
+
+    journal = JobJournal(out_dir)
+    assert journal.completed_summary(first) is not None
+    assert journal.completed_summary(second) is not None
+
+
+def test_compact_keeps_last_state(tmp_path):
+    out_dir = str(tmp_path / "out")
+    pdf_path, _ = _files(tmp_path, "doc")
+    journal = JobJournal(out_dir)
+    for _ in range(60):
+        journal.mark_running(pdf_path)
+        journal.mark_pending([pdf_path])
+
+    journal = JobJournal(out_dir)
+    journal.compact()
+    with open(os.path.join(out_dir, JOURNAL_FILENAME), encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['state'] for record in records] == [STATE_PENDING]
+    assert JobJournal(out_dir).state(pdf_path) == STATE_PENDING
@@ -0,0 +1,66 @@
+# tests/test_llm_check.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pdf2md.config import build_llm_config, parse_config
+from pdf2md import llm_check
+
+
+class _OpenAICompatibleHandler(BaseHTTPRequestHandler):
+    """模拟 LM Studio 的 OpenAI 兼容接口"""
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"data": [{"id": "local-model"}]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply({"choices": [{"message": {"content": "OK"}}]})
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def lm_studio_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _OpenAICompatibleHandler)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/v1"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connection_reports_configured_service_name(lm_studio_url):
+    llm_config = build_llm_config("LM Studio", base_url=lm_studio_url)
+    result = llm_check.test_connection(llm_config, timeout=5, service_name="LM Studio")
+    assert result['ok'], result['message']
+    assert result['message'].startswith("LM Studio 连接正常")
+    assert result['models'] == ["local-model"]
+
+
+def test_connection_without_service_name_uses_service_class(lm_studio_url):
+    result = llm_check.test_connection(build_llm_config("OpenAI", base_url=lm_studio_url), timeout=5)
+    assert result['message'].startswith("OpenAI 连接正常")
+
+
+def test_config_file_service_name(lm_studio_url, tmp_path, capsys):
+    options = parse_config({"use_llm": True, "llm_service": "LM Studio", "base_url": lm_studio_url})
+    assert options['llm_service_name'] == "LM Studio"
+
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"use_llm": True, "llm_service": "LM Studio", "base_url": lm_studio_url}),
+                           encoding="utf-8")
+    assert llm_check.main(["-c", str(config_path), "--requests", "0", "--timeout", "5"]) == 0
+    assert capsys.readouterr().out.startswith("LM Studio 连接正常")
@@ -0,0 +1,176 @@
+# tests/test_llm_gateway.py
+
+import threading
+import time
+
+import pytest
+
+from pdf2md import llm_gateway
+from pdf2md.llm_gateway import (STATS, LLMGatewayService, LLMResponseCache, ServiceLimiter, TokenBucket,
+                                get_limiter, request_key, stats_delta)
+
+
+class FakeClock:
+    """代替 time 模块：sleep 只推进时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class StubService:
+    """前 failures 次调用返回空结果（Marker 的服务出错时的返回值），之后成功"""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = []
+        self.max_retries_seen = set()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __call__(self, prompt, image, block, response_schema, max_retries=None, timeout=None):
+        with self._lock:
+            self.calls.append(prompt)
+            self.max_retries_seen.add(max_retries)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            failed = len(self.calls) <= self.failures
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return {} if failed else {"answer": prompt.upper()}
+
+
+def make_gateway(service, max_retries=3, limiter=None, cache=None):
+    """不经过 Marker 的配置解析，直接组装网关"""
+    gateway = LLMGatewayService.__new__(LLMGatewayService)
+    gateway.service = service
+    gateway.service_key = ("stub", "http://localhost", "model")
+    gateway.llm_max_retries = max_retries
+    gateway.limiter = limiter or ServiceLimiter(4)
+    gateway.cache = cache
+    return gateway
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_gateway, "time", fake)
+    monkeypatch.setattr(llm_gateway.random, "uniform", lambda low, high: 1.0)
+    return fake
+
+
+def test_retries_with_exponential_backoff(clock):
+    service = StubService(failures=3)
+    before = STATS.snapshot()
+    assert make_gateway(service, max_retries=3)("hello", None, None, None) == {"answer": "HELLO"}
+    assert len(service.calls) == 4
+    assert service.max_retries_seen == {0}
+    assert clock.sleeps == [2.0, 4.0, 8.0]
+    delta = stats_delta(before, STATS.snapshot())
+    assert delta['requests'] == 4 and delta['retries'] == 3 and delta['failures'] == 0
+
+
+def test_gives_up_after_max_retries(clock):
+    service = StubService(failures=10)
+    before = STATS.snapshot()
+    assert make_gateway(service, max_retries=2)("hello", None, None, None) == {}
+    assert len(service.calls) == 3
+    assert stats_delta(before, STATS.snapshot())['failures'] == 1
+
+
+def test_retry_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(llm_gateway.random, "uniform", lambda low, high: high)
+    assert llm_gateway.retry_delay(1) == llm_gateway.RETRY_BASE_DELAY
+    assert llm_gateway.retry_delay(20) == llm_gateway.MAX_RETRY_DELAY
+
+
+def test_token_bucket_limits_requests_per_minute(clock):
+    bucket = TokenBucket(requests_per_minute=60, capacity=2)
+    # 初始积攒的 2 个令牌立即可用，之后每秒补充 1 个
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    start = clock.now
+    waits = [bucket.acquire() for _ in range(3)]
+    assert waits == pytest.approx([1.0, 1.0, 1.0])
+    assert clock.now - start == pytest.approx(3.0)
+
+    # 空闲后最多积攒 capacity 个令牌
+    clock.now += 100
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_token_bucket_without_rate_never_waits(clock):
+    bucket = TokenBucket(0)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+    assert clock.sleeps == []
+
+
+def test_concurrency_cap():
+    limiter = ServiceLimiter(max_concurrency=2)
+    service = StubService(delay=0.02)
+    gateway = make_gateway(service, limiter=limiter)
+    threads = [threading.Thread(target=gateway, args=(f"p{k}", None, None, None)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(service.calls) == 8
+    assert service.peak == 2 and limiter.peak == 2 and limiter.in_flight == 0
+
+
+def test_limiter_shared_per_service():
+    key = ("stub", "http://shared", "model")
+    first = get_limiter(key, 3)
+    assert get_limiter(key, 3) is first
+    assert get_limiter(key, 5) is not first
+
+
+def test_cache_hit_skips_service(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache"))
+    service = StubService()
+    gateway = make_gateway(service, cache=cache)
+    image = b"\x89PNG fake image bytes"
+
+    before = STATS.snapshot()
+    first = gateway("describe", image, None, None)
+    second = gateway("describe", image, None, None)
+    assert first == second == {"answer": "DESCRIBE"}
+    assert len(service.calls) == 1
+    assert stats_delta(before, STATS.snapshot())['cache_hits'] == 1
+
+    # 提示词或图片内容不同时不命中
+    gateway("describe", b"other image", None, None)
+    gateway("summarize", image, None, None)
+    assert len(service.calls) == 3
+
+    # 缓存在磁盘上，新的网关实例（例如重新转换）同样命中
+    assert make_gateway(StubService(failures=99), cache=LLMResponseCache(cache.cache_dir))(
+        "describe", image, None, None) == {"answer": "DESCRIBE"}
+
+
+def test_failed_responses_are_not_cached(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache"))
+    service = StubService(failures=1)
+    gateway = make_gateway(service, max_retries=0, cache=cache)
+    assert gateway("hello", None, None, None) == {}
+    assert gateway("hello", None, None, None) == {"answer": "HELLO"}
+    assert len(service.calls) == 2
+    assert cache.get(request_key(gateway.service_key, "hello", None, None)) == {"answer": "HELLO"}
+
+
+def test_request_key_depends_on_image_content():
+    key = ("stub", "", "")
+    assert request_key(key, "p", [b"a", b"b"], None) == request_key(key, "p", (b"a", b"b"), None)
+    assert request_key(key, "p", b"a", None) != request_key(key, "p", b"b", None)
+    assert request_key(key, "p", None, None) != request_key(("other", "", ""), "p", None, None)
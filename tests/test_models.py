@@ -0,0 +1,142 @@
+# tests/test_models.py
+
+import threading
+import time
+
+import pytest
+
+from pdf2md import models
+from pdf2md.models import ModelRegistry
+
+
+class FakeLoader:
+    """代替 Marker 的模型加载：记录加载次数，每次返回新的 artifact dict"""
+
+    def __init__(self):
+        self.loads = 0
+
+    def __call__(self):
+        self.loads += 1
+        return {'model': object(), 'load': self.loads}
+
+
+class FakeTimer:
+    """手动触发的 threading.Timer：cancel() 只做标记，模拟已经开始执行、无法取消的回调"""
+
+    created = []
+
+    def __init__(self, interval, function, args=None, kwargs=None):
+        self.function = function
+        self.args = args or ()
+        self.cancelled = False
+        self.daemon = False
+        FakeTimer.created.append(self)
+
+    def start(self):
+        pass
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        self.function(*self.args)
+
+
+@pytest.fixture
+def fake_timers(monkeypatch):
+    FakeTimer.created = []
+    monkeypatch.setattr(models.threading, "Timer", FakeTimer)
+    return FakeTimer.created
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_acquire_loads_once_and_counts_users():
+    loader = FakeLoader()
+    registry = ModelRegistry(idle_timeout=0, loader=loader)
+
+    first = registry.acquire()
+    second = registry.acquire()
+    assert first is second and loader.loads == 1
+    assert registry.users == 2
+
+    registry.release()
+    assert not registry.unload()
+    registry.release()
+    assert registry.users == 0 and registry.is_loaded
+    assert registry.unload() and not registry.is_loaded
+
+
+def test_idle_unload_and_reload():
+    loader = FakeLoader()
+    registry = ModelRegistry(idle_timeout=0.05, loader=loader)
+
+    registry.acquire()
+    registry.release()
+    _wait_until(lambda: not registry.is_loaded)
+
+    assert registry.acquire()['load'] == 2
+    registry.release()
+
+
+def test_acquire_cancels_idle_unload():
+    registry = ModelRegistry(idle_timeout=0.05, loader=FakeLoader())
+    registry.acquire()
+    registry.release()
+    artifacts = registry.acquire()
+
+    time.sleep(0.15)
+    assert registry.is_loaded and registry.users == 1
+    registry.release()
+    _wait_until(lambda: not registry.is_loaded)
+    assert artifacts['load'] == 1
+
+
+def test_stale_idle_callback_does_not_unload(fake_timers, monkeypatch):
+    registry = ModelRegistry(idle_timeout=60, loader=FakeLoader())
+    registry.acquire()
+    registry.release()
+    registry.acquire()
+    assert fake_timers[0].cancelled
+
+    # 旧计时的回调在 acquire() 取消它之前已经开始执行
+    fake_timers[0].fire()
+    assert registry.is_loaded and registry.users == 1
+
+    registry.release()
+    # 与系统时钟无关：即使时钟跳过了空闲时长，旧回调也不会释放
+    now = time.time()
+    monkeypatch.setattr(models.time, "time", lambda: now + 3600)
+    fake_timers[0].fire()
+    assert registry.is_loaded
+
+    fake_timers[1].fire()
+    assert not registry.is_loaded
+
+
+def test_concurrent_users_never_see_unloaded_models():
+    loader = FakeLoader()
+    registry = ModelRegistry(idle_timeout=0.001, loader=loader)
+    errors = []
+
+    def use():
+        for _ in range(200):
+            artifacts = registry.acquire()
+            if not registry.is_loaded or artifacts is None:
+                errors.append("模型在使用中被释放")
+            registry.release()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert registry.users == 0
+    _wait_until(lambda: not registry.is_loaded)
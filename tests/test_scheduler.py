@@ -0,0 +1,178 @@
+# tests/test_scheduler.py
+
+import os
+import time
+import queue
+from collections import Counter
+
+import pytest
+
+from pdf2md import scheduler as scheduler_module
+from pdf2md.engine import create_conversion_summary
+from pdf2md.scheduler import ProcessPoolScheduler
+
+
+class StubEngine:
+    """工作进程中代替 ConversionEngine，按文件名模拟不同情况（不加载模型）
+
+    crash_once_*: 第一次转换时进程直接退出；crash_always_*: 每次都退出；
+    hang_once_*: 第一次转换时一直等待（由看门狗终止）。
+    “第一次”用输出目录中的标记文件跨进程记录。
+    """
+
+    def __init__(self, output_dir, config_dict, use_llm, llm_service_config, use_fallback_extraction=False,
+                 log=None, should_continue=None):
+        self.output_dir = output_dir
+
+    def _first_attempt(self, pdf_path):
+        marker = os.path.join(self.output_dir, os.path.basename(pdf_path) + ".attempted")
+        if os.path.exists(marker):
+            return False
+        open(marker, 'w').close()
+        return True
+
+    def convert_file(self, pdf_path):
+        name = os.path.basename(pdf_path)
+        if name.startswith("crash_always") or (name.startswith("crash_once") and self._first_attempt(pdf_path)):
+            os._exit(3)
+        if name.startswith("hang_once") and self._first_attempt(pdf_path):
+            time.sleep(60)
+        summary = create_conversion_summary(pdf_path, True)
+        summary['pid'] = os.getpid()
+        return summary
+
+    def close(self):
+        pass
+
+
+class StubScheduler(ProcessPoolScheduler):
+    engine_class = StubEngine
+
+
+class DropFirstResult:
+    """包装调度器的事件接收：丢弃指定文件的第一个结果，模拟随进程退出而丢失的事件"""
+
+    def __init__(self, receive, index):
+        self.receive = receive
+        self.index = index
+        self.dropped = False
+
+    def __call__(self, timeout):
+        event = self.receive(timeout)
+        if not self.dropped and event[0] == "result" and event[2][0] == self.index:
+            self.dropped = True
+            raise queue.Empty
+        return event
+
+
+def _files(tmp_path, names):
+    return [str(tmp_path / f"{name}.pdf") for name in names]
+
+
+def _run(scheduler, pdf_files, wrap_receive=None):
+    """运行调度器直到所有文件都有结果，返回 (按序号排列的结果, 每个序号的结果数, 日志)"""
+    results, logs = {}, []
+    counts = Counter()
+    try:
+        scheduler.start(pdf_files)
+        if wrap_receive:
+            scheduler._receive = wrap_receive(scheduler._receive)
+        deadline = time.monotonic() + 60
+        for kind, _, payload in scheduler.events(poll_interval=0.1):
+            assert time.monotonic() < deadline, "调度超时"
+            if kind == "result":
+                index, summary = payload
+                counts[index] += 1
+                results[index] = summary
+            elif kind == "log":
+                logs.append(payload)
+    finally:
+        scheduler.close()
+    return [results[k] for k in sorted(results)], counts, logs
+
+
+def _assert_each_once(pdf_files, results, counts):
+    assert counts == Counter(range(len(pdf_files)))
+    assert [summary['path'] for summary in results] == pdf_files
+
+
+@pytest.fixture
+def out_dir(tmp_path):
+    path = tmp_path / "out"
+    path.mkdir()
+    return str(path)
+
+
+def test_crashed_worker_task_is_requeued(tmp_path, out_dir):
+    pdf_files = _files(tmp_path, ["a", "b", "crash_once_c", "d", "e"])
+    scheduler = StubScheduler(2, out_dir, {}, False, {})
+    results, counts, logs = _run(scheduler, pdf_files)
+
+    _assert_each_once(pdf_files, results, counts)
+    assert all(summary['success'] for summary in results)
+    assert any("crash_once_c.pdf 已重新排队" in message for message in logs)
+
+
+def test_task_that_keeps_crashing_fails_once(tmp_path, out_dir):
+    pdf_files = _files(tmp_path, ["a", "crash_always_b", "c"])
+    scheduler = StubScheduler(1, out_dir, {}, False, {})
+    results, counts, _ = _run(scheduler, pdf_files)
+
+    _assert_each_once(pdf_files, results, counts)
+    assert [summary['success'] for summary in results] == [True, False, True]
+    assert "工作进程异常退出" in results[1]['error']
+
+
+def test_workers_recycled_after_n_files(tmp_path, out_dir):
+    pdf_files = _files(tmp_path, [f"doc{k}" for k in range(5)])
+    scheduler = StubScheduler(1, out_dir, {}, False, {}, recycle={'recycle_after_files': 2})
+    results, counts, logs = _run(scheduler, pdf_files)
+
+    _assert_each_once(pdf_files, results, counts)
+    # 单个工作进程按顺序领取：每两个文件换一个进程
+    pids = [summary['pid'] for summary in results]
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert sum("工作进程退出以释放内存" in message for message in logs) == 2
+
+
+def test_workers_recycled_on_rss(tmp_path, out_dir):
+    pdf_files = _files(tmp_path, ["a", "b", "c"])
+    scheduler = StubScheduler(1, out_dir, {}, False, {}, recycle={'max_worker_rss_mb': 1})
+    results, counts, _ = _run(scheduler, pdf_files)
+
+    _assert_each_once(pdf_files, results, counts)
+    assert len({summary['pid'] for summary in results}) == 3
+
+
+def test_watchdog_kills_and_requeues(tmp_path, out_dir, monkeypatch):
+    pdf_files = _files(tmp_path, ["a", "hang_once_b", "c"])
+    hang_marker = os.path.join(out_dir, "hang_once_b.pdf.attempted")
+    killed = []
+
+    def fake_rss_mb(pid=None):
+        # 卡住的进程报告超过上限的内存，只报告一次
+        if os.path.exists(hang_marker) and not killed:
+            killed.append(pid)
+            return 4096.0
+        return 10.0
+
+    monkeypatch.setattr(scheduler_module, "WATCHDOG_INTERVAL", 0.0)
+    monkeypatch.setattr(scheduler_module, "process_rss_mb", fake_rss_mb)
+    scheduler = StubScheduler(1, out_dir, {}, False, {}, recycle={'worker_memory_limit_mb': 1024})
+    results, counts, logs = _run(scheduler, pdf_files)
+
+    _assert_each_once(pdf_files, results, counts)
+    assert all(summary['success'] for summary in results)
+    assert results[1]['pid'] != killed[0]
+    assert any("超过上限 1024 MB，已终止" in message for message in logs)
+    assert any("hang_once_b.pdf 已重新排队" in message for message in logs)
+
+
+def test_lost_result_is_recovered(tmp_path, out_dir):
+    pdf_files = _files(tmp_path, ["a", "b", "c"])
+    scheduler = StubScheduler(1, out_dir, {}, False, {})
+    results, counts, logs = _run(scheduler, pdf_files, wrap_receive=lambda receive: DropFirstResult(receive, 1))
+
+    _assert_each_once(pdf_files, results, counts)
+    assert all(summary['success'] for summary in results)
+    assert any("b.pdf 的转换结果丢失，已重新排队" in message for message in logs)
@@ -0,0 +1,151 @@
+# tests/test_service.py
+
+import os
+import json
+import socket
+import threading
+import http.client
+
+import pytest
+
+from pdf2md.service import (ConversionService, QueueFullError, STATUS_QUEUED, STATUS_RUNNING,
+                            _ServiceHandler, _ServiceHTTPServer)
+
+
+class FakeTaskQueue(list):
+    put = list.append
+
+
+def _service(tmp_path, **kwargs):
+    return ConversionService(str(tmp_path / "data"), {}, False, {}, **kwargs)
+
+
+def _add_idle_worker(service, worker_id):
+    service._workers.setdefault(worker_id, (None, FakeTaskQueue()))
+    service._idle.append(worker_id)
+
+
+def test_dispatch_follows_priority_then_submission_order(tmp_path):
+    service = _service(tmp_path, workers=1)
+    jobs = {name: service.submit(f"{name}.pdf", priority)
+            for name, priority in [("a", 0), ("b", 5), ("c", 5), ("d", 1)]}
+    assert all(job.status == STATUS_QUEUED for job in jobs.values())
+    assert [service.job_info(jobs[name].id)['position'] for name in "abcd"] == [4, 1, 2, 3]
+
+    order = []
+    for _ in jobs:
+        with service._lock:
+            _add_idle_worker(service, 1)
+            service._dispatch()
+            order.append(service._busy.pop(1))
+    assert order == [jobs[name].id for name in "bcda"]
+    assert all(job.status == STATUS_RUNNING for job in jobs.values())
+    assert [task[0] for task in service._workers[1][1]] == order
+
+
+def test_cancelled_jobs_are_skipped_by_dispatch(tmp_path):
+    service = _service(tmp_path)
+    first = service.submit("a.pdf", 1)
+    second = service.submit("b.pdf", 0)
+    assert service.cancel(first.id) == "cancelled"
+    with service._lock:
+        _add_idle_worker(service, 1)
+        service._dispatch()
+    assert service._busy == {1: second.id}
+
+
+def test_queue_limit(tmp_path):
+    service = _service(tmp_path, max_queue=2)
+    service.submit("a.pdf")
+    service.submit("b.pdf")
+    with pytest.raises(QueueFullError) as excinfo:
+        service.submit("c.pdf")
+    assert excinfo.value.retry_after >= 1
+
+
+@pytest.fixture
+def http_service(tmp_path):
+    """只启动 HTTP 接口（不启动工作进程），任务停留在队列中"""
+    service = _service(tmp_path)
+    httpd = _ServiceHTTPServer(("127.0.0.1", 0), _ServiceHandler)
+    httpd.service = service
+    service.port = httpd.server_address[1]
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield service
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _post(service, path, body, content_type):
+    connection = http.client.HTTPConnection(service.host, service.port, timeout=10)
+    try:
+        connection.request("POST", path, body, {"Content-Type": content_type})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        connection.close()
+
+
+def _job_dirs(service):
+    jobs_dir = os.path.join(service.data_dir, "jobs")
+    return os.listdir(jobs_dir) if os.path.isdir(jobs_dir) else []
+
+
+@pytest.mark.parametrize("payload", [
+    [1, 2],
+    "a.pdf",
+    {"path": "PDF", "priority": "high"},
+    {"path": "PDF", "priority": None},
+    {"path": "PDF", "priority": 1.5},
+])
+def test_invalid_json_requests_get_400(http_service, pdf_file, payload):
+    if isinstance(payload, dict):
+        payload = dict(payload, path=pdf_file)
+    status, body = _post(http_service, "/jobs", json.dumps(payload), "application/json")
+    assert status == 400, body
+    assert http_service.list_jobs() == []
+
+
+def test_json_submit(http_service, pdf_file):
+    status, body = _post(http_service, "/jobs", json.dumps({"path": pdf_file, "priority": "3"}), "application/json")
+    assert status == 202
+    assert body['status'] == STATUS_QUEUED and body['priority'] == 3
+
+
+def test_upload_with_invalid_priority_gets_400(http_service):
+    status, _ = _post(http_service, "/jobs?filename=a.pdf&priority=high", b"%PDF-1.4", "application/pdf")
+    assert status == 400
+    assert _job_dirs(http_service) == []
+
+
+def test_truncated_upload_is_removed(http_service):
+    with socket.create_connection((http_service.host, http_service.port), timeout=10) as sock:
+        sock.sendall(b"POST /jobs?filename=a.pdf HTTP/1.1\r\nHost: localhost\r\n"
+                     b"Content-Type: application/pdf\r\nContent-Length: 1000\r\n\r\n%PDF-1.4")
+        sock.shutdown(socket.SHUT_WR)
+        assert b" 400 " in sock.recv(4096)
+    assert _job_dirs(http_service) == []
+
+
+def test_upload_dropped_mid_stream_is_removed(http_service, monkeypatch):
+    save_upload = http_service.save_upload
+
+    class DroppedStream:
+        def __init__(self, stream):
+            self.stream = stream
+            self.reads = 0
+
+        def read(self, size):
+            self.reads += 1
+            if self.reads > 1:
+                raise ConnectionResetError("连接被重置")
+            return self.stream.read(min(size, 4))
+
+    monkeypatch.setattr(http_service, "save_upload",
+                        lambda job_id, filename, stream, length: save_upload(job_id, filename,
+                                                                             DroppedStream(stream), length))
+    with pytest.raises((http.client.RemoteDisconnected, ConnectionError)):
+        _post(http_service, "/jobs?filename=a.pdf", b"%PDF-1.4 content", "application/pdf")
+    assert _job_dirs(http_service) == []
+    assert http_service.list_jobs() == []
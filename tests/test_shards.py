@@ -0,0 +1,157 @@
+# tests/test_shards.py
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from pdf2md import engine as engine_module
+from pdf2md.engine import ConversionEngine
+
+from .conftest import make_pdf, png_base64
+
+PAGES = 5
+
+
+class PagedConverter:
+    """按 page_range 只输出对应页面的 Marker 替身：每页一个分页标记、一个标题和一张图片
+
+    relative=True 时模拟分片内从0开始的页面编号；extra_image 在每次转换的第一页加一张不含页码的图片。
+    """
+
+    def __init__(self, page_range=None, relative=False, extra_image=None):
+        self.page_range = page_range
+        self.relative = relative
+        self.extra_image = extra_image
+
+    def __call__(self, pdf_path):
+        start, end = 0, PAGES
+        if self.page_range:
+            first, last = self.page_range.split("-")
+            start, end = int(first), int(last) + 1
+        parts, images = [], {}
+        for page in range(start, end):
+            page_id = page - start if self.relative else page
+            name = f"_page_{page_id}_Picture_0.png"
+            images[name] = png_base64((40 * page, 0, 0))
+            parts.append(f"{{{page_id}}}" + "-" * 48 + f"\n\n# 第 {page + 1} 页\n\n正文 {page + 1}\n\n![]({name})\n")
+            if self.extra_image and page == start:
+                images[self.extra_image] = png_base64((0, 40 * page, 0))
+                parts.append(f"![]({self.extra_image})\n")
+        return SimpleNamespace(
+            markdown="\n".join(parts),
+            images=images,
+            metadata={'page_stats': [{'page_id': k} for k in range(start, end)], 'table_of_contents': []},
+        )
+
+
+@pytest.fixture
+def paged_marker(monkeypatch):
+    """让引擎使用 PagedConverter；返回的字典可修改替身的参数"""
+    options = {'relative': False, 'extra_image': None}
+
+    def build_converter(self, final_config, use_llm=None):
+        return PagedConverter(final_config.get("page_range"), **options)
+
+    def load_models(self):
+        self.converter = build_converter(self, self.get_final_config())
+
+    monkeypatch.setattr(ConversionEngine, "load_models", load_models)
+    monkeypatch.setattr(ConversionEngine, "_build_converter", build_converter)
+    monkeypatch.setattr(engine_module, "MARKER_AVAILABLE", True)
+    return options
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    return make_pdf(str(tmp_path / "doc.pdf"), pages=PAGES)
+
+
+def _engine(tmp_path, name, **config):
+    output_dir = tmp_path / name
+    output_dir.mkdir()
+    return ConversionEngine(str(output_dir), dict(config, paginate_output=True), False, {})
+
+
+def _output(engine):
+    """输出的 Markdown（去掉转换时间）和图片文件"""
+    with open(os.path.join(engine.output_dir, "doc.md"), encoding="utf-8") as f:
+        markdown = "".join(line for line in f if not line.startswith("converted:"))
+    images_dir = os.path.join(engine.output_dir, "doc_images")
+    images = {}
+    for name in os.listdir(images_dir):
+        with open(os.path.join(images_dir, name), "rb") as f:
+            images[name] = f.read()
+    return markdown, images
+
+
+def _convert_sharded(engine, pdf_path, shard_pages):
+    shards = engine.plan_shards(pdf_path, shard_pages)
+    # 分片可能以任意顺序完成
+    results = [engine.convert_shard(pdf_path, k, start, end) for k, (start, end) in reversed(list(enumerate(shards)))]
+    return engine.merge_shards(pdf_path, results, None, engine_module.datetime.datetime.now())
+
+
+def _assert_same_summary(summary, expected):
+    assert summary['success'], summary['error']
+    for key in ('file', 'path', 'pages', 'images', 'route'):
+        assert summary[key] == expected[key]
+    assert {'marker', 'save_images', 'write_markdown'} <= set(summary['stages'])
+    assert set(expected['stages']) - {'validate', 'cache'} <= set(summary['stages'])
+
+
+@pytest.mark.parametrize("relative", [False, True])
+def test_sharded_output_matches_single_pass(tmp_path, paged_marker, pdf_path, relative):
+    single = _engine(tmp_path, "single")
+    expected = single.convert_file(pdf_path)
+
+    paged_marker['relative'] = relative
+    sharded = _engine(tmp_path, "sharded")
+    summary = _convert_sharded(sharded, pdf_path, 2)
+
+    _assert_same_summary(summary, expected)
+    assert summary['pages'] == PAGES and summary['images'] == PAGES
+    assert _output(sharded) == _output(single)
+    assert not os.path.exists(sharded._shard_dir(pdf_path))
+
+
+@pytest.mark.parametrize("relative", [False, True])
+def test_windowed_output_matches_single_pass(tmp_path, paged_marker, pdf_path, relative):
+    single = _engine(tmp_path, "single")
+    expected = single.convert_file(pdf_path)
+
+    paged_marker['relative'] = relative
+    windowed = _engine(tmp_path, "windowed", low_memory=True, low_memory_window_pages=2)
+    summary = windowed.convert_file(pdf_path)
+
+    _assert_same_summary(summary, expected)
+    assert set(expected['stages']) <= set(summary['stages'])
+    assert _output(windowed) == _output(single)
+
+
+def test_relative_page_markers_are_renumbered(tmp_path, paged_marker, pdf_path):
+    paged_marker['relative'] = True
+    sharded = _engine(tmp_path, "sharded")
+    _convert_sharded(sharded, pdf_path, 2)
+
+    markdown, images = _output(sharded)
+    markers = [line.split("}")[0] + "}" for line in markdown.splitlines() if line.endswith("-" * 48)]
+    assert markers == ["{0}", "{1}", "{2}", "{3}", "{4}"]
+    assert sorted(images) == [f"_page_{k}_Picture_0.png" for k in range(PAGES)]
+
+
+def test_image_name_collisions_between_shards(tmp_path, paged_marker, pdf_path):
+    paged_marker['extra_image'] = "figure.png"
+    sharded = _engine(tmp_path, "sharded")
+    summary = _convert_sharded(sharded, pdf_path, 2)
+
+    markdown, images = _output(sharded)
+    extra = ["figure.png", "shard2_figure.png", "shard3_figure.png"]
+    assert summary['images'] == PAGES + len(extra)
+    assert set(extra) <= set(images)
+    # 每个分片的同名图片各自保存，内容互不覆盖，链接指向各自的文件
+    assert len({images[name] for name in extra}) == len(extra)
+    assert [f"doc_images/{name}" in markdown for name in extra] == [True] * len(extra)
+    positions = [markdown.index(text) for text in (
+        "# 第 3 页", "doc_images/shard2_figure.png", "# 第 4 页", "# 第 5 页", "doc_images/shard3_figure.png")]
+    assert positions == sorted(positions)
@@ -0,0 +1,42 @@
+# tests/test_triage.py
+
+import os
+import sys
+
+import pytest
+
+from pdf2md.triage import ROUTE_OCR, ROUTE_PLAIN, ROUTE_TEXT, choose_route, triage_pdf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from corpus import generate_corpus  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("corpus"))
+    kinds = ["text_only", "image_heavy", "scanned", "logos", "tables"]
+    return {item.kind: item.path for item in generate_corpus(out_dir, scale=0.1, kinds=kinds)}
+
+
+@pytest.mark.parametrize("kind, route", [
+    ("text_only", ROUTE_PLAIN),
+    ("tables", ROUTE_TEXT),
+    ("image_heavy", ROUTE_TEXT),
+    ("logos", ROUTE_TEXT),
+    ("scanned", ROUTE_OCR),
+])
+def test_corpus_routes(corpus, kind, route):
+    assert triage_pdf(corpus[kind])['route'] == route
+
+
+def test_table_pages_keep_llm(corpus):
+    stats = triage_pdf(corpus["tables"])
+    assert stats['table_pages'] == stats['page_count']
+    assert stats['image_ratio'] == 0 and stats['scanned_pages'] == 0
+    assert triage_pdf(corpus["text_only"])['table_pages'] == 0
+
+
+def test_choose_route_without_table_stats():
+    stats = {'page_count': 4, 'image_ratio': 0.0, 'scanned_pages': 0}
+    assert choose_route(stats) == ROUTE_PLAIN
+    assert choose_route(dict(stats, table_pages=1)) == ROUTE_TEXT
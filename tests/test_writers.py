@@ -0,0 +1,100 @@
+# tests/test_writers.py
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from pdf2md.writers import (ChunksWriter, HtmlWriter, JsonWriter, MarkdownWriter, OutputWriter, get_writer,
+                            rendered_images)
+
+
+class Block:
+    """模拟 Marker 的 pydantic 块：带 model_dump_json()"""
+
+    def __init__(self, block_id, html, children=None):
+        self.data = {'id': block_id, 'block_type': "Text", 'html': html, 'children': children}
+
+    def model_dump_json(self):
+        return json.dumps(self.data, ensure_ascii=False)
+
+
+def _json_document():
+    pages = [Block(f"/page/{k}/Page/0", "", [{'id': f"/page/{k}/Text/1", 'html': f"<p>第{k + 1}页</p>"}])
+             for k in range(2)]
+    return SimpleNamespace(children=pages, block_type="Document",
+                           metadata={'page_stats': [{'page_id': 0}, {'page_id': 1}], 'table_of_contents': []})
+
+
+def test_output_writer_is_abstract():
+    with pytest.raises(TypeError):
+        OutputWriter()
+
+
+def test_get_writer():
+    assert isinstance(get_writer(None), MarkdownWriter)
+    assert isinstance(get_writer("chunks"), ChunksWriter)
+    with pytest.raises(ValueError):
+        get_writer("docx")
+
+
+def test_markdown_writer(tmp_path):
+    path = str(tmp_path / "doc.md")
+    written = MarkdownWriter().write(SimpleNamespace(markdown="# 标题\n"), path)
+    with open(path, 'rb') as f:
+        assert f.read() == "# 标题\n".encode('utf-8')
+    assert written == len("# 标题\n".encode('utf-8'))
+
+
+def test_json_writer_output_parses(tmp_path):
+    writer = JsonWriter()
+    rendered = _json_document()
+    assert writer.page_count(rendered) == 2
+    path = str(tmp_path / "doc.json")
+    written = writer.write(rendered, path)
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert written == len(text.encode('utf-8'))
+    document = json.loads(text)
+    assert document['block_type'] == "Document"
+    assert [page['id'] for page in document['children']] == ["/page/0/Page/0", "/page/1/Page/0"]
+    assert document['children'][1]['children'][0]['html'] == "<p>第2页</p>"
+    assert document['metadata']['page_stats'] == [{'page_id': 0}, {'page_id': 1}]
+    # 写完的页面已从渲染结果中释放
+    assert rendered.children == [None, None]
+
+
+def test_html_writer_points_images_into_folder(tmp_path):
+    html = ('<p><img src="_page_0_Picture_0.png" alt="图"/></p><img src=\'_page_1_Picture_0.png\'>'
+            '<img src="data:image/png;base64,AAAA"><img src="https://example.com/a.png">')
+    rendered = SimpleNamespace(html=html, images={"_page_0_Picture_0.png": "AAAA"})
+    path = str(tmp_path / "doc.html")
+    HtmlWriter().write(rendered, path, "doc_images/", {"_page_1_Picture_0.png": "_page_1_Picture_0.jpg"})
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert 'src="doc_images/_page_0_Picture_0.png"' in text
+    assert "src='doc_images/_page_1_Picture_0.jpg'" in text
+    assert 'src="data:image/png;base64,AAAA"' in text and 'src="https://example.com/a.png"' in text
+    assert rendered_images(rendered) == {"_page_0_Picture_0.png": "AAAA"}
+
+
+def test_chunks_writer_output_parses(tmp_path):
+    writer = ChunksWriter()
+    blocks = [Block(f"/page/0/Text/{k}", f"<p>段落{k}</p>") for k in range(3)] + [{'id': "/page/1/Table/0"}]
+    page_info = {0: {'bbox': [0, 0, 612, 792]}, 1: {'bbox': [0, 0, 612, 792]}}
+    rendered = SimpleNamespace(blocks=blocks, page_info=page_info, metadata={'table_of_contents': []})
+    assert writer.page_count(rendered) == 2
+    path = str(tmp_path / "doc.jsonl")
+    files = writer.output_files(path)
+    assert files == {".jsonl": path, "_meta.json": str(tmp_path / "doc_meta.json")}
+
+    written = writer.write(rendered, path)
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['id'] for line in lines] == ["/page/0/Text/0", "/page/0/Text/1", "/page/0/Text/2", "/page/1/Table/0"]
+    with open(files["_meta.json"], encoding='utf-8') as f:
+        meta = json.load(f)
+    assert sorted(meta['page_info']) == ["0", "1"] and meta['metadata'] == {'table_of_contents': []}
+    assert written > 0